@@ -1,9 +1,10 @@
 import numpy as np
+from numba import njit, prange
 
 from pyro.mesh import reconstruction
 
 
-def fvs(q, order, u, alpha):
+def fvs(q, order, u, alpha, weno_z=False):
     """
     Perform Flux-Vector-Split (LF) finite differencing using WENO in 1d.
 
@@ -18,6 +19,43 @@ def fvs(q, order, u, alpha):
         Advection velocity in this direction
     alpha : float
         Maximum characteristic speed
+    weno_z : bool
+        Do we use the WENO-Z weights instead of the WENO-JS weights?
+
+    Returns
+    -------
+
+    f : np array
+        flux
+    """
+    flux = u * q
+    flux[1:-1] = fvs_2d(q[:, np.newaxis], order, u, alpha, 1, weno_z)[1:-1, 0]
+
+    return flux
+
+
+def fvs_2d(q, order, u, alpha, idir, weno_z=False):
+    """
+    Perform Flux-Vector-Split (LF) finite differencing using WENO on
+    all the interfaces of a 2d array in one direction.  Interface i
+    is the left edge of zone i, and the interfaces within order of
+    the boundary are left as 0.
+
+    Parameters
+    ----------
+
+    q : np array
+        input data with at least order+1 ghost zones
+    order : int
+        WENO order (k)
+    u : float
+        Advection velocity in this direction
+    alpha : float
+        Maximum characteristic speed
+    idir : int
+        The direction to compute the fluxes in (1 = x, 2 = y)
+    weno_z : bool
+        Do we use the WENO-Z weights instead of the WENO-JS weights?
 
     Returns
     -------
@@ -28,17 +66,38 @@ def fvs(q, order, u, alpha):
     flux = u * q
     flux_p = (flux + alpha * q) / 2
     flux_m = (flux - alpha * q) / 2
-    flux_p_r = np.zeros_like(flux_p)
-    flux_m_l = np.zeros_like(flux_m)
-    Npoints = len(q)
-    for i in range(order, Npoints-order):
-        flux_p_r[i] = reconstruction.weno_upwind(flux_p[i-order:i+order-1],
-                                                 order)
-        flux_m_l[i] = reconstruction.weno_upwind(flux_m[i+order-1:i-order:-1],
-                                                 order)
-    flux[1:-1] = flux_p_r[1:-1] + flux_m_l[1:-1]
 
-    return flux
+    if idir == 1:
+        di, dj = 1, 0
+    else:
+        di, dj = 0, 1
+
+    f = np.zeros_like(q)
+    _fvs(flux_p, flux_m, di, dj,
+         reconstruction.C_all[order], reconstruction.a_all[order],
+         reconstruction.sigma_all[order], weno_z, f)
+
+    return f
+
+
+@njit(cache=True, parallel=True)
+def _fvs(flux_p, flux_m, di, dj, C, a, sigma, weno_z, f):
+    """ the interface by interface flux splitting done by fvs_2d """
+
+    order = C.shape[0]
+    qx, qy = flux_p.shape
+
+    for i in prange(order*di, qx-order*di):  # pylint: disable=not-an-iterable
+        # each row gets its own scratch space, so the threads don't share it
+        work = np.empty((3, order))
+        for j in range(order*dj, qy-order*dj):
+            # the right-moving part is upwinded from the zone to the
+            # left of the interface, the left-moving part from the
+            # zone to the right
+            f[i, j] = reconstruction.weno_point(flux_p, i-di, j-dj, di, dj,
+                                                C, a, sigma, weno_z, work) + \
+                reconstruction.weno_point(flux_m, i, j, -di, -dj,
+                                          C, a, sigma, weno_z, work)
 
 
 def fluxes(my_data, rp):
@@ -78,14 +137,12 @@ def fluxes(my_data, rp):
     u = rp.get_param("advection.u")
     v = rp.get_param("advection.v")
 
-    qx = myg.qx
-    qy = myg.qy
-
     # --------------------------------------------------------------------------
     # WENO fvs
     # --------------------------------------------------------------------------
 
     weno_order = rp.get_param("advection.weno_order")
+    weno_z = rp.get_param("advection.weno_z")
     assert weno_order in (2, 3), "Currently only implemented weno_order=2, 3"
     assert myg.ng > weno_order, "Need more ghosts than the weno_order"
 
@@ -95,11 +152,8 @@ def fluxes(my_data, rp):
 
     alpha = np.sqrt(u**2 + v**2)
 
-    # x-direction
-    for j in range(qy):
-        F_x.v(buf=myg.ng)[1:-1, j] = fvs(q[:, j], weno_order, u, alpha)[1:-1]
-    # y-direction
-    for i in range(qx):
-        F_y.v(buf=myg.ng)[i, 1:-1] = fvs(q[i, :], weno_order, v, alpha)[1:-1]
+    # the compiled kernels do all the rows / columns at once
+    F_x.v(buf=myg.ng)[:, :] = fvs_2d(q, weno_order, u, alpha, 1, weno_z)
+    F_y.v(buf=myg.ng)[:, :] = fvs_2d(q, weno_order, v, alpha, 2, weno_z)
 
     return F_x, F_y
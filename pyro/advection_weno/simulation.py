@@ -1,11 +1,25 @@
 import pyro.advection_weno.fluxes as flx
 import pyro.mesh.array_indexer as ai
 from pyro import advection
-from pyro.mesh import integration
+from pyro.mesh import integration, reconstruction
 
 
 class Simulation(advection.Simulation):
 
+    def initialize(self):
+        """
+        Initialize the grid and variables for advection and set the initial
+        conditions for the chosen problem.
+        """
+
+        # the WENO coefficients are only tabulated for some orders
+        weno_order = self.rp.get_param("advection.weno_order")
+        if weno_order not in reconstruction.C_all:
+            raise ValueError(f"advection.weno_order = {weno_order} is not supported, "
+                             f"use one of {sorted(reconstruction.C_all)}")
+
+        super().initialize()
+
     def substep(self, myd):
         """
         take a single substep in the RK timestepping starting with the
@@ -59,14 +73,20 @@ class Simulation(advection.Simulation):
 
         method = self.rp.get_param("advection.temporal_method")
 
-        rk = integration.RKIntegrator(myd.t, self.dt, method=method)
-        rk.set_start(myd)
+        # with adaptive timestepping, the step is redone with a smaller
+        # dt until it is accurate enough
+        while True:
+            rk = integration.RKIntegrator(myd.t, self.dt, method=method)
+            rk.set_start(myd)
+
+            for s in range(rk.nstages()):
+                ytmp = rk.get_stage_start(s)
+                ytmp.fill_BC_all()
+                k = self.substep(ytmp)
+                rk.store_increment(s, k)
 
-        for s in range(rk.nstages()):
-            ytmp = rk.get_stage_start(s)
-            ytmp.fill_BC_all()
-            k = self.substep(ytmp)
-            rk.store_increment(s, k)
+            if self.accept_timestep(rk):
+                break
 
         rk.compute_final_update()
 
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+import argparse
+import time
+
+import numpy as np
+
+from pyro import Pyro
+from pyro.compressible import cons_to_prim, eos
+from pyro.compressible import interface as ifc
+from pyro.compressible import riemann
+from pyro.mesh import reconstruction
+
+# measure the throughput of the directional kernels of the compressible
+# solver in the x- and y-directions.  The data is stored as [i, j, n],
+# so a y-sweep runs along the contiguous axis while the neighbors in
+# an x-sweep are a whole row apart -- this shows whether that matters.
+
+
+def throughput(func, nzones, nreps):
+    """return the zones per second of func()"""
+
+    # the first call includes the compilation
+    func()
+
+    start = time.perf_counter()
+    for _ in range(nreps):
+        func()
+
+    return nzones * nreps / (time.perf_counter() - start)
+
+
+def main():
+    p = argparse.ArgumentParser(description="compare the x- and y-direction throughput of the compressible kernels")
+    p.add_argument("--nzones", type=int, default=512,
+                   help="number of zones on a side of the domain")
+    p.add_argument("--nreps", type=int, default=5,
+                   help="number of times to call each kernel")
+
+    args = p.parse_args()
+
+    ps = Pyro("compressible")
+    ps.initialize_problem("kh", inputs_dict={"mesh.nx": args.nzones,
+                                             "mesh.ny": args.nzones})
+
+    sim = ps.sim
+    myg = sim.cc_data.grid
+    ivars = sim.ivars
+    rp = sim.rp
+
+    my_eos = eos.EOS.from_params(rp)
+    U = np.asarray(sim.cc_data.data)
+    q = np.asarray(cons_to_prim(sim.cc_data.data, my_eos, ivars, myg))
+
+    ldx = np.zeros_like(q)
+    ldy = np.zeros_like(q)
+    reconstruction.limited_slopes(q, myg.ng, rp.get_param("compressible.limiter"),
+                                  rp.get_param("compressible.use_flattening"),
+                                  ivars.ip, ivars.iu, ivars.iv,
+                                  rp.get_param("compressible.delta"),
+                                  rp.get_param("compressible.z0"),
+                                  rp.get_param("compressible.z1"),
+                                  ldx, ldy)
+
+    dt = 1.e-3
+    nzones = myg.nx * myg.ny
+
+    kernels = {}
+    for idir, dx, ld in [(1, myg.Lx, ldx), (2, myg.Ly, ldy)]:
+        kernels[("states", idir)] = lambda idir=idir, dx=dx, ld=ld: \
+            ifc.states(idir, myg.ng, dx, dt,
+                       ivars.irho, ivars.iu, ivars.iv, ivars.ip, ivars.ix,
+                       ivars.naux, my_eos.data, q, ld)
+
+        for name, solver in [("HLLC", riemann.riemann_hllc),
+                             ("CGF", riemann.riemann_cgf)]:
+            kernels[(name, idir)] = lambda idir=idir, solver=solver: \
+                solver(idir, myg.ng,
+                       ivars.idens, ivars.ixmom, ivars.iymom, ivars.iener,
+                       ivars.irhox, ivars.naux, 0, 0, my_eos.data, U, U)
+
+    print(f"{'kernel':>8} {'x (zones/s)':>12} {'y (zones/s)':>12} {'y/x':>6}")
+
+    for name in ["states", "HLLC", "CGF"]:
+        tx = throughput(kernels[(name, 1)], nzones, args.nreps)
+        ty = throughput(kernels[(name, 2)], nzones, args.nreps)
+        print(f"{name:>8} {tx:12.4g} {ty:12.4g} {ty/tx:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+import argparse
+import time
+
+import numba
+
+from pyro import Pyro
+
+# time a few steps of a problem on 1, 2, 4, ... threads and report the
+# speedup of the compiled kernels over a single thread
+
+
+def time_steps(solver, problem, nthreads, nzones, nsteps):
+    """return the wall-clock time per step on nthreads threads"""
+
+    p = Pyro(solver)
+    p.initialize_problem(problem,
+                         inputs_dict={"driver.nthreads": nthreads,
+                                      "mesh.nx": nzones, "mesh.ny": nzones})
+
+    # the first step includes the compilation of the kernels
+    p.single_step()
+
+    start = time.perf_counter()
+    for _ in range(nsteps):
+        p.single_step()
+
+    return (time.perf_counter() - start) / nsteps
+
+
+def main():
+    p = argparse.ArgumentParser(description="measure the thread scaling of a pyro problem")
+    p.add_argument("solver", type=str, help="the solver to use")
+    p.add_argument("problem", type=str, help="the problem to run")
+    p.add_argument("--nzones", type=int, default=512,
+                   help="number of zones on a side of the domain")
+    p.add_argument("--nsteps", type=int, default=5,
+                   help="number of steps to time")
+    p.add_argument("--max_threads", type=int, default=numba.config.NUMBA_NUM_THREADS,  # pylint: disable=no-member
+                   help="largest number of threads to try")
+
+    args = p.parse_args()
+
+    nthreads = []
+    n = 1
+    while n < args.max_threads:
+        nthreads.append(n)
+        n *= 2
+    nthreads.append(args.max_threads)
+
+    print(f"{'threads':>8} {'s/step':>10} {'speedup':>8}")
+
+    t_serial = None
+    for n in nthreads:
+        t = time_steps(args.solver, args.problem, n, args.nzones, args.nsteps)
+        if t_serial is None:
+            t_serial = t
+        print(f"{n:8d} {t:10.4f} {t_serial/t:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
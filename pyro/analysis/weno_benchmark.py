@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+import argparse
+import time
+
+import numpy as np
+
+from pyro.advection_weno import fluxes
+from pyro.mesh import reconstruction
+
+# compare the throughput of the compiled WENO flux splitting of the
+# advection_weno solver to doing it an interface at a time with
+# reconstruction.weno_upwind(), the way it used to be done
+
+
+def fvs_python(q, order, u, alpha):
+    """the x-direction fluxes, reconstructed one interface at a time"""
+
+    flux = u * q
+    flux_p = (flux + alpha * q) / 2
+    flux_m = (flux - alpha * q) / 2
+
+    f = np.zeros_like(q)
+    for j in range(q.shape[1]):
+        for i in range(order, q.shape[0]-order):
+            f[i, j] = reconstruction.weno_upwind(flux_p[i-order:i+order-1, j], order) + \
+                reconstruction.weno_upwind(flux_m[i+order-1:i-order:-1, j], order)
+
+    return f
+
+
+def throughput(func, nzones, nreps):
+    """return the zones per second of func()"""
+
+    # the first call includes the compilation
+    func()
+
+    start = time.perf_counter()
+    for _ in range(nreps):
+        func()
+
+    return nzones * nreps / (time.perf_counter() - start)
+
+
+def main():
+    p = argparse.ArgumentParser(description="compare the compiled and pure python WENO flux splitting")
+    p.add_argument("--nzones", type=int, default=128,
+                   help="number of zones on a side of the domain")
+    p.add_argument("--nreps", type=int, default=3,
+                   help="number of times to call each kernel")
+
+    args = p.parse_args()
+
+    rng = np.random.default_rng(12345)
+    q = rng.uniform(0.5, 1.0, size=(args.nzones, args.nzones))
+    u = 1.0
+    alpha = np.sqrt(2.0)
+
+    print(f"{'order':>6} {'python (zones/s)':>17} {'compiled (zones/s)':>19} {'speedup':>8} {'max rel diff':>13}")
+
+    for order in [2, 3]:
+        f_python = fvs_python(q, order, u, alpha)
+        f_compiled = fluxes.fvs_2d(q, order, u, alpha, 1)
+        diff = np.max(np.abs(f_compiled - f_python)) / np.max(np.abs(f_python))
+
+        t_python = throughput(lambda order=order: fvs_python(q, order, u, alpha), q.size, args.nreps)
+        t_compiled = throughput(lambda order=order: fluxes.fvs_2d(q, order, u, alpha, 1), q.size, args.nreps)
+        print(f"{order:6d} {t_python:17.4g} {t_compiled:19.4g} {t_compiled/t_python:8.1f} {diff:13.3g}")
+
+
+if __name__ == "__main__":
+    main()
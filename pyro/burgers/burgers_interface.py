@@ -1,4 +1,5 @@
 import numpy as np
+from numba import njit, prange
 
 
 def get_interface_states(grid, dt,
@@ -310,3 +311,33 @@ def riemann_and_upwind(grid, q_l, q_r):
 
     s = riemann(grid, q_l, q_r)
     return upwind(grid, q_l, q_r, s)
+
+
+@njit(cache=True, parallel=True)
+def max_speeds(u, v):
+    """
+    Find the largest magnitude of the x- and y-velocities in a single
+    pass, without making temporary arrays.
+
+    Parameters
+    ----------
+    u, v : ndarray
+        x-velocity and y-velocity
+
+    Returns
+    -------
+    out : float, float
+        max(|u|) and max(|v|)
+    """
+
+    qx, qy = u.shape
+
+    umax = 0.0
+    vmax = 0.0
+
+    for i in prange(qx):  # pylint: disable=not-an-iterable
+        for j in range(qy):
+            umax = max(umax, abs(u[i, j]))
+            vmax = max(vmax, abs(v[i, j]))
+
+    return umax, vmax
@@ -59,9 +59,10 @@ class Simulation(NullSimulation):
         v = self.cc_data.get_var("y-velocity")
 
         # the timestep is min(dx/|u|, dy|v|)
+        umax, vmax = burgers_interface.max_speeds(u, v)
 
-        xtmp = self.cc_data.grid.dx / max(abs(u).max(), self.SMALL)
-        ytmp = self.cc_data.grid.dy / max(abs(v).max(), self.SMALL)
+        xtmp = self.cc_data.grid.dx / max(umax, self.SMALL)
+        ytmp = self.cc_data.grid.dy / max(vmax, self.SMALL)
 
         self.dt = cfl * min(xtmp, ytmp)
 
@@ -6,4 +6,5 @@ second-order (piecewise-linear), unsplit method of Colella 1990.
 
 __all__ = ["simulation"]
 
-from .simulation import Simulation, Variables, cons_to_prim, prim_to_cons, get_external_sources
+from .simulation import (Simulation, Variables, cons_to_prim,
+                         get_external_sources, prim_to_cons, state_to_prim)
@@ -1,28 +1,40 @@
-import numpy as np
-
 from pyro.compressible import eos
 
 
-def derive_primitives(myd, varnames):
-    """
-    derive desired primitive variables from conserved state
-    """
+def _primitives(myd, my_eos):
+    """ compute the velocities, specific internal energy, and pressure """
 
-    # get the variables we need
     dens = myd.get_var("density")
     xmom = myd.get_var("x-momentum")
     ymom = myd.get_var("y-momentum")
     ener = myd.get_var("energy")
 
-    derived_vars = []
-
     u = xmom/dens
     v = ymom/dens
 
     e = (ener - 0.5*dens*(u*u + v*v))/dens
 
-    gamma = myd.get_aux("gamma")
-    p = eos.pres(gamma, dens, e)
+    p = my_eos.pres(dens, e)
+
+    return u, v, e, p
+
+
+def derive_primitives(myd, varnames):
+    """
+    derive desired primitive variables from conserved state
+    """
+
+    # get the variables we need
+    dens = myd.get_var("density")
+
+    my_eos = eos.EOS.from_aux(myd)
+
+    # inside of a cache scope, these are only computed once for each
+    # version of the state
+    u, v, e, p = myd.cached("derive_primitives",
+                            lambda: _primitives(myd, my_eos))
+
+    derived_vars = []
 
     if isinstance(varnames, str):
         wanted = [varnames]
@@ -48,7 +60,8 @@ def derive_primitives(myd, varnames):
             derived_vars.append(p)
 
         elif var == "soundspeed":
-            derived_vars.append(np.sqrt(gamma*p/dens))
+            derived_vars.append(myd.cached("soundspeed",
+                                           lambda: my_eos.soundspeed(dens, e)))
 
     if len(derived_vars) > 1:
         return derived_vars
@@ -1,8 +1,58 @@
 """
-This is a gamma-law equation of state: p = rho e (gamma - 1), where
-gamma is the constant ratio of specific heats.
+The equation of state for the compressible solvers.
+
+The simplest is a gamma-law equation of state: p = rho e (gamma - 1),
+where gamma is the constant ratio of specific heats.  The functions
+``pres``, ``dens``, and ``rhoe`` implement this directly.
+
+More general equations of state are described by an :class:`EOS`
+object, selected by the ``eos.type`` runtime parameter:
+
+* ``gamma-law`` : p = rho e (gamma - 1)
+
+* ``stiffened-gas`` : p = rho e (gamma - 1) - gamma p_inf
+
+* ``tabulated`` : p and c_s are bilinearly interpolated in
+  (log10 rho, log10 e) from a table, read from ``eos.table_file``
+
+An EOS is packed into a single compact float array (see
+:func:`pack`), so the same description can be passed into the
+compiled kernels and evaluated there zone-by-zone with
+:func:`pres_from_rhoe`, :func:`rhoe_from_pres`, :func:`soundspeed`,
+:func:`gamma1`, and :func:`pres_soundspeed`.  The :class:`EOS`
+methods evaluate it on whole NumPy arrays.
 """
 
+import functools
+
+import numpy as np
+from numba import njit
+
+from pyro.util import msg
+
+# the kinds of equation of state
+GAMMA_LAW = 0
+STIFFENED_GAS = 1
+TABULATED = 2
+
+EOS_TYPES = {"gamma-law": GAMMA_LAW,
+             "stiffened-gas": STIFFENED_GAS,
+             "tabulated": TABULATED}
+
+# layout of the header of the packed EOS.  A table, if any, follows
+# the header: first the pressure and then the sound speed, each
+# stored as nrho x ne values, with the energy varying fastest.
+_ITYPE = 0
+_IGAMMA = 1
+_IPINF = 2
+_INRHO = 3
+_INE = 4
+_ILOGRHO_MIN = 5
+_ILOGRHO_MAX = 6
+_ILOGE_MIN = 7
+_ILOGE_MAX = 8
+_NHEADER = 9
+
 
 def pres(gamma, rho, eint):
     """
@@ -70,3 +120,449 @@ def rhoe(gamma, p):
 
     """
     return p / (gamma - 1.0)
+
+
+def pack(eos_type, gamma, p_inf=0.0, table=None):
+    """
+    Pack the description of an equation of state into a compact
+    array that can be passed into the compiled kernels.
+
+    Parameters
+    ----------
+    eos_type : int
+        One of ``GAMMA_LAW``, ``STIFFENED_GAS``, or ``TABULATED``
+    gamma : float
+        The ratio of specific heats
+    p_inf : float
+        The stiffening pressure of a stiffened gas
+    table : ndarray, optional
+        For a tabulated EOS, the packed table, as made by :func:`tabulate`
+
+    Returns
+    -------
+    out : ndarray
+        The packed equation of state
+    """
+
+    if eos_type == TABULATED:
+        if table is None:
+            msg.fail("ERROR: a tabulated EOS needs a table")
+        eos_data = np.array(table, dtype=np.float64)
+    else:
+        eos_data = np.zeros(_NHEADER)
+
+    eos_data[_ITYPE] = eos_type
+    eos_data[_IGAMMA] = gamma
+    eos_data[_IPINF] = p_inf
+
+    return eos_data
+
+
+def tabulate(eos_data, rho_min, rho_max, nrho, e_min, e_max, ne):
+    """
+    Tabulate the pressure and sound speed of an equation of state on a
+    grid uniformly spaced in log10 rho and log10 e.  The result can be
+    saved with ``np.save`` and read back in through ``eos.table_file``.
+
+    Parameters
+    ----------
+    eos_data : ndarray
+        The packed equation of state to tabulate
+    rho_min, rho_max : float
+        The range of densities of the table
+    nrho : int
+        The number of densities in the table
+    e_min, e_max : float
+        The range of specific internal energies of the table
+    ne : int
+        The number of specific internal energies in the table
+
+    Returns
+    -------
+    out : ndarray
+        The packed, tabulated equation of state
+    """
+
+    rho = np.logspace(np.log10(rho_min), np.log10(rho_max), nrho)
+    e = np.logspace(np.log10(e_min), np.log10(e_max), ne)
+
+    rho2d, e2d = np.meshgrid(rho, e, indexing="ij")
+    p, cs = _pres_soundspeed_array(eos_data,
+                                   rho2d.ravel(), (rho2d*e2d).ravel())
+
+    table = np.zeros(_NHEADER + 2*nrho*ne)
+    table[_INRHO] = nrho
+    table[_INE] = ne
+    table[_ILOGRHO_MIN] = np.log10(rho_min)
+    table[_ILOGRHO_MAX] = np.log10(rho_max)
+    table[_ILOGE_MIN] = np.log10(e_min)
+    table[_ILOGE_MAX] = np.log10(e_max)
+    table[_NHEADER:_NHEADER + nrho*ne] = p
+    table[_NHEADER + nrho*ne:] = cs
+
+    return pack(TABULATED, eos_data[_IGAMMA], eos_data[_IPINF], table)
+
+
+@njit(cache=True)
+def _table_index(x, n):
+    """the lower index of the table interval holding the (fractional)
+    table coordinate x.  Points off of the table use the edge interval,
+    so they are linearly extrapolated."""
+
+    i = 0
+    if x >= n - 2:
+        i = n - 2
+    elif x > 0.0:
+        i = int(x)
+    return i
+
+
+@njit(cache=True)
+def _rho_coord(eos_data, rho):
+    """the table index and weight in the density direction"""
+
+    nrho = int(eos_data[_INRHO])
+    x = (np.log10(rho) - eos_data[_ILOGRHO_MIN]) / \
+        (eos_data[_ILOGRHO_MAX] - eos_data[_ILOGRHO_MIN]) * (nrho - 1)
+    i = _table_index(x, nrho)
+    return i, x - i
+
+
+@njit(cache=True)
+def _table_lookup(eos_data, ivar, rho, eint):
+    """bilinearly interpolate table quantity ivar (0 for the pressure,
+    1 for the sound speed) at (rho, eint)"""
+
+    ne = int(eos_data[_INE])
+    nrho = int(eos_data[_INRHO])
+    offset = _NHEADER + ivar * nrho * ne
+
+    i, fx = _rho_coord(eos_data, rho)
+
+    y = (np.log10(eint) - eos_data[_ILOGE_MIN]) / \
+        (eos_data[_ILOGE_MAX] - eos_data[_ILOGE_MIN]) * (ne - 1)
+    j = _table_index(y, ne)
+    fy = y - j
+
+    n = offset + i * ne + j
+    return (1.0 - fx) * ((1.0 - fy) * eos_data[n] + fy * eos_data[n + 1]) + \
+        fx * ((1.0 - fy) * eos_data[n + ne] + fy * eos_data[n + ne + 1])
+
+
+@njit(cache=True)
+def _table_eint(eos_data, rho, p):
+    """invert the tabulated pressure for the specific internal energy.
+    At a fixed density the interpolated pressure is piecewise linear
+    in the energy coordinate, so this is exact after a bisection to
+    find the interval."""
+
+    ne = int(eos_data[_INE])
+    i, fx = _rho_coord(eos_data, rho)
+    n = _NHEADER + i * ne
+
+    jlo = 0
+    jhi = ne - 1
+    while jhi - jlo > 1:
+        jmid = (jlo + jhi) // 2
+        p_mid = (1.0 - fx) * eos_data[n + jmid] + fx * eos_data[n + ne + jmid]
+        if p_mid <= p:
+            jlo = jmid
+        else:
+            jhi = jmid
+
+    p_lo = (1.0 - fx) * eos_data[n + jlo] + fx * eos_data[n + ne + jlo]
+    p_hi = (1.0 - fx) * eos_data[n + jlo + 1] + fx * eos_data[n + ne + jlo + 1]
+
+    y = jlo + (p - p_lo) / (p_hi - p_lo)
+
+    return 10.0**(eos_data[_ILOGE_MIN] +
+                  y * (eos_data[_ILOGE_MAX] - eos_data[_ILOGE_MIN]) / (ne - 1))
+
+
+@njit(cache=True)
+def pres_from_rhoe(eos_data, rho, rho_e):
+    """
+    Return the pressure, given the density and the internal energy
+    density, rho e, for the packed equation of state eos_data.
+    """
+
+    eos_type = eos_data[_ITYPE]
+    gamma = eos_data[_IGAMMA]
+
+    if eos_type == GAMMA_LAW:
+        return rho_e * (gamma - 1.0)
+
+    if eos_type == STIFFENED_GAS:
+        return rho_e * (gamma - 1.0) - gamma * eos_data[_IPINF]
+
+    return _table_lookup(eos_data, 0, rho, rho_e / rho)
+
+
+@njit(cache=True)
+def rhoe_from_pres(eos_data, rho, p):
+    """
+    Return the internal energy density, rho e, given the density and
+    the pressure, for the packed equation of state eos_data.
+    """
+
+    eos_type = eos_data[_ITYPE]
+    gamma = eos_data[_IGAMMA]
+
+    if eos_type == GAMMA_LAW:
+        return p / (gamma - 1.0)
+
+    if eos_type == STIFFENED_GAS:
+        return (p + gamma * eos_data[_IPINF]) / (gamma - 1.0)
+
+    return rho * _table_eint(eos_data, rho, p)
+
+
+@njit(cache=True)
+def soundspeed(eos_data, rho, p):
+    """
+    Return the sound speed, given the density and the pressure, for
+    the packed equation of state eos_data.
+    """
+
+    eos_type = eos_data[_ITYPE]
+    gamma = eos_data[_IGAMMA]
+
+    if eos_type == GAMMA_LAW:
+        return np.sqrt(gamma * p / rho)
+
+    if eos_type == STIFFENED_GAS:
+        return np.sqrt(gamma * (p + eos_data[_IPINF]) / rho)
+
+    return _table_lookup(eos_data, 1, rho, _table_eint(eos_data, rho, p))
+
+
+@njit(cache=True)
+def gamma1(eos_data, rho, p):
+    """
+    Return the adiabatic index, Gamma_1 = rho c_s**2 / p, given the
+    density and the pressure, for the packed equation of state
+    eos_data.  For a gamma-law gas this is just gamma.
+    """
+
+    eos_type = eos_data[_ITYPE]
+    gamma = eos_data[_IGAMMA]
+
+    if eos_type == GAMMA_LAW:
+        return gamma
+
+    if eos_type == STIFFENED_GAS:
+        return gamma * (p + eos_data[_IPINF]) / p
+
+    cs = soundspeed(eos_data, rho, p)
+    return rho * cs * cs / p
+
+
+@njit(cache=True)
+def pres_soundspeed(eos_data, rho, rho_e):
+    """
+    Return both the pressure and the sound speed, given the density
+    and the internal energy density, rho e, for the packed equation of
+    state eos_data.  For a table, this is a single lookup.
+    """
+
+    if eos_data[_ITYPE] == TABULATED:
+        eint = rho_e / rho
+        return (_table_lookup(eos_data, 0, rho, eint),
+                _table_lookup(eos_data, 1, rho, eint))
+
+    p = pres_from_rhoe(eos_data, rho, rho_e)
+    return p, soundspeed(eos_data, rho, p)
+
+
+@njit(cache=True)
+def _pres_soundspeed_array(eos_data, rho, rho_e):
+    """pres_soundspeed for 1-d arrays of density and rho e"""
+
+    p = np.empty_like(rho)
+    cs = np.empty_like(rho)
+    for n in range(rho.size):
+        p[n], cs[n] = pres_soundspeed(eos_data, rho[n], rho_e[n])
+    return p, cs
+
+
+@njit(cache=True)
+def _cached_lookup(eos_data, rho, rho_e, rho_c, rho_e_c, p_c, cs_c):
+    """pres_soundspeed for 1-d arrays of density and rho e, only
+    recomputing the zones whose inputs differ from the last lookup
+    stored in (rho_c, rho_e_c) -> (p_c, cs_c)"""
+
+    for n in range(rho.size):
+        if rho[n] != rho_c[n] or rho_e[n] != rho_e_c[n]:
+            p_c[n], cs_c[n] = pres_soundspeed(eos_data, rho[n], rho_e[n])
+            rho_c[n] = rho[n]
+            rho_e_c[n] = rho_e[n]
+
+
+@njit(cache=True)
+def _rhoe_array(eos_data, rho, p):
+    """rhoe_from_pres for 1-d arrays of density and pressure"""
+
+    out = np.empty_like(rho)
+    for n in range(rho.size):
+        out[n] = rhoe_from_pres(eos_data, rho[n], p[n])
+    return out
+
+
+@njit(cache=True)
+def _gamma1_array(eos_data, rho, p):
+    """gamma1 for 1-d arrays of density and pressure"""
+
+    out = np.empty_like(rho)
+    for n in range(rho.size):
+        out[n] = gamma1(eos_data, rho[n], p[n])
+    return out
+
+
+class EOS:
+    """
+    An equation of state, usable on NumPy arrays.  The packed form,
+    for passing into the compiled kernels, is ``data``.
+
+    For the stiffened gas and tabulated EOS, the pressure and sound
+    speed of the last lookup are kept zone-by-zone, so asking for them
+    again on the same state (e.g. in several places in a step) only
+    recomputes the zones that changed.  The gamma-law EOS is cheaper
+    to evaluate than to check, so it is not cached.
+    """
+
+    def __init__(self, eos_type="gamma-law", gamma=1.4, p_inf=0.0, table_file=""):
+
+        if eos_type not in EOS_TYPES:
+            msg.fail(f"ERROR: EOS type {eos_type} not known")
+
+        self.eos_type = eos_type
+        self.gamma = gamma
+        self.p_inf = p_inf
+        self.table_file = table_file
+
+        table = None
+        if eos_type == "tabulated":
+            try:
+                table = np.load(table_file)
+            except OSError:
+                msg.fail(f"ERROR: unable to read the EOS table {table_file}")
+
+        self.data = pack(EOS_TYPES[eos_type], gamma, p_inf, table)
+
+        self._cache = {}
+
+    @staticmethod
+    def from_params(rp):
+        """return the EOS described by the runtime parameters rp"""
+
+        try:
+            eos_type = rp.get_param("eos.type")
+            p_inf = rp.get_param("eos.p_inf")
+            table_file = rp.get_param("eos.table_file")
+        except KeyError:
+            eos_type, p_inf, table_file = "gamma-law", 0.0, ""
+
+        return _get_eos(eos_type, rp.get_param("eos.gamma"), p_inf, table_file)
+
+    @staticmethod
+    def from_aux(myd):
+        """return the EOS stored in the auxiliary data of the
+        CellCenterData2d myd, e.g. as read from a plotfile"""
+
+        eos_type = myd.get_aux("eos_type")
+        if eos_type is None:
+            # older files only have gamma
+            return _get_eos("gamma-law", myd.get_aux("gamma"), 0.0, "")
+
+        return _get_eos(str(eos_type), myd.get_aux("gamma"),
+                        myd.get_aux("p_inf"), str(myd.get_aux("eos_table")))
+
+    def set_aux(self, myd):
+        """store the EOS in the auxiliary data of the
+        CellCenterData2d myd, so it is carried into output files"""
+
+        myd.set_aux("gamma", self.gamma)
+        myd.set_aux("eos_type", self.eos_type)
+        myd.set_aux("p_inf", self.p_inf)
+        myd.set_aux("eos_table", self.table_file)
+
+    def _state(self, rho, eint):
+        """return the pressure and sound speed, using the cache"""
+
+        rho, eint = np.broadcast_arrays(rho, eint)
+        rho_f = np.ascontiguousarray(rho, dtype=np.float64).ravel()
+        rhoe_f = np.ascontiguousarray(rho * eint, dtype=np.float64).ravel()
+
+        # there is a cache for each size of array we are asked about
+        if rho_f.size not in self._cache:
+            self._cache[rho_f.size] = [np.full_like(rho_f, np.nan) for _ in range(4)]
+
+        rho_c, rhoe_c, p_c, cs_c = self._cache[rho_f.size]
+        _cached_lookup(self.data, rho_f, rhoe_f, rho_c, rhoe_c, p_c, cs_c)
+
+        p = np.empty_like(rho, dtype=np.float64)
+        cs = np.empty_like(rho, dtype=np.float64)
+        p[...] = p_c.reshape(rho.shape)
+        cs[...] = cs_c.reshape(rho.shape)
+
+        return p[()], cs[()]
+
+    def pres(self, rho, eint):
+        """
+        Given the density and the specific internal energy, return the
+        pressure
+        """
+        if self.eos_type == "gamma-law":
+            return pres(self.gamma, rho, eint)
+
+        return self._state(rho, eint)[0]
+
+    def soundspeed(self, rho, eint):
+        """
+        Given the density and the specific internal energy, return the
+        sound speed
+        """
+        if self.eos_type == "gamma-law":
+            p = pres(self.gamma, rho, eint)
+            return np.sqrt(self.gamma*p/rho)
+
+        return self._state(rho, eint)[1]
+
+    def rhoe(self, rho, p):
+        """
+        Given the density and the pressure, return (rho * e)
+        """
+        if self.eos_type == "gamma-law":
+            return rhoe(self.gamma, p)
+
+        return self._apply(_rhoe_array, rho, p)
+
+    def gamma1(self, rho, p):
+        """
+        Given the density and the pressure, return the adiabatic index
+        Gamma_1 = rho c_s**2 / p.  For a gamma-law gas this is just gamma.
+        """
+        if self.eos_type == "gamma-law":
+            return self.gamma
+
+        return self._apply(_gamma1_array, rho, p)
+
+    def _apply(self, func, rho, p):
+        """evaluate the 1-d array kernel func zone-by-zone on arrays
+        of any shape, keeping the array type of rho"""
+
+        rho, p = np.broadcast_arrays(rho, p)
+        result = func(self.data,
+                      np.ascontiguousarray(rho, dtype=np.float64).ravel(),
+                      np.ascontiguousarray(p, dtype=np.float64).ravel())
+
+        out = np.empty_like(rho, dtype=np.float64)
+        out[...] = result.reshape(rho.shape)
+        return out[()]
+
+
+@functools.lru_cache(maxsize=None)
+def _get_eos(eos_type, gamma, p_inf, table_file):
+    """return the EOS object for these parameters.  This is shared,
+    so the lookups cached by it are reused across calls."""
+    return EOS(eos_type, gamma, p_inf, table_file)
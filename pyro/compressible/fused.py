@@ -0,0 +1,421 @@
+"""A fused, tiled implementation of the unsplit CTU update for
+Cartesian geometry.
+
+The standard update (see unsplit_fluxes.py) works on the whole grid at
+once, one step at a time: the primitive variables, the limited slopes,
+the interface states, the transverse-corrected states, and the fluxes
+are each stored as full (qx, qy, nvar) arrays before the next step
+can begin.  On large grids, this means a lot of memory and every step
+streams these arrays through main memory.
+
+Here we instead loop over tiles of the domain.  For each tile, we
+copy the state in the tile and the surrounding 4 ghost cells (all
+that the CTU stencil reaches) and do the entire update on these
+small arrays, which stay in cache, before moving on to the next tile.
+The same interface state and Riemann solver kernels are used, so the
+result is the same as the standard update to round-off.
+
+The external sources (gravity) need their ghost cells filled by the
+boundary conditions, so these are computed on the full grid first
+(using the aux data), just as in the standard update.
+"""
+
+import numpy as np
+from numba import njit
+
+import pyro.compressible.interface as ifc
+import pyro.compressible.unsplit_fluxes as flx
+from pyro.compressible import eos, riemann
+from pyro.mesh import reconstruction
+from pyro.util import msg
+
+# the number of ghost cells the CTU stencil needs around a tile
+TILE_NG = 4
+
+RIEMANN_METHODS = {"HLLC": 0, "HLLC_lm": 1, "CGF": 2}
+
+
+@njit(cache=True)
+def _cons_to_prim(U, eos_data,
+                  idens, ixmom, iymom, iener, irhox, naux,
+                  irho, iu, iv, ip, ix):
+    """ convert the conserved state on a tile to primitive variables """
+
+    qx, qy, nvar = U.shape
+    q = np.zeros((qx, qy, nvar))
+
+    for i in range(qx):
+        for j in range(qy):
+            q[i, j, irho] = U[i, j, idens]
+            q[i, j, iu] = U[i, j, ixmom]/U[i, j, idens]
+            q[i, j, iv] = U[i, j, iymom]/U[i, j, idens]
+
+            e = (U[i, j, iener] -
+                 0.5*q[i, j, irho]*(q[i, j, iu]**2 + q[i, j, iv]**2))/q[i, j, irho]
+
+            q[i, j, ip] = eos.pres_from_rhoe(eos_data, q[i, j, irho], q[i, j, irho]*e)
+
+            for n in range(naux):
+                q[i, j, ix+n] = U[i, j, irhox+n]/q[i, j, irho]
+
+    return q
+
+
+@njit(cache=True)
+def _prim_to_cons(q, eos_data,
+                  idens, ixmom, iymom, iener, irhox, naux,
+                  irho, iu, iv, ip, ix):
+    """ convert the primitive state on a tile to conserved variables """
+
+    qx, qy, nvar = q.shape
+    U = np.zeros((qx, qy, nvar))
+
+    for i in range(qx):
+        for j in range(qy):
+            U[i, j, idens] = q[i, j, irho]
+            U[i, j, ixmom] = q[i, j, iu]*U[i, j, idens]
+            U[i, j, iymom] = q[i, j, iv]*U[i, j, idens]
+
+            rhoe = eos.rhoe_from_pres(eos_data, q[i, j, irho], q[i, j, ip])
+
+            U[i, j, iener] = rhoe + 0.5*q[i, j, irho]*(q[i, j, iu]**2 +
+                                                      q[i, j, iv]**2)
+
+            for n in range(naux):
+                U[i, j, irhox+n] = q[i, j, ix+n]*q[i, j, irho]
+
+    return U
+
+
+@njit(cache=True)
+def _riemann_flux(idir, method,
+                  idens, ixmom, iymom, iener, irhox, naux,
+                  lower_solid, upper_solid,
+                  eos_data, U_l, U_r):
+    """ the flux through the idir interfaces of a tile """
+
+    if method == 0:
+        return riemann.riemann_hllc(idir, TILE_NG,
+                                    idens, ixmom, iymom, iener, irhox, naux,
+                                    lower_solid, upper_solid,
+                                    eos_data, U_l, U_r)
+
+    if method == 1:
+        return riemann.riemann_hllc_lowspeed(idir, TILE_NG,
+                                             idens, ixmom, iymom, iener, irhox, naux,
+                                             lower_solid, upper_solid,
+                                             eos_data, U_l, U_r)
+
+    U = riemann.riemann_cgf(idir, TILE_NG,
+                            idens, ixmom, iymom, iener, irhox, naux,
+                            lower_solid, upper_solid,
+                            eos_data, U_l, U_r)
+
+    return riemann.consFlux(idir, 0, eos_data,
+                            idens, ixmom, iymom, iener, irhox, naux, U)
+
+
+@njit(cache=True)
+def ctu_update(U, xmom_src, ymom_src, E_src,
+               ng, dx, dy, dt, eos_data, grav,
+               idens, ixmom, iymom, iener, irhox, naux,
+               irho, iu, iv, ip, ix,
+               use_flattening, delta, z0, z1, limiter,
+               method, cvisc, solid, tile_size):
+    r"""
+    Do the unsplit CTU update of the conserved state U through dt,
+    one tile at a time.
+
+    Parameters
+    ----------
+    U : ndarray
+        The conserved state, with its ghost cells filled
+    xmom_src, ymom_src, E_src : ndarray
+        The external sources, with their ghost cells filled
+    ng : int
+        The number of ghost cells (at least 4)
+    dx, dy : float
+        Cell spacings
+    dt : float
+        The timestep we are advancing through.
+    eos_data : ndarray
+        The packed equation of state (see :func:`pyro.compressible.eos.pack`)
+    grav : float
+        The gravitational acceleration (in the y-direction)
+    idens, ixmom, iymom, iener, irhox, naux : int
+        The indices of the conserved variables and number of species
+    irho, iu, iv, ip, ix : int
+        The indices of the primitive variables
+    use_flattening : int
+        Do we apply flattening at shocks?
+    delta, z0, z1 : float
+        The flattening parameters
+    limiter : int
+        The limiter (0 = none, 1 = 2nd order, 2 = 4th order)
+    method : int
+        The Riemann solver (0 = HLLC, 1 = HLLC_lm, 2 = CGF)
+    cvisc : float
+        The artificial viscosity coefficient
+    solid : ndarray
+        Which domain boundaries (xl, xr, yl, yr) are solid walls
+    tile_size : int
+        The number of zones on a side of a tile
+
+    Returns
+    -------
+    out : ndarray
+        The updated conserved state in the valid region
+    """
+
+    qx, qy, nvar = U.shape
+    nx = qx - 2*ng
+    ny = qy - 2*ng
+
+    tng = TILE_NG
+
+    dtdV = dt / (dx*dy)
+    hdtV = 0.5*dt / (dx*dy)
+
+    U_new = np.zeros((nx, ny, nvar))
+
+    for ti in range(0, nx, tile_size):
+        for tj in range(0, ny, tile_size):
+
+            tnx = min(tile_size, nx - ti)
+            tny = min(tile_size, ny - tj)
+
+            # the tile, including its ghost cells -- ii, jj are the
+            # global indices of the tile's first ghost cell
+            ii = ng + ti - tng
+            jj = ng + tj - tng
+
+            Ut = np.ascontiguousarray(U[ii:ii+tnx+2*tng, jj:jj+tny+2*tng, :])
+
+            ilo = tng
+            ihi = tng + tnx - 1
+            jlo = tng
+            jhi = tng + tny - 1
+
+            # the solid walls only matter if we touch the boundary
+            xl_solid = solid[0] if ti == 0 else 0
+            xr_solid = solid[1] if ti + tnx == nx else 0
+            yl_solid = solid[2] if tj == 0 else 0
+            yr_solid = solid[3] if tj + tny == ny else 0
+
+            # primitive variables, flattening, and limited slopes
+            q = _cons_to_prim(Ut, eos_data,
+                              idens, ixmom, iymom, iener, irhox, naux,
+                              irho, iu, iv, ip, ix)
+
+            ldx = np.zeros_like(q)
+            ldy = np.zeros_like(q)
+
+            reconstruction.limited_slopes(q, tng, limiter, use_flattening,
+                                          ip, iu, iv, delta, z0, z1,
+                                          ldx, ldy)
+
+            # normal interface states
+            Lx = np.full((tnx+2*tng, tny+2*tng), dx)
+            V_l, V_r = ifc.states(1, tng, Lx, dt,
+                                  irho, iu, iv, ip, ix, naux,
+                                  eos_data, q, ldx)
+
+            U_xl = _prim_to_cons(V_l, eos_data,
+                                 idens, ixmom, iymom, iener, irhox, naux,
+                                 irho, iu, iv, ip, ix)
+            U_xr = _prim_to_cons(V_r, eos_data,
+                                 idens, ixmom, iymom, iener, irhox, naux,
+                                 irho, iu, iv, ip, ix)
+
+            Ly = np.full((tnx+2*tng, tny+2*tng), dy)
+            V_l, V_r = ifc.states(2, tng, Ly, dt,
+                                  irho, iu, iv, ip, ix, naux,
+                                  eos_data, q, ldy)
+
+            U_yl = _prim_to_cons(V_l, eos_data,
+                                 idens, ixmom, iymom, iener, irhox, naux,
+                                 irho, iu, iv, ip, ix)
+            U_yr = _prim_to_cons(V_r, eos_data,
+                                 idens, ixmom, iymom, iener, irhox, naux,
+                                 irho, iu, iv, ip, ix)
+
+            # source terms
+            for i in range(ilo-1, ihi+2):
+                for j in range(jlo-1, jhi+2):
+                    gi = ii + i
+                    gj = jj + j
+
+                    U_xl[i, j, ixmom] += 0.5*dt*xmom_src[gi-1, gj]
+                    U_xl[i, j, iymom] += 0.5*dt*ymom_src[gi-1, gj]
+                    U_xl[i, j, iener] += 0.5*dt*E_src[gi-1, gj]
+
+                    U_xr[i, j, ixmom] += 0.5*dt*xmom_src[gi, gj]
+                    U_xr[i, j, iymom] += 0.5*dt*ymom_src[gi, gj]
+                    U_xr[i, j, iener] += 0.5*dt*E_src[gi, gj]
+
+                    U_yl[i, j, ixmom] += 0.5*dt*xmom_src[gi, gj-1]
+                    U_yl[i, j, iymom] += 0.5*dt*ymom_src[gi, gj-1]
+                    U_yl[i, j, iener] += 0.5*dt*E_src[gi, gj-1]
+
+                    U_yr[i, j, ixmom] += 0.5*dt*xmom_src[gi, gj]
+                    U_yr[i, j, iymom] += 0.5*dt*ymom_src[gi, gj]
+                    U_yr[i, j, iener] += 0.5*dt*E_src[gi, gj]
+
+            # transverse flux corrections -- we only need the
+            # corrected states on the interfaces of the tile's zones
+            F_x = _riemann_flux(1, method,
+                                idens, ixmom, iymom, iener, irhox, naux,
+                                xl_solid, xr_solid,
+                                eos_data, U_xl, U_xr)
+            F_y = _riemann_flux(2, method,
+                                idens, ixmom, iymom, iener, irhox, naux,
+                                yl_solid, yr_solid,
+                                eos_data, U_yl, U_yr)
+
+            for n in range(nvar):
+                for i in range(ilo, ihi+2):
+                    for j in range(jlo, jhi+1):
+                        U_xl[i, j, n] += - hdtV*(F_y[i-1, j+1, n]*dx - F_y[i-1, j, n]*dx)
+                        U_xr[i, j, n] += - hdtV*(F_y[i, j+1, n]*dx - F_y[i, j, n]*dx)
+
+                for i in range(ilo, ihi+1):
+                    for j in range(jlo, jhi+2):
+                        U_yl[i, j, n] += - hdtV*(F_x[i+1, j-1, n]*dy - F_x[i, j-1, n]*dy)
+                        U_yr[i, j, n] += - hdtV*(F_x[i+1, j, n]*dy - F_x[i, j, n]*dy)
+
+            # the fluxes through the tile's interfaces
+            F_x = _riemann_flux(1, method,
+                                idens, ixmom, iymom, iener, irhox, naux,
+                                xl_solid, xr_solid,
+                                eos_data, U_xl, U_xr)
+            F_y = _riemann_flux(2, method,
+                                idens, ixmom, iymom, iener, irhox, naux,
+                                yl_solid, yr_solid,
+                                eos_data, U_yl, U_yr)
+
+            # artificial viscosity -- this uses the divergence at the
+            # vertices.  Note: like interface.artificial_viscosity,
+            # there is none on the upper domain boundaries.
+            divU = np.zeros((tnx+2*tng, tny+2*tng))
+
+            for i in range(ilo, ihi+2):
+                for j in range(jlo, jhi+2):
+                    ur = 0.5*(q[i, j, iu] + q[i, j-1, iu])
+                    ul = 0.5*(q[i-1, j, iu] + q[i-1, j-1, iu])
+
+                    vt = 0.5*(q[i, j, iv] + q[i-1, j, iv])
+                    vb = 0.5*(q[i, j-1, iv] + q[i-1, j-1, iv])
+
+                    divU[i, j] = (ur - ul)/dx + (vt - vb)/dy
+
+            for i in range(ilo, ihi+2):
+                for j in range(jlo, jhi+1):
+                    if ii + i == ng + nx:
+                        continue
+
+                    divU_x = 0.5*(divU[i, j] + divU[i, j+1])
+                    avisco_x = cvisc*max(-divU_x*dx, 0.0)
+
+                    for n in range(nvar):
+                        F_x[i, j, n] += avisco_x*(Ut[i-1, j, n] - Ut[i, j, n])
+
+            for i in range(ilo, ihi+1):
+                for j in range(jlo, jhi+2):
+                    if jj + j == ng + ny:
+                        continue
+
+                    divU_y = 0.5*(divU[i, j] + divU[i+1, j])
+                    avisco_y = cvisc*max(-divU_y*dy, 0.0)
+
+                    for n in range(nvar):
+                        F_y[i, j, n] += avisco_y*(Ut[i, j-1, n] - Ut[i, j, n])
+
+            # conservative update, and then the gravitational sources
+            for i in range(ilo, ihi+1):
+                for j in range(jlo, jhi+1):
+                    io = ti + i - ilo
+                    jo = tj + j - jlo
+
+                    for n in range(nvar):
+                        U_new[io, jo, n] = Ut[i, j, n] + dtdV * \
+                            (F_x[i, j, n]*dy - F_x[i+1, j, n]*dy +
+                             F_y[i, j, n]*dx - F_y[i, j+1, n]*dx)
+
+                    U_new[io, jo, iymom] += 0.5*dt*(U_new[io, jo, idens] + Ut[i, j, idens])*grav
+                    U_new[io, jo, iener] += 0.5*dt*(U_new[io, jo, iymom] + Ut[i, j, iymom])*grav
+
+    return U_new
+
+
+def fused_update(my_data, my_aux, rp, ivars, solid, tc, dt):
+    """
+    Update the conserved state in my_data through dt using the fused
+    CTU kernel.  This does the same update (including the gravity
+    sources) as the standard unsplit update in Simulation.evolve(),
+    but only for Cartesian grids.
+
+    Parameters
+    ----------
+    my_data : CellCenterData2d object
+        The data object containing the grid and the conserved state.
+    my_aux : CellCenterData2d object
+        The data object that carries the source terms, which we need
+        to fill in the ghost cells.
+    rp : RuntimeParameters object
+        The runtime parameters for the simulation
+    ivars : Variables object
+        The Variables object that tells us which indices refer to which
+        variables
+    solid: A container class
+        This is used in Riemann solver to indicate which side has solid boundary
+    tc : TimerCollection object
+        The timers we are using to profile
+    dt : float
+        The timestep we are advancing through.
+    """
+
+    myg = my_data.grid
+
+    if myg.coord_type != 0:
+        msg.fail("ERROR: the fused update only supports Cartesian2d")
+
+    if myg.ng < TILE_NG:
+        msg.fail(f"ERROR: the fused update needs at least {TILE_NG} ghost cells")
+
+    riemann_method = rp.get_param("compressible.riemann")
+    if riemann_method not in RIEMANN_METHODS:
+        msg.fail("ERROR: Riemann solver undefined")
+
+    tm_source = tc.timer("sourceTerms")
+    tm_source.begin()
+
+    flx.compute_source_terms(my_data, my_aux, rp, ivars)
+
+    tm_source.end()
+
+    tm_fused = tc.timer("fused update")
+    tm_fused.begin()
+
+    U_new = ctu_update(my_data.data,
+                       my_aux.get_var("xmom_src"),
+                       my_aux.get_var("ymom_src"),
+                       my_aux.get_var("E_src"),
+                       myg.ng, myg.dx, myg.dy, dt,
+                       eos.EOS.from_params(rp).data,
+                       rp.get_param("compressible.grav"),
+                       ivars.idens, ivars.ixmom, ivars.iymom, ivars.iener,
+                       ivars.irhox, ivars.naux,
+                       ivars.irho, ivars.iu, ivars.iv, ivars.ip, ivars.ix,
+                       rp.get_param("compressible.use_flattening"),
+                       rp.get_param("compressible.delta"),
+                       rp.get_param("compressible.z0"),
+                       rp.get_param("compressible.z1"),
+                       rp.get_param("compressible.limiter"),
+                       RIEMANN_METHODS[riemann_method],
+                       rp.get_param("compressible.cvisc"),
+                       np.array([solid.xl, solid.xr, solid.yl, solid.yr]),
+                       rp.get_param("compressible.tile_size"))
+
+    my_data.data[myg.ilo:myg.ihi+1, myg.jlo:myg.jhi+1, :] = U_new
+
+    tm_fused.end()
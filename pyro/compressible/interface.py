@@ -1,11 +1,13 @@
 import numpy as np
-from numba import njit
+from numba import njit, prange
 
+from pyro.compressible import eos
 
-@njit(cache=True)
+
+@njit(cache=True, parallel=True)
 def states(idir, ng, dx, dt,
            irho, iu, iv, ip, ix, nspec,
-           gamma, qv, dqv):
+           eos_data, qv, dqv):
     r"""
     predict the cell-centered state to the edges in one-dimension
     using the reconstructed, limited slopes.
@@ -76,8 +78,8 @@ def states(idir, ng, dx, dt,
         state vector
     nspec : int
         The number of species
-    gamma : float
-        Adiabatic index
+    eos_data : ndarray
+        The packed equation of state (see :func:`pyro.compressible.eos.pack`)
     qv : ndarray
         The primitive state vector
     dqv : ndarray
@@ -89,7 +91,7 @@ def states(idir, ng, dx, dt,
         State vector predicted to the left and right edges
     """
 
-    qx, qy, nvar = qv.shape
+    qx, qy, _ = qv.shape
 
     q_l = np.zeros_like(qv)
     q_r = np.zeros_like(qv)
@@ -101,121 +103,133 @@ def states(idir, ng, dx, dt,
     jlo = ng
     jhi = ng + ny
 
-    ns = nvar - nspec
-
     dtdx = dt / dx
     dtdx4 = 0.25 * dtdx
 
-    lvec = np.zeros((nvar, nvar))
-    rvec = np.zeros((nvar, nvar))
-    e_val = np.zeros(nvar)
-    betal = np.zeros(nvar)
-    betar = np.zeros(nvar)
-
-    # this is the loop over zones.  For zone i, we see q_l[i+1] and q_r[i]
-    for i in range(ilo - 2, ihi + 2):
-        for j in range(jlo - 2, jhi + 2):
-
-            dq = dqv[i, j, :]
-            q = qv[i, j, :]
+    # this is the loop over zones.  For zone i, we see q_l[i+1] and q_r[i].
+    # Each row only writes to its own zones, so the rows are done in parallel
+    for i in prange(ilo - 2, ihi + 2):  # pylint: disable=not-an-iterable
+        _states_row(i, idir, jlo, jhi, dtdx, dtdx4,
+                    irho, iu, iv, ip, ix, nspec,
+                    eos_data, qv, dqv, q_l, q_r)
 
-            cs = np.sqrt(gamma * q[ip] / q[irho])
-
-            lvec[:, :] = 0.0
-            rvec[:, :] = 0.0
-            e_val[:] = 0.0
-
-            # compute the eigenvalues and eigenvectors
-            if idir == 1:
-                e_val[:] = np.array([q[iu] - cs, q[iu], q[iu], q[iu] + cs])
-
-                lvec[0, :ns] = [0.0, -0.5 *
-                                 q[irho] / cs, 0.0, 0.5 / (cs * cs)]
-                lvec[1, :ns] = [1.0, 0.0,
-                                 0.0, -1.0 / (cs * cs)]
-                lvec[2, :ns] = [0.0, 0.0, 1.0, 0.0]
-                lvec[3, :ns] = [0.0, 0.5 *
-                                 q[irho] / cs,  0.0, 0.5 / (cs * cs)]
-
-                rvec[0, :ns] = [1.0, -cs / q[irho], 0.0, cs * cs]
-                rvec[1, :ns] = [1.0, 0.0, 0.0, 0.0]
-                rvec[2, :ns] = [0.0, 0.0, 1.0, 0.0]
-                rvec[3, :ns] = [1.0, cs / q[irho],  0.0, cs * cs]
-
-                # now the species -- they only have a 1 in their corresponding slot
-                e_val[ns:] = q[iu]
-                for n in range(ix, ix + nspec):
-                    lvec[n, n] = 1.0
-                    rvec[n, n] = 1.0
-
-            else:
-                e_val[:] = np.array([q[iv] - cs, q[iv], q[iv], q[iv] + cs])
-
-                lvec[0, :ns] = [0.0, 0.0, -0.5 *
-                                 q[irho] / cs, 0.5 / (cs * cs)]
-                lvec[1, :ns] = [1.0, 0.0,
-                                 0.0,             -1.0 / (cs * cs)]
-                lvec[2, :ns] = [0.0, 1.0, 0.0,             0.0]
-                lvec[3, :ns] = [0.0, 0.0, 0.5 *
-                                 q[irho] / cs,  0.5 / (cs * cs)]
-
-                rvec[0, :ns] = [1.0, 0.0, -cs / q[irho], cs * cs]
-                rvec[1, :ns] = [1.0, 0.0, 0.0,       0.0]
-                rvec[2, :ns] = [0.0, 1.0, 0.0,       0.0]
-                rvec[3, :ns] = [1.0, 0.0, cs / q[irho],  cs * cs]
-
-                # now the species -- they only have a 1 in their corresponding slot
-                e_val[ns:] = q[iv]
-                for n in range(ix, ix + nspec):
-                    lvec[n, n] = 1.0
-                    rvec[n, n] = 1.0
-
-            # define the reference states
-            if idir == 1:
-                # this is one the right face of the current zone,
-                # so the fastest moving eigenvalue is e_val[3] = u + c
-                factor = 0.5 * (1.0 - dtdx[i, j] * max(e_val[3], 0.0))
-                q_l[i + 1, j, :] = q + factor * dq
+    return q_l, q_r
 
-                # left face of the current zone, so the fastest moving
-                # eigenvalue is e_val[3] = u - c
-                factor = 0.5 * (1.0 + dtdx[i, j] * min(e_val[0], 0.0))
-                q_r[i,  j, :] = q - factor * dq
 
-            else:
+@njit(cache=True)
+def _states_row(i, idir, jlo, jhi, dtdx, dtdx4,
+                irho, iu, iv, ip, ix, nspec,
+                eos_data, qv, dqv, q_l, q_r):
+    """trace the zones in row i of qv to the edges, as described in states"""
 
-                factor = 0.5 * (1.0 - dtdx[i, j] * max(e_val[3], 0.0))
-                q_l[i, j + 1, :] = q + factor * dq
+    nvar = qv.shape[-1]
+    ns = nvar - nspec
 
-                factor = 0.5 * (1.0 + dtdx[i, j] * min(e_val[0], 0.0))
-                q_r[i, j, :] = q - factor * dq
+    # the right eigenvectors are stored transposed (rvec_t[m, :] is
+    # the m-th component of each of them), so the sums over them for
+    # each component run along contiguous memory
+    lvec = np.zeros((nvar, nvar))
+    rvec_t = np.zeros((nvar, nvar))
+    e_val = np.zeros(nvar)
+    betal = np.zeros(nvar)
+    betar = np.zeros(nvar)
 
-            # compute the Vhat functions
+    # the tracing is always done in double precision, even if the
+    # state is stored in single precision
+    dq = np.zeros(nvar)
+
+    if idir == 1:
+        iun = iu
+    else:
+        iun = iv
+
+    for j in range(jlo - 2, jhi + 2):
+
+        dq[:] = dqv[i, j, :]
+        q = qv[i, j, :]
+
+        cs = eos.soundspeed(eos_data, q[irho], q[ip])
+
+        lvec[:, :] = 0.0
+        rvec_t[:, :] = 0.0
+
+        # compute the eigenvalues and eigenvectors -- these are the
+        # same for both directions, with the roles of the velocity
+        # components swapped
+        e_val[0] = q[iun] - cs
+        e_val[1] = q[iun]
+        e_val[2] = q[iun]
+        e_val[3] = q[iun] + cs
+
+        lvec[0, iun] = -0.5 * q[irho] / cs
+        lvec[0, ip] = 0.5 / (cs * cs)
+        lvec[1, irho] = 1.0
+        lvec[1, ip] = -1.0 / (cs * cs)
+        lvec[3, iun] = 0.5 * q[irho] / cs
+        lvec[3, ip] = 0.5 / (cs * cs)
+
+        rvec_t[irho, 0] = 1.0
+        rvec_t[iun, 0] = -cs / q[irho]
+        rvec_t[ip, 0] = cs * cs
+        rvec_t[irho, 1] = 1.0
+        rvec_t[irho, 3] = 1.0
+        rvec_t[iun, 3] = cs / q[irho]
+        rvec_t[ip, 3] = cs * cs
+
+        # the transverse velocity is simply advected
+        if idir == 1:
+            lvec[2, iv] = 1.0
+            rvec_t[iv, 2] = 1.0
+        else:
+            lvec[2, iu] = 1.0
+            rvec_t[iu, 2] = 1.0
+
+        # now the species -- they only have a 1 in their corresponding slot
+        e_val[ns:] = q[iun]
+        for n in range(ix, ix + nspec):
+            lvec[n, n] = 1.0
+            rvec_t[n, n] = 1.0
+
+        # define the reference states -- the left state is on the right
+        # face of the current zone, so the fastest moving eigenvalue is
+        # e_val[3] = u + c, and the right state is on the left face, so
+        # the fastest moving eigenvalue is e_val[0] = u - c
+        factor_l = 0.5 * (1.0 - dtdx[i, j] * max(e_val[3], 0.0))
+        factor_r = 0.5 * (1.0 + dtdx[i, j] * min(e_val[0], 0.0))
+
+        if idir == 1:
+            for m in range(nvar):
+                q_l[i + 1, j, m] = q[m] + factor_l * dq[m]
+                q_r[i, j, m] = q[m] - factor_r * dq[m]
+        else:
             for m in range(nvar):
-                asum = np.dot(lvec[m, :], dq)
+                q_l[i, j + 1, m] = q[m] + factor_l * dq[m]
+                q_r[i, j, m] = q[m] - factor_r * dq[m]
 
-                # Should we change to max(e_val[3], 0.0) and min(e_val[0], 0.0)?
-                betal[m] = dtdx4[i, j] * (e_val[3] - e_val[m]) * \
-                    (np.copysign(1.0, e_val[m]) + 1.0) * asum
-                betar[m] = dtdx4[i, j] * (e_val[0] - e_val[m]) * \
-                    (1.0 - np.copysign(1.0, e_val[m])) * asum
+        # compute the Vhat functions
+        for m in range(nvar):
+            asum = np.dot(lvec[m, :], dq)
 
-            # construct the states
-            for m in range(nvar):
-                sum_l = np.dot(betal, np.ascontiguousarray(rvec[:, m]))
-                sum_r = np.dot(betar, np.ascontiguousarray(rvec[:, m]))
+            # Should we change to max(e_val[3], 0.0) and min(e_val[0], 0.0)?
+            betal[m] = dtdx4[i, j] * (e_val[3] - e_val[m]) * \
+                (np.copysign(1.0, e_val[m]) + 1.0) * asum
+            betar[m] = dtdx4[i, j] * (e_val[0] - e_val[m]) * \
+                (1.0 - np.copysign(1.0, e_val[m])) * asum
 
-                if idir == 1:
-                    q_l[i + 1, j, m] = q_l[i + 1, j, m] + sum_l
-                    q_r[i,  j, m] = q_r[i,  j, m] + sum_r
-                else:
-                    q_l[i, j + 1, m] = q_l[i, j + 1, m] + sum_l
-                    q_r[i, j,  m] = q_r[i, j,  m] + sum_r
+        # construct the states
+        for m in range(nvar):
+            sum_l = np.dot(betal, rvec_t[m, :])
+            sum_r = np.dot(betar, rvec_t[m, :])
 
-    return q_l, q_r
+            if idir == 1:
+                q_l[i + 1, j, m] = q_l[i + 1, j, m] + sum_l
+                q_r[i,  j, m] = q_r[i,  j, m] + sum_r
+            else:
+                q_l[i, j + 1, m] = q_l[i, j + 1, m] + sum_l
+                q_r[i, j,  m] = q_r[i, j,  m] + sum_r
 
 
-@njit(cache=True)
+@njit(cache=True, parallel=True)
 def artificial_viscosity(ng, dx, dy, Lx, Ly,
                          xmin, ymin, coord_type,
                          cvisc, u, v):
@@ -288,7 +302,7 @@ def artificial_viscosity(ng, dx, dy, Lx, Ly,
     # Then a simple difference is done between the right and left,
     # and top and bottom to get the divergence at the vertex.
 
-    for i in range(ilo - 1, ihi + 1):
+    for i in prange(ilo - 1, ihi + 1):  # pylint: disable=not-an-iterable
         for j in range(jlo - 1, jhi + 1):
 
             # For Cartesian2d:
@@ -336,7 +350,7 @@ def artificial_viscosity(ng, dx, dy, Lx, Ly,
                 divU[i, j] = ux + vy
 
     # Compute divergence at the face by averaging over divergence at vertex
-    for i in range(ilo, ihi):
+    for i in prange(ilo, ihi):  # pylint: disable=not-an-iterable
         for j in range(jlo, jhi):
 
             divU_x = 0.5 * (divU[i, j] + divU[i, j + 1])
@@ -346,3 +360,202 @@ def artificial_viscosity(ng, dx, dy, Lx, Ly,
             avisco_y[i, j] = cvisc * max(-divU_y * Ly[i, j], 0.0)
 
     return avisco_x, avisco_y
+
+
+@njit(cache=True, parallel=True)
+def add_source_terms(ng, dt, ixmom, iymom, iener,
+                     xmom_src, ymom_src, E_src,
+                     U_xl, U_xr, U_yl, U_yr):
+    r"""
+    Add the source terms to the interface states in place, over the
+    valid region plus one ghost cell.  Each interface state sees the
+    source from the zone it was predicted from::
+
+        U_xl[i,j] += 0.5*dt*source[i-1,j]
+        U_xr[i,j] += 0.5*dt*source[i,j]
+        U_yl[i,j] += 0.5*dt*source[i,j-1]
+        U_yr[i,j] += 0.5*dt*source[i,j]
+
+    Parameters
+    ----------
+    ng : int
+        The number of ghost cells
+    dt : float
+        The timestep we are advancing through.
+    ixmom, iymom, iener : int
+        The indices of the x-momentum, y-momentum and energy density
+        in the conserved state vector.
+    xmom_src, ymom_src, E_src : ndarray
+        The sources for the x-momentum, y-momentum and energy
+    U_xl, U_xr, U_yl, U_yr : ndarray
+        Conserved states in the left and right x-interface and left
+        and right y-interface.  These are updated in place.
+    """
+
+    qx, qy, _ = U_xl.shape
+
+    ilo = ng
+    ihi = qx - ng - 1
+    jlo = ng
+    jhi = qy - ng - 1
+
+    for i in prange(ilo - 1, ihi + 2):  # pylint: disable=not-an-iterable
+        for j in range(jlo - 1, jhi + 2):
+            U_xl[i, j, ixmom] += 0.5 * dt * xmom_src[i - 1, j]
+            U_xl[i, j, iymom] += 0.5 * dt * ymom_src[i - 1, j]
+            U_xl[i, j, iener] += 0.5 * dt * E_src[i - 1, j]
+
+            U_xr[i, j, ixmom] += 0.5 * dt * xmom_src[i, j]
+            U_xr[i, j, iymom] += 0.5 * dt * ymom_src[i, j]
+            U_xr[i, j, iener] += 0.5 * dt * E_src[i, j]
+
+            U_yl[i, j, ixmom] += 0.5 * dt * xmom_src[i, j - 1]
+            U_yl[i, j, iymom] += 0.5 * dt * ymom_src[i, j - 1]
+            U_yl[i, j, iener] += 0.5 * dt * E_src[i, j - 1]
+
+            U_yr[i, j, ixmom] += 0.5 * dt * xmom_src[i, j]
+            U_yr[i, j, iymom] += 0.5 * dt * ymom_src[i, j]
+            U_yr[i, j, iener] += 0.5 * dt * E_src[i, j]
+
+
+@njit(cache=True, parallel=True)
+def transverse_flux(ng, dt, V, Ax, Ay, F_x, F_y,
+                    U_xl, U_xr, U_yl, U_yr):
+    r"""
+    Add the transverse flux differences to the interface states in
+    place, over the valid region plus two ghost cells on the low side
+    and one on the high side::
+
+        U_xl[i,j] -= 0.5*dt/V * (F_y[i-1,j+1] Ay[i-1,j+1] - F_y[i-1,j] Ay[i-1,j])
+        U_xr[i,j] -= 0.5*dt/V * (F_y[i,j+1] Ay[i,j+1] - F_y[i,j] Ay[i,j])
+        U_yl[i,j] -= 0.5*dt/V * (F_x[i+1,j-1] Ax[i+1,j-1] - F_x[i,j-1] Ax[i,j-1])
+        U_yr[i,j] -= 0.5*dt/V * (F_x[i+1,j] Ax[i+1,j] - F_x[i,j] Ax[i,j])
+
+    Parameters
+    ----------
+    ng : int
+        The number of ghost cells
+    dt : float
+        The timestep we are advancing through.
+    V, Ax, Ay : ndarray
+        The cell volumes and the areas of the x- and y-faces
+    F_x, F_y : ndarray
+        The fluxes through the x- and y-interfaces
+    U_xl, U_xr, U_yl, U_yr : ndarray
+        Conserved states in the left and right x-interface and left
+        and right y-interface.  These are updated in place.
+    """
+
+    qx, qy, nvar = U_xl.shape
+
+    ilo = ng
+    ihi = qx - ng - 1
+    jlo = ng
+    jhi = qy - ng - 1
+
+    for i in prange(ilo - 2, ihi + 2):  # pylint: disable=not-an-iterable
+        for j in range(jlo - 2, jhi + 2):
+            hdtV = 0.5 * dt / V[i, j]
+
+            for n in range(nvar):
+                U_xl[i, j, n] += - hdtV * (F_y[i - 1, j + 1, n] * Ay[i - 1, j + 1] -
+                                           F_y[i - 1, j, n] * Ay[i - 1, j])
+
+                U_xr[i, j, n] += - hdtV * (F_y[i, j + 1, n] * Ay[i, j + 1] -
+                                           F_y[i, j, n] * Ay[i, j])
+
+                U_yl[i, j, n] += - hdtV * (F_x[i + 1, j - 1, n] * Ax[i + 1, j - 1] -
+                                           F_x[i, j - 1, n] * Ax[i, j - 1])
+
+                U_yr[i, j, n] += - hdtV * (F_x[i + 1, j, n] * Ax[i + 1, j] -
+                                           F_x[i, j, n] * Ax[i, j])
+
+
+@njit(cache=True, parallel=True)
+def timestep(idens, ixmom, iymom, iener, eos_data, Lx, Ly, U):
+    r"""
+    Find the advective timestep constraint,
+    :math:`\min(\Delta x/(|u| + c_s), \Delta y/(|v| + c_s))`, over
+    all of the zones (including ghost cells).  The sound speed is
+    found zone-by-zone, so this is a single pass over the conserved
+    state without any temporary arrays.
+
+    Parameters
+    ----------
+    idens, ixmom, iymom, iener : int
+        The indices of the density, x-momentum, y-momentum and energy
+        density in the conserved state vector.
+    eos_data : ndarray
+        The packed equation of state (see :func:`pyro.compressible.eos.pack`)
+    Lx, Ly : ndarray
+        Cell size in x, y direction
+    U : ndarray
+        Conserved state
+
+    Returns
+    -------
+    out : float
+        The timestep, before the CFL number is applied
+    """
+
+    qx, qy, _ = U.shape
+
+    dt = np.inf
+
+    for i in prange(qx):  # pylint: disable=not-an-iterable
+        for j in range(qy):
+            dens = U[i, j, idens]
+            u = U[i, j, ixmom] / dens
+            v = U[i, j, iymom] / dens
+
+            e = (U[i, j, iener] - 0.5 * dens * (u * u + v * v)) / dens
+            _, cs = eos.pres_soundspeed(eos_data, dens, dens * e)
+
+            dt_zone = min(Lx[i, j] / (abs(u) + cs), Ly[i, j] / (abs(v) + cs))
+            dt = min(dt, dt_zone)
+
+    return dt
+
+
+@njit(cache=True, parallel=True)
+def timestep_mol(idens, ixmom, iymom, iener, eos_data, dx, dy, U):
+    r"""
+    Find the timestep constraint for the method-of-lines solvers,
+    :math:`\min(1/((|u| + c_s)/\Delta x + (|v| + c_s)/\Delta y))`, over
+    all of the zones (including ghost cells) in a single pass, like
+    :func:`timestep`.
+
+    Parameters
+    ----------
+    idens, ixmom, iymom, iener : int
+        The indices of the density, x-momentum, y-momentum and energy
+        density in the conserved state vector.
+    eos_data : ndarray
+        The packed equation of state (see :func:`pyro.compressible.eos.pack`)
+    dx, dy : float
+        Cell spacings
+    U : ndarray
+        Conserved state
+
+    Returns
+    -------
+    out : float
+        The timestep, before the CFL number is applied
+    """
+
+    qx, qy, _ = U.shape
+
+    dt = np.inf
+
+    for i in prange(qx):  # pylint: disable=not-an-iterable
+        for j in range(qy):
+            dens = U[i, j, idens]
+            u = U[i, j, ixmom] / dens
+            v = U[i, j, iymom] / dens
+
+            e = (U[i, j, iener] - 0.5 * dens * (u * u + v * v)) / dens
+            _, cs = eos.pres_soundspeed(eos_data, dens, dens * e)
+
+            dt = min(dt, 1.0 / ((abs(u) + cs) / dx + (abs(v) + cs) / dy))
+
+    return dt
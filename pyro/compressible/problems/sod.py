@@ -1,6 +1,7 @@
 """A general shock tube problem for comparing the solver to an exact
 Riemann solution."""
 
+from pyro.compressible import eos
 from pyro.util import msg
 
 DEFAULT_INPUTS = "inputs.sod.x"
@@ -45,7 +46,11 @@ def init_data(my_data, rp):
     ymin = rp.get_param("mesh.ymin")
     ymax = rp.get_param("mesh.ymax")
 
-    gamma = rp.get_param("eos.gamma")
+    # the internal energy of each state comes from the EOS, so this
+    # problem works with any of them
+    my_eos = eos.EOS.from_params(rp)
+    rhoe_left = my_eos.rhoe(dens_left, p_left)
+    rhoe_right = my_eos.rhoe(dens_right, p_right)
 
     direction = rp.get_param("sod.direction")
 
@@ -62,7 +67,7 @@ def init_data(my_data, rp):
         dens[idxl] = dens_left
         xmom[idxl] = dens_left*u_left
         ymom[idxl] = 0.0
-        ener[idxl] = p_left/(gamma - 1.0) + 0.5*xmom[idxl]*u_left
+        ener[idxl] = rhoe_left + 0.5*xmom[idxl]*u_left
 
         # right
         idxr = myg.x2d > xctr
@@ -70,7 +75,7 @@ def init_data(my_data, rp):
         dens[idxr] = dens_right
         xmom[idxr] = dens_right*u_right
         ymom[idxr] = 0.0
-        ener[idxr] = p_right/(gamma - 1.0) + 0.5*xmom[idxr]*u_right
+        ener[idxr] = rhoe_right + 0.5*xmom[idxr]*u_right
 
     else:
 
@@ -80,7 +85,7 @@ def init_data(my_data, rp):
         dens[idxb] = dens_left
         xmom[idxb] = 0.0
         ymom[idxb] = dens_left*u_left
-        ener[idxb] = p_left/(gamma - 1.0) + 0.5*ymom[idxb]*u_left
+        ener[idxb] = rhoe_left + 0.5*ymom[idxb]*u_left
 
         # top
         idxt = myg.y2d > yctr
@@ -88,7 +93,7 @@ def init_data(my_data, rp):
         dens[idxt] = dens_right
         xmom[idxt] = 0.0
         ymom[idxt] = dens_right*u_right
-        ener[idxt] = p_right/(gamma - 1.0) + 0.5*ymom[idxt]*u_right
+        ener[idxt] = rhoe_right + 0.5*ymom[idxt]*u_right
 
 
 def finalize():
@@ -1,15 +1,16 @@
 import numpy as np
-from numba import njit
+from numba import njit, prange
 
 import pyro.mesh.array_indexer as ai
+from pyro.compressible import eos
 from pyro.util import msg
 
 
-@njit(cache=True)
+@njit(cache=True, parallel=True)
 def riemann_cgf(idir, ng,
                  idens, ixmom, iymom, iener, irhoX, nspec,
                  lower_solid, upper_solid,
-                 gamma, U_l, U_r):
+                 eos_data, U_l, U_r, out=None):
     r"""
     Solve riemann shock tube problem for a general equation of
     state using the method of Colella, Glaz, and Ferguson.  See
@@ -51,10 +52,14 @@ def riemann_cgf(idir, ng,
         and species partial densities in the conserved state vector.
     lower_solid, upper_solid : int
         Are we at lower or upper solid boundaries?
-    gamma : float
-        Adiabatic index
+    eos_data : ndarray
+        The packed equation of state (see :func:`pyro.compressible.eos.pack`)
     U_l, U_r : ndarray
         Conserved state on the left and right cell edges.
+    out : ndarray, optional
+        Array to store the result in -- only the interfaces that are
+        solved for are written.  If not given, a zeroed array is
+        allocated.
 
     Returns
     -------
@@ -66,7 +71,10 @@ def riemann_cgf(idir, ng,
 
     qx, qy, nvar = U_l.shape
 
-    U_out = np.zeros((qx, qy, nvar))
+    if out is None:
+        U_out = np.zeros_like(U_l)
+    else:
+        U_out = out
 
     smallc = 1.e-10
     smallrho = 1.e-10
@@ -79,7 +87,10 @@ def riemann_cgf(idir, ng,
     jlo = ng
     jhi = ng + ny
 
-    for i in range(ilo - 1, ihi + 1):
+    for i in prange(ilo - 1, ihi + 1):  # pylint: disable=not-an-iterable
+        # the rows are done in parallel, so each gets its own scratch space
+        xn = np.zeros(nspec)
+
         for j in range(jlo - 1, jhi + 1):
 
             # primitive variable states
@@ -95,7 +106,7 @@ def riemann_cgf(idir, ng,
 
             rhoe_l = U_l[i, j, iener] - 0.5 * rho_l * (un_l**2 + ut_l**2)
 
-            p_l = rhoe_l * (gamma - 1.0)
+            p_l = eos.pres_from_rhoe(eos_data, rho_l, rhoe_l)
             p_l = max(p_l, smallp)
 
             rho_r = U_r[i, j, idens]
@@ -109,16 +120,21 @@ def riemann_cgf(idir, ng,
 
             rhoe_r = U_r[i, j, iener] - 0.5 * rho_r * (un_r**2 + ut_r**2)
 
-            p_r = rhoe_r * (gamma - 1.0)
+            p_r = eos.pres_from_rhoe(eos_data, rho_r, rhoe_r)
             p_r = max(p_r, smallp)
 
+            # the adiabatic index of each state -- for a gamma-law gas
+            # this is just gamma
+            gamma_l = eos.gamma1(eos_data, rho_l, p_l)
+            gamma_r = eos.gamma1(eos_data, rho_r, p_r)
+
             # define the Lagrangian sound speed
-            W_l = max(smallrho * smallc, np.sqrt(gamma * p_l * rho_l))
-            W_r = max(smallrho * smallc, np.sqrt(gamma * p_r * rho_r))
+            W_l = max(smallrho * smallc, np.sqrt(gamma_l * p_l * rho_l))
+            W_r = max(smallrho * smallc, np.sqrt(gamma_r * p_r * rho_r))
 
             # and the regular sound speeds
-            c_l = max(smallc, np.sqrt(gamma * p_l / rho_l))
-            c_r = max(smallc, np.sqrt(gamma * p_r / rho_r))
+            c_l = max(smallc, np.sqrt(gamma_l * p_l / rho_l))
+            c_r = max(smallc, np.sqrt(gamma_r * p_r / rho_r))
 
             # define the star states
             pstar = (W_l * p_r + W_r * p_l + W_l *
@@ -136,8 +152,8 @@ def riemann_cgf(idir, ng,
             rhoestar_r = rhoe_r + \
                 (pstar - p_r) * (rhoe_r / rho_r + p_r / rho_r) / c_r**2
 
-            cstar_l = max(smallc, np.sqrt(gamma * pstar / rhostar_l))
-            cstar_r = max(smallc, np.sqrt(gamma * pstar / rhostar_r))
+            cstar_l = max(smallc, np.sqrt(gamma_l * pstar / rhostar_l))
+            cstar_r = max(smallc, np.sqrt(gamma_r * pstar / rhostar_r))
 
             # figure out which state we are in, based on the location of
             # the waves
@@ -268,13 +284,13 @@ def riemann_cgf(idir, ng,
             # species now
             if nspec > 0:
                 if ustar > 0.0:
-                    xn = U_l[i, j, irhoX:irhoX + nspec] / U_l[i, j, idens]
+                    xn[:] = U_l[i, j, irhoX:irhoX + nspec] / U_l[i, j, idens]
 
                 elif ustar < 0.0:
-                    xn = U_r[i, j, irhoX:irhoX + nspec] / U_r[i, j, idens]
+                    xn[:] = U_r[i, j, irhoX:irhoX + nspec] / U_r[i, j, idens]
                 else:
-                    xn = 0.5 * (U_l[i, j, irhoX:irhoX + nspec] / U_l[i, j, idens] +
-                                   U_r[i, j, irhoX:irhoX + nspec] / U_r[i, j, idens])
+                    xn[:] = 0.5 * (U_l[i, j, irhoX:irhoX + nspec] / U_l[i, j, idens] +
+                                      U_r[i, j, irhoX:irhoX + nspec] / U_r[i, j, idens])
 
             # are we on a solid boundary?
             if idir == 1:
@@ -310,11 +326,11 @@ def riemann_cgf(idir, ng,
     return U_out
 
 
-@njit(cache=True)
+@njit(cache=True, parallel=True)
 def riemann_prim(idir, ng,
                  irho, iu, iv, ip, iX, nspec,
                  lower_solid, upper_solid,
-                 gamma, q_l, q_r):
+                 eos_data, q_l, q_r, out=None):
     r"""
     this is like riemann_cgf, except that it works on a primitive
     variable input state and returns the primitive variable interface
@@ -359,10 +375,14 @@ def riemann_prim(idir, ng,
         The indices of the density, x-velocity, y-velocity, pressure and species fractions in the state vector.
     lower_solid, upper_solid : int
         Are we at lower or upper solid boundaries?
-    gamma : float
-        Adiabatic index
+    eos_data : ndarray
+        The packed equation of state (see :func:`pyro.compressible.eos.pack`)
     q_l, q_r : ndarray
         Primitive state on the left and right cell edges.
+    out : ndarray, optional
+        Array to store the result in -- only the interfaces that are
+        solved for are written.  If not given, a zeroed array is
+        allocated.
 
     Returns
     -------
@@ -370,9 +390,12 @@ def riemann_prim(idir, ng,
         Primitive flux
     """
 
-    qx, qy, nvar = q_l.shape
+    qx, qy, _ = q_l.shape
 
-    q_int = np.zeros((qx, qy, nvar))
+    if out is None:
+        q_int = np.zeros_like(q_l)
+    else:
+        q_int = out
 
     smallc = 1.e-10
     smallrho = 1.e-10
@@ -385,7 +408,10 @@ def riemann_prim(idir, ng,
     jlo = ng
     jhi = ng + ny
 
-    for i in range(ilo - 1, ihi + 1):
+    for i in prange(ilo - 1, ihi + 1):  # pylint: disable=not-an-iterable
+        # the rows are done in parallel, so each gets its own scratch space
+        xn = np.zeros(nspec)
+
         for j in range(jlo - 1, jhi + 1):
 
             # primitive variable states
@@ -417,12 +443,18 @@ def riemann_prim(idir, ng,
             # define the Lagrangian sound speed
             rho_l = max(smallrho, rho_l)
             rho_r = max(smallrho, rho_r)
-            W_l = max(smallrho * smallc, np.sqrt(gamma * p_l * rho_l))
-            W_r = max(smallrho * smallc, np.sqrt(gamma * p_r * rho_r))
+
+            # the adiabatic index of each state -- for a gamma-law gas
+            # this is just gamma
+            gamma_l = eos.gamma1(eos_data, rho_l, p_l)
+            gamma_r = eos.gamma1(eos_data, rho_r, p_r)
+
+            W_l = max(smallrho * smallc, np.sqrt(gamma_l * p_l * rho_l))
+            W_r = max(smallrho * smallc, np.sqrt(gamma_r * p_r * rho_r))
 
             # and the regular sound speeds
-            c_l = max(smallc, np.sqrt(gamma * p_l / rho_l))
-            c_r = max(smallc, np.sqrt(gamma * p_r / rho_r))
+            c_l = max(smallc, np.sqrt(gamma_l * p_l / rho_l))
+            c_r = max(smallc, np.sqrt(gamma_r * p_r / rho_r))
 
             # define the star states
             pstar = (W_l * p_r + W_r * p_l + W_l *
@@ -435,8 +467,8 @@ def riemann_prim(idir, ng,
             rhostar_l = rho_l + (pstar - p_l) / c_l**2
             rhostar_r = rho_r + (pstar - p_r) / c_r**2
 
-            cstar_l = max(smallc, np.sqrt(gamma * pstar / rhostar_l))
-            cstar_r = max(smallc, np.sqrt(gamma * pstar / rhostar_r))
+            cstar_l = max(smallc, np.sqrt(gamma_l * pstar / rhostar_l))
+            cstar_r = max(smallc, np.sqrt(gamma_r * pstar / rhostar_r))
 
             # figure out which state we are in, based on the location of
             # the waves
@@ -554,13 +586,13 @@ def riemann_prim(idir, ng,
             # species now
             if nspec > 0:
                 if ustar > 0.0:
-                    xn = q_l[i, j, iX:iX + nspec]
+                    xn[:] = q_l[i, j, iX:iX + nspec]
 
                 elif ustar < 0.0:
-                    xn = q_r[i, j, iX:iX + nspec]
+                    xn[:] = q_r[i, j, iX:iX + nspec]
                 else:
-                    xn = 0.5 * (q_l[i, j, iX:iX + nspec] +
-                                   q_r[i, j, iX:iX + nspec])
+                    xn[:] = 0.5 * (q_l[i, j, iX:iX + nspec] +
+                                      q_r[i, j, iX:iX + nspec])
 
             # are we on a solid boundary?
             if idir == 1:
@@ -678,11 +710,11 @@ def estimate_wave_speed(rho_l, u_l, p_l, c_l,
     return S_l, S_r
 
 
-@njit(cache=True)
+@njit(cache=True, parallel=True)
 def riemann_hllc(idir, ng,
                  idens, ixmom, iymom, iener, irhoX, nspec,
                  lower_solid, upper_solid,  # pylint: disable=unused-argument
-                 gamma, U_l, U_r):
+                 eos_data, U_l, U_r, out=None):
     r"""
     This is the HLLC Riemann solver.  The implementation follows
     directly out of Toro's book.  Note: this does not handle the
@@ -701,10 +733,14 @@ def riemann_hllc(idir, ng,
         and species partial densities in the conserved state vector.
     lower_solid, upper_solid : int
         Are we at lower or upper solid boundaries?
-    gamma : float
-        Adiabatic index
+    eos_data : ndarray
+        The packed equation of state (see :func:`pyro.compressible.eos.pack`)
     U_l, U_r : ndarray
         Conserved state on the left and right cell edges.
+    out : ndarray, optional
+        Array to store the result in -- only the interfaces that are
+        solved for are written.  If not given, a zeroed array is
+        allocated.
 
     Returns
     -------
@@ -717,13 +753,14 @@ def riemann_hllc(idir, ng,
 
     qx, qy, nvar = U_l.shape
 
-    F = np.zeros((qx, qy, nvar))
+    if out is None:
+        F = np.zeros_like(U_l)
+    else:
+        F = out
 
     smallc = 1.e-10
     smallp = 1.e-10
 
-    U_state = np.zeros(nvar)
-
     nx = qx - 2 * ng
     ny = qy - 2 * ng
     ilo = ng
@@ -731,7 +768,10 @@ def riemann_hllc(idir, ng,
     jlo = ng
     jhi = ng + ny
 
-    for i in range(ilo - 1, ihi + 1):
+    for i in prange(ilo - 1, ihi + 1):  # pylint: disable=not-an-iterable
+        # the rows are done in parallel, so each gets its own scratch space
+        U_state = np.zeros(nvar)
+
         for j in range(jlo - 1, jhi + 1):
 
             # primitive variable states
@@ -747,7 +787,7 @@ def riemann_hllc(idir, ng,
 
             rhoe_l = U_l[i, j, iener] - 0.5 * rho_l * (un_l**2 + ut_l**2)
 
-            p_l = rhoe_l * (gamma - 1.0)
+            p_l = eos.pres_from_rhoe(eos_data, rho_l, rhoe_l)
             p_l = max(p_l, smallp)
 
             rho_r = U_r[i, j, idens]
@@ -761,15 +801,21 @@ def riemann_hllc(idir, ng,
 
             rhoe_r = U_r[i, j, iener] - 0.5 * rho_r * (un_r**2 + ut_r**2)
 
-            p_r = rhoe_r * (gamma - 1.0)
+            p_r = eos.pres_from_rhoe(eos_data, rho_r, rhoe_r)
             p_r = max(p_r, smallp)
 
+            # the adiabatic index of each state -- for a gamma-law gas
+            # this is just gamma
+            gamma_l = eos.gamma1(eos_data, rho_l, p_l)
+            gamma_r = eos.gamma1(eos_data, rho_r, p_r)
+
             # compute the sound speeds
-            c_l = max(smallc, np.sqrt(gamma * p_l / rho_l))
-            c_r = max(smallc, np.sqrt(gamma * p_r / rho_r))
+            c_l = max(smallc, np.sqrt(gamma_l * p_l / rho_l))
+            c_r = max(smallc, np.sqrt(gamma_r * p_r / rho_r))
 
             S_l, S_r = estimate_wave_speed(rho_l, un_l, p_l, c_l,
-                                           rho_r, un_r, p_r, c_r, gamma)
+                                           rho_r, un_r, p_r, c_r,
+                                           0.5 * (gamma_l + gamma_r))
 
             #  We could just take S_c = u_star as the estimate for the
             #  contact speed, but we can actually do this more accurately
@@ -785,7 +831,7 @@ def riemann_hllc(idir, ng,
                 # R region
                 U_state[:] = U_r[i, j, :]
 
-                F[i, j, :] = consFlux(idir, coord_type, gamma,
+                F[i, j, :] = consFlux(idir, coord_type, eos_data,
                                       idens, ixmom, iymom, iener, irhoX, nspec,
                                       U_state)
 
@@ -811,7 +857,7 @@ def riemann_hllc(idir, ng,
                         U_r[i, j, irhoX:irhoX + nspec] / rho_r
 
                 # find the flux on the right interface
-                F[i, j, :] = consFlux(idir, coord_type, gamma,
+                F[i, j, :] = consFlux(idir, coord_type, eos_data,
                                       idens, ixmom, iymom, iener, irhoX, nspec,
                                       U_r[i, j, :])
 
@@ -840,7 +886,7 @@ def riemann_hllc(idir, ng,
                         U_l[i, j, irhoX:irhoX + nspec] / rho_l
 
                 # find the flux on the left interface
-                F[i, j, :] = consFlux(idir, coord_type, gamma,
+                F[i, j, :] = consFlux(idir, coord_type, eos_data,
                                       idens, ixmom, iymom, iener, irhoX, nspec,
                                       U_l[i, j, :])
 
@@ -851,7 +897,7 @@ def riemann_hllc(idir, ng,
                 # L region
                 U_state[:] = U_l[i, j, :]
 
-                F[i, j, :] = consFlux(idir, coord_type, gamma,
+                F[i, j, :] = consFlux(idir, coord_type, eos_data,
                                       idens, ixmom, iymom, iener, irhoX, nspec,
                                       U_state)
 
@@ -860,11 +906,11 @@ def riemann_hllc(idir, ng,
     return F
 
 
-@njit(cache=True)
+@njit(cache=True, parallel=True)
 def riemann_hllc_lowspeed(idir, ng,
                           idens, ixmom, iymom, iener, irhoX, nspec,
                           lower_solid, upper_solid,  # pylint: disable=unused-argument
-                          gamma, U_l, U_r):
+                          eos_data, U_l, U_r, out=None):
     r"""
     This is the HLLC Riemann solver based on Toro (2009) alternate formulation
     (Eqs. 10.43 and 10.44) and the low Mach number asymptotic fix of
@@ -883,10 +929,14 @@ def riemann_hllc_lowspeed(idir, ng,
         and species partial densities in the conserved state vector.
     lower_solid, upper_solid : int
         Are we at lower or upper solid boundaries?
-    gamma : float
-        Adiabatic index
+    eos_data : ndarray
+        The packed equation of state (see :func:`pyro.compressible.eos.pack`)
     U_l, U_r : ndarray
         Conserved state on the left and right cell edges.
+    out : ndarray, optional
+        Array to store the result in -- only the interfaces that are
+        solved for are written.  If not given, a zeroed array is
+        allocated.
 
     Returns
     -------
@@ -899,7 +949,10 @@ def riemann_hllc_lowspeed(idir, ng,
 
     qx, qy, nvar = U_l.shape
 
-    F = np.zeros((qx, qy, nvar))
+    if out is None:
+        F = np.zeros_like(U_l)
+    else:
+        F = out
 
     smallc = 1.e-10
     smallp = 1.e-10
@@ -911,7 +964,7 @@ def riemann_hllc_lowspeed(idir, ng,
     jlo = ng
     jhi = ng + ny
 
-    for i in range(ilo - 1, ihi + 1):
+    for i in prange(ilo - 1, ihi + 1):  # pylint: disable=not-an-iterable
         for j in range(jlo - 1, jhi + 1):
 
             D_star = np.zeros(nvar)
@@ -932,7 +985,7 @@ def riemann_hllc_lowspeed(idir, ng,
 
             rhoe_l = U_l[i, j, iener] - 0.5 * rho_l * (un_l**2 + ut_l**2)
 
-            p_l = rhoe_l * (gamma - 1.0)
+            p_l = eos.pres_from_rhoe(eos_data, rho_l, rhoe_l)
             p_l = max(p_l, smallp)
 
             rho_r = U_r[i, j, idens]
@@ -946,15 +999,21 @@ def riemann_hllc_lowspeed(idir, ng,
 
             rhoe_r = U_r[i, j, iener] - 0.5 * rho_r * (un_r**2 + ut_r**2)
 
-            p_r = rhoe_r * (gamma - 1.0)
+            p_r = eos.pres_from_rhoe(eos_data, rho_r, rhoe_r)
             p_r = max(p_r, smallp)
 
+            # the adiabatic index of each state -- for a gamma-law gas
+            # this is just gamma
+            gamma_l = eos.gamma1(eos_data, rho_l, p_l)
+            gamma_r = eos.gamma1(eos_data, rho_r, p_r)
+
             # compute the sound speeds
-            c_l = max(smallc, np.sqrt(gamma * p_l / rho_l))
-            c_r = max(smallc, np.sqrt(gamma * p_r / rho_r))
+            c_l = max(smallc, np.sqrt(gamma_l * p_l / rho_l))
+            c_r = max(smallc, np.sqrt(gamma_r * p_r / rho_r))
 
             S_l, S_r = estimate_wave_speed(rho_l, un_l, p_l, c_l,
-                                           rho_r, un_r, p_r, c_r, gamma)
+                                           rho_r, un_r, p_r, c_r,
+                                           0.5 * (gamma_l + gamma_r))
 
             # We could just take S_c = u_star as the estimate for the
             # contact speed, but we can actually do this more accurately
@@ -974,12 +1033,12 @@ def riemann_hllc_lowspeed(idir, ng,
             # compute the fluxes corresponding to the left and right states
 
             U_state_l = U_l[i, j, :]
-            F_l = consFlux(idir, coord_type, gamma,
+            F_l = consFlux(idir, coord_type, eos_data,
                            idens, ixmom, iymom, iener, irhoX, nspec,
                            U_state_l)
 
             U_state_r = U_r[i, j, :]
-            F_r = consFlux(idir, coord_type, gamma,
+            F_r = consFlux(idir, coord_type, eos_data,
                            idens, ixmom, iymom, iener, irhoX, nspec,
                            U_state_r)
 
@@ -1021,7 +1080,7 @@ def riemann_hllc_lowspeed(idir, ng,
 
 
 def riemann_flux(idir, U_l, U_r, my_data, rp, ivars,
-                 lower_solid, upper_solid, tc, return_cons=False):
+                 lower_solid, upper_solid, tc, return_cons=False, out=None):
     """
     This is the general interface that constructs the unsplit fluxes through
     the idir (1 for x, 2 for y) interfaces using the left and right
@@ -1045,6 +1104,10 @@ def riemann_flux(idir, U_l, U_r, my_data, rp, ivars,
         The timers we are using to profile
     return_cons: Boolean
         If we don't use HLLC Riemann solver, do we also return conserved states?
+    out : ArrayIndexer, optional
+        Array to store the fluxes in.  If not given, a scratch array of
+        the grid is used, so the fluxes come from the grid's scratch
+        pool when that is enabled.
 
     Returns
     -------
@@ -1062,7 +1125,7 @@ def riemann_flux(idir, U_l, U_r, my_data, rp, ivars,
     myg = my_data.grid
 
     riemann_method = rp.get_param("compressible.riemann")
-    gamma = rp.get_param("eos.gamma")
+    my_eos = eos.EOS.from_params(rp)
 
     riemann_solvers = {"HLLC": riemann_hllc,
                        "HLLC_lm": riemann_hllc_lowspeed,
@@ -1073,38 +1136,50 @@ def riemann_flux(idir, U_l, U_r, my_data, rp, ivars,
 
     riemannFunc = riemann_solvers[riemann_method]
 
-    # This returns Flux in idir direction if we use HLLC
-    # and conserved states otherwise
-    _u = riemannFunc(idir, myg.ng,
-                     ivars.idens, ivars.ixmom, ivars.iymom,
-                     ivars.iener, ivars.irhox, ivars.naux,
-                     lower_solid, upper_solid,
-                     gamma, U_l, U_r)
-
-    # If riemann_method is not HLLC, then construct flux using conserved states
-    if riemann_method not in ["HLLC", "HLLC_lm"]:
-        _f = consFlux(idir, myg.coord_type, gamma,
-                      ivars.idens, ivars.ixmom, ivars.iymom,
-                      ivars.iener, ivars.irhox, ivars.naux,
-                      _u)
-    else:
-        # If riemann_method is HLLC, then its already flux
-        _f = _u
+    # the solvers write into scratch arrays, so with the scratch pool
+    # these are reused from step to step instead of being allocated
+    nalloc = myg.scratch_allocs
 
-    F = ai.ArrayIndexer(d=_f, grid=myg)
+    if out is None:
+        F = myg.scratch_array(nvar=ivars.nvar)
+    else:
+        F = ai.ArrayIndexer(d=out, grid=myg)
+
+    if riemann_method in ["HLLC", "HLLC_lm"]:
+        # HLLC returns the flux in the idir direction directly
+        riemannFunc(idir, myg.ng,
+                    ivars.idens, ivars.ixmom, ivars.iymom,
+                    ivars.iener, ivars.irhox, ivars.naux,
+                    lower_solid, upper_solid,
+                    my_eos.data, U_l, U_r, F)
+    else:
+        # otherwise we get the conserved states and construct the
+        # flux from them
+        U = myg.scratch_array(nvar=ivars.nvar)
+        riemannFunc(idir, myg.ng,
+                    ivars.idens, ivars.ixmom, ivars.iymom,
+                    ivars.iener, ivars.irhox, ivars.naux,
+                    lower_solid, upper_solid,
+                    my_eos.data, U_l, U_r, U)
+
+        consFlux(idir, myg.coord_type, my_eos.data,
+                 ivars.idens, ivars.ixmom, ivars.iymom,
+                 ivars.iener, ivars.irhox, ivars.naux,
+                 U, F)
+
+    tm_riem.n_allocs += myg.scratch_allocs - nalloc
     tm_riem.end()
 
     if riemann_method not in ["HLLC", "HLLC_lm"] and return_cons:
-        U = ai.ArrayIndexer(d=_u, grid=myg)
         return F, U
 
     return F
 
 
 @njit(cache=True)
-def consFlux(idir, coord_type, gamma,
+def consFlux(idir, coord_type, eos_data,
              idens, ixmom, iymom, iener, irhoX, nspec,
-             U_state):
+             U_state, out=None):
     r"""
     Calculate the conservative flux.
 
@@ -1112,15 +1187,20 @@ def consFlux(idir, coord_type, gamma,
     ----------
     idir : int
         Are we predicting to the edges in the x-direction (1) or y-direction (2)?
-    gamma : float
-        Adiabatic index
+    eos_data : ndarray
+        The packed equation of state (see :func:`pyro.compressible.eos.pack`)
     idens, ixmom, iymom, iener, irhoX : int
         The indices of the density, x-momentum, y-momentum, internal energy density
         and species partial densities in the conserved state vector.
     nspec : int
         The number of species
     U_state : ndarray
-        Conserved state vector.
+        Conserved state vector, either for a single zone or for a
+        2-d array of zones.  Zones with no density (like those that
+        the Riemann solvers did not fill) are skipped.
+    out : ndarray, optional
+        Array to store the flux in.  If not given, a new array is
+        allocated.
 
     Returns
     -------
@@ -1128,39 +1208,62 @@ def consFlux(idir, coord_type, gamma,
         Conserved flux
     """
 
-    F = np.zeros_like(U_state)
+    if out is None:
+        F = np.zeros_like(U_state)
+    else:
+        F = out
 
-    u = U_state[..., ixmom] / U_state[..., idens]
-    v = U_state[..., iymom] / U_state[..., idens]
+    if U_state.ndim == 1:
+        _zone_flux(idir, coord_type, eos_data,
+                   idens, ixmom, iymom, iener, irhoX, nspec,
+                   U_state, F)
+    else:
+        for i in range(U_state.shape[0]):
+            for j in range(U_state.shape[1]):
+                if U_state[i, j, idens] != 0.0:
+                    _zone_flux(idir, coord_type, eos_data,
+                               idens, ixmom, iymom, iener, irhoX, nspec,
+                               U_state[i, j, :], F[i, j, :])
 
-    p = (U_state[..., iener] - 0.5 * U_state[..., idens] * (u * u + v * v)) * (gamma - 1.0)
+    return F
+
+
+@njit(cache=True)
+def _zone_flux(idir, coord_type, eos_data,
+               idens, ixmom, iymom, iener, irhoX, nspec,
+               U, F):
+    """the conservative flux of a single zone, as described in consFlux"""
+
+    u = U[ixmom] / U[idens]
+    v = U[iymom] / U[idens]
+
+    rhoe = U[iener] - 0.5 * U[idens] * (u * u + v * v)
+    p = eos.pres_from_rhoe(eos_data, U[idens], rhoe)
 
     if idir == 1:
-        F[..., idens] = U_state[..., idens] * u
-        F[..., ixmom] = U_state[..., ixmom] * u
+        F[idens] = U[idens] * u
+        F[ixmom] = U[ixmom] * u
 
         # if Cartesian2d, then add pressure to xmom flux
         if coord_type == 0:
-            F[..., ixmom] += p
+            F[ixmom] += p
 
-        F[..., iymom] = U_state[..., iymom] * u
-        F[..., iener] = (U_state[..., iener] + p) * u
+        F[iymom] = U[iymom] * u
+        F[iener] = (U[iener] + p) * u
 
         if nspec > 0:
-            F[..., irhoX:irhoX + nspec] = U_state[..., irhoX:irhoX + nspec] * u
+            F[irhoX:irhoX + nspec] = U[irhoX:irhoX + nspec] * u
 
     else:
-        F[..., idens] = U_state[..., idens] * v
-        F[..., ixmom] = U_state[..., ixmom] * v
-        F[..., iymom] = U_state[..., iymom] * v
+        F[idens] = U[idens] * v
+        F[ixmom] = U[ixmom] * v
+        F[iymom] = U[iymom] * v
 
         # if Cartesian2d, then add pressure to ymom flux
         if coord_type == 0:
-            F[..., iymom] += p
+            F[iymom] += p
 
-        F[..., iener] = (U_state[..., iener] + p) * v
+        F[iener] = (U[iener] + p) * v
 
         if nspec > 0:
-            F[..., irhoX:irhoX + nspec] = U_state[..., irhoX:irhoX + nspec] * v
-
-    return F
+            F[irhoX:irhoX + nspec] = U[irhoX:irhoX + nspec] * v
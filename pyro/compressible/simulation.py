@@ -3,7 +3,10 @@ import numpy as np
 
 import pyro.compressible.unsplit_fluxes as flx
 import pyro.mesh.boundary as bnd
-from pyro.compressible import BC, derives, eos, riemann
+from pyro.compressible import BC, derives, eos
+from pyro.compressible import interface as ifc
+from pyro.compressible import riemann
+from pyro.compressible.fused import fused_update
 from pyro.particles import particles
 from pyro.simulation_null import NullSimulation, bc_setup, grid_setup
 from pyro.util import msg, plot_tools
@@ -46,8 +49,9 @@ class Variables:
             self.ix = -1
 
 
-def cons_to_prim(U, gamma, ivars, myg):
-    """ convert an input vector of conserved variables to primitive variables """
+def cons_to_prim(U, my_eos, ivars, myg):
+    """ convert an input vector of conserved variables to primitive
+    variables, using the EOS object my_eos """
 
     q = myg.scratch_array(nvar=ivars.nq)
 
@@ -59,7 +63,7 @@ def cons_to_prim(U, gamma, ivars, myg):
          0.5*q[:, :, ivars.irho]*(q[:, :, ivars.iu]**2 +
                                   q[:, :, ivars.iv]**2))/q[:, :, ivars.irho]
 
-    q[:, :, ivars.ip] = eos.pres(gamma, q[:, :, ivars.irho], e)
+    q[:, :, ivars.ip] = my_eos.pres(q[:, :, ivars.irho], e)
 
     if ivars.naux > 0:
         for nq, nu in zip(range(ivars.ix, ivars.ix+ivars.naux),
@@ -69,8 +73,20 @@ def cons_to_prim(U, gamma, ivars, myg):
     return q
 
 
-def prim_to_cons(q, gamma, ivars, myg):
-    """ convert an input vector of primitive variables to conserved variables """
+def state_to_prim(my_data, my_eos, ivars):
+    """ return the primitive variables for the current state of the
+    CellCenterData2d object my_data.  Inside of a cache_scope(), the
+    conversion is only done once for each version of the state, so
+    the result must not be modified. """
+
+    return my_data.cached("primitive",
+                          lambda: cons_to_prim(my_data.data, my_eos,
+                                               ivars, my_data.grid))
+
+
+def prim_to_cons(q, my_eos, ivars, myg):
+    """ convert an input vector of primitive variables to conserved
+    variables, using the EOS object my_eos """
 
     U = myg.scratch_array(nvar=ivars.nvar)
 
@@ -78,7 +94,7 @@ def prim_to_cons(q, gamma, ivars, myg):
     U[:, :, ivars.ixmom] = q[:, :, ivars.iu]*U[:, :, ivars.idens]
     U[:, :, ivars.iymom] = q[:, :, ivars.iv]*U[:, :, ivars.idens]
 
-    rhoe = eos.rhoe(gamma, q[:, :, ivars.ip])
+    rhoe = my_eos.rhoe(q[:, :, ivars.irho], q[:, :, ivars.ip])
 
     U[:, :, ivars.iener] = rhoe + 0.5*q[:, :, ivars.irho]*(q[:, :, ivars.iu]**2 +
                                                            q[:, :, ivars.iv]**2)
@@ -156,10 +172,11 @@ class Simulation(NullSimulation):
             for v in extra_vars:
                 my_data.register_var(v, bc)
 
-        # store the EOS gamma as an auxiliary quantity so we can have a
-        # self-contained object stored in output files to make plots.
+        # store the EOS (gamma and any other EOS parameters) as
+        # auxiliary quantities so we can have a self-contained object
+        # stored in output files to make plots.
         # store grav because we'll need that in some BCs
-        my_data.set_aux("gamma", self.rp.get_param("eos.gamma"))
+        eos.EOS.from_params(self.rp).set_aux(my_data)
         my_data.set_aux("grav", self.rp.get_param("compressible.grav"))
 
         my_data.create()
@@ -202,16 +219,16 @@ class Simulation(NullSimulation):
 
         cfl = self.rp.get_param("driver.cfl")
 
-        # get the variables we need
-        u, v, cs = self.cc_data.get_var(["velocity", "soundspeed"])
-
         grid = self.cc_data.grid
 
-        # the timestep is min(dx/(|u| + cs), dy/(|v| + cs))
-        xtmp = grid.Lx / (abs(u) + cs)
-        ytmp = grid.Ly / (abs(v) + cs)
+        # the timestep is min(dx/(|u| + cs), dy/(|v| + cs)) -- this is
+        # found in one pass over the conserved state
+        dt = ifc.timestep(self.ivars.idens, self.ivars.ixmom,
+                          self.ivars.iymom, self.ivars.iener,
+                          eos.EOS.from_aux(self.cc_data).data,
+                          grid.Lx, grid.Ly, self.cc_data.data)
 
-        self.dt = cfl*float(min(xtmp.min(), ytmp.min()))
+        self.dt = cfl*float(dt)
 
     def evolve(self):
         """
@@ -228,110 +245,125 @@ class Simulation(NullSimulation):
         ener = self.cc_data.get_var("energy")
 
         grav = self.rp.get_param("compressible.grav")
-        gamma = self.rp.get_param("eos.gamma")
+        my_eos = eos.EOS.from_params(self.rp)
 
         myg = self.cc_data.grid
 
-        # First get conserved states normal to the x and y interface
-        U_xl, U_xr, U_yl, U_yr = flx.interface_states(self.cc_data, self.rp,
-                                                      self.ivars, self.tc, self.dt)
+        try:
+            fused = self.rp.get_param("compressible.fused")
+        except KeyError:
+            fused = 0
 
-        # Apply source terms to them.
-        # This includes external (gravity), geometric and pressure terms for SphericalPolar
-        # Only gravitional source for Cartesian2d
-        U_xl, U_xr, U_yl, U_yr = flx.apply_source_terms(U_xl, U_xr, U_yl, U_yr,
-                                                        self.cc_data, self.aux_data, self.rp,
-                                                        self.ivars, self.tc, self.dt)
+        if fused:
+            # do the entire update (including the gravity sources)
+            # tile-by-tile
+            fused_update(self.cc_data, self.aux_data, self.rp, self.ivars,
+                         self.solid, self.tc, self.dt)
 
-        # Apply transverse corrections.
-        U_xl, U_xr, U_yl, U_yr = flx.apply_transverse_flux(U_xl, U_xr, U_yl, U_yr,
-                                                           self.cc_data, self.rp, self.ivars,
-                                                           self.solid, self.tc, self.dt)
+        else:
+            # First get conserved states normal to the x and y interface
+            U_xl, U_xr, U_yl, U_yr = flx.interface_states(self.cc_data, self.rp,
+                                                          self.ivars, self.tc, self.dt)
 
-        # Get the actual interface conserved state after using Riemann Solver
-        # Then construct the corresponding fluxes using the conserved states
+            # Apply source terms to them.
+            # This includes external (gravity), geometric and pressure terms for SphericalPolar
+            # Only gravitional source for Cartesian2d
+            U_xl, U_xr, U_yl, U_yr = flx.apply_source_terms(U_xl, U_xr, U_yl, U_yr,
+                                                            self.cc_data, self.aux_data, self.rp,
+                                                            self.ivars, self.tc, self.dt)
 
-        if myg.coord_type == 1:
-            # We need pressure from interface state for conservative update for
-            # SphericalPolar geometry. So we need interface conserved states.
-            F_x, U_x = riemann.riemann_flux(1, U_xl, U_xr,
-                                            self.cc_data, self.rp, self.ivars,
-                                            self.solid.xl, self.solid.xr, self.tc,
-                                            return_cons=True)
-
-            F_y, U_y = riemann.riemann_flux(2, U_yl, U_yr,
-                                            self.cc_data, self.rp, self.ivars,
-                                            self.solid.yl, self.solid.yr, self.tc,
-                                            return_cons=True)
-
-            # Find primitive variable since we need pressure in conservative update.
-            qx = cons_to_prim(U_x, gamma, self.ivars, myg)
-            qy = cons_to_prim(U_y, gamma, self.ivars, myg)
+            # Apply transverse corrections.
+            U_xl, U_xr, U_yl, U_yr = flx.apply_transverse_flux(U_xl, U_xr, U_yl, U_yr,
+                                                               self.cc_data, self.rp, self.ivars,
+                                                               self.solid, self.tc, self.dt)
 
-        else:
-            # Directly calculate the interface flux using Riemann Solver
-            F_x = riemann.riemann_flux(1, U_xl, U_xr,
-                                       self.cc_data, self.rp, self.ivars,
-                                       self.solid.xl, self.solid.xr, self.tc,
-                                       return_cons=False)
+            # Get the actual interface conserved state after using Riemann Solver
+            # Then construct the corresponding fluxes using the conserved states
 
-            F_y = riemann.riemann_flux(2, U_yl, U_yr,
-                                       self.cc_data, self.rp, self.ivars,
-                                       self.solid.yl, self.solid.yr, self.tc,
-                                       return_cons=False)
+            if myg.coord_type == 1:
+                # We need pressure from interface state for conservative update for
+                # SphericalPolar geometry. So we need interface conserved states.
+                F_x, U_x = riemann.riemann_flux(1, U_xl, U_xr,
+                                                self.cc_data, self.rp, self.ivars,
+                                                self.solid.xl, self.solid.xr, self.tc,
+                                                return_cons=True)
+
+                F_y, U_y = riemann.riemann_flux(2, U_yl, U_yr,
+                                                self.cc_data, self.rp, self.ivars,
+                                                self.solid.yl, self.solid.yr, self.tc,
+                                                return_cons=True)
+
+                # Find primitive variable since we need pressure in conservative update.
+                qx = cons_to_prim(U_x, my_eos, self.ivars, myg)
+                qy = cons_to_prim(U_y, my_eos, self.ivars, myg)
 
-        # Apply artificial viscosity to fluxes
+            else:
+                # Directly calculate the interface flux using Riemann Solver
+                F_x = riemann.riemann_flux(1, U_xl, U_xr,
+                                           self.cc_data, self.rp, self.ivars,
+                                           self.solid.xl, self.solid.xr, self.tc,
+                                           return_cons=False)
 
-        q = cons_to_prim(self.cc_data.data, gamma, self.ivars, myg)
+                F_y = riemann.riemann_flux(2, U_yl, U_yr,
+                                           self.cc_data, self.rp, self.ivars,
+                                           self.solid.yl, self.solid.yr, self.tc,
+                                           return_cons=False)
 
-        F_x, F_y = flx.apply_artificial_viscosity(F_x, F_y, q,
-                                                  self.cc_data, self.rp,
-                                                  self.ivars)
+            # Apply artificial viscosity to fluxes
 
-        old_dens = dens.copy()
-        old_xmom = xmom.copy()
-        old_ymom = ymom.copy()
+            q = state_to_prim(self.cc_data, my_eos, self.ivars)
 
-        # Conservative update
+            F_x, F_y = flx.apply_artificial_viscosity(F_x, F_y, q,
+                                                      self.cc_data, self.rp,
+                                                      self.ivars)
 
-        # Apply contribution due to fluxes
-        dtdV = self.dt / myg.V.v()
+            old_dens = dens.copy()
+            old_xmom = xmom.copy()
+            old_ymom = ymom.copy()
 
-        for n in range(self.ivars.nvar):
-            var = self.cc_data.get_var_by_index(n)
+            # Conservative update
 
-            var.v()[:, :] += dtdV * \
-                (F_x.v(n=n)*myg.Ax.v() - F_x.ip(1, n=n)*myg.Ax.ip(1) +
-                 F_y.v(n=n)*myg.Ay.v() - F_y.jp(1, n=n)*myg.Ay.jp(1))
+            # Apply contribution due to fluxes
+            dtdV = self.dt / myg.V.v()
 
-        # Now apply external sources
+            for n in range(self.ivars.nvar):
+                var = self.cc_data.get_var_by_index(n)
 
-        # For SphericalPolar (coord_type == 1):
-        # There are gravity (external) sources,
-        # geometric terms due to local unit vectors, and pressure gradient
-        # since we don't include pressure in xmom and ymom fluxes
-        # due to incompatible divergence and gradient in non-Cartesian geometry
+                var.v()[:, :] += dtdV * \
+                    (F_x.v(n=n)*myg.Ax.v() - F_x.ip(1, n=n)*myg.Ax.ip(1) +
+                     F_y.v(n=n)*myg.Ay.v() - F_y.jp(1, n=n)*myg.Ay.jp(1))
 
-        # For Cartesian2d (coord_type == 0):
-        # There is only gravity sources.
+            # Now apply external sources
 
-        if myg.coord_type == 1:
-            xmom.v()[:, :] += 0.5*self.dt * \
-                ((dens.v() + old_dens.v())*grav +
-                 (ymom.v()**2 / dens.v() +
-                  old_ymom.v()**2 / old_dens.v()) / myg.x2d.v()) - \
-                self.dt * (qx.ip(1, n=self.ivars.ip) - qx.v(n=self.ivars.ip)) / myg.Lx.v()
+            # For SphericalPolar (coord_type == 1):
+            # There are gravity (external) sources,
+            # geometric terms due to local unit vectors, and pressure gradient
+            # since we don't include pressure in xmom and ymom fluxes
+            # due to incompatible divergence and gradient in non-Cartesian geometry
 
-            ymom.v()[:, :] += 0.5*self.dt * \
-                (-xmom.v()*ymom.v() / dens.v() -
-                 old_xmom.v()*old_ymom.v() / old_dens.v()) / myg.x2d.v() - \
-                self.dt * (qy.jp(1, n=self.ivars.ip) - qy.v(n=self.ivars.ip)) / myg.Ly.v()
+            # For Cartesian2d (coord_type == 0):
+            # There is only gravity sources.
 
-            ener.v()[:, :] += 0.5*self.dt*(xmom.v() + old_xmom.v())*grav
+            if myg.coord_type == 1:
+                xmom.v()[:, :] += 0.5*self.dt * \
+                    ((dens.v() + old_dens.v())*grav +
+                     (ymom.v()**2 / dens.v() +
+                      old_ymom.v()**2 / old_dens.v()) / myg.x2d.v()) - \
+                    self.dt * (qx.ip(1, n=self.ivars.ip) - qx.v(n=self.ivars.ip)) / myg.Lx.v()
 
-        else:
-            ymom.v()[:, :] += 0.5*self.dt*(dens.v() + old_dens.v())*grav
-            ener.v()[:, :] += 0.5*self.dt*(ymom.v() + old_ymom.v())*grav
+                ymom.v()[:, :] += 0.5*self.dt * \
+                    (-xmom.v()*ymom.v() / dens.v() -
+                     old_xmom.v()*old_ymom.v() / old_dens.v()) / myg.x2d.v() - \
+                    self.dt * (qy.jp(1, n=self.ivars.ip) - qy.v(n=self.ivars.ip)) / myg.Ly.v()
+
+                ener.v()[:, :] += 0.5*self.dt*(xmom.v() + old_xmom.v())*grav
+
+            else:
+                ymom.v()[:, :] += 0.5*self.dt*(dens.v() + old_dens.v())*grav
+                ener.v()[:, :] += 0.5*self.dt*(ymom.v() + old_ymom.v())*grav
+
+        # the conserved state was updated in place
+        self.cc_data.state_changed()
 
         if self.particles is not None:
             self.particles.update_particles(self.dt)
@@ -355,17 +387,17 @@ class Simulation(NullSimulation):
         # we are plotting from a file
         ivars = Variables(self.cc_data)
 
-        # access gamma from the cc_data object so we can use dovis
+        # access the EOS from the cc_data object so we can use dovis
         # outside of a running simulation.
-        gamma = self.cc_data.get_aux("gamma")
+        my_eos = eos.EOS.from_aux(self.cc_data)
 
-        q = cons_to_prim(self.cc_data.data, gamma, ivars, self.cc_data.grid)
+        q = cons_to_prim(self.cc_data.data, my_eos, ivars, self.cc_data.grid)
 
         rho = q[:, :, ivars.irho]
         u = q[:, :, ivars.iu]
         v = q[:, :, ivars.iv]
         p = q[:, :, ivars.ip]
-        e = eos.rhoe(gamma, p)/rho
+        e = my_eos.rhoe(rho, p)/rho
 
         magvel = np.sqrt(u**2 + v**2)
 
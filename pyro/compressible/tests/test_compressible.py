@@ -1,9 +1,13 @@
 import numpy as np
 import pytest
-from numpy.testing import assert_array_equal
+from numpy.testing import assert_allclose, assert_array_equal
 
 import pyro.compressible.simulation as sim
+from pyro import Pyro
+from pyro.compressible import eos
+from pyro.compressible import interface as ifc
 from pyro.compressible.problems import test
+from pyro.mesh import patch
 from pyro.util import runparams
 
 
@@ -45,14 +49,14 @@ class TestSimulation:
     def test_prim(self):
 
         # U -> q
-        gamma = self.sim.cc_data.get_aux("gamma")
-        q = sim.cons_to_prim(self.sim.cc_data.data, gamma, self.sim.ivars, self.sim.cc_data.grid)
+        my_eos = eos.EOS.from_aux(self.sim.cc_data)
+        q = sim.cons_to_prim(self.sim.cc_data.data, my_eos, self.sim.ivars, self.sim.cc_data.grid)
 
         assert q[:, :, self.sim.ivars.ip].min() == pytest.approx(1.0) and \
                q[:, :, self.sim.ivars.ip].max() == pytest.approx(1.0)
 
         # q -> U
-        U = sim.prim_to_cons(q, gamma, self.sim.ivars, self.sim.cc_data.grid)
+        U = sim.prim_to_cons(q, my_eos, self.sim.ivars, self.sim.cc_data.grid)
         assert_array_equal(U, self.sim.cc_data.data)
 
     def test_derives(self):
@@ -60,3 +64,177 @@ class TestSimulation:
         gamma = self.sim.cc_data.get_aux("gamma")
         cs = self.sim.cc_data.get_var("soundspeed")
         assert np.all(cs == np.sqrt(gamma))
+
+    def test_timestep(self):
+
+        # give the state some velocity, so both directions matter
+        xmom = self.sim.cc_data.get_var("x-momentum")
+        xmom[:, :] = 0.5
+        self.sim.cc_data.fill_BC_all()
+
+        self.rp.params["driver.cfl"] = 0.8
+        self.sim.method_compute_timestep()
+
+        u, v, cs = self.sim.cc_data.get_var(["velocity", "soundspeed"])
+        grid = self.sim.cc_data.grid
+        dt = 0.8*min((grid.Lx/(abs(u) + cs)).min(), (grid.Ly/(abs(v) + cs)).min())
+
+        assert self.sim.dt == dt
+
+
+# the fused, tiled update should give exactly the same answer as the
+# standard update
+@pytest.mark.parametrize("riemann", ["HLLC", "CGF"])
+def test_fused_update(riemann):
+
+    results = []
+    for fused in [0, 1]:
+        pyro_sim = Pyro("compressible")
+        pyro_sim.initialize_problem("rt", inputs_dict={"mesh.nx": 24,
+                                                       "mesh.ny": 40,
+                                                       "driver.max_steps": 5,
+                                                       "compressible.riemann": riemann,
+                                                       "compressible.fused": fused,
+                                                       "compressible.tile_size": 16})
+        pyro_sim.run_sim()
+        results.append(pyro_sim.sim.cc_data.data)
+
+    assert_array_equal(results[0], results[1])
+
+
+# the Riemann fluxes come from the scratch pool, when it is enabled, so
+# they are only allocated in the first step
+@pytest.mark.parametrize("riemann", ["HLLC", "CGF"])
+def test_riemann_flux_pool(riemann):
+
+    results = []
+    allocs = []
+    for pool in [0, 1]:
+        pyro_sim = Pyro("compressible")
+        pyro_sim.initialize_problem("rt", inputs_dict={"mesh.nx": 24,
+                                                       "mesh.ny": 40,
+                                                       "driver.max_steps": 5,
+                                                       "compressible.riemann": riemann,
+                                                       "driver.scratch_pool": pool})
+        pyro_sim.run_sim()
+        results.append(pyro_sim.sim.cc_data.data)
+        allocs.append(pyro_sim.tc.timer("riemann").n_allocs)
+
+    assert_array_equal(results[0], results[1])
+    assert allocs[1] < allocs[0]
+
+
+# a stiffened gas with no stiffening and a table made from a gamma-law
+# gas should both give nearly the same answer as the gamma-law EOS
+@pytest.mark.parametrize("riemann", ["HLLC", "CGF"])
+def test_general_eos(riemann, tmp_path):
+
+    table_file = str(tmp_path / "table.npy")
+    np.save(table_file, eos.tabulate(eos.pack(eos.GAMMA_LAW, 1.4),
+                                     1.e-2, 10.0, 128, 0.1, 10.0, 128))
+
+    results = []
+    for eos_type in ["gamma-law", "stiffened-gas", "tabulated"]:
+        pyro_sim = Pyro("compressible")
+        pyro_sim.initialize_problem("sod", inputs_file="inputs.sod.x",
+                                    inputs_dict={"mesh.nx": 64,
+                                                 "driver.max_steps": 10,
+                                                 "compressible.riemann": riemann,
+                                                 "eos.type": eos_type,
+                                                 "eos.table_file": table_file})
+        pyro_sim.run_sim()
+        results.append(pyro_sim.sim.cc_data.data.v(n=0))
+
+    assert_allclose(results[1], results[0], rtol=1.e-12)
+    assert_allclose(results[2], results[0], rtol=1.e-3)
+
+
+# inside of a step, the primitive variables are only computed once
+# for each version of the state
+def test_primitive_cache():
+
+    pyro_sim = Pyro("compressible")
+    pyro_sim.initialize_problem("rt", inputs_dict={"mesh.nx": 8,
+                                                   "mesh.ny": 16})
+
+    cc_data = pyro_sim.sim.cc_data
+    my_eos = eos.EOS.from_aux(cc_data)
+    ivars = pyro_sim.sim.ivars
+
+    with cc_data.cache_scope():
+        q = sim.state_to_prim(cc_data, my_eos, ivars)
+        assert sim.state_to_prim(cc_data, my_eos, ivars) is q
+        assert_array_equal(q, sim.cons_to_prim(cc_data.data, my_eos, ivars, cc_data.grid))
+
+        p = cc_data.get_var("pressure")
+        assert cc_data.get_var("pressure") is p
+
+        cc_data.fill_BC_all()
+        assert sim.state_to_prim(cc_data, my_eos, ivars) is not q
+        assert cc_data.get_var("pressure") is not p
+
+
+# the compiled source and transverse flux kernels should match the
+# array-based updates
+def test_transverse_flux():
+
+    myg = patch.Cartesian2d(8, 6, ng=4)
+    rng = np.random.default_rng(12345)
+
+    U = [myg.scratch_array(nvar=4) for _ in range(4)]
+    F_x = myg.scratch_array(nvar=4)
+    F_y = myg.scratch_array(nvar=4)
+    src = myg.scratch_array()
+    for a in U + [F_x, F_y, src]:
+        a[...] = rng.uniform(size=a.shape)
+
+    dt = 0.1
+    U_ref = [u.copy() for u in U]
+
+    ifc.add_source_terms(myg.ng, dt, 1, 2, 3, src, src, src, *U)
+    ifc.transverse_flux(myg.ng, dt, myg.V, myg.Ax, myg.Ay, F_x, F_y, *U)
+
+    U_xl, U_xr, U_yl, U_yr = U_ref
+    for n in [1, 2, 3]:
+        U_xl.v(buf=1, n=n)[:, :] += 0.5*dt*src.ip(-1, buf=1)
+        U_xr.v(buf=1, n=n)[:, :] += 0.5*dt*src.v(buf=1)
+        U_yl.v(buf=1, n=n)[:, :] += 0.5*dt*src.jp(-1, buf=1)
+        U_yr.v(buf=1, n=n)[:, :] += 0.5*dt*src.v(buf=1)
+
+    b = (2, 1)
+    hdtV = 0.5*dt / myg.V
+    for n in range(4):
+        U_xl.v(buf=b, n=n)[:, :] -= hdtV.v(buf=b)*(F_y.ip_jp(-1, 1, buf=b, n=n)*myg.Ay.ip_jp(-1, 1, buf=b) -
+                                                   F_y.ip(-1, buf=b, n=n)*myg.Ay.ip(-1, buf=b))
+        U_xr.v(buf=b, n=n)[:, :] -= hdtV.v(buf=b)*(F_y.jp(1, buf=b, n=n)*myg.Ay.jp(1, buf=b) -
+                                                   F_y.v(buf=b, n=n)*myg.Ay.v(buf=b))
+        U_yl.v(buf=b, n=n)[:, :] -= hdtV.v(buf=b)*(F_x.ip_jp(1, -1, buf=b, n=n)*myg.Ax.ip_jp(1, -1, buf=b) -
+                                                   F_x.jp(-1, buf=b, n=n)*myg.Ax.jp(-1, buf=b))
+        U_yr.v(buf=b, n=n)[:, :] -= hdtV.v(buf=b)*(F_x.ip(1, buf=b, n=n)*myg.Ax.ip(1, buf=b) -
+                                                   F_x.v(buf=b, n=n)*myg.Ax.v(buf=b))
+
+    for u, u_ref in zip(U, U_ref):
+        assert_array_equal(u, u_ref)
+
+
+# a single precision run should store its state in float32 and stay
+# close to the double precision run
+def test_single_precision():
+
+    results = {}
+    for precision in ["double", "single"]:
+        pyro_sim = Pyro("compressible")
+        pyro_sim.initialize_problem("sod", inputs_file="inputs.sod.x",
+                                    inputs_dict={"driver.max_steps": 20,
+                                                 "driver.precision": precision})
+        pyro_sim.run_sim()
+        results[precision] = pyro_sim.sim.cc_data
+
+    cc_data = results["single"]
+    assert cc_data.data.dtype == np.float32
+    assert cc_data.grid.scratch_array().dtype == np.float32
+
+    for name in cc_data.names:
+        assert_allclose(cc_data.get_var(name).v(),
+                        results["double"].get_var(name).v(),
+                        rtol=1.e-5, atol=1.e-6)
@@ -1,3 +1,7 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
 from pyro.compressible import eos
 
 
@@ -16,3 +20,87 @@ def test_eos_consistency():
     rhoe_eos = eos.rhoe(gamma, p)
 
     assert dens*eint == rhoe_eos
+
+
+def test_gamma_law():
+
+    gamma = 1.4
+    eos_data = eos.pack(eos.GAMMA_LAW, gamma)
+
+    dens = 2.0
+    rhoe = 3.0
+
+    p, cs = eos.pres_soundspeed(eos_data, dens, rhoe)
+
+    assert p == rhoe*(gamma - 1.0)
+    assert cs == np.sqrt(gamma*p/dens)
+    assert eos.rhoe_from_pres(eos_data, dens, p) == eos.rhoe(gamma, p)
+    assert eos.gamma1(eos_data, dens, p) == gamma
+
+
+def test_stiffened_gas():
+
+    gamma = 4.4
+    p_inf = 6.e3
+    eos_data = eos.pack(eos.STIFFENED_GAS, gamma, p_inf)
+
+    dens = 1.0
+    rhoe = 2.e4
+
+    p, cs = eos.pres_soundspeed(eos_data, dens, rhoe)
+
+    assert p == pytest.approx(rhoe*(gamma - 1.0) - gamma*p_inf)
+    assert eos.rhoe_from_pres(eos_data, dens, p) == pytest.approx(rhoe)
+    assert eos.gamma1(eos_data, dens, p) == pytest.approx(dens*cs**2/p)
+
+
+def test_tabulated():
+
+    gamma = 1.4
+    table = eos.tabulate(eos.pack(eos.GAMMA_LAW, gamma),
+                         1.e-3, 1.e3, 64, 1.e-2, 1.e3, 128)
+
+    dens = 0.7
+    eint = 2.5
+
+    # the interpolated table should be close to the gamma-law -- the
+    # linear interpolation in log rho and log e is good to < 1%
+    p, cs = eos.pres_soundspeed(table, dens, dens*eint)
+
+    assert p == pytest.approx(eos.pres(gamma, dens, eint), rel=1.e-2)
+    assert cs == pytest.approx(np.sqrt(gamma*(gamma - 1.0)*eint), rel=1.e-2)
+
+    # and the inversion for the energy is exact for the interpolated
+    # table
+    assert eos.rhoe_from_pres(table, dens, p) == pytest.approx(dens*eint, rel=1.e-12)
+    assert eos.soundspeed(table, dens, p) == pytest.approx(cs, rel=1.e-12)
+
+
+def test_tabulated_eos_object(tmp_path):
+
+    gamma = 1.4
+    table_file = tmp_path / "table.npy"
+    np.save(table_file, eos.tabulate(eos.pack(eos.GAMMA_LAW, gamma),
+                                     1.e-3, 1.e3, 64, 1.e-2, 1.e3, 128))
+
+    my_eos = eos.EOS("tabulated", gamma, 0.0, str(table_file))
+
+    rng = np.random.default_rng(12345)
+    dens = rng.uniform(0.5, 2.0, (8, 6))
+    eint = rng.uniform(1.0, 3.0, (8, 6))
+
+    p = my_eos.pres(dens, eint)
+    assert p.shape == dens.shape
+    assert_allclose(p, eos.pres(gamma, dens, eint), rtol=1.e-2)
+    assert_allclose(my_eos.rhoe(dens, p), dens*eint, rtol=1.e-12)
+
+    # asking again, with some zones changed, only recomputes those
+    # zones, but gives the same answer as an uncached lookup
+    eint[2:4, :] *= 1.5
+    p_new = my_eos.pres(dens, eint)
+    cs_new = my_eos.soundspeed(dens, eint)
+
+    ref_eos = eos.EOS("tabulated", gamma, 0.0, str(table_file))
+    assert np.array_equal(p_new, ref_eos.pres(dens, eint))
+    assert np.array_equal(cs_new, ref_eos.soundspeed(dens, eint))
+    assert np.array_equal(p_new[4:, :], p[4:, :])
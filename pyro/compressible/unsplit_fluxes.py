@@ -127,7 +127,7 @@ Updating U_{i,j}:
 import pyro.compressible as comp
 import pyro.compressible.interface as ifc
 import pyro.mesh.array_indexer as ai
-from pyro.compressible import riemann
+from pyro.compressible import eos, riemann
 from pyro.mesh import reconstruction
 
 
@@ -159,31 +159,22 @@ def interface_states(my_data, rp, ivars, tc, dt):
     """
 
     myg = my_data.grid
-    gamma = rp.get_param("eos.gamma")
+    my_eos = eos.EOS.from_params(rp)
 
     # =========================================================================
     # compute the primitive variables
     # =========================================================================
     # Q = (rho, u, v, p, {X})
 
-    q = comp.cons_to_prim(my_data.data, gamma, ivars, myg)
+    q = comp.state_to_prim(my_data, my_eos, ivars)
 
     # =========================================================================
-    # compute the flattening coefficients
+    # compute the flattened, limited slopes
     # =========================================================================
 
-    # there is a single flattening coefficient (xi) for all directions
-    use_flattening = rp.get_param("compressible.use_flattening")
-
-    if use_flattening:
-        xi_x = reconstruction.flatten(myg, q, 1, ivars, rp)
-        xi_y = reconstruction.flatten(myg, q, 2, ivars, rp)
-
-        xi = reconstruction.flatten_multid(myg, q, xi_x, xi_y, ivars)
-    else:
-        xi = 1.0
-
-    # monotonized central differences
+    # there is a single flattening coefficient (xi) for all
+    # directions.  The monotonized central differences of all of the
+    # variables are found together with it.
     tm_limit = tc.timer("limiting")
     tm_limit.begin()
 
@@ -192,9 +183,13 @@ def interface_states(my_data, rp, ivars, tc, dt):
     ldx = myg.scratch_array(nvar=ivars.nvar)
     ldy = myg.scratch_array(nvar=ivars.nvar)
 
-    for n in range(ivars.nvar):
-        ldx[:, :, n] = xi*reconstruction.limit(q[:, :, n], myg, 1, limiter)
-        ldy[:, :, n] = xi*reconstruction.limit(q[:, :, n], myg, 2, limiter)
+    reconstruction.limited_slopes(q, myg.ng, limiter,
+                                  rp.get_param("compressible.use_flattening"),
+                                  ivars.ip, ivars.iu, ivars.iv,
+                                  rp.get_param("compressible.delta"),
+                                  rp.get_param("compressible.z0"),
+                                  rp.get_param("compressible.z1"),
+                                  ldx, ldy)
 
     tm_limit.end()
 
@@ -209,14 +204,14 @@ def interface_states(my_data, rp, ivars, tc, dt):
     V_l, V_r = ifc.states(1, myg.ng, myg.Lx, dt,
                           ivars.irho, ivars.iu, ivars.iv, ivars.ip, ivars.ix,
                           ivars.naux,
-                          gamma,
+                          my_eos.data,
                           q, ldx)
 
     tm_states.end()
 
     # transform primitive interface states back into conserved variables
-    U_xl = comp.prim_to_cons(V_l, gamma, ivars, myg)
-    U_xr = comp.prim_to_cons(V_r, gamma, ivars, myg)
+    U_xl = comp.prim_to_cons(V_l, my_eos, ivars, myg)
+    U_xr = comp.prim_to_cons(V_r, my_eos, ivars, myg)
 
     # =========================================================================
     # y-direction
@@ -228,7 +223,7 @@ def interface_states(my_data, rp, ivars, tc, dt):
     _V_l, _V_r = ifc.states(2, myg.ng, myg.Ly, dt,
                             ivars.irho, ivars.iu, ivars.iv, ivars.ip, ivars.ix,
                             ivars.naux,
-                            gamma,
+                            my_eos.data,
                             q, ldy)
     V_l = ai.ArrayIndexer(d=_V_l, grid=myg)
     V_r = ai.ArrayIndexer(d=_V_r, grid=myg)
@@ -236,25 +231,20 @@ def interface_states(my_data, rp, ivars, tc, dt):
     tm_states.end()
 
     # transform primitive interface states back into conserved variables
-    U_yl = comp.prim_to_cons(V_l, gamma, ivars, myg)
-    U_yr = comp.prim_to_cons(V_r, gamma, ivars, myg)
+    U_yl = comp.prim_to_cons(V_l, my_eos, ivars, myg)
+    U_yr = comp.prim_to_cons(V_r, my_eos, ivars, myg)
 
     return U_xl, U_xr, U_yl, U_yr
 
 
-def apply_source_terms(U_xl, U_xr, U_yl, U_yr,
-                       my_data, my_aux, rp, ivars, tc, dt):
+def compute_source_terms(my_data, my_aux, rp, ivars):
     """
-    This function applies source terms including external (gravity),
-    geometric terms, and pressure terms to the left and right
-    interface states (normal conserved states).
-    Both geometric and pressure terms arise purely from geometry.
+    This function computes the source terms, including external
+    (gravity), geometric, and pressure terms, and stores them, with
+    their ghost cells filled, in the auxiliary data.
 
     Parameters
     ----------
-    U_xl, U_xr, U_yl, U_yr: ndarray, ndarray, ndarray, ndarray
-        Conserved states in the left and right x-interface
-        and left and right y-interface.
     my_data : CellCenterData2d object
         The data object containing the grid and advective scalar that
         we are advecting.
@@ -266,21 +256,8 @@ def apply_source_terms(U_xl, U_xr, U_yl, U_yr,
     ivars : Variables object
         The Variables object that tells us which indices refer to which
         variables
-    tc : TimerCollection object
-        The timers we are using to profile
-    dt : float
-        The timestep we are advancing through.
-
-    Returns
-    -------
-    out : ndarray, ndarray, ndarray, ndarray
-        Left and right normal conserved states in x and y interfaces
-        with source terms added.
     """
 
-    tm_source = tc.timer("sourceTerms")
-    tm_source.begin()
-
     myg = my_data.grid
 
     dens = my_data.get_var("density")
@@ -312,25 +289,56 @@ def apply_source_terms(U_xl, U_xr, U_yl, U_yr,
     my_aux.fill_BC("ymom_src")
     my_aux.fill_BC("E_src")
 
-    # U_xl[i,j] += 0.5*dt*source[i-1, j]
-    U_xl.v(buf=1, n=ivars.ixmom)[:, :] += 0.5*dt*xmom_src.ip(-1, buf=1)
-    U_xl.v(buf=1, n=ivars.iymom)[:, :] += 0.5*dt*ymom_src.ip(-1, buf=1)
-    U_xl.v(buf=1, n=ivars.iener)[:, :] += 0.5*dt*E_src.ip(-1, buf=1)
 
-    # U_xr[i,j] += 0.5*dt*source[i, j]
-    U_xr.v(buf=1, n=ivars.ixmom)[:, :] += 0.5*dt*xmom_src.v(buf=1)
-    U_xr.v(buf=1, n=ivars.iymom)[:, :] += 0.5*dt*ymom_src.v(buf=1)
-    U_xr.v(buf=1, n=ivars.iener)[:, :] += 0.5*dt*E_src.v(buf=1)
+def apply_source_terms(U_xl, U_xr, U_yl, U_yr,
+                       my_data, my_aux, rp, ivars, tc, dt):
+    """
+    This function applies source terms including external (gravity),
+    geometric terms, and pressure terms to the left and right
+    interface states (normal conserved states).
+    Both geometric and pressure terms arise purely from geometry.
+
+    Parameters
+    ----------
+    U_xl, U_xr, U_yl, U_yr: ndarray, ndarray, ndarray, ndarray
+        Conserved states in the left and right x-interface
+        and left and right y-interface.
+    my_data : CellCenterData2d object
+        The data object containing the grid and advective scalar that
+        we are advecting.
+    my_aux : CellCenterData2d object
+        The data object that carries auxiliary quantities which we need
+        to fill in the ghost cells.
+    rp : RuntimeParameters object
+        The runtime parameters for the simulation
+    ivars : Variables object
+        The Variables object that tells us which indices refer to which
+        variables
+    tc : TimerCollection object
+        The timers we are using to profile
+    dt : float
+        The timestep we are advancing through.
+
+    Returns
+    -------
+    out : ndarray, ndarray, ndarray, ndarray
+        Left and right normal conserved states in x and y interfaces
+        with source terms added.
+    """
+
+    tm_source = tc.timer("sourceTerms")
+    tm_source.begin()
+
+    compute_source_terms(my_data, my_aux, rp, ivars)
 
-    # U_yl[i,j] += 0.5*dt*source[i, j-1]
-    U_yl.v(buf=1, n=ivars.ixmom)[:, :] += 0.5*dt*xmom_src.jp(-1, buf=1)
-    U_yl.v(buf=1, n=ivars.iymom)[:, :] += 0.5*dt*ymom_src.jp(-1, buf=1)
-    U_yl.v(buf=1, n=ivars.iener)[:, :] += 0.5*dt*E_src.jp(-1, buf=1)
+    xmom_src = my_aux.get_var("xmom_src")
+    ymom_src = my_aux.get_var("ymom_src")
+    E_src = my_aux.get_var("E_src")
 
-    # U_yr[i,j] += 0.5*dt*source[i, j]
-    U_yr.v(buf=1, n=ivars.ixmom)[:, :] += 0.5*dt*xmom_src.v(buf=1)
-    U_yr.v(buf=1, n=ivars.iymom)[:, :] += 0.5*dt*ymom_src.v(buf=1)
-    U_yr.v(buf=1, n=ivars.iener)[:, :] += 0.5*dt*E_src.v(buf=1)
+    # add the sources to the interface states in place
+    ifc.add_source_terms(my_data.grid.ng, dt, ivars.ixmom, ivars.iymom, ivars.iener,
+                         xmom_src, ymom_src, E_src,
+                         U_xl, U_xr, U_yl, U_yr)
 
     tm_source.end()
 
@@ -428,30 +436,9 @@ def apply_transverse_flux(U_xl, U_xr, U_yl, U_yr,
     tm_transverse = tc.timer("transverse flux addition")
     tm_transverse.begin()
 
-    b = (2, 1)
-    hdtV = 0.5*dt / myg.V
-
-    for n in range(ivars.nvar):
-
-        # U_xl[i,j,:] = U_xl[i,j,:] - 0.5*dt/dy * (F_y[i-1,j+1,:] - F_y[i-1,j,:])
-        U_xl.v(buf=b, n=n)[:, :] += \
-            - hdtV.v(buf=b)*(F_y.ip_jp(-1, 1, buf=b, n=n)*myg.Ay.ip_jp(-1, 1, buf=b) -
-                             F_y.ip(-1, buf=b, n=n)*myg.Ay.ip(-1, buf=b))
-
-        # U_xr[i,j,:] = U_xr[i,j,:] - 0.5*dt/dy * (F_y[i,j+1,:] - F_y[i,j,:]
-        U_xr.v(buf=b, n=n)[:, :] += \
-            - hdtV.v(buf=b)*(F_y.jp(1, buf=b, n=n)*myg.Ay.jp(1, buf=b) -
-                             F_y.v(buf=b, n=n)*myg.Ay.v(buf=b))
-
-        # U_yl[i,j,:] = U_yl[i,j,:] - 0.5*dt/dx * (F_x[i+1,j-1,:] - F_x[i,j-1,:])
-        U_yl.v(buf=b, n=n)[:, :] += \
-            - hdtV.v(buf=b)*(F_x.ip_jp(1, -1, buf=b, n=n)*myg.Ax.ip_jp(1, -1, buf=b) -
-                             F_x.jp(-1, buf=b, n=n)*myg.Ax.jp(-1, buf=b))
-
-        # U_yr[i,j,:] = U_yr[i,j,:] - 0.5*dt/dx * (F_x[i+1,j,:] - F_x[i,j,:])
-        U_yr.v(buf=b, n=n)[:, :] += \
-            - hdtV.v(buf=b)*(F_x.ip(1, buf=b, n=n)*myg.Ax.ip(1, buf=b) -
-                             F_x.v(buf=b, n=n)*myg.Ax.v(buf=b))
+    # this updates the interface states in place
+    ifc.transverse_flux(myg.ng, dt, myg.V, myg.Ax, myg.Ay, F_x, F_y,
+                        U_xl, U_xr, U_yl, U_yr)
 
     tm_transverse.end()
 
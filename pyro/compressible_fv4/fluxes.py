@@ -3,13 +3,12 @@
 import numpy as np
 
 import pyro.compressible as comp
-import pyro.mesh.array_indexer as ai
 from pyro.advection_fv4 import interface
-from pyro.compressible import riemann
+from pyro.compressible import eos, riemann
 from pyro.mesh import reconstruction
 
 
-def flux_cons(ivars, idir, gamma, q):
+def flux_cons(ivars, idir, my_eos, q):
 
     flux = q.g.scratch_array(nvar=ivars.nvar)
 
@@ -27,7 +26,7 @@ def flux_cons(ivars, idir, gamma, q):
         flux[:, :, ivars.ixmom] = q[:, :, ivars.irho]*q[:, :, ivars.iu]*q[:, :, ivars.iv]
         flux[:, :, ivars.iymom] = q[:, :, ivars.irho]*q[:, :, ivars.iv]**2 + q[:, :, ivars.ip]
 
-    flux[:, :, ivars.iener] = (q[:, :, ivars.ip]/(gamma - 1.0) +
+    flux[:, :, ivars.iener] = (my_eos.rhoe(q[:, :, ivars.irho], q[:, :, ivars.ip]) +
                                0.5*q[:, :, ivars.irho]*(q[:, :, ivars.iu]**2 +
                                                         q[:, :, ivars.iv]**2) + q[:, :, ivars.ip])*un
 
@@ -45,7 +44,7 @@ def fluxes(myd, rp, ivars):
 
     myg = myd.grid
 
-    gamma = rp.get_param("eos.gamma")
+    my_eos = eos.EOS.from_params(rp)
 
     # get the cell-average data
     U_avg = myd.data
@@ -59,8 +58,8 @@ def fluxes(myd, rp, ivars):
     U_cc[:, :, ivars.iener] = myd.to_centers("energy")
 
     # compute the primitive variables of both the cell-center and averages
-    q_bar = comp.cons_to_prim(U_avg, gamma, ivars, myd.grid)
-    q_cc = comp.cons_to_prim(U_cc, gamma, ivars, myd.grid)
+    q_bar = comp.cons_to_prim(U_avg, my_eos, ivars, myd.grid)
+    q_cc = comp.cons_to_prim(U_cc, my_eos, ivars, myd.grid)
 
     # compute the 4th-order approximation to the cell-average primitive state
     q_avg = myg.scratch_array(nvar=ivars.nq)
@@ -120,12 +119,11 @@ def fluxes(myd, rp, ivars):
                         (1.0 - xi.v(buf=2))*q_avg.v(n=n, buf=2)
 
         # solve the Riemann problem to find the face-average q
-        _q = riemann.riemann_prim(idir, myg.ng,
-                                  ivars.irho, ivars.iu, ivars.iv, ivars.ip, ivars.ix, ivars.naux,
-                                   0, 0,
-                                   gamma, q_l, q_r)
-
-        q_int_avg = ai.ArrayIndexer(_q, grid=myg)
+        q_int_avg = myg.scratch_array(nvar=ivars.nq)
+        riemann.riemann_prim(idir, myg.ng,
+                             ivars.irho, ivars.iu, ivars.iv, ivars.ip, ivars.ix, ivars.naux,
+                             0, 0,
+                             my_eos.data, q_l, q_r, q_int_avg)
 
         # calculate the face-centered q using the transverse Laplacian
         q_int_fc = myg.scratch_array(nvar=ivars.nq)
@@ -145,8 +143,8 @@ def fluxes(myd, rp, ivars):
 
         # compute the final fluxes using both the face-average state, q_int_avg,
         # and face-centered q, q_int_fc
-        F_fc = flux_cons(ivars, idir, gamma, q_int_fc)
-        F_avg = flux_cons(ivars, idir, gamma, q_int_avg)
+        F_fc = flux_cons(ivars, idir, my_eos, q_int_fc)
+        F_avg = flux_cons(ivars, idir, my_eos, q_int_avg)
 
         if idir == 1:
             F_x = myg.scratch_array(nvar=ivars.nvar)
@@ -182,9 +180,11 @@ def fluxes(myd, rp, ivars):
                                         q_bar.ip_jp(1, -1, buf=1, n=ivars.iu) -
                                         q_bar.ip_jp(-1, -1, buf=1, n=ivars.iu))/myg.dx
 
+        gamma1 = my_eos.gamma1(q_bar.v(buf=1, n=ivars.irho), q_bar.v(buf=1, n=ivars.ip))
+
         test = myg.scratch_array()
         test.v(buf=1)[:, :] = (myg.dx*lam.v(buf=1))**2 / \
-                                (beta * gamma * q_bar.v(buf=1, n=ivars.ip) /
+                                (beta * gamma1 * q_bar.v(buf=1, n=ivars.ip) /
                                  q_bar.v(buf=1, n=ivars.irho))
 
         nu = myg.dx * lam * np.minimum(test, 1.0)
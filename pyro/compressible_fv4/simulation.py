@@ -74,14 +74,20 @@ class Simulation(compressible_rk.Simulation):
 
         method = self.rp.get_param("compressible.temporal_method")
 
-        rk = integration.RKIntegrator(myd.t, self.dt, method=method)
-        rk.set_start(myd)
-
-        for s in range(rk.nstages()):
-            ytmp = rk.get_stage_start(s)
-            ytmp.fill_BC_all()
-            k = self.substep(ytmp)
-            rk.store_increment(s, k)
+        # with adaptive timestepping, the step is redone with a smaller
+        # dt until it is accurate enough
+        while True:
+            rk = integration.RKIntegrator(myd.t, self.dt, method=method)
+            rk.set_start(myd)
+
+            for s in range(rk.nstages()):
+                ytmp = rk.get_stage_start(s)
+                ytmp.fill_BC_all()
+                k = self.substep(ytmp)
+                rk.store_increment(s, k)
+
+            if self.accept_timestep(rk):
+                break
 
         rk.compute_final_update()
 
@@ -70,17 +70,17 @@ class Simulation(compressible.Simulation):
         # we are plotting from a file
         ivars = compressible.Variables(self.cc_data)
 
-        # access gamma from the cc_data object so we can use dovis
+        # access the EOS from the cc_data object so we can use dovis
         # outside of a running simulation.
-        gamma = self.cc_data.get_aux("gamma")
+        my_eos = eos.EOS.from_aux(self.cc_data)
 
-        q = compressible.cons_to_prim(self.cc_data.data, gamma, ivars, self.cc_data.grid)
+        q = compressible.cons_to_prim(self.cc_data.data, my_eos, ivars, self.cc_data.grid)
 
         rho = q[:, :, ivars.irho]
         u = q[:, :, ivars.iu]
         v = q[:, :, ivars.iv]
         p = q[:, :, ivars.ip]
-        e = eos.rhoe(gamma, p)/rho
+        e = my_eos.rhoe(rho, p)/rho
 
         X = q[:, :, ivars.ix]
 
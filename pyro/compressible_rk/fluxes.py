@@ -21,7 +21,7 @@ Taylor expanding *in space only* yields::
 
 import pyro.compressible as comp
 import pyro.compressible.unsplit_fluxes as flx
-from pyro.compressible import riemann
+from pyro.compressible import eos, riemann
 from pyro.mesh import reconstruction
 
 
@@ -31,7 +31,7 @@ def fluxes(my_data, rp, ivars, solid, tc):
     doing an unsplit reconstruction of the interface values and then
     solving the Riemann problem through all the interfaces at once
 
-    currently we assume a gamma-law EOS
+    the EOS is given by the eos.* runtime parameters
 
     Parameters
     ----------
@@ -58,31 +58,22 @@ def fluxes(my_data, rp, ivars, solid, tc):
 
     myg = my_data.grid
 
-    gamma = rp.get_param("eos.gamma")
+    my_eos = eos.EOS.from_params(rp)
 
     # =========================================================================
     # compute the primitive variables
     # =========================================================================
     # Q = (rho, u, v, p)
 
-    q = comp.cons_to_prim(my_data.data, gamma, ivars, myg)
+    q = comp.cons_to_prim(my_data.data, my_eos, ivars, myg)
 
     # =========================================================================
-    # compute the flattening coefficients
+    # compute the flattened, limited slopes
     # =========================================================================
 
-    # there is a single flattening coefficient (xi) for all directions
-    use_flattening = rp.get_param("compressible.use_flattening")
-
-    if use_flattening:
-        xi_x = reconstruction.flatten(myg, q, 1, ivars, rp)
-        xi_y = reconstruction.flatten(myg, q, 2, ivars, rp)
-
-        xi = reconstruction.flatten_multid(myg, q, xi_x, xi_y, ivars)
-    else:
-        xi = 1.0
-
-    # monotonized central differences in x-direction
+    # there is a single flattening coefficient (xi) for all
+    # directions.  The monotonized central differences of all of the
+    # variables are found together with it.
     tm_limit = tc.timer("limiting")
     tm_limit.begin()
 
@@ -91,9 +82,13 @@ def fluxes(my_data, rp, ivars, solid, tc):
     ldx = myg.scratch_array(nvar=ivars.nvar)
     ldy = myg.scratch_array(nvar=ivars.nvar)
 
-    for n in range(ivars.nvar):
-        ldx[:, :, n] = xi * reconstruction.limit(q[:, :, n], myg, 1, limiter)
-        ldy[:, :, n] = xi * reconstruction.limit(q[:, :, n], myg, 2, limiter)
+    reconstruction.limited_slopes(q, myg.ng, limiter,
+                                  rp.get_param("compressible.use_flattening"),
+                                  ivars.ip, ivars.iu, ivars.iv,
+                                  rp.get_param("compressible.delta"),
+                                  rp.get_param("compressible.z0"),
+                                  rp.get_param("compressible.z1"),
+                                  ldx, ldy)
 
     tm_limit.end()
 
@@ -125,8 +120,8 @@ def fluxes(my_data, rp, ivars, solid, tc):
     tm_states.end()
 
     # transform interface states back into conserved variables
-    U_xl = comp.prim_to_cons(V_l, gamma, ivars, myg)
-    U_xr = comp.prim_to_cons(V_r, gamma, ivars, myg)
+    U_xl = comp.prim_to_cons(V_l, my_eos, ivars, myg)
+    U_xr = comp.prim_to_cons(V_r, my_eos, ivars, myg)
 
     # =========================================================================
     # y-direction
@@ -154,8 +149,8 @@ def fluxes(my_data, rp, ivars, solid, tc):
     tm_states.end()
 
     # transform interface states back into conserved variables
-    U_yl = comp.prim_to_cons(V_l, gamma, ivars, myg)
-    U_yr = comp.prim_to_cons(V_r, gamma, ivars, myg)
+    U_yl = comp.prim_to_cons(V_l, my_eos, ivars, myg)
+    U_yr = comp.prim_to_cons(V_r, my_eos, ivars, myg)
 
     # =========================================================================
     # construct the fluxes normal to the interfaces
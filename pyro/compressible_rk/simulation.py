@@ -1,7 +1,7 @@
-import numpy as np
-
 import pyro.compressible_rk.fluxes as flx
 from pyro import compressible
+from pyro.compressible import eos
+from pyro.compressible import interface as ifc
 from pyro.mesh import integration
 
 
@@ -55,14 +55,15 @@ class Simulation(compressible.Simulation):
 
         cfl = self.rp.get_param("driver.cfl")
 
-        # get the variables we need
-        u, v, cs = self.cc_data.get_var(["velocity", "soundspeed"])
-
-        # the timestep is min(dx/(|u| + cs), dy/(|v| + cs))
-        xtmp = (abs(u) + cs)/self.cc_data.grid.dx
-        ytmp = (abs(v) + cs)/self.cc_data.grid.dy
+        # the timestep is min(1/((|u| + cs)/dx + (|v| + cs)/dy)) --
+        # this is found in one pass over the conserved state
+        dt = ifc.timestep_mol(self.ivars.idens, self.ivars.ixmom,
+                              self.ivars.iymom, self.ivars.iener,
+                              eos.EOS.from_aux(self.cc_data).data,
+                              self.cc_data.grid.dx, self.cc_data.grid.dy,
+                              self.cc_data.data)
 
-        self.dt = cfl*float(np.min(1.0/(xtmp + ytmp)))
+        self.dt = cfl*float(dt)
 
     def evolve(self):
         """
@@ -77,14 +78,20 @@ class Simulation(compressible.Simulation):
 
         method = self.rp.get_param("compressible.temporal_method")
 
-        rk = integration.RKIntegrator(myd.t, self.dt, method=method)
-        rk.set_start(myd)
+        # with adaptive timestepping, the step is redone with a smaller
+        # dt until it is accurate enough
+        while True:
+            rk = integration.RKIntegrator(myd.t, self.dt, method=method)
+            rk.set_start(myd)
+
+            for s in range(rk.nstages()):
+                ytmp = rk.get_stage_start(s)
+                ytmp.fill_BC_all()
+                k = self.substep(ytmp)
+                rk.store_increment(s, k)
 
-        for s in range(rk.nstages()):
-            ytmp = rk.get_stage_start(s)
-            ytmp.fill_BC_all()
-            k = self.substep(ytmp)
-            rk.store_increment(s, k)
+            if self.accept_timestep(rk):
+                break
 
         rk.compute_final_update()
 
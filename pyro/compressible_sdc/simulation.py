@@ -31,6 +31,21 @@ class Simulation(compressible_fv4.Simulation):
 
         return integral
 
+    def initialize(self, *, extra_vars=None, ng=4):
+        """
+        Initialize the grid and variables for compressible flow and set
+        the initial conditions for the chosen problem.  This also sets
+        up the storage for the SDC time nodes.
+        """
+        super().initialize(extra_vars=extra_vars, ng=ng)
+
+        if self.rp.get_param("sdc.max_iterations") < 1:
+            msg.fail("ERROR: sdc.max_iterations must be at least 1")
+
+        # the solution at time nodes 1 and 2 -- node 0 is the current
+        # solution.  These are reused every step.
+        self.U_nodes = [patch.cell_center_data_clone(self.cc_data) for _ in range(2)]
+
     def evolve(self):
 
         """
@@ -42,57 +57,76 @@ class Simulation(compressible_fv4.Simulation):
         tm_evolve.begin()
 
         myd = self.cc_data
-
-        # we need the solution at 3 time points and at the old and
-        # current iteration (except for m = 0 -- that doesn't change).
-
-        # This copy will initialize the the solution at all time nodes
-        # with the current (old) solution.
-        U_kold = []
-        U_kold.append(patch.cell_center_data_clone(self.cc_data))
-        U_kold.append(patch.cell_center_data_clone(self.cc_data))
-        U_kold.append(patch.cell_center_data_clone(self.cc_data))
-
-        U_knew = []
-        U_knew.append(U_kold[0])
-        U_knew.append(patch.cell_center_data_clone(self.cc_data))
-        U_knew.append(patch.cell_center_data_clone(self.cc_data))
+        myg = myd.grid
+
+        max_iterations = self.rp.get_param("sdc.max_iterations")
+        tol = self.rp.get_param("sdc.tol")
+
+        # we need the solution at 3 time points.  The iterations start
+        # with the current (old) solution at all time nodes.  Node 0
+        # never changes.
+        U_knew = [myd] + self.U_nodes
+        for m in range(1, 3):
+            U_knew[m].data[:, :, :] = myd.data[:, :, :]
+            U_knew[m].state_changed()
+
+        # we need the advective term at all time nodes at the old
+        # iteration.  To start, this is the same at all nodes, and it
+        # never changes at node 0.
+        A_0 = self.substep(myd)
+        A_kold = [A_0, A_0, A_0]
+
+        # to see how much the solution changes between iterations
+        dU = None
+        if tol > 0.0:
+            dU = myg.scratch_array(nvar=self.ivars.nvar)
 
         # loop over iterations
-        for _ in range(1, 5):
-
-            # we need the advective term at all time nodes at the old
-            # iteration -- we'll compute this now
-            A_kold = []
-            for m in range(3):
-                _tmp = self.substep(U_kold[m])
-                A_kold.append(_tmp)
+        for k in range(max_iterations):
 
             # loop over the time nodes and update
+            A_knew = [A_0]
             for m in range(2):
 
                 # update m to m+1 for knew
 
                 # compute A(U_m^{k+1})
-                A_knew = self.substep(U_knew[m])
+                if m > 0:
+                    A_knew.append(self.substep(U_knew[m]))
 
                 # compute the integral over A at the old iteration
                 integral = self.sdc_integral(m, m+1, A_kold)
 
+                if m == 1 and tol > 0.0:
+                    dU[:, :, :] = U_knew[2].data[:, :, :]
+
                 # and the final update
                 for n in range(self.ivars.nvar):
                     U_knew[m+1].data.v(n=n)[:, :] = U_knew[m].data.v(n=n) + \
-                        0.5*self.dt * (A_knew.v(n=n) - A_kold[m].v(n=n)) + integral.v(n=n)
+                        0.5*self.dt * (A_knew[m].v(n=n) - A_kold[m].v(n=n)) + integral.v(n=n)
 
                 # fill ghost cells
                 U_knew[m+1].fill_BC_all()
 
-            # store the current iteration as the old iteration
-            for m in range(1, 3):
-                U_kold[m].data[:, :, :] = U_knew[m].data[:, :, :]
+            if k == max_iterations - 1:
+                break
+
+            # stop once the solution at the end of the step stops
+            # changing
+            if tol > 0.0:
+                dU[:, :, :] = U_knew[2].data[:, :, :] - dU[:, :, :]
+                change = sum(dU.norm(n=n)**2 for n in range(self.ivars.nvar))
+                size = sum(U_knew[2].data.norm(n=n)**2 for n in range(self.ivars.nvar))
+                if change <= tol**2 * size:
+                    break
+
+            # the current iteration becomes the old iteration -- A at
+            # node 1 was already found, so we only need it at node 2
+            A_kold = A_knew + [self.substep(U_knew[2])]
 
         # store the new solution
         self.cc_data.data[:, :, :] = U_knew[-1].data[:, :, :]
+        self.cc_data.state_changed()
 
         if self.particles is not None:
             self.particles.update_particles(self.dt)
@@ -0,0 +1,47 @@
+import pytest
+from numpy.testing import assert_allclose
+
+import pyro.compressible_sdc.simulation as sim
+from pyro import Pyro
+
+
+# stopping the SDC iterations once they converge should take fewer
+# flux evaluations and give nearly the same answer
+def test_sdc_tol(monkeypatch):
+
+    nsubsteps = []
+    substep = sim.Simulation.substep
+
+    def counted_substep(self, myd):
+        nsubsteps[-1] += 1
+        return substep(self, myd)
+
+    monkeypatch.setattr(sim.Simulation, "substep", counted_substep)
+
+    results = []
+    for tol in [0.0, 1.e-8]:
+        nsubsteps.append(0)
+        pyro_sim = Pyro("compressible_sdc")
+        pyro_sim.initialize_problem("acoustic_pulse", inputs_file="inputs.acoustic_pulse",
+                                    inputs_dict={"mesh.nx": 32, "mesh.ny": 32,
+                                                 "driver.max_steps": 5,
+                                                 "sdc.tol": tol})
+        pyro_sim.run_sim()
+        results.append(pyro_sim.sim.cc_data.data.v(n=0))
+
+    # A at node 0 is found once, and then each iteration needs one new
+    # evaluation at node 1 and one at node 2 (except the last)
+    assert nsubsteps[0] == 5*(1 + 4 + 3)
+    assert nsubsteps[1] < nsubsteps[0]
+
+    assert_allclose(results[1], results[0], rtol=1.e-6)
+
+
+# without any iterations the state would never be advanced
+def test_sdc_max_iterations():
+
+    pyro_sim = Pyro("compressible_sdc")
+    with pytest.raises(SystemExit):
+        pyro_sim.initialize_problem("acoustic_pulse", inputs_file="inputs.acoustic_pulse",
+                                    inputs_dict={"mesh.nx": 16, "mesh.ny": 16,
+                                                 "sdc.max_iterations": 0})
@@ -4,7 +4,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 
 from pyro.mesh import patch
-from pyro.multigrid import MG
+from pyro.multigrid import MG, solver_cache
 from pyro.simulation_null import NullSimulation, bc_setup, grid_setup
 from pyro.util import msg
 
@@ -46,6 +46,10 @@ class Simulation(NullSimulation):
 
         self.cc_data = my_data
 
+        # the multigrid hierarchy is the same every step, so we hold
+        # onto it and just update the coefficients and RHS
+        self.mg_cache = solver_cache.SolverCache()
+
         # now set the initial conditions for the problem
         self.problem_func(self.cc_data, self.rp)
 
@@ -89,7 +93,7 @@ class Simulation(NullSimulation):
         #
         # this is the form that arises with a Crank-Nicolson discretization
         # of the diffusion equation.
-        mg = MG.CellCenterMG2d(myg.nx, myg.ny,
+        mg = self.mg_cache.get(MG.CellCenterMG2d, myg.nx, myg.ny,
                                xmin=myg.xmin, xmax=myg.xmax,
                                ymin=myg.ymin, ymax=myg.ymax,
                                xl_BC_type=self.cc_data.BCs['phi'].xlb,
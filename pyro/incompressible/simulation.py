@@ -6,7 +6,7 @@ import pyro.mesh.boundary as bnd
 from pyro.burgers import Simulation as burgers_simulation
 from pyro.incompressible import incomp_interface
 from pyro.mesh import patch, reconstruction
-from pyro.multigrid import MG
+from pyro.multigrid import MG, solver_cache
 from pyro.particles import particles
 from pyro.simulation_null import bc_setup, grid_setup
 
@@ -61,6 +61,10 @@ class Simulation(burgers_simulation):
 
         self.in_preevolve = False
 
+        # the projections are done on the same grid with the same BCs
+        # every step, so we reuse the multigrid hierarchies
+        self.mg_cache = solver_cache.SolverCache()
+
         # now set the initial conditions for the problem
         self.problem_func(self.cc_data, self.rp)
 
@@ -88,7 +92,7 @@ class Simulation(burgers_simulation):
 
         # next create the multigrid object.  We want Neumann BCs on phi
         # at solid walls and periodic on phi for periodic BCs
-        mg = MG.CellCenterMG2d(myg.nx, myg.ny,
+        mg = self.mg_cache.get(MG.CellCenterMG2d, myg.nx, myg.ny,
                                xl_BC_type="periodic",
                                xr_BC_type="periodic",
                                yl_BC_type="periodic",
@@ -240,7 +244,7 @@ class Simulation(burgers_simulation):
             print("  MAC projection")
 
         # create the multigrid object
-        mg = MG.CellCenterMG2d(myg.nx, myg.ny,
+        mg = self.mg_cache.get(MG.CellCenterMG2d, myg.nx, myg.ny,
                                xl_BC_type=self.cc_data.BCs["phi"].xlb,
                                xr_BC_type=self.cc_data.BCs["phi"].xrb,
                                yl_BC_type=self.cc_data.BCs["phi"].ylb,
@@ -347,7 +351,7 @@ class Simulation(burgers_simulation):
             print("  final projection")
 
         # create the multigrid object
-        mg = MG.CellCenterMG2d(myg.nx, myg.ny,
+        mg = self.mg_cache.get(MG.CellCenterMG2d, myg.nx, myg.ny,
                                xl_BC_type=self.cc_data.BCs["phi"].xlb,
                                xr_BC_type=self.cc_data.BCs["phi"].xrb,
                                yl_BC_type=self.cc_data.BCs["phi"].ylb,
@@ -1,5 +1,5 @@
 import numpy as np
-from numba import njit
+from numba import njit, prange
 
 
 @njit(cache=True)
@@ -328,7 +328,7 @@ def states(ng, dx, dy, dt,
 
 
 # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
-@njit(cache=True)
+@njit(cache=True, parallel=True)
 def rho_states(ng, dx, dy, dt,
                rho, u_MAC, v_MAC,
                ldelta_rx, ldelta_ry):
@@ -372,7 +372,7 @@ def rho_states(ng, dx, dy, dt,
     dtdx = dt / dx
     dtdy = dt / dy
 
-    for i in range(ilo - 2, ihi + 2):
+    for i in prange(ilo - 2, ihi + 2):  # pylint: disable=not-an-iterable
         for j in range(jlo - 2, jhi + 2):
 
             # u on x-edges
@@ -393,7 +393,7 @@ def rho_states(ng, dx, dy, dt,
 
     # now add the transverse term and the non-advective part of the normal
     # divergence
-    for i in range(ilo - 2, ihi + 2):
+    for i in prange(ilo - 2, ihi + 2):  # pylint: disable=not-an-iterable
         for j in range(jlo - 2, jhi + 2):
 
             u_x = (u_MAC[i + 1, j] - u_MAC[i, j]) / dx
@@ -425,7 +425,7 @@ def rho_states(ng, dx, dy, dt,
 
 
 # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
-@njit(cache=True)
+@njit(cache=True, parallel=True)
 def get_interface_states(ng, dx, dy, dt,
                          u, v,
                          ldelta_ux, ldelta_vx,
@@ -490,7 +490,7 @@ def get_interface_states(ng, dx, dy, dt,
     dtdx = dt / dx
     dtdy = dt / dy
 
-    for i in range(ilo - 2, ihi + 2):
+    for i in prange(ilo - 2, ihi + 2):  # pylint: disable=not-an-iterable
         for j in range(jlo - 2, jhi + 2):
 
             # u on x-edges
@@ -542,7 +542,7 @@ def get_interface_states(ng, dx, dy, dt,
     # considered the normal to the interface portion of the predictor.
 
     # add the transverse flux differences to the preliminary interface states
-    for i in range(ilo - 1, ihi + 1):
+    for i in prange(ilo - 1, ihi + 1):  # pylint: disable=not-an-iterable
         for j in range(jlo - 1, jhi + 1):
 
             ubar = 0.5 * (uhat_adv[i, j] + uhat_adv[i + 1, j])
@@ -584,7 +584,7 @@ def get_interface_states(ng, dx, dy, dt,
 
 
 # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
-@njit(cache=True)
+@njit(cache=True, parallel=True)
 def upwind(ng, q_l, q_r, s):
     r"""
     upwind the left and right states based on the specified input
@@ -616,7 +616,7 @@ def upwind(ng, q_l, q_r, s):
     jlo = ng
     jhi = ng + ny
 
-    for i in range(ilo - 1, ihi + 2):
+    for i in prange(ilo - 1, ihi + 2):  # pylint: disable=not-an-iterable
         for j in range(jlo - 1, jhi + 2):
 
             if (s[i, j] > 0.0):
@@ -630,7 +630,7 @@ def upwind(ng, q_l, q_r, s):
 
 
 # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
-@njit(cache=True)
+@njit(cache=True, parallel=True)
 def riemann(ng, q_l, q_r):
     """
     Solve the Burger's Riemann problem given the input left and right
@@ -662,7 +662,7 @@ def riemann(ng, q_l, q_r):
 
     s = np.zeros((qx, qy))
 
-    for i in range(ilo - 1, ihi + 2):
+    for i in prange(ilo - 1, ihi + 2):  # pylint: disable=not-an-iterable
         for j in range(jlo - 1, jhi + 2):
 
             if q_l[i, j] > 0.0 and q_l[i, j] + q_r[i, j] > 0.0:
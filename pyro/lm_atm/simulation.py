@@ -6,7 +6,9 @@ import pyro.mesh.array_indexer as ai
 import pyro.mesh.boundary as bnd
 import pyro.multigrid.variable_coeff_MG as vcMG
 from pyro.mesh import patch, reconstruction
+from pyro.multigrid import solver_cache
 from pyro.simulation_null import NullSimulation, bc_setup, grid_setup
+from pyro.util import msg
 
 
 class Basestate:
@@ -45,6 +47,11 @@ class Simulation(NullSimulation):
         self.aux_data = None
         self.in_preevolve = False
 
+        # the projections are done on the same grid with the same BCs
+        # every step, so we reuse the multigrid hierarchies, only
+        # updating the coefficients
+        self.mg_cache = solver_cache.SolverCache()
+
     def initialize(self):
         """
         Initialize the grid and variables for low Mach atmospheric flow
@@ -132,6 +139,22 @@ class Simulation(NullSimulation):
     def make_prime(self, a, a0):
         return a - a0.v2d(buf=a0.ng)
 
+    def _solve_elliptic(self, mg, rtol):
+        """
+        solve the elliptic problem set up in mg, either with multigrid
+        V-cycles or a multigrid-preconditioned Krylov method,
+        depending on lm-atmosphere.elliptic_solver
+        """
+
+        solver = self.rp.get_param("lm-atmosphere.elliptic_solver")
+
+        if solver == "mg":
+            mg.solve(rtol=rtol)
+        elif solver in ("bicgstab", "cg"):
+            mg.krylov_solve(rtol=rtol, method=solver)
+        else:
+            msg.fail(f"ERROR: invalid elliptic solver {solver}")
+
     def method_compute_timestep(self):
         """
         The timestep() function computes the advective timestep
@@ -205,16 +228,16 @@ class Simulation(NullSimulation):
 
         # next create the multigrid object.  We defined phi with
         # the right BCs previously
-        mg = vcMG.VarCoeffCCMG2d(myg.nx, myg.ny,
-                                 xl_BC_type=self.cc_data.BCs["phi"].xlb,
-                                 xr_BC_type=self.cc_data.BCs["phi"].xrb,
-                                 yl_BC_type=self.cc_data.BCs["phi"].ylb,
-                                 yr_BC_type=self.cc_data.BCs["phi"].yrb,
-                                 xmin=myg.xmin, xmax=myg.xmax,
-                                 ymin=myg.ymin, ymax=myg.ymax,
-                                 coeffs=coeff,
-                                 coeffs_bc=self.cc_data.BCs["density"],
-                                 verbose=0)
+        mg = self.mg_cache.get(vcMG.VarCoeffCCMG2d, myg.nx, myg.ny,
+                               xl_BC_type=self.cc_data.BCs["phi"].xlb,
+                               xr_BC_type=self.cc_data.BCs["phi"].xrb,
+                               yl_BC_type=self.cc_data.BCs["phi"].ylb,
+                               yr_BC_type=self.cc_data.BCs["phi"].yrb,
+                               xmin=myg.xmin, xmax=myg.xmax,
+                               ymin=myg.ymin, ymax=myg.ymax,
+                               coeffs=coeff,
+                               coeffs_bc=self.cc_data.BCs["density"],
+                               verbose=0)
 
         # first compute div{beta_0 U}
         div_beta_U = mg.soln_grid.scratch_array()
@@ -228,7 +251,7 @@ class Simulation(NullSimulation):
 
         # set the RHS to divU and solve
         mg.init_RHS(div_beta_U)
-        mg.solve(rtol=1.e-10)
+        self._solve_elliptic(mg, rtol=1.e-10)
 
         # store the solution in our self.cc_data object -- include a single
         # ghostcell
@@ -387,16 +410,16 @@ class Simulation(NullSimulation):
         coeff.v(buf=1)[:, :] = coeff.v(buf=1)*beta0.v2d(buf=1)**2
 
         # create the multigrid object
-        mg = vcMG.VarCoeffCCMG2d(myg.nx, myg.ny,
-                                 xl_BC_type=self.cc_data.BCs["phi-MAC"].xlb,
-                                 xr_BC_type=self.cc_data.BCs["phi-MAC"].xrb,
-                                 yl_BC_type=self.cc_data.BCs["phi-MAC"].ylb,
-                                 yr_BC_type=self.cc_data.BCs["phi-MAC"].yrb,
-                                 xmin=myg.xmin, xmax=myg.xmax,
-                                 ymin=myg.ymin, ymax=myg.ymax,
-                                 coeffs=coeff,
-                                 coeffs_bc=self.cc_data.BCs["density"],
-                                 verbose=0)
+        mg = self.mg_cache.get(vcMG.VarCoeffCCMG2d, myg.nx, myg.ny,
+                               xl_BC_type=self.cc_data.BCs["phi-MAC"].xlb,
+                               xr_BC_type=self.cc_data.BCs["phi-MAC"].xrb,
+                               yl_BC_type=self.cc_data.BCs["phi-MAC"].ylb,
+                               yr_BC_type=self.cc_data.BCs["phi-MAC"].yrb,
+                               xmin=myg.xmin, xmax=myg.xmax,
+                               ymin=myg.ymin, ymax=myg.ymax,
+                               coeffs=coeff,
+                               coeffs_bc=self.cc_data.BCs["density"],
+                               verbose=0)
 
         # first compute div{beta_0 U}
         div_beta_U = mg.soln_grid.scratch_array()
@@ -409,7 +432,7 @@ class Simulation(NullSimulation):
 
         # solve the Poisson problem
         mg.init_RHS(div_beta_U)
-        mg.solve(rtol=1.e-12)
+        self._solve_elliptic(mg, rtol=1.e-12)
 
         # update the normal velocities with the pressure gradient -- these
         # constitute our advective velocities.  Note that what we actually
@@ -550,16 +573,16 @@ class Simulation(NullSimulation):
         coeff.v()[:, :] = coeff.v()*beta0.v2d()**2
 
         # create the multigrid object
-        mg = vcMG.VarCoeffCCMG2d(myg.nx, myg.ny,
-                                 xl_BC_type=self.cc_data.BCs["phi"].xlb,
-                                 xr_BC_type=self.cc_data.BCs["phi"].xrb,
-                                 yl_BC_type=self.cc_data.BCs["phi"].ylb,
-                                 yr_BC_type=self.cc_data.BCs["phi"].yrb,
-                                 xmin=myg.xmin, xmax=myg.xmax,
-                                 ymin=myg.ymin, ymax=myg.ymax,
-                                 coeffs=coeff,
-                                 coeffs_bc=self.cc_data.BCs["density"],
-                                 verbose=0)
+        mg = self.mg_cache.get(vcMG.VarCoeffCCMG2d, myg.nx, myg.ny,
+                               xl_BC_type=self.cc_data.BCs["phi"].xlb,
+                               xr_BC_type=self.cc_data.BCs["phi"].xrb,
+                               yl_BC_type=self.cc_data.BCs["phi"].ylb,
+                               yr_BC_type=self.cc_data.BCs["phi"].yrb,
+                               xmin=myg.xmin, xmax=myg.xmax,
+                               ymin=myg.ymin, ymax=myg.ymax,
+                               coeffs=coeff,
+                               coeffs_bc=self.cc_data.BCs["density"],
+                               verbose=0)
 
         # first compute div{beta_0 U}
 
@@ -576,7 +599,7 @@ class Simulation(NullSimulation):
         mg.init_solution(phiGuess)
 
         # solve
-        mg.solve(rtol=1.e-12)
+        self._solve_elliptic(mg, rtol=1.e-12)
 
         # store the solution in our self.cc_data object -- include a single
         # ghostcell
@@ -10,3 +10,4 @@ from .boundary import BC, bc_is_solid, define_bc
 from .fv import FV2d
 from .integration import RKIntegrator
 from .patch import CellCenterData2d, FaceCenterData2d, Grid2d
+from .scratch_pool import ScratchPool
@@ -104,11 +104,11 @@ class ArrayIndexer(np.ndarray):
         c = len(self.shape)
         if c == 2:
             return np.sqrt(self.g.dx * self.g.dy *
-                           np.sum((self[self.g.ilo:self.g.ihi+1, self.g.jlo:self.g.jhi+1]**2).flat))
+                           np.sum((self[self.g.ilo:self.g.ihi+1, self.g.jlo:self.g.jhi+1]**2).flat, dtype=np.float64))
 
         _tmp = self[:, :, n]
         return np.sqrt(self.g.dx * self.g.dy *
-                       np.sum((_tmp[self.g.ilo:self.g.ihi+1, self.g.jlo:self.g.jhi+1]**2).flat))
+                       np.sum((_tmp[self.g.ilo:self.g.ihi+1, self.g.jlo:self.g.jhi+1]**2).flat, dtype=np.float64))
 
     def copy(self, order='C'):
         """make a copy of the array, defined on the same grid"""
@@ -273,6 +273,111 @@ class ArrayIndexer(np.ndarray):
             for j in range(self.g.jhi+1, 2*self.g.ng + self.g.ny):
                 self[:, j, n] = self[:, j-self.g.jhi-1+self.g.ng, n]
 
+    def fill_ghost_vars(self, ns, bc):
+        """Fill the boundary conditions for several components at once.
+        ns is a slice or an array of component indices that all share
+        the same BC object, bc.  All of the ghost cells on a boundary
+        are filled with a single array operation, giving the same
+        result as calling fill_ghost() on each component.
+        """
+
+        g = self.g
+        ng = g.ng
+
+        # if the domain is narrower than the ghost region, then the
+        # periodic and reflecting fills are not independent from one
+        # ghost cell to the next, so do them one at a time
+        if g.nx < ng or g.ny < ng:
+            for n in np.arange(self.shape[2])[ns]:
+                self.fill_ghost(n=n, bc=bc)
+            return
+
+        d = np.asarray(self)
+
+        # -x boundary
+        if bc.xlb in ["outflow", "neumann"]:
+            if bc.xl_value is None:
+                d[:g.ilo, :, ns] = d[g.ilo:g.ilo+1, :, ns]
+            else:
+                d[g.ilo-1:g.ilo, :, ns] = \
+                    d[g.ilo:g.ilo+1, :, ns] - g.dx*bc.xl_value[np.newaxis, :, np.newaxis]
+
+        elif bc.xlb == "reflect-even":
+            d[:g.ilo, :, ns] = d[2*ng-1:ng-1:-1, :, ns]
+
+        elif bc.xlb in ["reflect-odd", "dirichlet"]:
+            if bc.xl_value is None:
+                d[:g.ilo, :, ns] = -d[2*ng-1:ng-1:-1, :, ns]
+            else:
+                d[g.ilo-1:g.ilo, :, ns] = \
+                    2*bc.xl_value[np.newaxis, :, np.newaxis] - d[g.ilo:g.ilo+1, :, ns]
+
+        elif bc.xlb == "periodic":
+            d[:g.ilo, :, ns] = d[g.ihi-ng+1:g.ihi+1, :, ns]
+
+        # +x boundary
+        if bc.xrb in ["outflow", "neumann"]:
+            if bc.xr_value is None:
+                d[g.ihi+1:, :, ns] = d[g.ihi:g.ihi+1, :, ns]
+            else:
+                d[g.ihi+1:g.ihi+2, :, ns] = \
+                    d[g.ihi:g.ihi+1, :, ns] + g.dx*bc.xr_value[np.newaxis, :, np.newaxis]
+
+        elif bc.xrb == "reflect-even":
+            d[g.ihi+1:, :, ns] = d[g.ihi:g.ihi-ng:-1, :, ns]
+
+        elif bc.xrb in ["reflect-odd", "dirichlet"]:
+            if bc.xr_value is None:
+                d[g.ihi+1:, :, ns] = -d[g.ihi:g.ihi-ng:-1, :, ns]
+            else:
+                d[g.ihi+1:g.ihi+2, :, ns] = \
+                    2*bc.xr_value[np.newaxis, :, np.newaxis] - d[g.ihi:g.ihi+1, :, ns]
+
+        elif bc.xrb == "periodic":
+            d[g.ihi+1:, :, ns] = d[ng:2*ng, :, ns]
+
+        # -y boundary
+        if bc.ylb in ["outflow", "neumann"]:
+            if bc.yl_value is None:
+                d[:, :g.jlo, ns] = d[:, g.jlo:g.jlo+1, ns]
+            else:
+                d[:, g.jlo-1:g.jlo, ns] = \
+                    d[:, g.jlo:g.jlo+1, ns] - g.dy*bc.yl_value[:, np.newaxis, np.newaxis]
+
+        elif bc.ylb == "reflect-even":
+            d[:, :g.jlo, ns] = d[:, 2*ng-1:ng-1:-1, ns]
+
+        elif bc.ylb in ["reflect-odd", "dirichlet"]:
+            if bc.yl_value is None:
+                d[:, :g.jlo, ns] = -d[:, 2*ng-1:ng-1:-1, ns]
+            else:
+                d[:, g.jlo-1:g.jlo, ns] = \
+                    2*bc.yl_value[:, np.newaxis, np.newaxis] - d[:, g.jlo:g.jlo+1, ns]
+
+        elif bc.ylb == "periodic":
+            d[:, :g.jlo, ns] = d[:, g.jhi-ng+1:g.jhi+1, ns]
+
+        # +y boundary
+        if bc.yrb in ["outflow", "neumann"]:
+            if bc.yr_value is None:
+                d[:, g.jhi+1:, ns] = d[:, g.jhi:g.jhi+1, ns]
+            else:
+                d[:, g.jhi+1:g.jhi+2, ns] = \
+                    d[:, g.jhi:g.jhi+1, ns] + g.dy*bc.yr_value[:, np.newaxis, np.newaxis]
+
+        elif bc.yrb == "reflect-even":
+            d[:, g.jhi+1:, ns] = d[:, g.jhi:g.jhi-ng:-1, ns]
+
+        elif bc.yrb in ["reflect-odd", "dirichlet"]:
+            if bc.yr_value is None:
+                d[:, g.jhi+1:, ns] = -d[:, g.jhi:g.jhi-ng:-1, ns]
+            else:
+                d[:, g.jhi+1:g.jhi+2, ns] = \
+                    2*bc.yr_value[:, np.newaxis, np.newaxis] - d[:, g.jhi:g.jhi+1, ns]
+
+        elif bc.yrb == "periodic":
+            d[:, g.jhi+1:, ns] = d[:, ng:2*ng, ns]
+
     def pretty_print(self, n=0, fmt=None, show_ghost=True):
         """
         Print out a small dataset to the screen with the ghost cells
@@ -393,20 +498,20 @@ class ArrayIndexerFC(ArrayIndexer):
         if self.idir == 1:
             if c == 2:
                 return np.sqrt(self.g.dx * self.g.dy *
-                               np.sum((self[self.g.ilo:self.g.ihi+2, self.g.jlo:self.g.jhi+1]**2).flat))
+                               np.sum((self[self.g.ilo:self.g.ihi+2, self.g.jlo:self.g.jhi+1]**2).flat, dtype=np.float64))
 
             _tmp = self[:, :, n]
             return np.sqrt(self.g.dx * self.g.dy *
-                           np.sum((_tmp[self.g.ilo:self.g.ihi+2, self.g.jlo:self.g.jhi+1]**2).flat))
+                           np.sum((_tmp[self.g.ilo:self.g.ihi+2, self.g.jlo:self.g.jhi+1]**2).flat, dtype=np.float64))
 
         # idir == 2
         if c == 2:
             return np.sqrt(self.g.dx * self.g.dy *
-                           np.sum((self[self.g.ilo:self.g.ihi+1, self.g.jlo:self.g.jhi+2]**2).flat))
+                           np.sum((self[self.g.ilo:self.g.ihi+1, self.g.jlo:self.g.jhi+2]**2).flat, dtype=np.float64))
 
         _tmp = self[:, :, n]
         return np.sqrt(self.g.dx * self.g.dy *
-                       np.sum((_tmp[self.g.ilo:self.g.ihi+1, self.g.jlo:self.g.jhi+2]**2).flat))
+                       np.sum((_tmp[self.g.ilo:self.g.ihi+1, self.g.jlo:self.g.jhi+2]**2).flat, dtype=np.float64))
 
     def copy(self, order='C'):
         """make a copy of the array, defined on the same grid"""
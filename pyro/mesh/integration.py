@@ -20,6 +20,23 @@ and the s increment is::
 
    k_s = f(t + c_s dt, y_n + dt (a_s1 k1 + a_s2 k2 + ... + a_s,s-1 k_{s-1})
 
+We also support low-storage schemes in the 2N-register form of
+Williamson (1980).  These only keep the solution, y, and a single
+increment register, dy, which are updated in place after each stage::
+
+   dy = A_s dy + dt k_s
+   y = y + B_s dy
+
+where k_s is evaluated at t + c_s dt (and A_1 = 0).
+
+Finally, the embedded pairs carry a second set of weights, bhat, that
+give a lower-order solution from the same stages::
+
+   yhat_{n+1} = y_n + dt sum_{i=1}^s {bhat_i k_i}
+
+The difference between the two solutions estimates the error of the
+step, which is used to pick the timestep adaptively.
+
 """
 
 import numpy as np
@@ -71,25 +88,114 @@ b["RK4"] = np.array([1./6., 1./3., 1./3., 1./6.])
 c["RK4"] = np.array([0.0, 0.5, 0.5, 1.0])
 
 
+# the embedded pairs -- bhat gives the lower-order solution, whose
+# order is in embedded_order
+bhat = {}
+embedded_order = {}
+
+# third-order with an embedded second-order solution (Bogacki & Shampine 1989)
+a["BS32"] = np.array([[0.0,   0.0,   0.0,   0.0],
+                      [0.5,   0.0,   0.0,   0.0],
+                      [0.0,   0.75,  0.0,   0.0],
+                      [2./9., 1./3., 4./9., 0.0]])
+
+b["BS32"] = np.array([2./9., 1./3., 4./9., 0.0])
+
+bhat["BS32"] = np.array([7./24., 1./4., 1./3., 1./8.])
+
+c["BS32"] = np.array([0.0, 0.5, 0.75, 1.0])
+
+embedded_order["BS32"] = 2
+
+
+# fifth-order with an embedded fourth-order solution (Dormand & Prince 1980)
+a["DP54"] = np.array([[0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+                      [1./5., 0.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+                      [3./40., 9./40., 0.0, 0.0, 0.0, 0.0, 0.0],
+                      [44./45., -56./15., 32./9., 0.0, 0.0, 0.0, 0.0],
+                      [19372./6561., -25360./2187., 64448./6561., -212./729., 0.0, 0.0, 0.0],
+                      [9017./3168., -355./33., 46732./5247., 49./176., -5103./18656., 0.0, 0.0],
+                      [35./384., 0.0, 500./1113., 125./192., -2187./6784., 11./84., 0.0]])
+
+b["DP54"] = np.array([35./384., 0.0, 500./1113., 125./192., -2187./6784., 11./84., 0.0])
+
+bhat["DP54"] = np.array([5179./57600., 0.0, 7571./16695., 393./640.,
+                         -92097./339200., 187./2100., 1./40.])
+
+c["DP54"] = np.array([0.0, 1./5., 3./10., 4./5., 8./9., 1.0, 1.0])
+
+embedded_order["DP54"] = 4
+
+
+# the low-storage schemes
+A2N = {}
+B2N = {}
+
+# second-order TVD (Gottlieb & Shu) -- the same scheme as TVD2
+A2N["TVD2-2N"] = np.array([0.0, -1.0])
+
+B2N["TVD2-2N"] = np.array([1.0, 0.5])
+
+c["TVD2-2N"] = np.array([0.0, 1.0])
+
+
+# third-order (Williamson 1980)
+A2N["RK3-2N"] = np.array([0.0, -5./9., -153./128.])
+
+B2N["RK3-2N"] = np.array([1./3., 15./16., 8./15.])
+
+c["RK3-2N"] = np.array([0.0, 1./3., 3./4.])
+
+
+# fourth-order, five stages (Carpenter & Kennedy 1994)
+A2N["RK4-2N"] = np.array([0.0,
+                          -567301805773./1357537059087.,
+                          -2404267990393./2016746695238.,
+                          -3550918686646./2091501179385.,
+                          -1275806237668./842570457699.])
+
+B2N["RK4-2N"] = np.array([1432997174477./9575080441755.,
+                          5161836677717./13612068292357.,
+                          1720146321549./2090206949498.,
+                          3134564353537./4481467310338.,
+                          2277821191437./14882151754819.])
+
+c["RK4-2N"] = np.array([0.0,
+                        1432997174477./9575080441755.,
+                        2526269341429./6820363962896.,
+                        2006345519317./3224310063776.,
+                        2802321613138./2924317926251.])
+
+
 class RKIntegrator:
     """the integration class for CellCenterData2d, supporting RK
     integration"""
 
     def __init__(self, t, dt, method="RK4"):
         """t is the starting time, dt is the total timestep to advance, method
-        = {2,4} is the temporal method"""
+        is the temporal method (a key of b or B2N)"""
         self.method = method
 
         self.t = t
         self.dt = dt
 
+        self.low_storage = method in B2N
+
         # storage for the intermediate stages
-        self.k = [None]*len(b[self.method])
+        self.k = [None]*self.nstages()
+
+        # the state the stages start from (for the Butcher tableau
+        # methods) or the increment register (for the low-storage
+        # methods) -- these are allocated once and reused by each stage
+        self.ytmp = None
+        self.dy = None
 
         self.start = None
 
     def nstages(self):
         """return the number of stages"""
+        if self.low_storage:
+            return len(B2N[self.method])
         return len(b[self.method])
 
     def set_start(self, start):
@@ -97,35 +203,100 @@ class RKIntegrator:
         object)"""
         self.start = start
 
+        if self.low_storage:
+            self.dy = start.grid.scratch_array(nvar=start.nvar)
+
     def store_increment(self, istage, k_stage):
         """store the increment for stage istage -- this should not have a dt
         weighting"""
-        self.k[istage] = k_stage
+        if not self.low_storage:
+            self.k[istage] = k_stage
+            return
+
+        # update the registers in place -- the increment is not
+        # needed after this
+        A = A2N[self.method][istage]
+        B = B2N[self.method][istage]
+        for n in range(self.start.nvar):
+            var = self.start.get_var_by_index(n)
+            dy = self.dy.v(n=n)
+            dy[:, :] = A*dy + self.dt*k_stage.v(n=n)
+            var.v()[:, :] += B*dy
+
+        self.start.state_changed()
 
     def get_stage_start(self, istage):
         """get the starting conditions (a CellCenterData2d object) for stage
         istage"""
+        if self.low_storage:
+            # the solution register already holds the stage's state
+            self.start.t = self.t + c[self.method][istage]*self.dt
+            return self.start
+
         if istage == 0:
-            ytmp = self.start
+            return self.start
+
+        if self.ytmp is None:
+            self.ytmp = patch.cell_center_data_clone(self.start)
         else:
-            ytmp = patch.cell_center_data_clone(self.start)
-            for n in range(ytmp.nvar):
-                var = ytmp.get_var_by_index(n)
-                for s in range(istage):
-                    var.v()[:, :] += self.dt*a[self.method][istage, s]*self.k[s].v(n=n)[:, :]
+            self.ytmp.data[:, :, :] = self.start.data
+            self.ytmp.state_changed()
 
-            ytmp.t = self.t + c[self.method][istage]*self.dt
+        ytmp = self.ytmp
+        for n in range(ytmp.nvar):
+            var = ytmp.get_var_by_index(n)
+            for s in range(istage):
+                var.v()[:, :] += self.dt*a[self.method][istage, s]*self.k[s].v(n=n)[:, :]
+
+        ytmp.t = self.t + c[self.method][istage]*self.dt
 
         return ytmp
 
+    def has_error_estimate(self):
+        """does the method have an embedded error estimate?"""
+        return self.method in bhat
+
+    def error_order(self):
+        """return the order of the embedded solution -- the error
+        estimate scales as dt**(error_order() + 1)"""
+        return embedded_order[self.method]
+
+    def error_norm(self, atol, rtol):
+        """return the RMS norm of the difference between the solution
+        and the embedded solution, with each zone scaled by atol +
+        rtol |y_n|.  The step is accurate enough if this is <= 1.
+        This should be called before compute_final_update()."""
+
+        myg = self.start.grid
+        err = myg.scratch_array()
+
+        err_sum = 0.0
+        for n in range(self.start.nvar):
+            var = self.start.get_var_by_index(n)
+            err[:, :] = 0.0
+            for s in range(self.nstages()):
+                err.v()[:, :] += self.dt*(b[self.method][s] - bhat[self.method][s])*self.k[s].v(n=n)[:, :]
+
+            err_sum += np.sum((err.v()/(atol + rtol*np.abs(var.v())))**2, dtype=np.float64)
+
+        return np.sqrt(err_sum/(self.start.nvar*myg.nx*myg.ny))
+
     def compute_final_update(self):
         """this constructs the final t + dt update, overwriting the initial data"""
         ytmp = self.start
+
+        if self.low_storage:
+            # the stages already updated the solution in place
+            ytmp.t = self.t
+            return ytmp
+
         for n in range(ytmp.nvar):
             var = ytmp.get_var_by_index(n)
             for s in range(self.nstages()):
                 var.v()[:, :] += self.dt*b[self.method][s]*self.k[s].v(n=n)[:, :]
 
+        ytmp.state_changed()
+
         return ytmp
 
     def __str__(self):
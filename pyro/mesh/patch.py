@@ -29,16 +29,46 @@ Typical usage:
 
    data.fill_BC("density")
 
+  or, for all of the variables at once::
+
+   data.fill_BC_all()
+
 """
 
+import contextlib
+import inspect
+
 import h5py
 import numpy as np
 
 import pyro.mesh.boundary as bnd
 from pyro.mesh.array_indexer import ArrayIndexer, ArrayIndexerFC
+from pyro.mesh.scratch_pool import ScratchPool
 from pyro.util import msg
 
 
+def _index_groups(groups):
+    """convert the lists of variable indices in groups into slices (a
+    view rather than a copy) where they are contiguous"""
+    index_groups = []
+    for bc, ns in groups.values():
+        if ns[-1] - ns[0] == len(ns) - 1:
+            index_groups.append((slice(ns[0], ns[-1]+1), bc))
+        else:
+            index_groups.append((np.array(ns), bc))
+    return index_groups
+
+
+def _takes_ivars(func):
+    """return True if the user-defined BC function func accepts the
+    ivars as an extra, fifth argument"""
+    try:
+        inspect.signature(func).bind(None, None, None, None, None)
+    except TypeError:
+        return False
+    return True
+
+
 class Grid2d:
     """
     the 2-d grid class.  The grid object will contain the coordinate
@@ -60,7 +90,8 @@ class Grid2d:
     # pylint: disable=too-many-instance-attributes
 
     def __init__(self, nx, ny, *, ng=1,
-                 xmin=0.0, xmax=1.0, ymin=0.0, ymax=1.0):
+                 xmin=0.0, xmax=1.0, ymin=0.0, ymax=1.0,
+                 dtype=np.float64):
         """
         Create a Grid2d object.
 
@@ -89,6 +120,9 @@ class Grid2d:
             Physical coordinate at the lower y boundary
         ymax : float, optional
             Physical coordinate at the upper y boundary
+        dtype : NumPy data type, optional
+            The floating point type of the data that lives on the
+            grid and of its scratch arrays (defaults to np.float64)
         """
 
         # pylint: disable=too-many-arguments
@@ -101,6 +135,8 @@ class Grid2d:
         self.qx = int(2*ng + nx)
         self.qy = int(2*ng + ny)
 
+        self.dtype = dtype
+
         # domain extrema
         self.xmin = xmin
         self.xmax = xmax
@@ -146,17 +182,59 @@ class Grid2d:
         self.xr2d = ArrayIndexer(d=xr2d, grid=self)
         self.yr2d = ArrayIndexer(d=yr2d, grid=self)
 
+        # an optional pool of reusable scratch arrays, and a count of
+        # how many scratch arrays we've allocated
+        self.scratch_pool = None
+        self.scratch_allocs = 0
+
     def scratch_array(self, *, nvar=1):
         """
         return a standard numpy array dimensioned to have the size
-        and number of ghostcells as the parent grid
+        and number of ghostcells as the parent grid.  If the scratch
+        pool is enabled, this may be a reused (zeroed) buffer.
         """
         if nvar == 1:
-            _tmp = np.zeros((self.qx, self.qy), dtype=np.float64)
+            shape = (self.qx, self.qy)
         else:
-            _tmp = np.zeros((self.qx, self.qy, nvar), dtype=np.float64)
+            shape = (self.qx, self.qy, nvar)
+
+        if self.scratch_pool is not None:
+            nalloc = self.scratch_pool.nalloc
+            _tmp = self.scratch_pool.get(shape, dtype=self.dtype)
+            self.scratch_allocs += self.scratch_pool.nalloc - nalloc
+        else:
+            _tmp = np.zeros(shape, dtype=self.dtype)
+            self.scratch_allocs += 1
+
         return ArrayIndexer(d=_tmp, grid=self)
 
+    def enable_scratch_pool(self):
+        """
+        have scratch_array() hand out reusable buffers from a pool --
+        these are returned to the pool with release_scratch() or at
+        the end of a scratch_scope()
+        """
+        if self.scratch_pool is None:
+            self.scratch_pool = ScratchPool()
+
+    def release_scratch(self, *arrays):
+        """
+        return scratch arrays to the pool.  They must not be used
+        afterwards.  This does nothing if the pool is not enabled.
+        """
+        if self.scratch_pool is not None:
+            self.scratch_pool.release(*arrays)
+
+    def scratch_scope(self):
+        """
+        return a context manager -- all of the scratch arrays
+        created in it are released to the pool when it exits.  If
+        the pool is not enabled, this does nothing.
+        """
+        if self.scratch_pool is None:
+            return contextlib.nullcontext()
+        return self.scratch_pool.scope()
+
     def coarse_like(self, N):
         """
         return a new grid object coarsened by a factor n, but with
@@ -164,7 +242,7 @@ class Grid2d:
         """
         return Grid2d(self.nx//N, self.ny//N, ng=self.ng,
                       xmin=self.xmin, xmax=self.xmax,
-                      ymin=self.ymin, ymax=self.ymax)
+                      ymin=self.ymin, ymax=self.ymax, dtype=self.dtype)
 
     def fine_like(self, N):
         """
@@ -173,7 +251,7 @@ class Grid2d:
         """
         return Grid2d(self.nx*N, self.ny*N, ng=self.ng,
                       xmin=self.xmin, xmax=self.xmax,
-                      ymin=self.ymin, ymax=self.ymax)
+                      ymin=self.ymin, ymax=self.ymax, dtype=self.dtype)
 
     def __str__(self):
         """ print out some basic information about the grid object """
@@ -199,9 +277,11 @@ class Cartesian2d(Grid2d):
     """
 
     def __init__(self, nx, ny, *, ng=1,
-                 xmin=0.0, xmax=1.0, ymin=0.0, ymax=1.0):
+                 xmin=0.0, xmax=1.0, ymin=0.0, ymax=1.0,
+                 dtype=np.float64):
 
-        super().__init__(nx, ny, ng=ng, xmin=xmin, xmax=xmax, ymin=ymin, ymax=ymax)
+        super().__init__(nx, ny, ng=ng, xmin=xmin, xmax=xmax, ymin=ymin, ymax=ymax,
+                         dtype=dtype)
 
         self.coord_type = 0
 
@@ -243,7 +323,8 @@ class SphericalPolar(Grid2d):
     """
 
     def __init__(self, nx, ny, *, ng=1,
-                 xmin=0.2, xmax=1.0, ymin=0.0, ymax=1.0):
+                 xmin=0.2, xmax=1.0, ymin=0.0, ymax=1.0,
+                 dtype=np.float64):
 
         # Make sure theta is within [0, PI]
         assert ymin >= 0.0 and ymax <= np.pi, "y or \u03b8 should be within [0, \u03c0]."
@@ -252,7 +333,8 @@ class SphericalPolar(Grid2d):
         assert xmin - ng*(xmax-xmin)/nx >= 0.0, \
             "xmin (r-direction), must be large enough so ghost cell doesn't have negative x."
 
-        super().__init__(nx, ny, ng=ng, xmin=xmin, xmax=xmax, ymin=ymin, ymax=ymax)
+        super().__init__(nx, ny, ng=ng, xmin=xmin, xmax=xmax, ymin=ymin, ymax=ymax,
+                         dtype=dtype)
 
         self.coord_type = 1
 
@@ -330,9 +412,9 @@ class CellCenterData2d:
     locked.  New variables cannot be added.
     """
 
-    # pylint: disable=too-many-instance-attributes
+    # pylint: disable=too-many-instance-attributes,too-many-public-methods
 
-    def __init__(self, grid, *, dtype=np.float64):
+    def __init__(self, grid, *, dtype=None):
 
         """
         Initialize the CellCenterData2d object.
@@ -343,11 +425,14 @@ class CellCenterData2d:
             The grid upon which the data will live
         dtype : NumPy data type, optional
             The datatype of the data we wish to create (defaults to
-            np.float64
+            the grid's dtype, usually np.float64)
         """
 
         self.grid = grid
 
+        if dtype is None:
+            dtype = grid.dtype
+
         self.dtype = dtype
         self.data = None
 
@@ -363,11 +448,22 @@ class CellCenterData2d:
 
         self.BCs = {}
 
+        # the custom BCs and the order to fill the ghost cells in --
+        # these are set up by create()
+        self.custom_bcs = {}
+        self.bc_fill_plan = []
+
         # time
         self.t = -1.0
 
         self.initialized = 0
 
+        # a counter that is incremented each time the state changes,
+        # and a cache of quantities computed from the current state
+        # (only active inside of a cache_scope())
+        self.state_version = 0
+        self.cache = None
+
     def register_var(self, name, bc):
         """
         Register a variable with CellCenterData2d object.
@@ -436,8 +532,50 @@ class CellCenterData2d:
                         dtype=self.dtype)
         self.data = ArrayIndexer(_tmp, grid=self.grid)
 
+        self._setup_bc_groups()
+
         self.initialized = 1
 
+    def _setup_bc_groups(self):
+        """
+        Look up the functions (and how to call them) for any custom
+        boundary conditions, and group together the variables that
+        have the same boundary conditions, so fill_BC_all() can fill
+        them all at once.
+        """
+
+        # for each variable, the custom BCs as (edge, function,
+        # whether it takes the ivars)
+        self.custom_bcs = {}
+        for name in self.names:
+            bc = self.BCs[name]
+            self.custom_bcs[name] = []
+            for edge, bc_type in [("xlb", bc.xlb), ("xrb", bc.xrb),
+                                  ("ylb", bc.ylb), ("yrb", bc.yrb)]:
+                if bc_type in bnd.ext_bcs:
+                    func = bnd.ext_bcs[bc_type]
+                    self.custom_bcs[name].append((edge, func, _takes_ivars(func)))
+
+        # a custom BC can use the ghost cells of the other variables,
+        # so to fill in the same order as calling fill_BC() on each
+        # variable, a variable with a custom BC ends a batch.  Each
+        # entry in bc_fill_plan is a list of (variable indices, BC)
+        # groups to fill together, followed by the name of the
+        # variable whose custom BCs are then filled (or None)
+        self.bc_fill_plan = []
+
+        groups = {}
+        for n, name in enumerate(self.names):
+            bc = self.BCs[name]
+            key = (bc.xlb, bc.xrb, bc.ylb, bc.yrb,
+                   id(bc.xl_value), id(bc.xr_value), id(bc.yl_value), id(bc.yr_value))
+            groups.setdefault(key, (bc, []))[1].append(n)
+
+            if self.custom_bcs[name] or n == self.nvar-1:
+                self.bc_fill_plan.append((_index_groups(groups),
+                                          name if self.custom_bcs[name] else None))
+                groups = {}
+
     def __str__(self):
         """ print out some basic information about the CellCenterData2d
             object """
@@ -557,12 +695,83 @@ class CellCenterData2d:
         n = self.names.index(name)
         self.data[:, :, n] = 0.0
 
+    def state_changed(self):
+        """
+        Note that the state data was modified -- anything cached from
+        the old state is discarded.  This needs to be called whenever
+        the data is changed inside of a cache_scope().
+        """
+        self.state_version += 1
+        if self.cache is not None:
+            self.cache.clear()
+
+    @contextlib.contextmanager
+    def cache_scope(self):
+        """
+        A context in which quantities computed from the state with
+        cached() are stored and reused until the state changes.  The
+        cache is discarded when the scope exits, so the data can be
+        freely modified outside of it.
+        """
+        if self.cache is not None:
+            # we are already in a scope
+            yield self
+            return
+
+        self.cache = {}
+        try:
+            yield self
+        finally:
+            self.cache = None
+
+    def cached(self, key, func):
+        """
+        Return the quantity named key computed from the current state,
+        calling func() to compute it if it is not already cached.  If
+        we are not in a cache_scope(), this just calls func().  Since
+        the cached quantity is shared by all of the callers, any arrays
+        in it (or in the tuple it returns) are made read-only.
+
+        Parameters
+        ----------
+        key : str
+            The name of the cached quantity
+        func : callable
+            A function with no arguments that computes the quantity
+
+        """
+        if self.cache is None:
+            return func()
+
+        try:
+            version, value = self.cache[key]
+        except KeyError:
+            pass
+        else:
+            if version == self.state_version:
+                return value
+
+        value = func()
+        for arr in value if isinstance(value, tuple) else (value,):
+            if isinstance(arr, np.ndarray):
+                arr.setflags(write=False)
+        self.cache[key] = (self.state_version, value)
+        return value
+
     def fill_BC_all(self):
         """
-        Fill boundary conditions on all variables.
+        Fill boundary conditions on all variables.  Variables that
+        share the same boundary conditions are filled together.
         """
-        for name in self.names:
-            self.fill_BC(name)
+
+        self.state_changed()
+
+        for groups, name in self.bc_fill_plan:
+            for ns, bc in groups:
+                self.data.fill_ghost_vars(ns, bc)
+
+            if name is not None:
+                self._fill_custom_BC(name)
 
     def fill_BC(self, name):
         """
@@ -582,31 +791,24 @@ class CellCenterData2d:
 
         """
 
+        self.state_changed()
+
         n = self.names.index(name)
         self.data.fill_ghost(n=n, bc=self.BCs[name])
 
         # that will handle the standard type of BCs, but if we asked
         # for a custom BC, we handle it here
-        if self.BCs[name].xlb in bnd.ext_bcs:
-            try:
-                bnd.ext_bcs[self.BCs[name].xlb](self.BCs[name].xlb, "xlb", name, self, self.ivars)
-            except TypeError:
-                bnd.ext_bcs[self.BCs[name].xlb](self.BCs[name].xlb, "xlb", name, self)
-        if self.BCs[name].xrb in bnd.ext_bcs:
-            try:
-                bnd.ext_bcs[self.BCs[name].xrb](self.BCs[name].xrb, "xrb", name, self)
-            except TypeError:
-                bnd.ext_bcs[self.BCs[name].xrb](self.BCs[name].xrb, "xrb", name, self, self.ivars)
-        if self.BCs[name].ylb in bnd.ext_bcs:
-            try:
-                bnd.ext_bcs[self.BCs[name].ylb](self.BCs[name].ylb, "ylb", name, self)
-            except TypeError:
-                bnd.ext_bcs[self.BCs[name].ylb](self.BCs[name].ylb, "ylb", name, self, self.ivars)
-        if self.BCs[name].yrb in bnd.ext_bcs:
-            try:
-                bnd.ext_bcs[self.BCs[name].yrb](self.BCs[name].yrb, "yrb", name, self)
-            except TypeError:
-                bnd.ext_bcs[self.BCs[name].yrb](self.BCs[name].yrb, "yrb", name, self, self.ivars)
+        self._fill_custom_BC(name)
+
+    def _fill_custom_BC(self, name):
+        """ fill any custom (user-defined) boundary conditions for name """
+
+        for edge, func, takes_ivars in self.custom_bcs[name]:
+            bc_type = getattr(self.BCs[name], edge)
+            if takes_ivars:
+                func(bc_type, edge, name, self, self.ivars)
+            else:
+                func(bc_type, edge, name, self)
 
     def min(self, name, *, ng=0):
         """
@@ -732,11 +934,30 @@ class CellCenterData2d:
         with h5py.File(filename, "w") as f:
             self.write_data(f)
 
-    def write_data(self, f):
+    def write_data(self, f, *, packed=False, compression=None,
+                   shuffle=False, single_precision=False):
         """
         write the data out to an hdf5 file -- here, f is an h5py
         File pbject
 
+        Parameters
+        ----------
+        f : h5py File object
+            The file to write to
+        packed : bool, optional
+            Store all of the variables in a single (nvar, nx, ny)
+            dataset, chunked by variable, instead of a group per
+            variable.
+        compression : str, optional
+            The compression filter to use for the packed dataset
+            ("gzip" or "lzf"), or None
+        shuffle : bool, optional
+            Apply the byte-shuffle filter to the packed dataset,
+            which usually helps compression
+        single_precision : bool, optional
+            Store the packed dataset as float32.  This is only
+            meant for visualization.
+
         """
 
         # auxiliary data
@@ -763,6 +984,10 @@ class CellCenterData2d:
         # data
         gstate = f.create_group("state")
 
+        if packed:
+            self._write_packed(gstate, compression, shuffle, single_precision)
+            return
+
         for n in range(self.nvar):
             gvar = gstate.create_group(self.names[n])
             gvar.create_dataset("data",
@@ -772,6 +997,35 @@ class CellCenterData2d:
             gvar.attrs["ylb"] = self.BCs[self.names[n]].ylb
             gvar.attrs["yrb"] = self.BCs[self.names[n]].yrb
 
+    def _write_packed(self, gstate, compression, shuffle, single_precision):
+        """
+        write the valid data for all of the variables as a single
+        dataset in the group gstate.  The variable names and their
+        BCs are stored as attributes of the group.
+        """
+
+        g = self.grid
+
+        if single_precision:
+            dtype = np.float32
+        else:
+            dtype = self.dtype
+
+        # variable-major order, so each variable is one contiguous chunk
+        data = np.ascontiguousarray(
+            np.moveaxis(self.data[g.ilo:g.ihi+1, g.jlo:g.jhi+1, :], -1, 0),
+            dtype=dtype)
+
+        gstate.attrs["layout"] = "packed"
+        gstate.attrs["names"] = self.names
+        for edge in ["xlb", "xrb", "ylb", "yrb"]:
+            gstate.attrs[edge] = [getattr(self.BCs[name], edge) for name in self.names]
+
+        gstate.create_dataset("data", data=data,
+                              chunks=(1, g.nx, g.ny),
+                              compression=compression,
+                              shuffle=shuffle)
+
     def pretty_print(self, var, fmt=None):
         """print out the contents of the data array with pretty formatting
         indicating where ghost cells are."""
@@ -785,7 +1039,7 @@ class FaceCenterData2d(CellCenterData2d):
     can be face-centered in x or y.  This is built in the same multistep
     process  as a CellCenterData2d object"""
 
-    def __init__(self, grid, idir, dtype=np.float64):
+    def __init__(self, grid, idir, dtype=None):
         """
         Initialize the FaceCenterData2d object
 
@@ -797,7 +1051,7 @@ class FaceCenterData2d(CellCenterData2d):
                1 for x or 2 for y)
         dtype : NumPy data type, optional
             The datatype of the data we wish to create (defaults to
-            np.float64
+            the grid's dtype, usually np.float64)
         """
 
         super().__init__(grid, dtype=dtype)
@@ -880,6 +1134,13 @@ class FaceCenterData2d(CellCenterData2d):
         """
         return ArrayIndexerFC(d=self.data, idir=self.idir, grid=self.grid)
 
+    def fill_BC_all(self):
+        """
+        Fill boundary conditions on all variables.
+        """
+        for name in self.names:
+            self.fill_BC(name)
+
     def fill_BC(self, name):
         """
         Fill the boundary conditions.  This operates on a single state
@@ -913,20 +1174,47 @@ class FaceCenterData2d(CellCenterData2d):
     def prolong(self, varname):
         raise NotImplementedError("prolongation not implemented for FaceCenterData2d")
 
-    def write_data(self, f):
+    def write_data(self, f, *, packed=False, compression=None,
+                   shuffle=False, single_precision=False):
         """
         write the data out to an hdf5 file -- here, f is an h5py
         File pbject
 
+        Parameters
+        ----------
+        f : h5py File object
+            The file to write to
+        packed : bool, optional
+            Not supported for face-centered data -- each variable
+            is always stored in its own group.
+        compression : str, optional
+            The compression filter to use for each variable's
+            dataset ("gzip" or "lzf"), or None
+        shuffle : bool, optional
+            Apply the byte-shuffle filter to each variable's dataset
+        single_precision : bool, optional
+            Store the data as float32.  This is only meant for
+            visualization.
+
         """
 
+        if packed:
+            msg.fail("ERROR: the packed layout is not supported for face-centered data")
+
+        if single_precision:
+            dtype = np.float32
+        else:
+            dtype = self.dtype
+
         # data
         gstate = f.create_group("face-centered-state")
 
         for n in range(self.nvar):
             gvar = gstate.create_group(self.names[n])
             gvar.create_dataset("data",
-                                data=self.get_var_by_index(n).v())
+                                data=np.asarray(self.get_var_by_index(n).v(), dtype=dtype),
+                                compression=compression,
+                                shuffle=shuffle)
             gvar.attrs["xlb"] = self.BCs[self.names[n]].xlb
             gvar.attrs["xrb"] = self.BCs[self.names[n]].xrb
             gvar.attrs["ylb"] = self.BCs[self.names[n]].ylb
@@ -4,6 +4,7 @@ of slopes in constructing interface states."""
 import sys
 
 import numpy as np
+from numba import njit, prange
 
 
 def limit(data, myg, idir, limiter):
@@ -183,6 +184,167 @@ def flatten_multid(myg, q, xi_x, xi_y, ivars):
     return xi
 
 
+@njit(cache=True)
+def _mc(dc, dl, dr):
+    """ the monotonized central difference of a zone """
+
+    if abs(dl) < abs(dr):
+        d1 = 2.0*dl
+    else:
+        d1 = 2.0*dr
+
+    if dl*dr > 0.0:
+        if abs(dc) < abs(d1):
+            return dc
+        return d1
+    return 0.0
+
+
+@njit(cache=True)
+def _limit2_zone(q, n, i, j, si, sj):
+    """ the 2nd order limited slope of component n in zone (i, j) """
+
+    return _mc(0.5*(q[i+si, j+sj, n] - q[i-si, j-sj, n]),
+               q[i+si, j+sj, n] - q[i, j, n],
+               q[i, j, n] - q[i-si, j-sj, n])
+
+
+@njit(cache=True)
+def _slope_zone(q, n, i, j, si, sj, ng, limiter):
+    """
+    the limited slope of component n in zone (i, j) -- this is
+    the same as limit(), which only finds the slopes in 2 ghost cells
+    """
+
+    if limiter == 0:
+        return 0.5*(q[i+si, j+sj, n] - q[i-si, j-sj, n])
+
+    if limiter == 1:
+        return _limit2_zone(q, n, i, j, si, sj)
+
+    qx, qy, _ = q.shape
+
+    # the 4th order limiter uses the 2nd order slopes of the
+    # neighbors, which are zero beyond 2 ghost cells
+    lo = ng - 2
+    ihi = qx - ng + 2
+    jhi = qy - ng + 2
+
+    ip, jp = i+si, j+sj
+    im, jm = i-si, j-sj
+
+    if lo <= ip < ihi and lo <= jp < jhi:
+        lda_p = _limit2_zone(q, n, ip, jp, si, sj)
+    else:
+        lda_p = 0.0
+
+    if lo <= im < ihi and lo <= jm < jhi:
+        lda_m = _limit2_zone(q, n, im, jm, si, sj)
+    else:
+        lda_m = 0.0
+
+    ap = q[ip, jp, n]
+    am = q[im, jm, n]
+
+    dc = (2./3.)*(ap - am - 0.25*(lda_p + lda_m))
+
+    return _mc(dc, ap - q[i, j, n], q[i, j, n] - am)
+
+
+@njit(cache=True)
+def _flatten_zone(q, i, j, si, sj, ip, iun, delta, z0, z1):
+    """ the 1-d flattening coefficient of zone (i, j), as in flatten() """
+
+    smallp = 1.e-10
+
+    dp = abs(q[i+si, j+sj, ip] - q[i-si, j-sj, ip])
+    dp2 = abs(q[i+2*si, j+2*sj, ip] - q[i-2*si, j-2*sj, ip])
+
+    z = dp/max(dp2, smallp)
+
+    t2 = dp/min(q[i+si, j+sj, ip], q[i-si, j-sj, ip])
+    t1 = q[i-si, j-sj, iun] - q[i+si, j+sj, iun]
+
+    if t1 > 0.0 and t2 > delta:
+        return min(1.0, max(0.0, 1.0 - (z - z0)/(z1 - z0)))
+    return 1.0
+
+
+@njit(cache=True, parallel=True)
+def limited_slopes(q, ng, limiter, use_flattening,
+                   ip, iu, iv, delta, z0, z1, ldx, ldy):
+    """
+    Find the limited slopes of all of the components of q in both
+    directions, including the flattening, at once.  This gives the
+    same result as calling flatten(), flatten_multid(), and then
+    limit() for each component and direction, but only needs a
+    sweep over the data for the flattening and one for the slopes.
+
+    Parameters
+    ----------
+    q : ndarray
+        The primitive variables, (qx, qy, nvar)
+    ng : int
+        The number of ghost cells
+    limiter : int
+        The limiter (0 = none, 1 = 2nd order, 2 = 4th order)
+    use_flattening : int
+        Do we apply flattening at shocks?
+    ip, iu, iv : int
+        The indices of the pressure and x- and y-velocity in q
+    delta, z0, z1 : float
+        The flattening parameters
+    ldx, ldy : ndarray
+        Zeroed arrays, shaped like q, to store the limited slopes in
+        the x- and y-directions (in 2 ghost cells) in
+    """
+
+    qx, qy, _ = q.shape
+
+    # the 1-d flattening coefficients -- these are 1 beyond 2 ghost
+    # cells
+    xi_x = np.ones((qx, qy))
+    xi_y = np.ones((qx, qy))
+
+    if use_flattening:
+        for i in prange(ng-2, qx-ng+2):  # pylint: disable=not-an-iterable
+            for j in range(ng-2, qy-ng+2):
+                xi_x[i, j] = _flatten_zone(q, i, j, 1, 0, ip, iu, delta, z0, z1)
+                xi_y[i, j] = _flatten_zone(q, i, j, 0, 1, ip, iv, delta, z0, z1)
+
+    for i in prange(ng-2, qx-ng+2):  # pylint: disable=not-an-iterable
+        _slopes_row(i, ng, limiter, use_flattening, ip, q, xi_x, xi_y, ldx, ldy)
+
+
+@njit(cache=True)
+def _slopes_row(i, ng, limiter, use_flattening, ip, q, xi_x, xi_y, ldx, ldy):
+    """ the flattened, limited slopes of row i, as described in limited_slopes """
+
+    qy, nvar = q.shape[1:]
+
+    for j in range(ng-2, qy-ng+2):
+
+        # the multidimensional flattening coefficient
+        if use_flattening:
+            if q[i+1, j, ip] - q[i-1, j, ip] > 0:
+                px = xi_x[i-1, j]
+            else:
+                px = xi_x[i+1, j]
+
+            if q[i, j+1, ip] - q[i, j-1, ip] > 0:
+                py = xi_y[i, j-1]
+            else:
+                py = xi_y[i, j+1]
+
+            xi = min(xi_x[i, j], px, xi_y[i, j], py)
+        else:
+            xi = 1.0
+
+        for n in range(nvar):
+            ldx[i, j, n] = xi*_slope_zone(q, n, i, j, 1, 0, ng, limiter)
+            ldy[i, j, n] = xi*_slope_zone(q, n, i, j, 0, 1, ng, limiter)
+
+
 # Constants for the WENO reconstruction
 # NOTE: integer division laziness means this WILL fail on python2
 C_3 = np.array([1, 2]) / 3
@@ -258,30 +420,145 @@ def weno_upwind(q, order):
     return np.dot(w, q_stencils)
 
 
-def weno(q, order):
+@njit(cache=True)
+def weno_point(f, i, j, di, dj, C, a, sigma, weno_z, work):
     """
-    Perform WENO reconstruction
+    The upwinded WENO reconstruction of f at the interface between zone
+    (i, j) and zone (i+di, j+dj), using the stencils that include zone
+    (i, j).  This is the same as weno_upwind() applied to the points
+    f[i+s*di, j+s*dj], s = 1-k, ..., k-1.
 
     Parameters
     ----------
+    f : ndarray
+        The 2-d data to reconstruct
+    i, j : int
+        The zone we reconstruct from
+    di, dj : int
+        The direction to reconstruct in (one of them is +1 or -1,
+        the other 0)
+    C, a, sigma : ndarray
+        The WENO coefficients for the order (k) we want
+    weno_z : bool
+        Do we use the WENO-Z weights instead of the WENO-JS weights?
+    work : ndarray
+        Scratch space of shape (3, k), so that a caller looping over
+        many zones only allocates it once
 
-    q : np array
-        input data with 3 ghost zones
+    Returns
+    -------
+    out : float
+        The reconstructed interface value
+    """
+
+    order = C.shape[0]
+    epsilon = 1e-16
+
+    alpha = work[0, :]
+    beta = work[1, :]
+    q_stencils = work[2, :]
+    for k in range(order):
+        beta_k = 0.0
+        q_k = 0.0
+        for l in range(order):
+            for m in range(l+1):
+                beta_k += sigma[k, l, m] * f[i+(k-l)*di, j+(k-l)*dj] * f[i+(k-m)*di, j+(k-m)*dj]
+            q_k += a[k, l] * f[i+(k-l)*di, j+(k-l)*dj]
+        beta[k] = beta_k
+        q_stencils[k] = q_k
+
+    if weno_z:
+        # Borges et al. (2008): the global smoothness indicator lets
+        # the weights get closer to the optimal ones on smooth data
+        tau = abs(beta[0] - beta[order-1])
+        for k in range(order):
+            r = tau / (epsilon + beta[k])
+            alpha[k] = C[k] * (1.0 + r * r)
+    else:
+        for k in range(order):
+            alpha[k] = C[k] / (epsilon + beta[k] * beta[k])
+
+    alpha_sum = 0.0
+    for k in range(order):
+        alpha_sum += alpha[k]
+
+    result = 0.0
+    for k in range(order):
+        result += alpha[k] / alpha_sum * q_stencils[k]
+
+    return result
+
+
+def weno_2d(q, order, idir, weno_z=False):
+    """
+    Perform the WENO reconstruction of every zone of a 2-d array in
+    one direction.  The zones within order of the boundary are not
+    reconstructed and are left as 0.
+
+    Parameters
+    ----------
+    q : ndarray
+        The 2-d data to reconstruct
     order : int
         WENO order (k)
+    idir : int
+        The direction to reconstruct in (1 = x, 2 = y)
+    weno_z : bool
+        Do we use the WENO-Z weights instead of the WENO-JS weights?
 
     Returns
     -------
-
-    q_plus, q_minus : np array
-        data reconstructed to the right / left respectively
+    q_minus, q_plus : ndarray
+        The data reconstructed to the left / right edge of each zone
     """
-    Npoints = q.shape
+
+    if idir == 1:
+        di, dj = 1, 0
+    else:
+        di, dj = 0, 1
+
     q_minus = np.zeros_like(q)
     q_plus = np.zeros_like(q)
 
-    for i in range(order, Npoints-order):
-        q_plus[i] = weno_upwind(q[i+1-order:i+order], order)
-        q_minus[i] = weno_upwind(q[i+order-1:i-order:-1], order)
+    _weno_2d(q, di, dj, C_all[order], a_all[order], sigma_all[order],
+             weno_z, q_minus, q_plus)
 
     return q_minus, q_plus
+
+
+@njit(cache=True, parallel=True)
+def _weno_2d(q, di, dj, C, a, sigma, weno_z, q_minus, q_plus):
+    """ the zone by zone reconstruction done by weno_2d """
+
+    order = C.shape[0]
+    qx, qy = q.shape
+
+    for i in prange(order*di, qx-order*di):  # pylint: disable=not-an-iterable
+        # each row gets its own scratch space, so the threads don't share it
+        work = np.empty((3, order))
+        for j in range(order*dj, qy-order*dj):
+            q_plus[i, j] = weno_point(q, i, j, di, dj, C, a, sigma, weno_z, work)
+            q_minus[i, j] = weno_point(q, i, j, -di, -dj, C, a, sigma, weno_z, work)
+
+
+def weno(q, order):
+    """
+    Perform WENO reconstruction
+
+    Parameters
+    ----------
+
+    q : np array
+        input data with order ghost zones
+    order : int
+        WENO order (k)
+
+    Returns
+    -------
+
+    q_minus, q_plus : np array
+        data reconstructed to the left / right edge of each zone
+    """
+    q_minus, q_plus = weno_2d(q[:, np.newaxis], order, 1)
+
+    return q_minus[:, 0], q_plus[:, 0]
@@ -0,0 +1,125 @@
+"""
+A pool of reusable scratch arrays for a grid.
+
+Grid2d.scratch_array() normally allocates a new, zeroed array each
+time it is called, and a single step of a solver can ask for dozens
+of these.  When a grid has a pool enabled, scratch_array() instead
+hands out a buffer of the right shape that was released back to the
+pool earlier (zeroing it first), and only allocates if there is none
+available.
+
+The general usage is::
+
+   myg.enable_scratch_pool()
+
+   with myg.scratch_scope():
+       a = myg.scratch_array()
+       ...
+
+All of the arrays handed out inside a scope are released when the
+scope exits, so they must not be used (or stored) after that.  An
+array can also be returned to the pool directly with
+``myg.release_scratch(a)``.
+
+"""
+
+import contextlib
+
+import numpy as np
+
+
+class ScratchPool:
+    """
+    hold the scratch buffers that are not in use, keyed on their
+    shape and data type
+    """
+
+    def __init__(self):
+
+        self.free = {}
+
+        # every buffer we allocated, keyed on the address of its data,
+        # so we can find it again from a view
+        self.owned = {}
+
+        # the arrays handed out in each (nested) scope
+        self.scopes = []
+
+        # keep track of how often we were able to reuse a buffer
+        self.nalloc = 0
+        self.nreuse = 0
+
+    @staticmethod
+    def _address(a):
+        return np.asarray(a).__array_interface__["data"][0]
+
+    def get(self, shape, dtype=np.float64):
+        """
+        Return a zeroed array of the given shape and type, reusing a
+        released buffer if we have one.
+
+        Parameters
+        ----------
+        shape : tuple
+            the shape of the array
+        dtype : NumPy data type, optional
+            the data type of the array
+
+        Returns
+        -------
+        out : ndarray
+
+        """
+
+        key = (shape, np.dtype(dtype))
+
+        try:
+            buf = self.free[key].pop()
+        except (KeyError, IndexError):
+            buf = np.zeros(shape, dtype=dtype)
+            self.owned[self._address(buf)] = buf
+            self.nalloc += 1
+        else:
+            buf[...] = 0
+            self.nreuse += 1
+
+        if self.scopes:
+            self.scopes[-1].append(buf)
+
+        return buf
+
+    def release(self, *arrays):
+        """
+        Return arrays (or ArrayIndexer views of them) that we handed
+        out to the pool.  Arrays that did not come from the pool, or
+        are already released, are ignored.
+        """
+
+        for a in arrays:
+            buf = self.owned.get(self._address(a))
+            if buf is None or np.shape(a) != buf.shape:
+                continue
+
+            free = self.free.setdefault((buf.shape, buf.dtype), [])
+            if not any(b is buf for b in free):
+                free.append(buf)
+
+    @contextlib.contextmanager
+    def scope(self):
+        """
+        A context in which all of the arrays handed out are released
+        back to the pool on exit.
+        """
+
+        self.scopes.append([])
+        try:
+            yield self
+        finally:
+            self.release(*self.scopes.pop())
+
+    def nbytes(self):
+        """ the total memory held by the pool """
+        return sum(buf.nbytes for buf in self.owned.values())
+
+    def __str__(self):
+        return f"scratch pool: {len(self.owned)} buffers ({self.nbytes()} bytes), {self.nreuse} reused, {self.nalloc} allocated"
@@ -0,0 +1,95 @@
+# unit tests for the Runge-Kutta integration
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+import pyro.mesh.boundary as bnd
+from pyro.mesh import integration, patch
+
+
+def integrate(method, nsteps):
+    """ integrate dy/dt = -y + cos(t) from y(0) = 1 to t = 1 """
+
+    g = patch.Grid2d(4, 4, ng=1)
+    d = patch.CellCenterData2d(g)
+    d.register_var("y", bnd.BC())
+    d.create()
+    d.get_var("y")[:, :] = 1.0
+    d.t = 0.0
+
+    dt = 1.0/nsteps
+    for _ in range(nsteps):
+        rk = integration.RKIntegrator(d.t, dt, method=method)
+        rk.set_start(d)
+
+        for s in range(rk.nstages()):
+            ytmp = rk.get_stage_start(s)
+            k = g.scratch_array(nvar=1)
+            k.v(n=0)[:, :] = -ytmp.get_var("y").v() + np.cos(ytmp.t)
+            rk.store_increment(s, k)
+
+        rk.compute_final_update()
+        d.t += dt
+
+    return d.get_var("y").v()
+
+
+@pytest.mark.parametrize("method, order", [("RK2", 2), ("TVD2", 2), ("TVD3", 3), ("RK4", 4),
+                                           ("TVD2-2N", 2), ("RK3-2N", 3), ("RK4-2N", 4),
+                                           ("BS32", 3), ("DP54", 5)])
+def test_convergence(method, order):
+
+    exact = 0.5*(np.cos(1.0) + np.sin(1.0) + np.exp(-1.0))
+
+    err_coarse = np.max(np.abs(integrate(method, 16) - exact))
+    err_fine = np.max(np.abs(integrate(method, 32) - exact))
+
+    assert np.log2(err_coarse/err_fine) == pytest.approx(order, abs=0.2)
+
+
+@pytest.mark.parametrize("method", ["BS32", "DP54"])
+def test_error_estimate(method):
+
+    # the error estimate of a single step should scale as dt**(q+1),
+    # where q is the order of the embedded solution
+    g = patch.Grid2d(4, 4, ng=1)
+    d = patch.CellCenterData2d(g)
+    d.register_var("y", bnd.BC())
+    d.create()
+
+    errs = []
+    for dt in [0.1, 0.05]:
+        d.get_var("y")[:, :] = 1.0
+        d.t = 0.0
+
+        rk = integration.RKIntegrator(d.t, dt, method=method)
+        rk.set_start(d)
+        assert rk.has_error_estimate()
+
+        for s in range(rk.nstages()):
+            ytmp = rk.get_stage_start(s)
+            k = g.scratch_array(nvar=1)
+            k.v(n=0)[:, :] = -ytmp.get_var("y").v() + np.cos(ytmp.t)
+            rk.store_increment(s, k)
+
+        errs.append(rk.error_norm(1.0, 0.0))
+
+    assert np.log2(errs[0]/errs[1]) == pytest.approx(rk.error_order() + 1, abs=0.2)
+
+
+def test_low_storage():
+
+    # the 2N form of TVD2 is the same scheme
+    assert_allclose(integrate("TVD2-2N", 8), integrate("TVD2", 8), rtol=1.e-14)
+
+    # the stages are done in place, without copying the state
+    g = patch.Grid2d(4, 4, ng=1)
+    d = patch.CellCenterData2d(g)
+    d.register_var("y", bnd.BC())
+    d.create()
+
+    rk = integration.RKIntegrator(0.0, 0.1, method="RK4-2N")
+    rk.set_start(d)
+    for s in range(rk.nstages()):
+        assert rk.get_stage_start(s) is d
+        rk.store_increment(s, g.scratch_array(nvar=1))
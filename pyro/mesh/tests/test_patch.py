@@ -1,5 +1,6 @@
 # unit tests for the patch
 import numpy as np
+import pytest
 from numpy.testing import assert_array_equal
 
 import pyro.mesh.boundary as bnd
@@ -42,6 +43,31 @@ class TestGrid2d:
         q = self.g.scratch_array()
         assert q.shape == (self.g.qx, self.g.qy)
 
+    def test_scratch_pool(self):
+        self.g.enable_scratch_pool()
+
+        with self.g.scratch_scope():
+            a = self.g.scratch_array()
+            a[:, :] = 1.0
+            b = self.g.scratch_array(nvar=2)
+
+        # the buffers from the scope are reused, and zeroed
+        with self.g.scratch_scope():
+            c = self.g.scratch_array()
+            assert c.base is a.base
+            assert np.all(c == 0.0)
+            d = self.g.scratch_array()
+            assert d.base is not c.base
+
+        e = self.g.scratch_array(nvar=2)
+        assert e.base is b.base
+        self.g.release_scratch(e.v())
+        self.g.release_scratch(e)
+        assert self.g.scratch_array(nvar=2).base is b.base
+        assert self.g.scratch_array(nvar=2).base is not b.base
+
+        assert self.g.scratch_allocs == 4
+
     def test_coarse_like(self):
         q = self.g.coarse_like(2)
         assert q.qx == 2*self.g.ng + self.g.nx//2
@@ -67,6 +93,21 @@ class TestGrid2d:
         g2 = patch.Grid2d(2, 5, ng=1)
         assert g2 != self.g
 
+    def test_dtype(self):
+        g32 = patch.Grid2d(4, 6, ng=2, dtype=np.float32)
+        assert g32.scratch_array(nvar=2).dtype == np.float32
+        assert g32.coarse_like(2).scratch_array().dtype == np.float32
+
+        d = patch.CellCenterData2d(g32)
+        d.register_var("a", bnd.BC())
+        d.create()
+        assert d.data.dtype == np.float32
+
+        # the norm is accumulated in double precision
+        q = g32.scratch_array()
+        q.v()[:, :] = 1.0
+        assert q.norm() == np.sqrt(24*g32.dx*g32.dy)
+
 
 # Cartesian2d tests
 class TestCartesian2d:
@@ -224,6 +265,45 @@ class TestCellCenterData2d:
         self.d.zero("a")
         assert self.d.min("a") == 0.0 and self.d.max("a") == 0.0
 
+    def test_cache(self):
+        calls = []
+
+        def total():
+            calls.append(1)
+            return self.d.data.sum()
+
+        # without a scope, nothing is cached
+        self.d.cached("total", total)
+        self.d.cached("total", total)
+        assert len(calls) == 2
+
+        with self.d.cache_scope():
+            assert self.d.cached("total", total) == 0
+            assert len(calls) == 3
+
+            # modifying the data directly is not seen...
+            a = self.d.get_var("a")
+            a[:, :] = 1
+            assert self.d.cached("total", total) == 0
+            assert len(calls) == 3
+
+            # ...until we note that the state changed
+            self.d.state_changed()
+            assert self.d.cached("total", total) == self.g.qx*self.g.qy
+            assert len(calls) == 4
+
+            self.d.fill_BC("a")
+            self.d.cached("total", total)
+            assert len(calls) == 5
+
+            # cached arrays are shared, so they can't be modified
+            u, v = self.d.cached("velocity", lambda: (a.copy(), a.copy()))
+            assert not u.flags.writeable and not v.flags.writeable
+            with pytest.raises(ValueError):
+                u[:, :] = 0.0
+
+        assert self.d.cache is None
+
 
 def test_bcs():
 
@@ -314,3 +394,38 @@ def test_bcs():
     # top
     assert_array_equal(d[myg.ilo:myg.ihi+1, myg.jhi-1:myg.jhi+1],
                        -np.fliplr(d[myg.ilo:myg.ihi+1, myg.jhi+1:myg.jhi+3]))
+
+
+# filling all of the variables at once (grouped by BC) should give the
+# same result as filling them one at a time
+def test_fill_BC_all():
+
+    myg = patch.Grid2d(8, 6, ng=4, xmax=1.0, ymax=1.0)
+
+    bco = bnd.BC(xlb="outflow", xrb="reflect-even",
+                 ylb="reflect-odd", yrb="outflow")
+    bcp = bnd.BC(xlb="periodic", xrb="periodic",
+                 ylb="reflect-even", yrb="outflow")
+    bcd = bnd.BC(xlb="dirichlet", xrb="neumann",
+                 ylb="periodic", yrb="periodic",
+                 xl_func=lambda y: 1.0 + y, grid=myg)
+
+    # interleave the BCs so the groups are not contiguous
+    myd = patch.CellCenterData2d(myg)
+    for n, bc in enumerate([bco, bcp, bco, bcd, bcp, bco]):
+        myd.register_var(f"var{n}", bc)
+    myd.create()
+
+    groups, custom = myd.bc_fill_plan[0]
+    assert len(groups) == 3
+    assert custom is None
+
+    myd.data[:, :, :] = np.random.default_rng(1).random(myd.data.shape)
+
+    myd2 = patch.cell_center_data_clone(myd)
+
+    myd.fill_BC_all()
+    for name in myd2.names:
+        myd2.fill_BC(name)
+
+    assert_array_equal(myd.data, myd2.data)
@@ -0,0 +1,110 @@
+# unit tests for the reconstruction
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from pyro.mesh import patch, reconstruction
+from pyro.util import runparams
+
+
+class Variables:
+    """ the primitive variable indices used by the flattening """
+    def __init__(self):
+        self.irho = 0
+        self.iu = 1
+        self.iv = 2
+        self.ip = 3
+
+
+# the batched slopes should be the same as limiting each variable
+# separately
+@pytest.mark.parametrize("limiter", [0, 1, 2])
+@pytest.mark.parametrize("use_flattening", [0, 1])
+def test_limited_slopes(limiter, use_flattening):
+
+    myg = patch.Grid2d(8, 6, ng=4)
+    ivars = Variables()
+
+    rp = runparams.RuntimeParameters()
+    rp.params["compressible.delta"] = 0.33
+    rp.params["compressible.z0"] = 0.75
+    rp.params["compressible.z1"] = 0.85
+
+    # a state with some shocks, so the flattening does something
+    rng = np.random.default_rng(12345)
+    q = myg.scratch_array(nvar=4)
+    q[...] = rng.uniform(0.5, 1.0, size=q.shape)
+    q[:, :, ivars.ip] += np.where(myg.x2d > 0.5, 10.0, 0.0) + np.where(myg.y2d > 0.5, 5.0, 0.0)
+    q[:, :, ivars.iu] -= np.where(myg.x2d > 0.5, 5.0, 0.0)
+    q[:, :, ivars.iv] -= np.where(myg.y2d > 0.5, 5.0, 0.0)
+
+    if use_flattening:
+        xi_x = reconstruction.flatten(myg, q, 1, ivars, rp)
+        xi_y = reconstruction.flatten(myg, q, 2, ivars, rp)
+        xi = reconstruction.flatten_multid(myg, q, xi_x, xi_y, ivars)
+        assert xi.v().min() < 1.0
+    else:
+        xi = 1.0
+
+    ldx_ref = myg.scratch_array(nvar=4)
+    ldy_ref = myg.scratch_array(nvar=4)
+    for n in range(4):
+        ldx_ref[:, :, n] = xi*reconstruction.limit(q[:, :, n], myg, 1, limiter)
+        ldy_ref[:, :, n] = xi*reconstruction.limit(q[:, :, n], myg, 2, limiter)
+
+    ldx = myg.scratch_array(nvar=4)
+    ldy = myg.scratch_array(nvar=4)
+    reconstruction.limited_slopes(q, myg.ng, limiter, use_flattening,
+                                  ivars.ip, ivars.iu, ivars.iv,
+                                  rp.params["compressible.delta"],
+                                  rp.params["compressible.z0"],
+                                  rp.params["compressible.z1"],
+                                  ldx, ldy)
+
+    assert_array_equal(ldx, ldx_ref)
+    assert_array_equal(ldy, ldy_ref)
+
+
+# the compiled 2-d reconstruction should agree with doing each zone
+# with weno_upwind
+@pytest.mark.parametrize("order", [2, 3])
+def test_weno_2d(order):
+
+    rng = np.random.default_rng(12345)
+    q = rng.uniform(0.5, 1.0, size=(12, 10))
+
+    qm_x, qp_x = reconstruction.weno_2d(q, order, 1)
+    qm_y, qp_y = reconstruction.weno_2d(q, order, 2)
+
+    for i in range(order, q.shape[0]-order):
+        for j in range(order, q.shape[1]-order):
+            assert qp_x[i, j] == pytest.approx(reconstruction.weno_upwind(q[i+1-order:i+order, j], order), rel=1.e-13)
+            assert qm_x[i, j] == pytest.approx(reconstruction.weno_upwind(q[i+order-1:i-order:-1, j], order), rel=1.e-13)
+            assert qp_y[i, j] == pytest.approx(reconstruction.weno_upwind(q[i, j+1-order:j+order], order), rel=1.e-13)
+            assert qm_y[i, j] == pytest.approx(reconstruction.weno_upwind(q[i, j+order-1:j-order:-1], order), rel=1.e-13)
+
+    # the 1-d version is the same as the x-direction
+    qm, qp = reconstruction.weno(q[:, 4], order)
+    assert_array_equal(qm, qm_x[:, 4])
+    assert_array_equal(qp, qp_x[:, 4])
+
+
+# the WENO-Z weights are closer to the optimal ones, so reconstructing
+# a sine from its averages should be more accurate
+def test_weno_z():
+
+    order = 3
+    n = 32
+    dx = 1.0/n
+    xl = (np.arange(n) - order)*dx
+    xr = xl + dx
+    q = (np.cos(2*np.pi*xl) - np.cos(2*np.pi*xr))/(2*np.pi*dx)
+
+    interior = slice(order, n-order)
+    err = {}
+    for weno_z in [False, True]:
+        _, qp = reconstruction.weno_2d(q[:, np.newaxis], order, 1, weno_z)
+        err[weno_z] = np.abs(qp[interior, 0] - np.sin(2*np.pi*xr[interior])).max()
+
+    assert err[False] < 1.e-4
+    assert err[True] < 0.5*err[False]
@@ -26,6 +26,11 @@ the coefficients of the Helmholtz equation.  Setting verbose = 1
 causing debugging information to be output, so you can see the
 residual errors in each of the V-cycles.
 
+By default, the smoothing and residual computations use the compiled
+kernels in multigrid/kernels.py.  Passing backend="numpy" instead
+uses array operations on the ArrayIndexer views -- the two give
+identical results.
+
 Initialization is done as::
 
    a.init_zeros()
@@ -45,7 +50,29 @@ Then to solve, you just do::
 
    a.solve(rtol = 1.e-10)
 
-where rtol is the desired tolerance (residual norm / source norm)
+where rtol is the desired tolerance (residual norm / source norm).
+By default this does V-cycles.  W- or F-cycles can be selected with
+the cycle_type argument, and fmg=True will start with a full multigrid
+pass to get the initial guess::
+
+   a.solve(rtol = 1.e-10, cycle_type="F", fmg=True)
+
+After the solve, a.num_cycles and a.solve_time hold the number of
+cycles taken and the wall time of the solve.
+
+For problems where the cycles alone converge slowly (e.g. strongly
+varying coefficients), a Krylov method preconditioned by a single
+cycle can be used instead::
+
+   a.krylov_solve(rtol = 1.e-10, method="bicgstab")
+
+By default, the hierarchy coarsens all the way down to a 2x2 grid,
+where the bottom solve is just smoothing.  Instead, the hierarchy can
+stop at a larger grid and solve the coarse problem as a matrix system,
+either with a (cached) LU decomposition or with a Jacobi-preconditioned
+Krylov method::
+
+   a = multigrid.CellCenterMG2d(nx, ny, bottom_solver="lu", bottom_size=16)
 
 to access the final solution, use the get_solution method::
 
@@ -64,13 +91,17 @@ a.dx and a.dy are the grid spacings
 
 
 import math
+import time
 
 import matplotlib
 import matplotlib.pyplot as plt
 import numpy as np
+from scipy import linalg
 
 import pyro.mesh.boundary as bnd
+import pyro.multigrid.kernels as mg_kernels
 from pyro.mesh import patch
+from pyro.multigrid import krylov
 from pyro.util import msg
 
 
@@ -90,6 +121,8 @@ class CellCenterMG2d:
                  yl_BC=None, yr_BC=None,
                  alpha=0.0, beta=-1.0,
                  nsmooth=10, nsmooth_bottom=50,
+                 bottom_solver="smooth", bottom_size=2,
+                 backend="numba",
                  verbose=0,
                  aux_field=None, aux_bc=None,
                  true_function=None, vis=0, vis_title=""):
@@ -140,7 +173,22 @@ class CellCenterMG2d:
             level in the V-cycle (up and down)
         nsmooth_bottom : int, optional
             number of smoothing iterations to be done during the bottom
-            solve
+            solve (for bottom_solver = 'smooth')
+        bottom_solver : {'smooth', 'lu', 'cg', 'bicgstab'}, optional
+            how to solve the problem on the coarsest level: smoothing,
+            a dense LU decomposition of the coarse operator (computed
+            once and cached), or Jacobi-preconditioned CG or BiCGStab
+            on the dense coarse operator.  CG requires a symmetric
+            operator.
+        bottom_size : int, optional
+            the number of zones in each direction on the coarsest level.
+            This must be a power of 2.  A larger bottom level (e.g. 16)
+            means fewer levels in the hierarchy, but requires one of
+            the matrix bottom solvers to be efficient.
+        backend : {'numba', 'numpy'}, optional
+            use the compiled kernels (numba) or array operations (numpy)
+            for the smoothing and residual.  The two give identical
+            results.
         verbose : int, optional
             increase verbosity during the solve (for verbose=1)
         aux_field : list of str, optional
@@ -187,8 +235,30 @@ class CellCenterMG2d:
         self.nsmooth = nsmooth
         self.nsmooth_bottom = nsmooth_bottom
 
+        if backend not in ("numba", "numpy"):
+            raise ValueError(f"ERROR: invalid multigrid backend {backend}")
+        self.backend = backend
+
         self.max_cycles = 100
 
+        if bottom_solver not in ("smooth", "lu", "cg", "bicgstab"):
+            raise ValueError(f"ERROR: invalid bottom solver {bottom_solver}")
+        self.bottom_solver = bottom_solver
+
+        if bottom_size < 2 or bottom_size > nx or 2**int(math.log2(bottom_size)) != bottom_size:
+            raise ValueError("ERROR: bottom_size must be a power of 2 no larger than nx")
+        self.bottom_size = bottom_size
+
+        # relative tolerance for the Krylov bottom solvers
+        self.bottom_rtol = 1.e-12
+
+        # the dense coarse operator (and its factorization) for the
+        # matrix bottom solvers -- these are created when first needed
+        self.bottom_op = None
+        self.bottom_factor = None
+        self.bottom_op_pinv = None
+        self.bottom_null = None
+
         self.verbose = verbose
 
         # for visualization purposes, we can set a function name that
@@ -203,8 +273,10 @@ class CellCenterMG2d:
         self.initialized_rhs = 0
 
         # assume that self.nx = 2^(nlevels-1) and that nx = ny
-        # this defines nlevels such that we end exactly on a 2x2 grid
-        self.nlevels = int(math.log(self.nx)/math.log(2.0))
+        # this defines nlevels such that we end exactly on a
+        # bottom_size x bottom_size grid (2x2 by default)
+        self.nlevels = int(math.log(self.nx)/math.log(2.0)) - \
+            int(math.log(bottom_size)/math.log(2.0)) + 1
 
         # a multigrid object will be a list of grids
         self.grids = []
@@ -217,7 +289,7 @@ class CellCenterMG2d:
         bc = bnd.BC(xlb=xl_BC_type, xrb=xr_BC_type,
                     ylb=yl_BC_type, yrb=yr_BC_type)
 
-        nx_t = ny_t = 2
+        nx_t = ny_t = bottom_size
 
         for i in range(self.nlevels):
 
@@ -279,10 +351,12 @@ class CellCenterMG2d:
 
         # after solving, keep track of the number of cycles taken, the
         # relative error from the previous cycle, and the residual error
-        # (normalized to the source norm)
+        # (normalized to the source norm), as well as the wall time
+        # for the solve
         self.num_cycles = 0
         self.residual_error = 1.e33
         self.relative_error = 1.e33
+        self.solve_time = 0.0
 
         # keep track of where we are in the V
         self.current_cycle = -1
@@ -526,6 +600,47 @@ class CellCenterMG2d:
 
         self.initialized_rhs = 1
 
+    def reset(self, *, alpha=None, beta=None):
+        r"""
+        Return the solver to the state it was in just after
+        construction, so the same hierarchy can be reused for a new
+        solve.  The grids, boundary conditions, and any auxiliary
+        fields are kept -- only the solution, RHS, and residual are
+        zeroed.  Optionally, the Helmholtz coefficients can be changed.
+
+        Parameters
+        ----------
+        alpha : float, optional
+            new coefficient in Helmholtz equation (alpha - beta L) phi = f
+        beta : float, optional
+            new coefficient in Helmholtz equation (alpha - beta L) phi = f
+
+        """
+
+        if alpha is not None and alpha != self.alpha:
+            self.alpha = alpha
+            self.bottom_op = None
+        if beta is not None and beta != self.beta:
+            self.beta = beta
+            self.bottom_op = None
+
+        for level in range(self.nlevels):
+            self.grids[level].zero("v")
+            self.grids[level].zero("f")
+            self.grids[level].zero("r")
+
+        self.initialized_rhs = 0
+        self.source_norm = 0.0
+
+        self.num_cycles = 0
+        self.residual_error = 1.e33
+        self.relative_error = 1.e33
+        self.solve_time = 0.0
+
+        self.current_cycle = -1
+        self.current_level = -1
+        self.up_or_down = ""
+
     def _compute_residual(self, level):
         """ compute the residual and store it in the r variable"""
 
@@ -535,6 +650,11 @@ class CellCenterMG2d:
 
         myg = self.grids[level].grid
 
+        if self.backend == "numba":
+            mg_kernels.residual_helmholtz(myg.ng, v, f, r, self.alpha, self.beta,
+                                          myg.dx**2, myg.dy**2)
+            return
+
         # compute the residual
         # r = f - alpha phi + beta L phi
         r.v()[:, :] = f.v()[:, :] - self.alpha*v.v()[:, :] + \
@@ -588,15 +708,22 @@ class CellCenterMG2d:
             # groups 1 and 3 are done together, then we need to
             # fill ghost cells, and then groups 2 and 4
 
-            for n, (ix, iy) in enumerate([(0, 0), (1, 1), (1, 0), (0, 1)]):
+            if self.backend == "numba":
+                for color in (0, 1):
+                    mg_kernels.smooth_helmholtz(myg.ng, color, v, f,
+                                                self.alpha, xcoeff, ycoeff)
+                    self.grids[level].fill_BC("v")
+
+            else:
+                for n, (ix, iy) in enumerate([(0, 0), (1, 1), (1, 0), (0, 1)]):
 
-                v.ip_jp(ix, iy, s=2)[:, :] = (f.ip_jp(ix, iy, s=2) +
-                    xcoeff*(v.ip_jp(1+ix, iy, s=2) + v.ip_jp(-1+ix, iy, s=2)) +
-                    ycoeff*(v.ip_jp(ix, 1+iy, s=2) + v.ip_jp(ix, -1+iy, s=2))) / \
-                    (self.alpha + 2.0*xcoeff + 2.0*ycoeff)
+                    v.ip_jp(ix, iy, s=2)[:, :] = (f.ip_jp(ix, iy, s=2) +
+                        xcoeff*(v.ip_jp(1+ix, iy, s=2) + v.ip_jp(-1+ix, iy, s=2)) +
+                        ycoeff*(v.ip_jp(ix, 1+iy, s=2) + v.ip_jp(ix, -1+iy, s=2))) / \
+                        (self.alpha + 2.0*xcoeff + 2.0*ycoeff)
 
-                if n in (1, 3):
-                    self.grids[level].fill_BC("v")
+                    if n in (1, 3):
+                        self.grids[level].fill_BC("v")
 
             if self.vis == 1:
                 plt.clf()
@@ -620,12 +747,12 @@ class CellCenterMG2d:
                 plt.savefig("mg_%4.4d.png" % (self.frame))
                 self.frame += 1
 
-    def solve(self, rtol=1.e-11):
+    def solve(self, rtol=1.e-11, cycle_type="V", fmg=False):
         """
         The main driver for the multigrid solution of the Helmholtz
-        equation.  This controls the V-cycles, smoothing at each
-        step of the way and uses simple smoothing at the coarsest
-        level to perform the bottom solve.
+        equation.  This controls the multigrid cycles, smoothing at
+        each step of the way and uses simple smoothing at the
+        coarsest level to perform the bottom solve.
 
         Parameters
         ----------
@@ -634,6 +761,16 @@ class CellCenterMG2d:
             solve to.  Note that if the source norm is 0 (e.g. the
             righthand side of our equation is 0), then we just use
             the norm of the residual.
+        cycle_type : {'V', 'W', 'F'}, optional
+            The cycle schedule to use.  A W-cycle visits each coarse
+            level twice per visit of the next finer level, and an
+            F-cycle does an F-cycle followed by a V-cycle on each
+            coarse level.
+        fmg : bool, optional
+            Do a full multigrid pass to get the initial guess: solve
+            on the coarsest level and work our way up, prolonging the
+            solution to each finer level and doing a single cycle
+            there.  This replaces any initial guess already set.
 
         """
 
@@ -641,15 +778,38 @@ class CellCenterMG2d:
         if not self.initialized_rhs:
             msg.fail("ERROR: RHS not initialized")
 
+        if cycle_type not in ("V", "W", "F"):
+            raise ValueError(f"ERROR: invalid cycle type {cycle_type}")
+
         if self.verbose:
             print("source norm = ", self.source_norm)
 
-        old_phi = self.grids[self.nlevels-1].get_var("v").copy()
+        start_time = time.time()
+
+        fp = self.grids[self.nlevels-1]
 
         residual_error = 1.e33
+        relative_error = 1.e33
+
+        if fmg:
+            self.fmg_cycle(cycle_type)
+
+            self._compute_residual(self.nlevels-1)
+            r = fp.get_var("r")
+
+            if self.source_norm != 0.0:
+                residual_error = r.norm()/self.source_norm
+            else:
+                residual_error = r.norm()
+
+            if self.verbose:
+                print(f"FMG: residual err = {residual_error}\n")
+
+        old_phi = fp.get_var("v").copy()
+
         cycle = 1
 
-        # V-cycles until we achieve the L2 norm of the residual < rtol
+        # cycles until we achieve the L2 norm of the residual < rtol
         while residual_error > rtol and cycle <= self.max_cycles:
 
             self.current_cycle = cycle
@@ -659,11 +819,11 @@ class CellCenterMG2d:
                 self.grids[level].zero("v")
 
             if self.verbose:
-                print(f"<<< beginning V-cycle (cycle {cycle}) >>>\n")
+                print(f"<<< beginning {cycle_type}-cycle (cycle {cycle}) >>>\n")
 
-            # do V-cycles through the entire hierarchy
+            # do the cycle through the entire hierarchy
             level = self.nlevels-1
-            self.v_cycle(level)
+            self._cycle(level, cycle_type)
 
             # compute the error with respect to the previous solution
             # this is for diagnostic purposes only -- it is not used to
@@ -696,11 +856,205 @@ class CellCenterMG2d:
         self.residual_error = residual_error
         fp.fill_BC("v")
 
+        self.solve_time = time.time() - start_time
+
+        if self.verbose:
+            print("{}{}-cycles: {} cycles, residual err = {}, time = {:.4g} s\n".format(
+                "FMG + " if fmg else "", cycle_type, self.num_cycles,
+                self.residual_error, self.solve_time))
+
+    def krylov_solve(self, rtol=1.e-11, method="bicgstab", cycle_type="V"):
+        """
+        Solve the elliptic problem using a Krylov method (conjugate
+        gradient or BiCGStab) with a single multigrid cycle as the
+        preconditioner.  This is a drop-in alternative to solve(),
+        and for problems with strongly varying coefficients it can
+        converge in far fewer cycles.
+
+        We solve for the correction to the initial guess, which
+        satisfies homogeneous boundary conditions, so the Krylov
+        iteration sees a linear operator even if the boundary
+        conditions are inhomogeneous.
+
+        Parameters
+        ----------
+        rtol : float
+            The relative tolerance (residual norm / source norm) to
+            solve to.  If the source norm is 0, then we just use the
+            norm of the residual.
+        method : {'bicgstab', 'cg'}, optional
+            The Krylov method to use.  CG requires a symmetric
+            operator (e.g. no gamma term in the general solver), and
+            since the multigrid cycle is only approximately symmetric,
+            BiCGStab is usually the more robust choice.
+        cycle_type : {'V', 'W', 'F'}, optional
+            The cycle schedule to use for the preconditioner.
+
+        """
+
+        if not self.initialized_rhs:
+            msg.fail("ERROR: RHS not initialized")
+
+        if method not in ("cg", "bicgstab"):
+            raise ValueError(f"ERROR: invalid Krylov method {method}")
+
+        if cycle_type not in ("V", "W", "F"):
+            raise ValueError(f"ERROR: invalid cycle type {cycle_type}")
+
+        start_time = time.time()
+
+        fp = self.grids[self.nlevels-1]
+        myg = fp.grid
+
+        v = fp.get_var("v")
+        f = fp.get_var("f")
+        r = fp.get_var("r")
+
+        # we will use the finest level's storage for the operator and
+        # preconditioner, so keep the initial guess and RHS
+        v0 = v.copy()
+        f0 = f.copy()
+
+        def residual(phi, rhs):
+            v.v()[:, :] = phi.reshape(myg.nx, myg.ny)
+            f.v()[:, :] = rhs
+            fp.fill_BC("v")
+            self._compute_residual(self.nlevels-1)
+            return r.v().flatten()
+
+        phi0 = v0.v().flatten()
+
+        # the residual is affine in the solution, so the linear part
+        # of the operator is the difference of two residuals
+        b0 = residual(phi0, f0.v())
+
+        def A(e):
+            return b0 - residual(phi0 + e, f0.v())
+
+        # the part of the residual coming from the inhomogeneous
+        # boundary values -- this is added to the RHS of the
+        # preconditioner so its cycle sees homogeneous boundaries
+        r_bc = residual(np.zeros_like(phi0), 0.0)
+
+        ncycles = 0
+
+        def M(z):
+            nonlocal ncycles
+            for level in range(self.nlevels):
+                self.grids[level].zero("v")
+            f.v()[:, :] = (z - r_bc).reshape(myg.nx, myg.ny)
+            self._cycle(self.nlevels-1, cycle_type)
+            ncycles += 1
+            return v.v().flatten()
+
+        def dot(x, y):
+            return myg.dx*myg.dy*np.dot(x, y)
+
+        scale = self.source_norm if self.source_norm != 0.0 else 1.0
+
+        e = np.zeros_like(phi0)
+        b = b0
+        residual_error = np.sqrt(dot(b, b))/scale
+
+        # the residual that the Krylov methods update can drift away
+        # from the true residual, so if the true residual has not
+        # converged, we restart from the current solution
+        while residual_error > rtol and ncycles < self.max_cycles:
+
+            d = np.zeros_like(e)
+            krylov_rtol = rtol/residual_error
+
+            if method == "cg":
+                krylov.pcg(A, b, d, M=M, dot=dot, rtol=krylov_rtol,
+                           max_iter=self.max_cycles - ncycles)
+            else:
+                # each BiCGStab iteration does two cycles
+                krylov.bicgstab(A, b, d, M=M, dot=dot, rtol=krylov_rtol,
+                                max_iter=(self.max_cycles - ncycles + 1)//2)
+
+            e += d
+
+            b = residual(phi0 + e, f0.v())
+            residual_error = np.sqrt(dot(b, b))/scale
+
+            if self.verbose:
+                print(f"{method}: {ncycles} cycles, residual err = {residual_error}\n")
+
+        # put the solution and RHS back in the finest level
+        for level in range(self.nlevels-1):
+            self.grids[level].zero("v")
+
+        residual(phi0 + e, f0.v())
+
+        self.residual_error = residual_error
+        self.relative_error = np.sqrt(dot(e, e))/(np.sqrt(dot(phi0 + e, phi0 + e)) + self.small)
+        self.num_cycles = ncycles
+
+        self.solve_time = time.time() - start_time
+
+        if self.verbose:
+            print("{}-preconditioned {}: {} cycles, residual err = {}, time = {:.4g} s\n".format(
+                cycle_type, method, self.num_cycles, self.residual_error, self.solve_time))
+
+    def fmg_cycle(self, cycle_type="V"):
+        """
+        Do a full multigrid pass to construct the initial guess on
+        the finest level.  The RHS is restricted to all levels, the
+        coarsest problem is solved, and then we work up the hierarchy,
+        prolonging the solution to the next finer level as the
+        initial guess there and doing a single cycle of type
+        cycle_type.
+
+        Note: on the coarser levels, the boundary conditions are
+        homogeneous, so for inhomogeneous boundary values, this gives
+        a poorer initial guess.
+        """
+
+        # restrict the RHS down the hierarchy
+        for level in range(self.nlevels-1, 0, -1):
+            fp = self.grids[level]
+            cp = self.grids[level-1]
+
+            f_coarse = cp.get_var("f")
+            f_coarse.v()[:, :] = fp.restrict("f").v()
+
+        # solve the coarsest problem
+        bp = self.grids[0]
+        bp.zero("v")
+
+        self.current_level = 0
+        self.bottom_solve()
+
+        # work our way up, using the prolonged coarse solution as the
+        # initial guess at each level
+        for level in range(1, self.nlevels):
+            fp = self.grids[level]
+            cp = self.grids[level-1]
+
+            v = fp.get_var("v")
+            v.v()[:, :] = cp.prolong("v").v()
+
+            fp.fill_BC("v")
+
+            if self.verbose:
+                print(f"<<< FMG: {cycle_type}-cycle on level {level} >>>\n")
+
+            self._cycle(level, cycle_type)
+
     def v_cycle(self, level):
         """
         Perform a V-cycle for a single 2-level solve.  This is applied
         recursively do V-cycle through the entire hierarchy.
 
+        """
+        self._cycle(level, "V")
+
+    def _cycle(self, level, cycle_type):
+        """
+        Perform a single cycle of type cycle_type ('V', 'W', or 'F')
+        starting at level.  This is applied recursively to work
+        through the entire hierarchy below level.
+
         """
 
         if level > 0:
@@ -731,8 +1085,18 @@ class CellCenterMG2d:
             f_coarse = cp.get_var("f")
             f_coarse.v()[:, :] = fp.restrict("r").v()
 
+            # the coarse problem is for the correction, which starts at 0
+            cp.zero("v")
+
             # solve the coarse problem
-            self.v_cycle(level-1)
+            if cycle_type == "V":
+                self._cycle(level-1, "V")
+            elif cycle_type == "W":
+                self._cycle(level-1, "W")
+                self._cycle(level-1, "W")
+            else:
+                self._cycle(level-1, "F")
+                self._cycle(level-1, "V")
 
             # ascending part
             self.current_level = level
@@ -763,16 +1127,134 @@ class CellCenterMG2d:
                 print(f"  level = {level:2}, nx = {nx:4}, residual change: {orig_resid:11.6g} → {new_resid:11.6g}")
 
         else:
-            # bottom solve: solve the discrete coarse problem.  We
-            # could use any number of different matrix solvers here
-            # (like CG), but since we are 2x2 by design at this point,
-            # we will just smooth
+            # bottom solve: solve the discrete coarse problem
             if self.verbose:
                 print("  bottom solve")
 
             self.current_level = level
-            bp = self.grids[level]
+            self.bottom_solve()
+
+    def bottom_solve(self):
+        """
+        Solve the problem on the coarsest level.  By default (and on
+        a 2x2 grid), we just smooth.  Otherwise, we solve the dense
+        linear system for the correction to the current solution,
+        using the cached LU decomposition or a Krylov method.
+        """
+
+        bp = self.grids[0]
+
+        if self.bottom_solver == "smooth":
+            self.smooth(0, self.nsmooth_bottom)
+            bp.fill_BC("v")
+            return
+
+        if self.bottom_op is None:
+            self._setup_bottom_op()
+
+        # the system we solve is A d = r, where r is the residual for
+        # the current solution, and d is the correction
+        v = bp.get_var("v")
+        r = bp.get_var("r")
+
+        bp.fill_BC("v")
+        self._compute_residual(0)
+
+        rhs = r.v().flatten()
+
+        if self.bottom_null is not None:
+            # for a singular operator (pure Neumann or periodic), the
+            # residual may not be exactly in the range of A, so project
+            # out the part that is not -- otherwise the Krylov methods
+            # will not converge
+            rhs -= self.bottom_null @ (self.bottom_null.T @ rhs)
+
+        if self.bottom_solver == "lu":
+            if self.bottom_factor is None:
+                # the operator is singular, so use the pseudo-inverse
+                d = self.bottom_op_pinv @ rhs
+            else:
+                d = linalg.lu_solve(self.bottom_factor, rhs)
+
+        else:
+            A = self.bottom_op
+            diag = np.diag(A).copy()
+
+            def jacobi(z):
+                return z/diag
+
+            M = jacobi if np.all(diag != 0.0) else None
+
+            d = np.zeros_like(rhs)
+            if self.bottom_solver == "cg":
+                krylov.pcg(lambda x: A @ x, rhs, d, M=M, rtol=self.bottom_rtol)
+            else:
+                krylov.bicgstab(lambda x: A @ x, rhs, d, M=M, rtol=self.bottom_rtol)
+
+        v.v()[:, :] += d.reshape(bp.grid.nx, bp.grid.ny)
+
+        bp.fill_BC("v")
+
+    def _setup_bottom_op(self):
+        """
+        Construct the dense matrix for the operator on the coarsest
+        level, by applying _compute_residual() to each unit vector.
+        This way the matrix includes the boundary conditions and works
+        for any of the multigrid classes.  The residual is affine in
+        the solution (because of any inhomogeneous boundary values),
+        so we subtract off the residual of a zero solution.
+        """
+
+        bp = self.grids[0]
+        myg = bp.grid
+
+        v = bp.get_var("v")
+        f = bp.get_var("f")
+        r = bp.get_var("r")
+
+        # we'll use the storage on the coarsest level, so save the
+        # current state
+        v_save = v.copy()
+        f_save = f.copy()
 
-            self.smooth(level, self.nsmooth_bottom)
+        f[:, :] = 0.0
+        v[:, :] = 0.0
+        bp.fill_BC("v")
+        self._compute_residual(0)
+        r0 = r.v().flatten()
+
+        n = myg.nx*myg.ny
+        A = np.zeros((n, n), dtype=np.float64)
+
+        for k in range(n):
+            i, j = divmod(k, myg.ny)
 
+            v[:, :] = 0.0
+            v[myg.ilo+i, myg.jlo+j] = 1.0
             bp.fill_BC("v")
+
+            self._compute_residual(0)
+            A[:, k] = r0 - r.v().ravel()
+
+        v[:, :] = v_save
+        f[:, :] = f_save
+
+        self.bottom_op = A
+        self.bottom_factor = None
+        self.bottom_op_pinv = None
+        self.bottom_null = None
+
+        # pure Neumann or periodic problems have a null space, so in
+        # that case we keep the left singular vectors spanning it
+        U, s, _ = linalg.svd(A)
+        singular = s <= 1.e-12*s[0]
+        if np.any(singular):
+            self.bottom_null = U[:, singular]
+
+        if self.bottom_solver == "lu":
+            # a singular operator can't be LU decomposed, so we use
+            # the pseudo-inverse instead
+            if self.bottom_null is not None:
+                self.bottom_op_pinv = linalg.pinv(A)
+            else:
+                self.bottom_factor = linalg.lu_factor(A)
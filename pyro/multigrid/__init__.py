@@ -20,8 +20,11 @@ general_MG implements a more general elliptic equation
    \alpha \phi + \nabla \cdot { \beta \nabla \phi } + \gamma \cdot \nabla \phi = f
 
 
-All use pure V-cycles to solve elliptic problems
+All use V-cycles to solve elliptic problems by default, with W- and
+F-cycles and a full multigrid initial pass available as options to
+solve().  krylov_solve() instead uses a multigrid cycle as the
+preconditioner for a conjugate gradient or BiCGStab iteration.
 
 """
 
-__all__ = ['MG', 'variable_coeff_MG', 'general_MG', 'edge_coeffs']
+__all__ = ['MG', 'variable_coeff_MG', 'general_MG', 'edge_coeffs', 'kernels', 'krylov', 'solver_cache']
@@ -8,38 +8,52 @@ class EdgeCoeffs:
         self.grid = g
 
         if not empty:
-            eta_x = g.scratch_array()
-            eta_y = g.scratch_array()
+            self.x = g.scratch_array()
+            self.y = g.scratch_array()
 
-            # the eta's are defined on the interfaces, so
-            # eta_x[i,j] will be eta_{i-1/2,j} and
-            # eta_y[i,j] will be eta_{i,j-1/2}
+            self.fill(eta)
 
-            b = (0, 1)
+    def fill(self, eta):
+        """
+        (re)compute the edge coefficients from the cell-centered eta,
+        reusing the existing storage
+        """
+
+        g = self.grid
+
+        # the eta's are defined on the interfaces, so
+        # eta_x[i,j] will be eta_{i-1/2,j} and
+        # eta_y[i,j] will be eta_{i,j-1/2}
 
-            eta_x.v(buf=b)[:, :] = 0.5*(eta.ip(-1, buf=b) + eta.v(buf=b))
-            eta_y.v(buf=b)[:, :] = 0.5*(eta.jp(-1, buf=b) + eta.v(buf=b))
+        b = (0, 1)
 
-            eta_x /= g.dx**2
-            eta_y /= g.dy**2
+        self.x.v(buf=b)[:, :] = 0.5*(eta.ip(-1, buf=b) + eta.v(buf=b))
+        self.y.v(buf=b)[:, :] = 0.5*(eta.jp(-1, buf=b) + eta.v(buf=b))
 
-            self.x = eta_x
-            self.y = eta_y
+        self.x /= g.dx**2
+        self.y /= g.dy**2
 
-    def restrict(self):
+    def restrict(self, c_edge_coeffs=None):
         """
         restrict the edge values to a coarser grid.  Return a new
-        EdgeCoeffs object
+        EdgeCoeffs object, or, if c_edge_coeffs is passed in, fill
+        its storage in place and return it.
         """
 
-        cg = self.grid.coarse_like(2)
+        fg = self.grid
 
-        c_edge_coeffs = EdgeCoeffs(cg, None, empty=True)
+        if c_edge_coeffs is None:
+            cg = fg.coarse_like(2)
 
-        c_eta_x = cg.scratch_array()
-        c_eta_y = cg.scratch_array()
+            c_edge_coeffs = EdgeCoeffs(cg, None, empty=True)
 
-        fg = self.grid
+            c_edge_coeffs.x = cg.scratch_array()
+            c_edge_coeffs.y = cg.scratch_array()
+        else:
+            cg = c_edge_coeffs.grid
+
+        c_eta_x = c_edge_coeffs.x
+        c_eta_y = c_edge_coeffs.y
 
         b = (0, 1, 0, 0)
         c_eta_x.v(buf=b)[:, :] = 0.5*(self.x.v(buf=b, s=2) + self.x.jp(1, buf=b, s=2))
@@ -48,7 +62,10 @@ class EdgeCoeffs:
         c_eta_y.v(buf=b)[:, :] = 0.5*(self.y.v(buf=b, s=2) + self.y.ip(1, buf=b, s=2))
 
         # redo the normalization
-        c_edge_coeffs.x = c_eta_x*fg.dx**2/cg.dx**2
-        c_edge_coeffs.y = c_eta_y*fg.dy**2/cg.dy**2
+        c_eta_x *= fg.dx**2
+        c_eta_x /= cg.dx**2
+
+        c_eta_y *= fg.dy**2
+        c_eta_y /= cg.dy**2
 
         return c_edge_coeffs
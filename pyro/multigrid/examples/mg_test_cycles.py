@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+"""
+
+compare the different multigrid cycle schedules (V, W, F, with and
+without an initial full multigrid pass) on the Poisson problem from
+mg_test_simple.py::
+
+   u_xx + u_yy = -2[(1-6x**2)y**2(1-y**2) + (1-6y**2)x**2(1-x**2)]
+   u = 0 on the boundary
+
+For each schedule, we report the number of cycles needed to reach the
+tolerance, the wall time of the solve, and the error with respect to
+the analytic solution.
+
+"""
+
+
+import argparse
+
+from pyro.multigrid import MG
+from pyro.multigrid.examples.mg_test_simple import f, true
+
+
+def compare_cycles(N, rtol=1.e-11, backend="numba"):
+
+    # do a small solve first, so any kernel compilation is not
+    # included in the timings
+    a = MG.CellCenterMG2d(8, 8, backend=backend)
+    a.init_RHS(f(a.x2d, a.y2d))
+    a.solve(rtol=rtol)
+
+    print(f"{'schedule':>10} {'cycles':>7} {'time (s)':>10} {'L2 error':>12}")
+
+    results = {}
+
+    for fmg in [False, True]:
+        for cycle_type in ["V", "W", "F"]:
+
+            a = MG.CellCenterMG2d(N, N,
+                                  xl_BC_type="dirichlet", yl_BC_type="dirichlet",
+                                  xr_BC_type="dirichlet", yr_BC_type="dirichlet",
+                                  backend=backend, verbose=0)
+
+            a.init_zeros()
+            a.init_RHS(f(a.x2d, a.y2d))
+
+            a.solve(rtol=rtol, cycle_type=cycle_type, fmg=fmg)
+
+            e = a.get_solution() - true(a.x2d, a.y2d)
+
+            name = f"FMG+{cycle_type}" if fmg else cycle_type
+            results[name] = (a.num_cycles, a.solve_time, e.norm())
+
+            print(f"{name:>10} {a.num_cycles:7d} {a.solve_time:10.4f} {e.norm():12.6g}")
+
+    return results
+
+
+if __name__ == "__main__":
+
+    p = argparse.ArgumentParser()
+    p.add_argument("-N", type=int, default=256,
+                   help="number of zones in each direction")
+    p.add_argument("--rtol", type=float, default=1.e-11,
+                   help="relative tolerance of the solve")
+
+    args = p.parse_args()
+
+    compare_cycles(args.N, rtol=args.rtol)
@@ -19,6 +19,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 
 import pyro.multigrid.edge_coeffs as ec
+import pyro.multigrid.kernels as mg_kernels
 from pyro.multigrid import MG
 
 np.set_printoptions(precision=3, linewidth=128)
@@ -46,6 +47,8 @@ class GeneralMG2d(MG.CellCenterMG2d):
                  xl_BC=None, xr_BC=None,
                  yl_BC=None, yr_BC=None,
                  nsmooth=10, nsmooth_bottom=50,
+                 bottom_solver="smooth", bottom_size=2,
+                 backend="numba",
                  verbose=0,
                  coeffs=None,
                  true_function=None, vis=0, vis_title=""):
@@ -67,6 +70,8 @@ class GeneralMG2d(MG.CellCenterMG2d):
                                    yl_BC=yl_BC, yr_BC=yr_BC,
                                    alpha=0.0, beta=0.0,
                                    nsmooth=nsmooth, nsmooth_bottom=nsmooth_bottom,
+                                   bottom_solver=bottom_solver, bottom_size=bottom_size,
+                                   backend=backend,
                                    verbose=verbose,
                                    aux_field=["alpha", "beta", "gamma_x", "gamma_y"],
                                    aux_bc=[coeffs.BCs["alpha"], coeffs.BCs["beta"],
@@ -131,8 +136,10 @@ class GeneralMG2d(MG.CellCenterMG2d):
         self.grids[level].fill_BC("v")
 
         alpha = self.grids[level].get_var("alpha")
-        gamma_x = 0.5*self.grids[level].get_var("gamma_x")/dx
-        gamma_y = 0.5*self.grids[level].get_var("gamma_y")/dy
+        gamma_x_cc = self.grids[level].get_var("gamma_x")
+        gamma_y_cc = self.grids[level].get_var("gamma_y")
+        gamma_x = 0.5*gamma_x_cc/dx
+        gamma_y = 0.5*gamma_y_cc/dy
 
         # these are already scaled by 1/dx**2 in the EdgeCoeffs
         # construction
@@ -160,25 +167,32 @@ class GeneralMG2d(MG.CellCenterMG2d):
             # groups 1 and 3 are done together, then we need to
             # fill ghost cells, and then groups 2 and 4
 
-            for n, (ix, iy) in enumerate([(0, 0), (1, 1), (1, 0), (0, 1)]):
+            if self.backend == "numba":
+                for color in (0, 1):
+                    mg_kernels.smooth_general(myg.ng, color, v, f, alpha, beta_x, beta_y,
+                                              gamma_x_cc, gamma_y_cc, dx, dy)
+                    self.grids[level].fill_BC("v")
 
-                denom = (
-                    alpha.ip_jp(ix, iy, s=2) -
-                    beta_x.ip_jp(1+ix, iy, s=2) - beta_x.ip_jp(ix, iy, s=2) -
-                    beta_y.ip_jp(ix, 1+iy, s=2) - beta_y.ip_jp(ix, iy, s=2))
+            else:
+                for n, (ix, iy) in enumerate([(0, 0), (1, 1), (1, 0), (0, 1)]):
 
-                v.ip_jp(ix, iy, s=2)[:, :] = (f.ip_jp(ix, iy, s=2) -
-                    # (beta_{i+1/2,j} + gamma^x_{i,j}) phi_{i+1,j}
-                    (beta_x.ip_jp(1+ix, iy, s=2) + gamma_x.ip_jp(ix, iy, s=2)) * v.ip_jp(1+ix, iy, s=2) -
-                    # (beta_{i-1/2,j} - gamma^x_{i,j}) phi_{i-1,j}
-                    (beta_x.ip_jp(ix, iy, s=2) - gamma_x.ip_jp(ix, iy, s=2)) * v.ip_jp(-1+ix, iy, s=2) -
-                    # (beta_{i,j+1/2} + gamma^y_{i,j}) phi_{i,j+1}
-                    (beta_y.ip_jp(ix, 1+iy, s=2) + gamma_y.ip_jp(ix, iy, s=2)) * v.ip_jp(ix, 1+iy, s=2) -
-                    # (beta_{i,j-1/2} - gamma^y_{i,j}) phi_{i,j-1}
-                    (beta_y.ip_jp(ix, iy, s=2) - gamma_y.ip_jp(ix, iy, s=2)) * v.ip_jp(ix, -1+iy, s=2)) / denom
+                    denom = (
+                        alpha.ip_jp(ix, iy, s=2) -
+                        beta_x.ip_jp(1+ix, iy, s=2) - beta_x.ip_jp(ix, iy, s=2) -
+                        beta_y.ip_jp(ix, 1+iy, s=2) - beta_y.ip_jp(ix, iy, s=2))
 
-                if n in (1, 3):
-                    self.grids[level].fill_BC("v")
+                    v.ip_jp(ix, iy, s=2)[:, :] = (f.ip_jp(ix, iy, s=2) -
+                        # (beta_{i+1/2,j} + gamma^x_{i,j}) phi_{i+1,j}
+                        (beta_x.ip_jp(1+ix, iy, s=2) + gamma_x.ip_jp(ix, iy, s=2)) * v.ip_jp(1+ix, iy, s=2) -
+                        # (beta_{i-1/2,j} - gamma^x_{i,j}) phi_{i-1,j}
+                        (beta_x.ip_jp(ix, iy, s=2) - gamma_x.ip_jp(ix, iy, s=2)) * v.ip_jp(-1+ix, iy, s=2) -
+                        # (beta_{i,j+1/2} + gamma^y_{i,j}) phi_{i,j+1}
+                        (beta_y.ip_jp(ix, 1+iy, s=2) + gamma_y.ip_jp(ix, iy, s=2)) * v.ip_jp(ix, 1+iy, s=2) -
+                        # (beta_{i,j-1/2} - gamma^y_{i,j}) phi_{i,j-1}
+                        (beta_y.ip_jp(ix, iy, s=2) - gamma_y.ip_jp(ix, iy, s=2)) * v.ip_jp(ix, -1+iy, s=2)) / denom
+
+                    if n in (1, 3):
+                        self.grids[level].fill_BC("v")
 
             if self.vis == 1:
                 plt.clf()
@@ -214,13 +228,21 @@ class GeneralMG2d(MG.CellCenterMG2d):
         dy = myg.dy
 
         alpha = self.grids[level].get_var("alpha")
-        gamma_x = 0.5*self.grids[level].get_var("gamma_x")/dx
-        gamma_y = 0.5*self.grids[level].get_var("gamma_y")/dy
+        gamma_x_cc = self.grids[level].get_var("gamma_x")
+        gamma_y_cc = self.grids[level].get_var("gamma_y")
 
         # these already have a 1/dx**2 scaling in them
         beta_x = self.beta_edge[level].x
         beta_y = self.beta_edge[level].y
 
+        if self.backend == "numba":
+            mg_kernels.residual_general(myg.ng, v, f, r, alpha, beta_x, beta_y,
+                                        gamma_x_cc, gamma_y_cc, dx, dy)
+            return
+
+        gamma_x = 0.5*gamma_x_cc/dx
+        gamma_y = 0.5*gamma_y_cc/dy
+
         # compute the residual
         # r = f - L_eta phi
         L_eta_phi = (
@@ -0,0 +1,271 @@
+"""
+Compiled kernels for the multigrid solvers.  These do the red-black
+Gauss-Seidel update of a single color and the residual computation
+in place, looping over the zones directly instead of building the
+strided temporaries that the NumPy versions in MG.py,
+variable_coeff_MG.py, and general_MG.py need.
+
+Each kernel does exactly the same floating point operations, in the
+same order, as the corresponding NumPy expression, so the two paths
+give identical results.
+
+In the smoothers, color = 0 updates the zones with (i - ilo) + (j - jlo)
+even (groups 1 and 3 in the picture in ``CellCenterMG2d.smooth()``), and
+color = 1 updates the zones where this is odd (groups 2 and 4).  The
+ghost cells need to be filled between the two colors.
+"""
+
+from numba import njit
+
+
+@njit(cache=True)
+def smooth_helmholtz(ng, color, v, f, alpha, xcoeff, ycoeff):
+    r"""
+    Do one color of a red-black Gauss-Seidel update for the constant
+    coefficient Helmholtz equation, :math:`(\alpha - \beta L) \phi = f`.
+
+    Parameters
+    ----------
+    ng : int
+        The number of ghost cells
+    color : int
+        Which set of zones to update (0 or 1)
+    v : ndarray
+        The solution, updated in place
+    f : ndarray
+        The righthand side
+    alpha : float
+        The Helmholtz alpha coefficient
+    xcoeff, ycoeff : float
+        beta/dx**2 and beta/dy**2
+    """
+
+    qx, qy = v.shape
+
+    ilo = ng
+    ihi = qx - ng - 1
+    jlo = ng
+    jhi = qy - ng - 1
+
+    denom = alpha + 2.0*xcoeff + 2.0*ycoeff
+
+    for i in range(ilo, ihi+1):
+        jstart = jlo + (color + i - ilo) % 2
+        for j in range(jstart, jhi+1, 2):
+            v[i, j] = (f[i, j] +
+                       xcoeff*(v[i+1, j] + v[i-1, j]) +
+                       ycoeff*(v[i, j+1] + v[i, j-1])) / denom
+
+
+@njit(cache=True)
+def residual_helmholtz(ng, v, f, r, alpha, beta, dx2, dy2):
+    r"""
+    Compute the residual, :math:`r = f - (\alpha - \beta L) \phi`, for
+    the constant coefficient Helmholtz equation.
+
+    Parameters
+    ----------
+    ng : int
+        The number of ghost cells
+    v : ndarray
+        The current solution
+    f : ndarray
+        The righthand side
+    r : ndarray
+        The residual, filled in place
+    alpha, beta : float
+        The Helmholtz coefficients
+    dx2, dy2 : float
+        dx**2 and dy**2
+    """
+
+    qx, qy = v.shape
+
+    ilo = ng
+    ihi = qx - ng - 1
+    jlo = ng
+    jhi = qy - ng - 1
+
+    for i in range(ilo, ihi+1):
+        for j in range(jlo, jhi+1):
+            r[i, j] = f[i, j] - alpha*v[i, j] + \
+                beta*((v[i-1, j] + v[i+1, j] - 2*v[i, j])/dx2 +
+                      (v[i, j-1] + v[i, j+1] - 2*v[i, j])/dy2)
+
+
+@njit(cache=True)
+def smooth_var_coeff(ng, color, v, f, eta_x, eta_y):
+    r"""
+    Do one color of a red-black Gauss-Seidel update for the variable
+    coefficient Poisson equation, :math:`\nabla \cdot (\eta \nabla \phi) = f`.
+
+    Parameters
+    ----------
+    ng : int
+        The number of ghost cells
+    color : int
+        Which set of zones to update (0 or 1)
+    v : ndarray
+        The solution, updated in place
+    f : ndarray
+        The righthand side
+    eta_x, eta_y : ndarray
+        The edge coefficients (already scaled by 1/dx**2 and 1/dy**2),
+        with eta_x[i, j] = eta_{i-1/2,j} and eta_y[i, j] = eta_{i,j-1/2}
+    """
+
+    qx, qy = v.shape
+
+    ilo = ng
+    ihi = qx - ng - 1
+    jlo = ng
+    jhi = qy - ng - 1
+
+    for i in range(ilo, ihi+1):
+        jstart = jlo + (color + i - ilo) % 2
+        for j in range(jstart, jhi+1, 2):
+            denom = (eta_x[i+1, j] + eta_x[i, j] +
+                     eta_y[i, j+1] + eta_y[i, j])
+
+            v[i, j] = (-f[i, j] +
+                       eta_x[i+1, j] * v[i+1, j] +
+                       eta_x[i, j] * v[i-1, j] +
+                       eta_y[i, j+1] * v[i, j+1] +
+                       eta_y[i, j] * v[i, j-1]) / denom
+
+
+@njit(cache=True)
+def residual_var_coeff(ng, v, f, r, eta_x, eta_y):
+    r"""
+    Compute the residual, :math:`r = f - \nabla \cdot (\eta \nabla \phi)`,
+    for the variable coefficient Poisson equation.
+
+    Parameters
+    ----------
+    ng : int
+        The number of ghost cells
+    v : ndarray
+        The current solution
+    f : ndarray
+        The righthand side
+    r : ndarray
+        The residual, filled in place
+    eta_x, eta_y : ndarray
+        The edge coefficients (already scaled by 1/dx**2 and 1/dy**2)
+    """
+
+    qx, qy = v.shape
+
+    ilo = ng
+    ihi = qx - ng - 1
+    jlo = ng
+    jhi = qy - ng - 1
+
+    for i in range(ilo, ihi+1):
+        for j in range(jlo, jhi+1):
+            L_eta_phi = (eta_x[i+1, j]*(v[i+1, j] - v[i, j]) -
+                         eta_x[i, j]*(v[i, j] - v[i-1, j]) +
+                         eta_y[i, j+1]*(v[i, j+1] - v[i, j]) -
+                         eta_y[i, j]*(v[i, j] - v[i, j-1]))
+
+            r[i, j] = f[i, j] - L_eta_phi
+
+
+@njit(cache=True)
+def smooth_general(ng, color, v, f, alpha, beta_x, beta_y, gamma_x, gamma_y, dx, dy):
+    r"""
+    Do one color of a red-black Gauss-Seidel update for the general
+    elliptic equation,
+    :math:`\alpha \phi + \nabla \cdot (\beta \nabla \phi) + \gamma \cdot \nabla \phi = f`.
+
+    Parameters
+    ----------
+    ng : int
+        The number of ghost cells
+    color : int
+        Which set of zones to update (0 or 1)
+    v : ndarray
+        The solution, updated in place
+    f : ndarray
+        The righthand side
+    alpha : ndarray
+        The cell-centered alpha coefficient
+    beta_x, beta_y : ndarray
+        The edge beta coefficients (already scaled by 1/dx**2 and 1/dy**2)
+    gamma_x, gamma_y : ndarray
+        The cell-centered gamma coefficients (unscaled)
+    dx, dy : float
+        The grid spacing
+    """
+
+    qx, qy = v.shape
+
+    ilo = ng
+    ihi = qx - ng - 1
+    jlo = ng
+    jhi = qy - ng - 1
+
+    for i in range(ilo, ihi+1):
+        jstart = jlo + (color + i - ilo) % 2
+        for j in range(jstart, jhi+1, 2):
+            gx = 0.5*gamma_x[i, j]/dx
+            gy = 0.5*gamma_y[i, j]/dy
+
+            denom = (alpha[i, j] -
+                     beta_x[i+1, j] - beta_x[i, j] -
+                     beta_y[i, j+1] - beta_y[i, j])
+
+            v[i, j] = (f[i, j] -
+                       (beta_x[i+1, j] + gx) * v[i+1, j] -
+                       (beta_x[i, j] - gx) * v[i-1, j] -
+                       (beta_y[i, j+1] + gy) * v[i, j+1] -
+                       (beta_y[i, j] - gy) * v[i, j-1]) / denom
+
+
+@njit(cache=True)
+def residual_general(ng, v, f, r, alpha, beta_x, beta_y, gamma_x, gamma_y, dx, dy):
+    r"""
+    Compute the residual for the general elliptic equation,
+    :math:`r = f - [\alpha \phi + \nabla \cdot (\beta \nabla \phi) + \gamma \cdot \nabla \phi]`.
+
+    Parameters
+    ----------
+    ng : int
+        The number of ghost cells
+    v : ndarray
+        The current solution
+    f : ndarray
+        The righthand side
+    r : ndarray
+        The residual, filled in place
+    alpha : ndarray
+        The cell-centered alpha coefficient
+    beta_x, beta_y : ndarray
+        The edge beta coefficients (already scaled by 1/dx**2 and 1/dy**2)
+    gamma_x, gamma_y : ndarray
+        The cell-centered gamma coefficients (unscaled)
+    dx, dy : float
+        The grid spacing
+    """
+
+    qx, qy = v.shape
+
+    ilo = ng
+    ihi = qx - ng - 1
+    jlo = ng
+    jhi = qy - ng - 1
+
+    for i in range(ilo, ihi+1):
+        for j in range(jlo, jhi+1):
+            gx = 0.5*gamma_x[i, j]/dx
+            gy = 0.5*gamma_y[i, j]/dy
+
+            L_eta_phi = (alpha[i, j]*v[i, j] +
+                         beta_x[i+1, j]*(v[i+1, j] - v[i, j]) -
+                         beta_x[i, j]*(v[i, j] - v[i-1, j]) +
+                         beta_y[i, j+1]*(v[i, j+1] - v[i, j]) -
+                         beta_y[i, j]*(v[i, j] - v[i, j-1]) +
+                         gx*(v[i+1, j] - v[i-1, j]) +
+                         gy*(v[i, j+1] - v[i, j-1]))
+
+            r[i, j] = f[i, j] - L_eta_phi
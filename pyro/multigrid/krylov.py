@@ -0,0 +1,213 @@
+"""
+Simple Krylov solvers (preconditioned conjugate gradient and
+BiCGStab) for the linear systems that arise in the multigrid solvers.
+
+These are written in terms of callables, so the same routines can
+operate on a dense matrix (as in the multigrid bottom solve) or on
+the full multigrid operator, using multigrid itself as the
+preconditioner.
+
+The general usage is::
+
+   x, niter, resid = pcg(A, b, x0, M=M, rtol=1.e-10)
+
+where ``A(x)`` returns the operator applied to x, ``M(r)`` returns the
+preconditioner applied to r (an approximation to A^{-1} r), and
+``dot(x, y)`` (optional) is the inner product.  The solution is
+returned along with the number of iterations taken and the final
+residual norm, relative to the norm of b.
+
+"""
+
+import numpy as np
+
+
+def _vdot(x, y):
+    """the default inner product"""
+    return np.vdot(x, y)
+
+
+def pcg(A, b, x, *, M=None, dot=None, rtol=1.e-10, max_iter=None):
+    """
+    Solve A x = b using the preconditioned conjugate gradient method.
+    A must be symmetric and definite.  We use the flexible form of the
+    method, so M only needs to be approximately symmetric.
+
+    Parameters
+    ----------
+    A : callable
+        returns the matrix-vector product A x
+    b : ndarray
+        the righthand side
+    x : ndarray
+        the initial guess (updated in place)
+    M : callable, optional
+        returns the preconditioned residual, M^{-1} r
+    dot : callable, optional
+        the inner product to use
+    rtol : float, optional
+        the tolerance on the residual norm relative to the norm of b
+    max_iter : int, optional
+        maximum number of iterations (default: the size of b)
+
+    Returns
+    -------
+    out : tuple
+        the solution, number of iterations, and relative residual norm
+
+    """
+
+    if dot is None:
+        dot = _vdot
+
+    if M is None:
+        M = np.copy
+
+    if max_iter is None:
+        max_iter = b.size
+
+    bnorm = np.sqrt(dot(b, b))
+    if bnorm == 0.0:
+        bnorm = 1.0
+
+    r = b - A(x)
+    rnorm = np.sqrt(dot(r, r))/bnorm
+
+    z = M(r)
+    p = z.copy()
+    rz = dot(r, z)
+
+    niter = 0
+    while rnorm > rtol and niter < max_iter:
+
+        Ap = A(p)
+        pAp = dot(p, Ap)
+        if pAp == 0.0:
+            break
+
+        alpha = rz/pAp
+
+        x += alpha*p
+        r -= alpha*Ap
+
+        niter += 1
+
+        rnorm = np.sqrt(dot(r, r))/bnorm
+        if rnorm <= rtol:
+            break
+
+        # we use the Polak-Ribiere form of beta, which is more robust
+        # if the preconditioner is not exactly symmetric (as is the
+        # case for a multigrid cycle)
+        z_old = z
+        z = M(r)
+        rz_new = dot(r, z)
+
+        p *= (rz_new - dot(r, z_old))/rz
+        p += z
+
+        rz = rz_new
+
+    return x, niter, rnorm
+
+
+def bicgstab(A, b, x, *, M=None, dot=None, rtol=1.e-10, max_iter=None):
+    """
+    Solve A x = b using the (right) preconditioned biconjugate gradient
+    stabilized method.  This works for nonsymmetric A.
+
+    Parameters
+    ----------
+    A : callable
+        returns the matrix-vector product A x
+    b : ndarray
+        the righthand side
+    x : ndarray
+        the initial guess (updated in place)
+    M : callable, optional
+        returns the preconditioned vector, M^{-1} v
+    dot : callable, optional
+        the inner product to use
+    rtol : float, optional
+        the tolerance on the residual norm relative to the norm of b
+    max_iter : int, optional
+        maximum number of iterations (default: the size of b)
+
+    Returns
+    -------
+    out : tuple
+        the solution, number of iterations, and relative residual norm
+
+    """
+
+    if dot is None:
+        dot = _vdot
+
+    if M is None:
+        M = np.copy
+
+    if max_iter is None:
+        max_iter = b.size
+
+    bnorm = np.sqrt(dot(b, b))
+    if bnorm == 0.0:
+        bnorm = 1.0
+
+    r = b - A(x)
+    rnorm = np.sqrt(dot(r, r))/bnorm
+
+    r_hat = r.copy()
+
+    rho = alpha = omega = 1.0
+
+    v = np.zeros_like(r)
+    p = np.zeros_like(r)
+
+    niter = 0
+    while rnorm > rtol and niter < max_iter:
+
+        rho_new = dot(r_hat, r)
+        if rho_new == 0.0:
+            break
+
+        beta = (rho_new/rho)*(alpha/omega)
+        rho = rho_new
+
+        p = r + beta*(p - omega*v)
+
+        p_hat = M(p)
+        v = A(p_hat)
+
+        alpha = rho/dot(r_hat, v)
+
+        s = r - alpha*v
+
+        niter += 1
+
+        if np.sqrt(dot(s, s))/bnorm <= rtol:
+            x += alpha*p_hat
+            r = s
+            rnorm = np.sqrt(dot(r, r))/bnorm
+            break
+
+        s_hat = M(s)
+        t = A(s_hat)
+
+        tt = dot(t, t)
+        if tt == 0.0:
+            x += alpha*p_hat
+            r = s
+            rnorm = np.sqrt(dot(r, r))/bnorm
+            break
+
+        omega = dot(t, s)/tt
+
+        x += alpha*p_hat + omega*s_hat
+        r = s - omega*t
+
+        rnorm = np.sqrt(dot(r, r))/bnorm
+
+        if omega == 0.0:
+            break
+
+    return x, niter, rnorm
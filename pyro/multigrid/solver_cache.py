@@ -0,0 +1,115 @@
+"""
+A cache of multigrid solvers that lets a simulation reuse the same
+multigrid hierarchy from one elliptic solve to the next.
+
+Creating a multigrid object allocates a CellCenterData2d object for
+every level, registers the boundary conditions, and (for the variable
+coefficient solver) restricts the coefficients to the edges of every
+level.  For a time-dependent problem, all of this is identical from
+step to step -- only the RHS, the initial guess, and possibly the
+coefficients change.
+
+The general usage is::
+
+   cache = SolverCache()
+
+   mg = cache.get(MG.CellCenterMG2d, nx, ny,
+                  xl_BC_type="periodic", ..., alpha=1.0, beta=beta)
+
+The first call creates the solver.  Subsequent calls with the same
+solver class, grid size, domain extrema, and boundary conditions return
+the same object, reset to the state it was in just after construction,
+with alpha and beta (or, for the variable-coefficient solver, coeffs)
+updated.  The returned solver is used exactly as a newly created one
+would be.
+
+"""
+
+from pyro.multigrid import general_MG, variable_coeff_MG
+
+
+def _refresh_keys(solver_class):
+    """return the constructor arguments that can change from solve to
+    solve without requiring a new hierarchy"""
+
+    if issubclass(solver_class, variable_coeff_MG.VarCoeffCCMG2d):
+        return ("coeffs",)
+    if issubclass(solver_class, general_MG.GeneralMG2d):
+        # the general solver's coefficients are part of its identity
+        return ()
+    return ("alpha", "beta")
+
+
+class SolverCache:
+    """
+    hold the multigrid solvers we've created, keyed on everything that
+    defines the hierarchy
+    """
+
+    def __init__(self):
+
+        self.solvers = {}
+
+        # keep track of how often we were able to reuse a solver
+        self.nhits = 0
+        self.nmisses = 0
+
+    def get(self, solver_class, nx, ny, **kwargs):
+        """
+        Return a multigrid solver of type solver_class, ready for a new
+        solve, creating it only if we have not seen this configuration
+        before.
+
+        Parameters
+        ----------
+        solver_class : class
+            The multigrid class to use (e.g. ``MG.CellCenterMG2d``)
+        nx : int
+            number of cells in x-direction
+        ny : int
+            number of cells in y-direction.
+        kwargs : dict
+            Any other arguments to pass to the solver's constructor.
+            ``alpha`` and ``beta`` (constant-coefficient solver) or
+            ``coeffs`` (variable-coefficient solver) are refreshed on
+            an existing solver, everything else is part of the key
+            that identifies the hierarchy.
+
+        Returns
+        -------
+        out : a multigrid object
+
+        """
+
+        refresh = _refresh_keys(solver_class)
+
+        key = (solver_class, nx, ny,
+               tuple(sorted((k, v) for k, v in kwargs.items()
+                            if k not in refresh)))
+
+        try:
+            mg = self.solvers[key]
+        except KeyError:
+            self.nmisses += 1
+            mg = solver_class(nx, ny, **kwargs)
+            self.solvers[key] = mg
+            return mg
+
+        self.nhits += 1
+
+        if "coeffs" in refresh:
+            mg.reset()
+            mg.set_coeffs(kwargs["coeffs"])
+        elif "alpha" in refresh:
+            mg.reset(alpha=kwargs.get("alpha", 0.0), beta=kwargs.get("beta", -1.0))
+        else:
+            mg.reset()
+
+        return mg
+
+    def clear(self):
+        """ forget all of the solvers we are holding """
+        self.solvers = {}
+
+    def __str__(self):
+        return f"multigrid solver cache: {len(self.solvers)} solvers, {self.nhits} reused, {self.nmisses} created"
@@ -1,10 +1,13 @@
 # unit tests
 
 import numpy as np
+import pytest
 from numpy.testing import assert_array_equal
 
+from pyro.mesh import boundary as bnd
 from pyro.mesh import patch
-from pyro.multigrid import MG, edge_coeffs
+from pyro.multigrid import (MG, edge_coeffs, general_MG, solver_cache,
+                            variable_coeff_MG)
 
 
 # utilities
@@ -55,3 +58,199 @@ def test_mg_gradient():
 
     assert_array_equal(gy[gx.g.ic, :],
                        np.array([0., 36., 60., 36., 12., -12., -36., -60., -36., 0.]))
+
+
+# a solver we get back from the cache should give the same answer as
+# a freshly created one
+def test_solver_cache():
+    cache = solver_cache.SolverCache()
+
+    answers = []
+    for beta in [1.0, 2.0, 2.0]:
+        a = cache.get(MG.CellCenterMG2d, 16, 16,
+                      xl_BC_type="dirichlet", xr_BC_type="dirichlet",
+                      yl_BC_type="dirichlet", yr_BC_type="dirichlet",
+                      alpha=1.0, beta=beta, verbose=0)
+
+        f = a.soln_grid.scratch_array()
+        f.v()[:, :] = np.sin(np.pi*a.x2d[a.ilo:a.ihi+1, a.jlo:a.jhi+1])
+
+        a.init_RHS(f)
+        a.init_zeros()
+        a.solve(rtol=1.e-10)
+
+        answers.append(a.get_solution().copy())
+
+    assert cache.nmisses == 1
+    assert cache.nhits == 2
+
+    b = MG.CellCenterMG2d(16, 16,
+                          xl_BC_type="dirichlet", xr_BC_type="dirichlet",
+                          yl_BC_type="dirichlet", yr_BC_type="dirichlet",
+                          alpha=1.0, beta=2.0, verbose=0)
+
+    f = b.soln_grid.scratch_array()
+    f.v()[:, :] = np.sin(np.pi*b.x2d[b.ilo:b.ihi+1, b.jlo:b.jhi+1])
+
+    b.init_RHS(f)
+    b.init_zeros()
+    b.solve(rtol=1.e-10)
+
+    assert_array_equal(answers[1], b.get_solution())
+    assert_array_equal(answers[2], b.get_solution())
+
+
+def _constant_coeff_solver(backend):
+    return MG.CellCenterMG2d(16, 16, alpha=1.0, beta=0.5,
+                             xl_BC_type="neumann", xr_BC_type="neumann",
+                             backend=backend, verbose=0)
+
+
+def _variable_coeff_solver(backend):
+    g = patch.Grid2d(16, 16, ng=1)
+    bc = bnd.BC(xlb="neumann", xrb="neumann", ylb="neumann", yrb="neumann")
+    d = patch.CellCenterData2d(g)
+    d.register_var("c", bc)
+    d.create()
+
+    c = d.get_var("c")
+    c[:, :] = 1.0 + 0.5*np.sin(2.0*np.pi*g.x2d)*np.cos(np.pi*g.y2d)
+
+    return variable_coeff_MG.VarCoeffCCMG2d(16, 16, coeffs=c, coeffs_bc=bc,
+                                            backend=backend, verbose=0)
+
+
+def _general_solver(backend):
+    g = patch.Grid2d(16, 16, ng=1)
+    bc = bnd.BC(xlb="neumann", xrb="neumann", ylb="neumann", yrb="neumann")
+    d = patch.CellCenterData2d(g)
+    for v in ["alpha", "beta", "gamma_x", "gamma_y"]:
+        d.register_var(v, bc)
+    d.create()
+
+    d.get_var("alpha")[:, :] = 1.0 + g.x2d
+    d.get_var("beta")[:, :] = 2.0 + np.cos(np.pi*g.x2d)*np.sin(np.pi*g.y2d)
+    d.get_var("gamma_x")[:, :] = g.y2d
+    d.get_var("gamma_y")[:, :] = -g.x2d
+
+    return general_MG.GeneralMG2d(16, 16, coeffs=d, backend=backend, verbose=0)
+
+
+# the compiled and NumPy smoothers and residuals should agree exactly
+@pytest.mark.parametrize("make_solver", [_constant_coeff_solver,
+                                         _variable_coeff_solver,
+                                         _general_solver])
+def test_backends(make_solver):
+    solns = []
+    for backend in ["numpy", "numba"]:
+        a = make_solver(backend)
+
+        f = a.soln_grid.scratch_array()
+        f.v()[:, :] = np.sin(2.0*np.pi*a.x2d[a.ilo:a.ihi+1, a.jlo:a.jhi+1]) * \
+            np.cos(np.pi*a.y2d[a.ilo:a.ihi+1, a.jlo:a.jhi+1])
+
+        a.init_RHS(f)
+        a.solve(rtol=1.e-10)
+
+        solns.append(a.get_solution().copy())
+
+    assert_array_equal(solns[0], solns[1])
+
+
+# all of the cycle schedules should converge to the same solution
+def test_cycle_types():
+    solns = []
+    for cycle_type, fmg in [("V", False), ("W", False), ("F", False), ("V", True)]:
+        a = MG.CellCenterMG2d(16, 16, verbose=0)
+
+        f = a.soln_grid.scratch_array()
+        f.v()[:, :] = np.sin(np.pi*a.x2d[a.ilo:a.ihi+1, a.jlo:a.jhi+1]) * \
+            np.sin(np.pi*a.y2d[a.ilo:a.ihi+1, a.jlo:a.jhi+1])
+
+        a.init_RHS(f)
+        a.solve(rtol=1.e-11, cycle_type=cycle_type, fmg=fmg)
+
+        assert a.residual_error < 1.e-11
+        solns.append(a.get_solution().copy())
+
+    for s in solns[1:]:
+        assert np.abs(s - solns[0]).max() < 1.e-10
+
+
+# the matrix bottom solvers on a coarser hierarchy should converge to
+# the same solution as smoothing all the way down to 2x2
+def test_bottom_solvers():
+    for bc in ["dirichlet", "neumann", "periodic"]:
+        solns = []
+        for bottom_solver, bottom_size in [("smooth", 2), ("lu", 8), ("cg", 8), ("bicgstab", 8)]:
+            a = MG.CellCenterMG2d(32, 32, alpha=0.0, beta=-1.0,
+                                  xl_BC_type=bc, xr_BC_type=bc,
+                                  yl_BC_type=bc, yr_BC_type=bc,
+                                  bottom_solver=bottom_solver, bottom_size=bottom_size,
+                                  verbose=0)
+
+            f = a.soln_grid.scratch_array()
+            f.v()[:, :] = np.cos(2.0*np.pi*a.x2d[a.ilo:a.ihi+1, a.jlo:a.jhi+1]) * \
+                np.cos(2.0*np.pi*a.y2d[a.ilo:a.ihi+1, a.jlo:a.jhi+1])
+
+            a.init_RHS(f)
+            a.solve(rtol=1.e-11)
+
+            assert a.residual_error < 1.e-11
+            phi = a.get_solution()
+            solns.append(phi.v() - phi.v().mean())
+
+        for s in solns[1:]:
+            assert np.abs(s - solns[0]).max() < 1.e-9
+
+
+# the multigrid-preconditioned Krylov solvers should agree with the
+# multigrid solution, including for inhomogeneous boundary values, and
+# take fewer cycles for a high-contrast variable-coefficient problem
+def test_krylov_solve():
+    solns = []
+    for method in [None, "cg", "bicgstab"]:
+        a = MG.CellCenterMG2d(32, 32, xl_BC=lambda y: 1.0 + y, verbose=0)
+
+        f = a.soln_grid.scratch_array()
+        f.v()[:, :] = 1.0
+
+        a.init_RHS(f)
+        if method is None:
+            a.solve(rtol=1.e-11)
+        else:
+            a.krylov_solve(rtol=1.e-11, method=method)
+
+        assert a.residual_error < 1.e-11
+        solns.append(a.get_solution().copy())
+
+    for s in solns[1:]:
+        assert np.abs(s - solns[0]).max() < 1.e-10
+
+    g = patch.Grid2d(64, 64, ng=1)
+    bc = bnd.BC(xlb="dirichlet", xrb="dirichlet", ylb="dirichlet", yrb="dirichlet")
+    d = patch.CellCenterData2d(g)
+    d.register_var("c", bc)
+    d.create()
+
+    c = d.get_var("c")
+    c[:, :] = 1.0 + 1.e4*((g.x2d - 0.5)**2 + (g.y2d - 0.5)**2 < 0.04)
+
+    cycles = []
+    for method in [None, "bicgstab"]:
+        a = variable_coeff_MG.VarCoeffCCMG2d(64, 64, coeffs=c, coeffs_bc=bc, verbose=0)
+
+        f = a.soln_grid.scratch_array()
+        f.v()[:, :] = np.sin(2.0*np.pi*a.x2d[a.ilo:a.ihi+1, a.jlo:a.jhi+1]) * \
+            np.sin(2.0*np.pi*a.y2d[a.ilo:a.ihi+1, a.jlo:a.jhi+1])
+
+        a.init_RHS(f)
+        if method is None:
+            a.solve(rtol=1.e-12)
+        else:
+            a.krylov_solve(rtol=1.e-12, method=method)
+
+        cycles.append(a.num_cycles)
+
+    assert a.residual_error < 1.e-12
+    assert cycles[1] < cycles[0]
@@ -16,6 +16,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 
 import pyro.multigrid.edge_coeffs as ec
+import pyro.multigrid.kernels as mg_kernels
 from pyro.multigrid import MG
 
 np.set_printoptions(precision=3, linewidth=128)
@@ -37,6 +38,8 @@ class VarCoeffCCMG2d(MG.CellCenterMG2d):
                  xl_BC_type="dirichlet", xr_BC_type="dirichlet",
                  yl_BC_type="dirichlet", yr_BC_type="dirichlet",
                  nsmooth=10, nsmooth_bottom=50,
+                 bottom_solver="smooth", bottom_size=2,
+                 backend="numba",
                  verbose=0,
                  coeffs=None, coeffs_bc=None,
                  true_function=None, vis=0, vis_title=""):
@@ -52,25 +55,54 @@ class VarCoeffCCMG2d(MG.CellCenterMG2d):
                                    yl_BC_type=yl_BC_type, yr_BC_type=yr_BC_type,
                                    alpha=0.0, beta=0.0,
                                    nsmooth=nsmooth, nsmooth_bottom=nsmooth_bottom,
+                                   bottom_solver=bottom_solver, bottom_size=bottom_size,
+                                   backend=backend,
                                    verbose=verbose,
                                    aux_field=["coeffs"], aux_bc=[coeffs_bc],
                                    true_function=true_function, vis=vis,
                                    vis_title=vis_title)
 
         # set the coefficients and restrict them down the hierarchy
-        # we only need to do this once.  We need to hold the original
-        # coeffs in our grid so we can do a ghost cell fill.
+        self.set_coeffs(coeffs)
+
+    def set_coeffs(self, coeffs):
+        """
+        Set the coefficients on the finest level and restrict them
+        down the MG hierarchy.  This is done once at construction,
+        but can be called again to reuse the same solver (and all of
+        its storage) with new coefficients.
+
+        Parameters
+        ----------
+        coeffs : ndarray
+            An array (of the same size as the finest MG level) with the
+            cell-centered coefficients, eta.
+
+        """
+
+        # we need to hold the original coeffs in our grid so we can
+        # do a ghost cell fill.
         c = self.grids[self.nlevels-1].get_var("coeffs")
 
-        if c.g.nx != nx or c.g.ny != ny:
+        if coeffs.g.nx != self.nx or coeffs.g.ny != self.ny:
             raise IndexError("coefficient array not the same size as multigrid problem")
 
         c.v()[:, :] = coeffs.v().copy()
 
         self.grids[self.nlevels-1].fill_BC("coeffs")
 
-        # put the coefficients on edges
-        self.edge_coeffs.insert(0, ec.EdgeCoeffs(self.grids[self.nlevels-1].grid, c))
+        # the coarse operator for the bottom solve depends on the
+        # coefficients, so it will need to be recomputed
+        self.bottom_op = None
+
+        # put the coefficients on edges -- if we already have the
+        # edge coefficients from a previous call, we refill them in place
+        reuse = len(self.edge_coeffs) == self.nlevels
+
+        if reuse:
+            self.edge_coeffs[self.nlevels-1].fill(c)
+        else:
+            self.edge_coeffs.insert(0, ec.EdgeCoeffs(self.grids[self.nlevels-1].grid, c))
 
         n = self.nlevels-2
         while n >= 0:
@@ -86,7 +118,10 @@ class VarCoeffCCMG2d(MG.CellCenterMG2d):
             self.grids[n].fill_BC("coeffs")
 
             # put the coefficients on edges
-            self.edge_coeffs.insert(0, self.edge_coeffs[0].restrict())  # _EdgeCoeffs(self.grids[n].grid, coeffs_c))
+            if reuse:
+                self.edge_coeffs[n+1].restrict(self.edge_coeffs[n])
+            else:
+                self.edge_coeffs.insert(0, self.edge_coeffs[0].restrict())
 
             # if we are periodic, then we should force the edge coefficients
             # to be periodic
@@ -149,23 +184,29 @@ class VarCoeffCCMG2d(MG.CellCenterMG2d):
             # groups 1 and 3 are done together, then we need to
             # fill ghost cells, and then groups 2 and 4
 
-            for n, (ix, iy) in enumerate([(0, 0), (1, 1), (1, 0), (0, 1)]):
+            if self.backend == "numba":
+                for color in (0, 1):
+                    mg_kernels.smooth_var_coeff(v.g.ng, color, v, f, eta_x, eta_y)
+                    self.grids[level].fill_BC("v")
 
-                denom = (eta_x.ip_jp(1+ix, iy, s=2) + eta_x.ip_jp(ix, iy, s=2) +
-                         eta_y.ip_jp(ix, 1+iy, s=2) + eta_y.ip_jp(ix, iy, s=2))
+            else:
+                for n, (ix, iy) in enumerate([(0, 0), (1, 1), (1, 0), (0, 1)]):
 
-                v.ip_jp(ix, iy, s=2)[:, :] = (-f.ip_jp(ix, iy, s=2) +
-                    # eta_{i+1/2,j} phi_{i+1,j}
-                    eta_x.ip_jp(1+ix, iy, s=2) * v.ip_jp(1+ix, iy, s=2) +
-                    # eta_{i-1/2,j} phi_{i-1,j}
-                    eta_x.ip_jp(ix, iy, s=2) * v.ip_jp(-1+ix, iy, s=2) +
-                    # eta_{i,j+1/2} phi_{i,j+1}
-                    eta_y.ip_jp(ix, 1+iy, s=2) * v.ip_jp(ix, 1+iy, s=2) +
-                    # eta_{i,j-1/2} phi_{i,j-1}
-                    eta_y.ip_jp(ix, iy, s=2) * v.ip_jp(ix, -1+iy, s=2)) / denom
+                    denom = (eta_x.ip_jp(1+ix, iy, s=2) + eta_x.ip_jp(ix, iy, s=2) +
+                             eta_y.ip_jp(ix, 1+iy, s=2) + eta_y.ip_jp(ix, iy, s=2))
 
-                if n in (1, 3):
-                    self.grids[level].fill_BC("v")
+                    v.ip_jp(ix, iy, s=2)[:, :] = (-f.ip_jp(ix, iy, s=2) +
+                        # eta_{i+1/2,j} phi_{i+1,j}
+                        eta_x.ip_jp(1+ix, iy, s=2) * v.ip_jp(1+ix, iy, s=2) +
+                        # eta_{i-1/2,j} phi_{i-1,j}
+                        eta_x.ip_jp(ix, iy, s=2) * v.ip_jp(-1+ix, iy, s=2) +
+                        # eta_{i,j+1/2} phi_{i,j+1}
+                        eta_y.ip_jp(ix, 1+iy, s=2) * v.ip_jp(ix, 1+iy, s=2) +
+                        # eta_{i,j-1/2} phi_{i,j-1}
+                        eta_y.ip_jp(ix, iy, s=2) * v.ip_jp(ix, -1+iy, s=2)) / denom
+
+                    if n in (1, 3):
+                        self.grids[level].fill_BC("v")
 
             if self.vis == 1:
                 plt.clf()
@@ -198,6 +239,10 @@ class VarCoeffCCMG2d(MG.CellCenterMG2d):
         eta_x = self.edge_coeffs[level].x
         eta_y = self.edge_coeffs[level].y
 
+        if self.backend == "numba":
+            mg_kernels.residual_var_coeff(v.g.ng, v, f, r, eta_x, eta_y)
+            return
+
         # compute the residual
         # r = f - L_eta phi
         L_eta_phi = (
@@ -4,6 +4,7 @@ on the velocity on the grid.
 """
 
 import numpy as np
+from numba import njit, prange
 
 from pyro.util import msg
 
@@ -96,14 +97,12 @@ class Particles:
         """
         Initialize the Particles object.
 
-        Particles are stored as a dictionary, with their keys being tuples
-        of their initial position. This was done in order to have a simple way
-        to access the initial particle positions when plotting.
-
-        However, this assumes that no two particles are
-        initialised with the same initial position, which is fine for the
-        massless particle case, however could no longer be a sensible thing
-        to do if have particles have other properties (e.g. mass).
+        The particles are stored as a struct of arrays: the positions
+        x, y, the velocities u, v, the initial positions x_init,
+        y_init (used to 'dye' the particles when plotting) and an
+        integer id are each a contiguous array with one entry per
+        particle.  This way the particles are all updated at once by
+        compiled kernels.
 
         Parameters
         ----------
@@ -123,13 +122,22 @@ class Particles:
 
         self.sim_data = sim_data
         self.bc = bc
-        self.particles = {}
+
+        # the particle data -- this is filled in by the generator
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.u = np.zeros(0)
+        self.v = np.zeros(0)
+        self.x_init = np.zeros(0)
+        self.y_init = np.zeros(0)
+        self.id = np.zeros(0, dtype=np.int64)
+        self.n_particles = 0
 
         if n_particles <= 0:
             msg.fail("ERROR: n_particles = %s <= 0" % (n_particles))
 
         if callable(particle_generator):  # custom particle generator function
-            self.particles = particle_generator(n_particles)
+            self.set_particles(particle_generator(n_particles))
         else:
             if particle_generator == "random":
                 self.randomly_generate_particles(n_particles)
@@ -141,7 +149,56 @@ class Particles:
                 msg.fail("ERROR: do not recognise particle generator %s"
                          % (particle_generator))
 
-        self.n_particles = len(self.particles)
+    def _set_arrays(self, x, y, x_init=None, y_init=None):
+        """
+        Store the particles at positions x, y, with zero velocity.
+        If the initial positions are not given, they are the current
+        positions.
+        """
+
+        self.x = np.array(x, dtype=np.float64)
+        self.y = np.array(y, dtype=np.float64)
+
+        if x_init is None:
+            self.x_init = self.x.copy()
+            self.y_init = self.y.copy()
+        else:
+            self.x_init = np.array(x_init, dtype=np.float64)
+            self.y_init = np.array(y_init, dtype=np.float64)
+
+        self.u = np.zeros_like(self.x)
+        self.v = np.zeros_like(self.x)
+
+        self.id = np.arange(len(self.x))
+        self.n_particles = len(self.x)
+
+    def set_particles(self, particle_dict):
+        """
+        Store the particles from a dictionary of Particle objects
+        keyed by their initial positions, as returned by a custom
+        particle generator function.
+        """
+
+        init_positions = np.array(list(particle_dict.keys()), dtype=np.float64).reshape(-1, 2)
+        ps = list(particle_dict.values())
+
+        self._set_arrays([p.x for p in ps], [p.y for p in ps],
+                         init_positions[:, 0], init_positions[:, 1])
+        self.u[:] = [p.u for p in ps]
+        self.v[:] = [p.v for p in ps]
+
+    @property
+    def particles(self):
+        """
+        The particles as a dictionary of Particle objects, keyed by
+        their initial positions.  This is a copy -- changing the
+        Particle objects does not change the particles stored here.
+        """
+
+        return {(xi, yi): Particle(x, y, u, v)
+                for xi, yi, x, y, u, v in zip(self.x_init.tolist(), self.y_init.tolist(),
+                                              self.x.tolist(), self.y.tolist(),
+                                              self.u.tolist(), self.v.tolist())}
 
     def randomly_generate_particles(self, n_particles):
         """
@@ -157,8 +214,7 @@ class Particles:
         positions[:, 1] = positions[:, 1] * (myg.ymax - myg.ymin) + \
             myg.ymin
 
-        for (x, y) in positions:
-            self.particles[(x, y)] = Particle(x, y)
+        self._set_arrays(positions[:, 0], positions[:, 1])
 
     def grid_generate_particles(self, n_particles):
         """
@@ -182,9 +238,8 @@ class Particles:
         xs += 0.5 * step
         ys, step = np.linspace(myg.ymin, myg.ymax, num=sq_n_particles, endpoint=False, retstep=True)
         ys += 0.5 * step
-        for x in xs:
-            for y in ys:
-                self.particles[(x, y)] = Particle(x, y)
+
+        self._set_arrays(np.repeat(xs, len(ys)), np.tile(ys, len(xs)))
 
     def array_generate_particles(self, pos_array, init_array=None):
         """
@@ -203,12 +258,14 @@ class Particles:
             msg.fail("ERROR: Array of particle positions has not been passed into Particles constructor.\
             Cannot generate particles.")
 
+        pos_array = np.asarray(pos_array, dtype=np.float64).reshape(-1, 2)
+
         if init_array is None:
-            for (x, y) in pos_array:
-                self.particles[(x, y)] = Particle(x, y)
+            self._set_arrays(pos_array[:, 0], pos_array[:, 1])
         else:
-            for (ix, iy), (x, y) in zip(init_array, pos_array):
-                self.particles[(ix, iy)] = Particle(x, y)
+            init_array = np.asarray(init_array, dtype=np.float64).reshape(-1, 2)
+            self._set_arrays(pos_array[:, 0], pos_array[:, 1],
+                             init_array[:, 0], init_array[:, 1])
 
     def update_particles(self, dt, u=None, v=None):
         r"""
@@ -237,109 +294,70 @@ class Particles:
         elif v is None:
             v = self.sim_data.get_var("y-velocity")
 
-        for p in self.particles.values():
+        _advect(self.x, self.y, self.u, self.v,
+                myg.xmin, myg.ymin, myg.dx, myg.dy,
+                np.asarray(u.v(buf=1)), np.asarray(v.v(buf=1)), dt)
 
-            # save old position and predict location at dt/2
-            initial_position = p.pos()
-
-            u_vel, v_vel = p.interpolate_velocity(myg, u, v)
+        self.enforce_particle_boundaries()
 
-            p.update(u_vel, v_vel, 0.5*dt)
+    def enforce_particle_boundaries(self):
+        """
+        Enforce the particle boundaries.  The particles that leave
+        through an outflow boundary are removed.
+        """
 
-            # find velocity at dt/2
-            u_vel, v_vel = p.interpolate_velocity(myg, u, v)
+        myg = self.sim_data.grid
 
-            # update to final time using original position and vel at dt/2
-            p.x, p.y = initial_position
+        keep = np.ones(self.n_particles, dtype=bool)
 
-            p.update(u_vel, v_vel, dt)
+        # the boundaries are done in turn, so a particle that leaves
+        # through a corner is moved back in both directions
+        for pos, bc_name, bc, edge, other_edge, lower in \
+                [(self.x, "xlb", self.bc.xlb, myg.xmin, myg.xmax, True),
+                 (self.x, "xrb", self.bc.xrb, myg.xmax, myg.xmin, False),
+                 (self.y, "ylb", self.bc.ylb, myg.ymin, myg.ymax, True),
+                 (self.y, "yrb", self.bc.yrb, myg.ymax, myg.ymin, False)]:
 
-        self.enforce_particle_boundaries()
+            if lower:
+                outside = keep & (pos < edge)
+            else:
+                outside = keep & (pos > edge)
 
-    def enforce_particle_boundaries(self):
-        """
-        Enforce the particle boundaries
+            if not outside.any():
+                continue
 
-        TODO: copying the dict and adding everything back again is messy
-        - think of a better way to do this? Did it this way so don't have
-        to remove items from a dictionary while iterating it for outflow
-        boundaries.
-        """
-        old_particles = self.particles.copy()
-        self.particles = {}
+            if bc in ["outflow", "neumann"]:
+                keep &= ~outside
+            elif bc == "periodic":
+                pos[outside] = other_edge + pos[outside] - edge
+            elif bc in ["reflect-even", "reflect-odd", "dirichlet"]:
+                pos[outside] = 2 * edge - pos[outside]
+            else:
+                msg.fail("ERROR: %s = %s invalid BC for particles" % (bc_name, bc))
 
-        myg = self.sim_data.grid
+        if not keep.all():
+            for name in ["x", "y", "u", "v", "x_init", "y_init", "id"]:
+                setattr(self, name, getattr(self, name)[keep])
 
-        xlb = self.bc.xlb
-        xrb = self.bc.xrb
-        ylb = self.bc.ylb
-        yrb = self.bc.yrb
-
-        while old_particles:
-            k, p = old_particles.popitem()
-
-            # -x boundary
-            if p.x < myg.xmin:
-                if xlb in ["outflow", "neumann"]:
-                    continue
-                if xlb == "periodic":
-                    p.x = myg.xmax + p.x - myg.xmin
-                elif xlb in ["reflect-even", "reflect-odd", "dirichlet"]:
-                    p.x = 2 * myg.xmin - p.x
-                else:
-                    msg.fail("ERROR: xlb = %s invalid BC for particles" % (xlb))
-
-            # +x boundary
-            if p.x > myg.xmax:
-                if xrb in ["outflow", "neumann"]:
-                    continue
-                if xrb == "periodic":
-                    p.x = myg.xmin + p.x - myg.xmax
-                elif xrb in ["reflect-even", "reflect-odd", "dirichlet"]:
-                    p.x = 2 * myg.xmax - p.x
-                else:
-                    msg.fail("ERROR: xrb = %s invalid BC for particles" % (xrb))
-
-            # -y boundary
-            if p.y < myg.ymin:
-                if ylb in ["outflow", "neumann"]:
-                    continue
-                if ylb == "periodic":
-                    p.y = myg.ymax + p.y - myg.ymin
-                elif ylb in ["reflect-even", "reflect-odd", "dirichlet"]:
-                    p.y = 2 * myg.ymin - p.y
-                else:
-                    msg.fail("ERROR: ylb = %s invalid BC for particles" % (ylb))
-
-            # +y boundary
-            if p.y > myg.ymax:
-                if yrb in ["outflow", "neumann"]:
-                    continue
-                if yrb == "periodic":
-                    p.y = myg.ymin + p.y - myg.ymax
-                elif yrb in ["reflect-even", "reflect-odd", "dirichlet"]:
-                    p.y = 2 * myg.ymax - p.y
-                else:
-                    msg.fail("ERROR: yrb = %s invalid BC for particles" % (yrb))
-
-            self.particles[k] = p
-
-        self.n_particles = len(self.particles)
+        self.n_particles = len(self.x)
 
     def get_positions(self):
         """
         Return an array of current particle positions.
         """
-        return np.array([[p.x, p.y] for p in self.particles.values()])
+        return np.column_stack((self.x, self.y))
+
+    def get_velocities(self):
+        """
+        Return an array of current particle velocities.
+        """
+        return np.column_stack((self.u, self.v))
 
     def get_init_positions(self):
         """
         Return initial positions of the particles as an array.
-
-        We defined the particles as a dictionary with their initial positions
-        as the keys, so this just becomes a restructuring operation.
         """
-        return np.array([[x, y] for (x, y) in self.particles.keys()])
+        return np.column_stack((self.x_init, self.y_init))
 
     def write_particles(self, f):
         """
@@ -356,3 +374,56 @@ class Particles:
             data=self.get_init_positions())
         gparticles.create_dataset("particle_positions",
             data=self.get_positions())
+
+
+@njit(cache=True)
+def _interpolate_velocity(x, y, xmin, ymin, dx, dy, u, v):
+    """
+    Bilinearly interpolate the velocities u, v (with one ghost cell)
+    to the position x, y, as in Particle.interpolate_velocity.
+    """
+
+    # find what cell it lives in
+    x_idx = (x - xmin) / dx - 0.5
+    y_idx = (y - ymin) / dy - 0.5
+
+    x_frac = x_idx % 1
+    y_frac = y_idx % 1
+
+    # the index of the closest bottom left cell, shifted by one for
+    # the ghost cell
+    i = int(x_idx) + 1
+    j = int(y_idx) + 1
+
+    u_vel = (1-x_frac)*(1-y_frac)*u[i, j] + \
+        x_frac*(1-y_frac)*u[i+1, j] + \
+        (1-x_frac)*y_frac*u[i, j+1] + \
+        x_frac*y_frac*u[i+1, j+1]
+
+    v_vel = (1-x_frac)*(1-y_frac)*v[i, j] + \
+        x_frac*(1-y_frac)*v[i+1, j] + \
+        (1-x_frac)*y_frac*v[i, j+1] + \
+        x_frac*y_frac*v[i+1, j+1]
+
+    return u_vel, v_vel
+
+
+@njit(cache=True, parallel=True)
+def _advect(x, y, up, vp, xmin, ymin, dx, dy, u, v, dt):
+    """
+    Advance the particles at x, y through dt with the midpoint method,
+    storing the velocity at the midpoint in up, vp.
+    """
+
+    for n in prange(len(x)):  # pylint: disable=not-an-iterable
+        # predict the location at dt/2
+        u_vel, v_vel = _interpolate_velocity(x[n], y[n], xmin, ymin, dx, dy, u, v)
+        x_half = x[n] + u_vel * (0.5*dt)
+        y_half = y[n] + v_vel * (0.5*dt)
+
+        # update to the final time using the velocity at dt/2
+        u_vel, v_vel = _interpolate_velocity(x_half, y_half, xmin, ymin, dx, dy, u, v)
+        up[n] = u_vel
+        vp[n] = v_vel
+        x[n] += u_vel * dt
+        y[n] += v_vel * dt
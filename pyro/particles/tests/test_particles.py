@@ -287,3 +287,67 @@ def test_outflow_bcs():
     correct_positions = [[0.5, 0.1], [0.9, 0.5]]
 
     np.testing.assert_array_almost_equal(positions, correct_positions)
+
+
+def test_particles_interpolate():
+    """
+    Test the batched update is the same as advecting each Particle with
+    its interpolate_velocity.
+    """
+
+    myd, bc, n_particles = setup_test(n_particles=100)
+    myg = myd.grid
+
+    np.random.seed(3287469)
+    ps = particles.Particles(myd, bc, n_particles, "random")
+
+    u = myg.scratch_array()
+    v = myg.scratch_array()
+    u[:, :] = np.sin(2*np.pi*myg.y2d)
+    v[:, :] = myg.x2d**2
+
+    dt = 0.01
+    correct_positions = []
+    correct_velocities = []
+    for x, y in ps.get_positions():
+        p = particles.Particle(x, y)
+        u_vel, v_vel = p.interpolate_velocity(myg, u, v)
+        p.update(u_vel, v_vel, 0.5*dt)
+        u_vel, v_vel = p.interpolate_velocity(myg, u, v)
+        p.x, p.y = x, y
+        p.update(u_vel, v_vel, dt)
+        correct_positions.append(p.pos())
+        correct_velocities.append(p.velocity())
+
+    ps.update_particles(dt, u, v)
+
+    assert_array_equal(ps.get_positions(), correct_positions)
+    assert_array_equal(ps.get_velocities(), correct_velocities)
+
+
+def test_outflow_ids():
+    """
+    Test the particle data stays together when particles flow out of
+    the domain.
+    """
+
+    extra_rp_params = {"mesh.xlboundary": "outflow",
+                       "mesh.xrboundary": "outflow",
+                       "mesh.ylboundary": "periodic",
+                       "mesh.yrboundary": "periodic"}
+
+    myd, bc, n_particles = setup_test(n_particles=49, extra_rp_params=extra_rp_params)
+
+    ps = particles.Particles(myd, bc, n_particles, "grid")
+
+    u = myd.grid.scratch_array()
+    v = myd.grid.scratch_array()
+    u[:, :] = 1
+
+    ps.update_particles(0.2, u, v)
+
+    # the last column of particles is lost
+    assert ps.n_particles == 42
+    assert_array_equal(ps.id, np.arange(42))
+    assert_array_equal(ps.x, ps.x_init + 0.2)
+    assert_array_equal(ps.y, ps.y_init)
@@ -5,6 +5,7 @@ import argparse
 import importlib
 import os
 
+import h5py
 import matplotlib.pyplot as plt
 
 import pyro.util.io_pyro as io
@@ -104,6 +105,27 @@ class Pyro:
             problem_params = {}
         self.custom_problems[name] = (problem_func, problem_params)
 
+    def _load_problem(self, problem_name):
+        """
+        Find the functions and runtime parameters for the problem,
+        returning its default inputs file (None for a custom problem)
+        """
+
+        if problem_name in self.custom_problems:
+            # this is a problem we added via self.add_problem
+            self.problem_name = problem_name
+            self.problem_func, self.problem_params = self.custom_problems[problem_name]
+            self.problem_finalize = None
+            return None
+
+        problem = importlib.import_module("pyro.{}.problems.{}".format(self.solver_name, problem_name))
+        self.problem_name = problem_name
+        self.problem_func = problem.init_data
+        self.problem_params = problem.PROBLEM_PARAMS
+        self.problem_finalize = problem.finalize
+
+        return problem.DEFAULT_INPUTS
+
     def initialize_problem(self, problem_name, *, inputs_file=None, inputs_dict=None):
         """
         Initialize the specific problem
@@ -119,21 +141,9 @@ class Pyro:
         """
         # pylint: disable=attribute-defined-outside-init
 
-        if problem_name in self.custom_problems:
-            # this is a problem we added via self.add_problem
-            self.problem_name = problem_name
-            self.problem_func, self.problem_params = self.custom_problems[problem_name]
-            self.problem_finalize = None
-
-        else:
-            problem = importlib.import_module("pyro.{}.problems.{}".format(self.solver_name, problem_name))
-            self.problem_name = problem_name
-            self.problem_func = problem.init_data
-            self.problem_params = problem.PROBLEM_PARAMS
-            self.problem_finalize = problem.finalize
-
-            if inputs_file is None:
-                inputs_file = problem.DEFAULT_INPUTS
+        default_inputs = self._load_problem(problem_name)
+        if inputs_file is None:
+            inputs_file = default_inputs
 
         # problem-specific runtime parameters
         for k, v in self.problem_params.items():
@@ -186,6 +196,76 @@ class Pyro:
 
         self.is_initialized = True
 
+    def restart(self, filename, *, inputs_dict=None):
+        """
+        Initialize the simulation from a checkpoint file, so run_sim()
+        continues from where it was written.  The problem and runtime
+        parameters are read from the file.
+
+        Parameters
+        ----------
+        filename : str
+            The checkpoint file
+        inputs_dict : dict
+            Dictionary containing runtime parameters that override
+            the ones in the checkpoint (e.g., driver.tmax)
+        """
+        # pylint: disable=attribute-defined-outside-init
+
+        if not filename.endswith(".h5"):
+            filename += ".h5"
+
+        with h5py.File(filename, "r") as f:
+
+            if "checkpoint" not in f:
+                msg.fail(f"ERROR: {filename} is not a checkpoint file")
+
+            if f.attrs["solver"] != self.solver_name:
+                msg.fail(f"ERROR: {filename} was written by the {f.attrs['solver']} solver")
+
+            self._load_problem(f.attrs["problem"])
+
+            # the runtime parameters are restored exactly
+            self.rp.read_params(f)
+
+            if not self.from_commandline:
+                self.rp.set_param("vis.dovis", 0)
+                self.rp.set_param("driver.verbose", 0)
+                self.rp.set_param("io.do_io", 0)
+
+            if inputs_dict is not None:
+                for k, v in inputs_dict.items():
+                    self.rp.set_param(k, v)
+
+            self.rp.print_paramfile()
+
+            self.verbose = self.rp.get_param("driver.verbose")
+            self.dovis = self.rp.get_param("vis.dovis")
+
+            # set up the simulation as usual, and then overwrite its
+            # state -- there is no preevolve, since that was already
+            # done in the original run
+            self.sim = self.solver.Simulation(
+                self.solver_name, self.problem_name, self.problem_func, self.rp,
+                problem_finalize_func=self.problem_finalize, timers=self.tc)
+
+            self.sim.initialize()
+            self.sim.read_checkpoint(f)
+
+        plt.ion()
+
+        self.is_initialized = True
+
+    def write_checkpoint(self):
+        """
+        Write a checkpoint file for the current step
+        """
+
+        if self.verbose > 0:
+            msg.warning("writing checkpoint...")
+        basename = self.rp.get_param("io.basename")
+        self.sim.write(f"{basename}chk{self.sim.n:04d}", checkpoint=True)
+
     def run_sim(self):
         """
         Evolve entire simulation
@@ -220,6 +300,13 @@ class Pyro:
             basename = self.rp.get_param("io.basename")
             self.sim.write(f"{basename}{self.sim.n:04d}")
 
+        # always end with a checkpoint, so the run can be continued
+        if self.sim.checkpointing() and self.sim.n_last_checkpoint != self.sim.n:
+            self.write_checkpoint()
+
+        # make sure any asynchronous output is on disk
+        self.sim.flush_output()
+
         tm_main.end()
         # -------------------------------------------------------------------------
         # final reports
@@ -241,11 +328,18 @@ class Pyro:
         # fill boundary conditions
         self.sim.cc_data.fill_BC_all()
 
-        # get the timestep
-        self.sim.compute_timestep()
+        # any scratch arrays from the grid's pool used in the step are
+        # released at the end of it, to be reused in the next step.
+        # Quantities derived from the state (like the primitive
+        # variables) are cached for the duration of the step.
+        with self.sim.cc_data.grid.scratch_scope(), \
+             self.sim.cc_data.cache_scope():
 
-        # evolve for a single timestep
-        self.sim.evolve()
+            # get the timestep
+            self.sim.compute_timestep()
+
+            # evolve for a single timestep
+            self.sim.evolve()
 
         if self.verbose > 0:
             print("%5d %10.5f %10.5f" %
@@ -258,6 +352,10 @@ class Pyro:
             basename = self.rp.get_param("io.basename")
             self.sim.write(f"{basename}{self.sim.n:04d}")
 
+        # checkpoint
+        if self.sim.do_checkpoint():
+            self.write_checkpoint()
+
         # visualization
         if self.dovis:
             tm_vis = self.tc.timer("vis")
@@ -342,7 +440,7 @@ class PyroBenchmark(Pyro):
         self.reset_bench_on_fail = reset_bench_on_fail
         self.make_bench = make_bench
 
-    def run_sim(self, rtol=1.e-12):
+    def run_sim(self, rtol=1.e-12, atol=None):
         """
         Evolve entire simulation and compare to benchmark at the end.
         """
@@ -352,7 +450,7 @@ class PyroBenchmark(Pyro):
         result = 0
 
         if self.comp_bench:
-            result = self.compare_to_benchmark(rtol)
+            result = self.compare_to_benchmark(rtol, atol)
 
         if self.make_bench or (result != 0 and self.reset_bench_on_fail):
             self.store_as_benchmark()
@@ -361,7 +459,7 @@ class PyroBenchmark(Pyro):
             return result
         return self.sim
 
-    def compare_to_benchmark(self, rtol):
+    def compare_to_benchmark(self, rtol, atol=None):
         """ Are we comparing to a benchmark? """
 
         basename = self.rp.get_param("io.basename")
@@ -374,7 +472,7 @@ class PyroBenchmark(Pyro):
             msg.warning("ERROR opening compare file")
             return "ERROR opening compare file"
 
-        result = compare.compare(self.sim.cc_data, sim_bench.cc_data, rtol)
+        result = compare.compare(self.sim.cc_data, sim_bench.cc_data, rtol, atol)
 
         if result == 0:
             msg.success(f"results match benchmark to within relative tolerance of {rtol}\n")
@@ -398,6 +496,7 @@ class PyroBenchmark(Pyro):
             basename + "%4.4d" % (self.sim.n)
         msg.warning(f"storing new benchmark: {bench_file}\n")
         self.sim.write(bench_file)
+        self.sim.flush_output()
 
 
 def parse_args():
@@ -412,29 +511,48 @@ def parse_args():
                    help="compare the end result to the stored benchmark",
                    action="store_true")
 
-    p.add_argument("solver", metavar="solver-name", type=str, nargs=1,
-                   help="name of the solver to use", choices=valid_solvers)
-    p.add_argument("problem", metavar="problem-name", type=str, nargs=1,
+    p.add_argument("--restart", metavar="checkpoint-file", type=str,
+                   help="restart from a checkpoint file -- the solver, problem, and "
+                   "runtime parameters are read from it, so only runtime-parameters "
+                   "should be given")
+
+    p.add_argument("solver", metavar="solver-name", type=str, nargs="?",
+                   help="name of the solver to use")
+    p.add_argument("problem", metavar="problem-name", type=str, nargs="?",
                    help="name of the problem to run")
-    p.add_argument("param", metavar="inputs-file", type=str, nargs=1,
+    p.add_argument("param", metavar="inputs-file", type=str, nargs="?",
                    help="name of the inputs file")
 
     p.add_argument("other", metavar="runtime-parameters", type=str, nargs="*",
                    help="additional runtime parameters that override the inputs file "
                    "in the format section.option=value")
 
-    return p.parse_args()
+    args = p.parse_args()
+
+    if args.restart is not None:
+        # the positional arguments are all runtime parameters
+        args.other = [a for a in [args.solver, args.problem, args.param]
+                      if a is not None] + args.other
+        with h5py.File(args.restart, "r") as f:
+            args.solver = f.attrs["solver"]
+    elif args.param is None:
+        p.error("the following arguments are required: solver-name, problem-name, inputs-file")
+
+    if args.solver not in valid_solvers:
+        p.error(f"invalid solver-name: {args.solver} (choose from {', '.join(valid_solvers)})")
+
+    return args
 
 
 def main():
     args = parse_args()
 
     if args.compare_benchmark or args.make_benchmark:
-        pyro = PyroBenchmark(args.solver[0],
+        pyro = PyroBenchmark(args.solver,
                              comp_bench=args.compare_benchmark,
                              make_bench=args.make_benchmark)
     else:
-        pyro = Pyro(args.solver[0], from_commandline=True)
+        pyro = Pyro(args.solver, from_commandline=True)
 
     other = {}
     for param_string in args.other:
@@ -442,9 +560,12 @@ def main():
         other[k] = _get_val(v)
 
     print(other)
-    pyro.initialize_problem(problem_name=args.problem[0],
-                            inputs_file=args.param[0],
-                            inputs_dict=other)
+    if args.restart is not None:
+        pyro.restart(args.restart, inputs_dict=other)
+    else:
+        pyro.initialize_problem(problem_name=args.problem,
+                                inputs_file=args.param,
+                                inputs_dict=other)
     pyro.run_sim()
 
 
@@ -1,9 +1,14 @@
+import time
+
 import h5py
+import numba
+import numpy as np
 
 import pyro.mesh.boundary as bnd
 import pyro.util.profile_pyro as profile
 from pyro.mesh import patch
 from pyro.util import msg
+from pyro.util.async_output import AsyncWriter, memory_file
 
 
 def grid_setup(rp, ng=1):
@@ -47,10 +52,30 @@ def grid_setup(rp, ng=1):
     else:
         raise ValueError("Unsupported grid type!")
 
+    try:
+        precision = rp.get_param("driver.precision")
+    except KeyError:
+        precision = "double"
+
+    if precision == "double":
+        dtype = np.float64
+    elif precision == "single":
+        dtype = np.float32
+    else:
+        raise ValueError("Unsupported precision!")
+
     my_grid = create_grid(nx, ny,
                           xmin=xmin, xmax=xmax,
                           ymin=ymin, ymax=ymax,
-                          ng=ng)
+                          ng=ng, dtype=dtype)
+
+    try:
+        scratch_pool = rp.get_param("driver.scratch_pool")
+    except KeyError:
+        scratch_pool = 0
+
+    if scratch_pool:
+        my_grid.enable_scratch_pool()
 
     return my_grid
 
@@ -129,6 +154,12 @@ class NullSimulation:
         self.dt = -1.e33
         self.dt_old = -1.e33
 
+        # with adaptive timestepping, the timestep proposed by the
+        # error estimate of the last step, and the number of steps that
+        # were rejected for being too inaccurate
+        self.dt_adaptive = None
+        self.n_rejected = 0
+
         self.data_class = data_class
 
         try:
@@ -164,6 +195,39 @@ class NullSimulation:
 
         self.n_num_out = 0
 
+        # if we are doing asynchronous output, the plotfiles are
+        # written to disk in the background
+        try:
+            async_output = self.rp.get_param("io.async_output")
+        except (AttributeError, KeyError):
+            async_output = 0
+
+        if async_output:
+            self.writer = AsyncWriter(max_pending=self.rp.get_param("io.async_max_pending"))
+        else:
+            self.writer = None
+
+        # the number of threads the compiled kernels run on.  This is
+        # numba's global setting, so it applies to everything else
+        # using numba too -- 0 leaves it as it is (all of the cores
+        # numba knows about, unless it was changed)
+        try:
+            nthreads = self.rp.get_param("driver.nthreads")
+        except (AttributeError, KeyError):
+            nthreads = 1
+
+        max_threads = numba.config.NUMBA_NUM_THREADS  # pylint: disable=no-member
+        if nthreads > max_threads:
+            msg.warning(f"driver.nthreads = {nthreads}, but only {max_threads} threads are available")
+            nthreads = max_threads
+
+        if nthreads > 0 and nthreads != numba.get_num_threads():
+            numba.set_num_threads(nthreads)
+
+        # checkpointing -- we keep track of when we last wrote one
+        self.n_last_checkpoint = None
+        self.last_checkpoint_time = time.time()
+
         # plotting
         self.cm = "viridis"
 
@@ -187,6 +251,26 @@ class NullSimulation:
             return True
         return False
 
+    def checkpointing(self):
+        """
+        are we writing checkpoint files?
+        """
+        return (self.rp.get_param("io.n_checkpoint") > 0 or
+                self.rp.get_param("io.dt_checkpoint_wall") > 0.0)
+
+    def do_checkpoint(self):
+        """
+        is it time to write a checkpoint?  This is based on the number
+        of steps or the wall-clock time since the last checkpoint.
+        """
+        n_checkpoint = self.rp.get_param("io.n_checkpoint")
+        dt_checkpoint_wall = self.rp.get_param("io.dt_checkpoint_wall")
+
+        if n_checkpoint > 0 and self.n % n_checkpoint == 0:
+            return True
+
+        return 0.0 < dt_checkpoint_wall <= time.time() - self.last_checkpoint_time
+
     def initialize(self):
         pass
 
@@ -212,6 +296,10 @@ class NullSimulation:
             self.method_compute_timestep()
             if self.n == 0:
                 self.dt = init_tstep_factor*self.dt
+            elif self.dt_adaptive is not None:
+                # the error estimate of the last step can only make the
+                # timestep smaller than the CFL condition allows
+                self.dt = min(self.dt, max_dt_change*self.dt_old, self.dt_adaptive)
             else:
                 self.dt = min(max_dt_change*self.dt_old, self.dt)
             self.dt_old = self.dt
@@ -219,6 +307,51 @@ class NullSimulation:
         if self.cc_data.t + self.dt > self.tmax:
             self.dt = self.tmax - self.cc_data.t
 
+    def accept_timestep(self, rk):
+        """
+        With adaptive timestepping (driver.adaptive_dt), decide whether
+        the step just taken by the RKIntegrator rk is accurate enough
+        to keep.  If it is, the next timestep is proposed from its
+        error estimate.  Otherwise, self.dt is reduced and the step
+        should be redone from the same starting state.  Without
+        adaptive timestepping, every step is accepted.
+        """
+
+        if self.rp.get_param("driver.fix_dt") > 0.0 or \
+           not self.rp.get_param("driver.adaptive_dt"):
+            return True
+
+        if not rk.has_error_estimate():
+            raise ValueError(f"adaptive timestepping needs an embedded RK method, not {rk.method}")
+
+        err = rk.error_norm(self.rp.get_param("driver.adaptive_atol"),
+                            self.rp.get_param("driver.adaptive_rtol"))
+
+        # the standard controller, with a safety factor and limits on
+        # how fast the timestep can shrink
+        safety = 0.9
+        min_dt_change = 0.2
+
+        if err == 0.0:
+            factor = self.rp.get_param("driver.max_dt_change")
+        else:
+            factor = safety*err**(-1.0/(rk.error_order() + 1))
+
+        if err <= 1.0:
+            # the growth of the next timestep is limited relative to
+            # the one that was actually accepted
+            self.dt_old = self.dt
+            self.dt_adaptive = self.dt*factor
+            return True
+
+        self.dt = self.dt*max(factor, min_dt_change)
+        self.n_rejected += 1
+
+        if self.verbose > 0:
+            print(f"      step rejected (error = {err:g}), retrying with dt = {self.dt:g}")
+
+        return False
+
     def preevolve(self):
         """
         Do any necessary evolution before the main evolve loop.  This
@@ -240,30 +373,134 @@ class NullSimulation:
         finalize() method.
         """
 
+        # wait for any asynchronous output and stop the writer thread --
+        # anything written after this is written directly
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
         if self.problem_finalize:
             self.problem_finalize()
 
-    def write(self, filename):
+    def write(self, filename, *, checkpoint=False):
         """
-        Output the state of the simulation to an HDF5 file for plotting
+        Output the state of the simulation to an HDF5 file for plotting.
+        With asynchronous output, the file is first written in memory
+        and then flushed to disk in the background -- call
+        flush_output() to wait for it to finish.
+
+        A checkpoint file is a plotfile that also holds everything
+        needed to restart the simulation with read_checkpoint().
         """
 
         if not filename.endswith(".h5"):
             filename += ".h5"
 
-        with h5py.File(filename, "w") as f:
+        if self.writer is None:
+            with h5py.File(filename, "w") as f:
+                self.write_file(f, checkpoint=checkpoint)
+        else:
+            with memory_file(filename) as f:
+                self.write_file(f, checkpoint=checkpoint)
+                f.flush()
+                image = f.id.get_file_image()
+            self.writer.submit(filename, image)
 
-            # main attributes
-            f.attrs["solver"] = self.solver_name
-            f.attrs["problem"] = self.problem_name
-            f.attrs["time"] = self.cc_data.t
-            f.attrs["nsteps"] = self.n
+        if checkpoint:
+            self.n_last_checkpoint = self.n
+            self.last_checkpoint_time = time.time()
+
+    def write_file(self, f, *, checkpoint=False):
+        """
+        write the state of the simulation to the h5py File object f
+        """
+
+        # main attributes
+        f.attrs["solver"] = self.solver_name
+        f.attrs["problem"] = self.problem_name
+        f.attrs["time"] = self.cc_data.t
+        f.attrs["nsteps"] = self.n
+
+        compression = self.rp.get_param("io.compression")
+        if compression == "none":
+            compression = None
+
+        # checkpoints always keep full precision
+        single_precision = self.rp.get_param("io.single_precision") and not checkpoint
+
+        self.cc_data.write_data(f, packed=self.rp.get_param("io.packed"),
+                                compression=compression,
+                                shuffle=self.rp.get_param("io.shuffle"),
+                                single_precision=single_precision)
+        if self.particles is not None:
+            self.particles.write_particles(f)
+        self.rp.write_params(f)
+        self.write_extras(f)
+
+        if checkpoint:
+            # the rest of the state needed to restart -- including
+            # the ghost cells, so a restart is bitwise identical
+            gchk = f.create_group("checkpoint")
+            gchk.attrs["dt"] = self.dt
+            gchk.attrs["dt_old"] = self.dt_old
+            if self.dt_adaptive is not None:
+                gchk.attrs["dt_adaptive"] = self.dt_adaptive
+            gchk.attrs["n_num_out"] = self.n_num_out
+            gchk.attrs["names"] = self.cc_data.names
+            gchk.create_dataset("data", data=self.cc_data.data)
 
-            self.cc_data.write_data(f)
             if self.particles is not None:
-                self.particles.write_particles(f)
-            self.rp.write_params(f)
-            self.write_extras(f)
+                gchk.create_dataset("particle_velocities",
+                                    data=self.particles.get_velocities())
+                gchk.create_dataset("particle_ids", data=self.particles.id)
+
+    def read_checkpoint(self, f):
+        """
+        Restore the state of the simulation from the h5py File object
+        f of a checkpoint file.  The simulation should already have
+        been set up by initialize() with the same runtime parameters,
+        and preevolve() should not be called.
+        """
+
+        gchk = f["checkpoint"]
+
+        names = [str(n) for n in gchk.attrs["names"]]
+        if names != self.cc_data.names:
+            msg.fail("ERROR: checkpoint variables do not match the simulation")
+
+        self.n = int(f.attrs["nsteps"])
+        self.cc_data.t = float(f.attrs["time"])
+
+        self.dt = float(gchk.attrs["dt"])
+        self.dt_old = float(gchk.attrs["dt_old"])
+        if "dt_adaptive" in gchk.attrs:
+            self.dt_adaptive = float(gchk.attrs["dt_adaptive"])
+        self.n_num_out = int(gchk.attrs["n_num_out"])
+
+        self.cc_data.data[:, :, :] = gchk["data"]
+
+        for k, v in f["aux"].attrs.items():
+            self.cc_data.set_aux(k, v)
+
+        if self.particles is not None:
+            gparticles = f["particles"]
+            self.particles.array_generate_particles(gparticles["particle_positions"][:],
+                                                    gparticles["init_particle_positions"][:])
+            velocities = gchk["particle_velocities"][:]
+            self.particles.u[:] = velocities[:, 0]
+            self.particles.v[:] = velocities[:, 1]
+            self.particles.id[:] = gchk["particle_ids"]
+
+        self.read_extras(f)
+
+        self.n_last_checkpoint = self.n
+
+    def flush_output(self):
+        """
+        wait for any plotfiles still being written in the background
+        """
+        if self.writer is not None:
+            self.writer.flush()
 
     def write_extras(self, f):
         """
@@ -1,8 +1,8 @@
 import numpy as np
-from numba import njit
+from numba import njit, prange
 
 
-@njit(cache=True)
+@njit(cache=True, parallel=True)
 def states(idir, ng, dx, dt,
            ih, iu, iv, ix, nspec,
            g,
@@ -85,17 +85,11 @@ def states(idir, ng, dx, dt,
         State vector predicted to the left and right edges
     """
 
-    qx, qy, nvar = qv.shape
+    qx, qy, _ = qv.shape
 
     q_l = np.zeros_like(qv)
     q_r = np.zeros_like(qv)
 
-    lvec = np.zeros((nvar, nvar))
-    rvec = np.zeros((nvar, nvar))
-    e_val = np.zeros(nvar)
-    betal = np.zeros(nvar)
-    betar = np.zeros(nvar)
-
     nx = qx - 2 * ng
     ny = qy - 2 * ng
     ilo = ng
@@ -103,111 +97,134 @@ def states(idir, ng, dx, dt,
     jlo = ng
     jhi = ng + ny
 
-    ns = nvar - nspec
-
     dtdx = dt / dx
     dtdx3 = 0.33333 * dtdx
 
-    # this is the loop over zones.  For zone i, we see q_l[i+1] and q_r[i]
-    for i in range(ilo - 2, ihi + 2):
-        for j in range(jlo - 2, jhi + 2):
+    # this is the loop over zones.  For zone i, we see q_l[i+1] and q_r[i].
+    # Each row only writes to its own zones, so the rows are done in parallel
+    for i in prange(ilo - 2, ihi + 2):  # pylint: disable=not-an-iterable
+        _states_row(i, idir, jlo, jhi, dtdx, dtdx3,
+                    ih, iu, iv, ix, nspec,
+                    g, qv, dqv, q_l, q_r)
 
-            dq = dqv[i, j, :]
-            q = qv[i, j, :]
+    return q_l, q_r
 
-            cs = np.sqrt(g * q[ih])
 
-            lvec[:, :] = 0.0
-            rvec[:, :] = 0.0
-            e_val[:] = 0.0
+@njit(cache=True)
+def _states_row(i, idir, jlo, jhi, dtdx, dtdx3,
+                ih, iu, iv, ix, nspec,
+                g, qv, dqv, q_l, q_r):
+    """trace the zones in row i of qv to the edges, as described in states"""
 
-            # compute the eigenvalues and eigenvectors
-            if idir == 1:
-                e_val[:ns] = [q[iu] - cs, q[iu], q[iu] + cs]
+    nvar = qv.shape[-1]
+    ns = nvar - nspec
 
-                lvec[0, :ns] = [cs, -q[ih], 0.0]
-                lvec[1, :ns] = [0.0, 0.0, 1.0]
-                lvec[2, :ns] = [cs, q[ih], 0.0]
+    lvec = np.zeros((nvar, nvar))
+    rvec = np.zeros((nvar, nvar))
+    e_val = np.zeros(nvar)
+    betal = np.zeros(nvar)
+    betar = np.zeros(nvar)
 
-                rvec[0, :ns] = [q[ih], -cs, 0.0]
-                rvec[1, :ns] = [0.0, 0.0, 1.0]
-                rvec[2, :ns] = [q[ih], cs, 0.0]
+    # the tracing is always done in double precision, even if the
+    # state is stored in single precision
+    dq = np.zeros(nvar)
 
-                # now the species -- they only have a 1 in their corresponding slot
-                e_val[ns:] = q[iu]
-                for n in range(ix, ix + nspec):
-                    lvec[n, n] = 1.0
-                    rvec[n, n] = 1.0
+    for j in range(jlo - 2, jhi + 2):
 
-                # multiply by scaling factors
-                lvec[0, :] = lvec[0, :] * 0.50 / (cs * q[ih])
-                lvec[2, :] = -lvec[2, :] * 0.50 / (cs * q[ih])
-            else:
-                e_val[:ns] = [q[iv] - cs, q[iv], q[iv] + cs]
+        dq[:] = dqv[i, j, :]
+        q = qv[i, j, :]
 
-                lvec[0, :ns] = [cs, 0.0, -q[ih]]
-                lvec[1, :ns] = [0.0, 1.0, 0.0]
-                lvec[2, :ns] = [cs, 0.0, q[ih]]
+        cs = np.sqrt(g * q[ih])
 
-                rvec[0, :ns] = [q[ih], 0.0, -cs]
-                rvec[1, :ns] = [0.0, 1.0, 0.0]
-                rvec[2, :ns] = [q[ih], 0.0, cs]
+        lvec[:, :] = 0.0
+        rvec[:, :] = 0.0
+        e_val[:] = 0.0
 
-                # now the species -- they only have a 1 in their corresponding slot
-                e_val[ns:] = q[iv]
-                for n in range(ix, ix + nspec):
-                    lvec[n, n] = 1.0
-                    rvec[n, n] = 1.0
+        # compute the eigenvalues and eigenvectors
+        if idir == 1:
+            e_val[:ns] = [q[iu] - cs, q[iu], q[iu] + cs]
 
-                # multiply by scaling factors
-                lvec[0, :] = lvec[0, :] * 0.50 / (cs * q[ih])
-                lvec[2, :] = -lvec[2, :] * 0.50 / (cs * q[ih])
+            lvec[0, :ns] = [cs, -q[ih], 0.0]
+            lvec[1, :ns] = [0.0, 0.0, 1.0]
+            lvec[2, :ns] = [cs, q[ih], 0.0]
 
-            # define the reference states
-            if idir == 1:
-                # this is one the right face of the current zone,
-                # so the fastest moving eigenvalue is e_val[2] = u + c
-                factor = 0.5 * (1.0 - dtdx * max(e_val[2], 0.0))
-                q_l[i + 1, j, :] = q + factor * dq
+            rvec[0, :ns] = [q[ih], -cs, 0.0]
+            rvec[1, :ns] = [0.0, 0.0, 1.0]
+            rvec[2, :ns] = [q[ih], cs, 0.0]
 
-                # left face of the current zone, so the fastest moving
-                # eigenvalue is e_val[3] = u - c
-                factor = 0.5 * (1.0 + dtdx * min(e_val[0], 0.0))
-                q_r[i,  j, :] = q - factor * dq
+            # now the species -- they only have a 1 in their corresponding slot
+            e_val[ns:] = q[iu]
+            for n in range(ix, ix + nspec):
+                lvec[n, n] = 1.0
+                rvec[n, n] = 1.0
 
-            else:
+            # multiply by scaling factors
+            lvec[0, :] = lvec[0, :] * 0.50 / (cs * q[ih])
+            lvec[2, :] = -lvec[2, :] * 0.50 / (cs * q[ih])
+        else:
+            e_val[:ns] = [q[iv] - cs, q[iv], q[iv] + cs]
 
-                factor = 0.5 * (1.0 - dtdx * max(e_val[2], 0.0))
-                q_l[i, j + 1, :] = q + factor * dq
+            lvec[0, :ns] = [cs, 0.0, -q[ih]]
+            lvec[1, :ns] = [0.0, 1.0, 0.0]
+            lvec[2, :ns] = [cs, 0.0, q[ih]]
 
-                factor = 0.5 * (1.0 + dtdx * min(e_val[0], 0.0))
-                q_r[i, j, :] = q - factor * dq
+            rvec[0, :ns] = [q[ih], 0.0, -cs]
+            rvec[1, :ns] = [0.0, 1.0, 0.0]
+            rvec[2, :ns] = [q[ih], 0.0, cs]
 
-            # compute the Vhat functions
-            for m in range(nvar):
-                asum = np.dot(lvec[m, :], dq)
+            # now the species -- they only have a 1 in their corresponding slot
+            e_val[ns:] = q[iv]
+            for n in range(ix, ix + nspec):
+                lvec[n, n] = 1.0
+                rvec[n, n] = 1.0
 
-                betal[m] = dtdx3 * (e_val[2] - e_val[m]) * \
-                                   (np.copysign(1.0, e_val[m]) + 1.0) * asum
-                betar[m] = dtdx3 * (e_val[0] - e_val[m]) * \
-                                   (1.0 - np.copysign(1.0, e_val[m])) * asum
+            # multiply by scaling factors
+            lvec[0, :] = lvec[0, :] * 0.50 / (cs * q[ih])
+            lvec[2, :] = -lvec[2, :] * 0.50 / (cs * q[ih])
 
-            # construct the states
-            for m in range(nvar):
-                sum_l = np.dot(betal, rvec[:, m])
-                sum_r = np.dot(betar, rvec[:, m])
+        # define the reference states
+        if idir == 1:
+            # this is one the right face of the current zone,
+            # so the fastest moving eigenvalue is e_val[2] = u + c
+            factor = 0.5 * (1.0 - dtdx * max(e_val[2], 0.0))
+            q_l[i + 1, j, :] = q + factor * dq
 
-                if idir == 1:
-                    q_l[i + 1, j, m] = q_l[i + 1, j, m] + sum_l
-                    q_r[i,  j, m] = q_r[i,  j, m] + sum_r
-                else:
-                    q_l[i, j + 1, m] = q_l[i, j + 1, m] + sum_l
-                    q_r[i, j,  m] = q_r[i, j,  m] + sum_r
+            # left face of the current zone, so the fastest moving
+            # eigenvalue is e_val[3] = u - c
+            factor = 0.5 * (1.0 + dtdx * min(e_val[0], 0.0))
+            q_r[i,  j, :] = q - factor * dq
 
-    return q_l, q_r
+        else:
 
+            factor = 0.5 * (1.0 - dtdx * max(e_val[2], 0.0))
+            q_l[i, j + 1, :] = q + factor * dq
 
-@njit(cache=True)
+            factor = 0.5 * (1.0 + dtdx * min(e_val[0], 0.0))
+            q_r[i, j, :] = q - factor * dq
+
+        # compute the Vhat functions
+        for m in range(nvar):
+            asum = np.dot(lvec[m, :], dq)
+
+            betal[m] = dtdx3 * (e_val[2] - e_val[m]) * \
+                               (np.copysign(1.0, e_val[m]) + 1.0) * asum
+            betar[m] = dtdx3 * (e_val[0] - e_val[m]) * \
+                               (1.0 - np.copysign(1.0, e_val[m])) * asum
+
+        # construct the states
+        for m in range(nvar):
+            sum_l = np.dot(betal, rvec[:, m])
+            sum_r = np.dot(betar, rvec[:, m])
+
+            if idir == 1:
+                q_l[i + 1, j, m] = q_l[i + 1, j, m] + sum_l
+                q_r[i,  j, m] = q_r[i,  j, m] + sum_r
+            else:
+                q_l[i, j + 1, m] = q_l[i, j + 1, m] + sum_l
+                q_r[i, j,  m] = q_r[i, j,  m] + sum_r
+
+
+@njit(cache=True, parallel=True)
 def riemann_roe(idir, ng,
                 ih, ixmom, iymom, ihX, nspec,
                 lower_solid, upper_solid,  # pylint: disable=unused-argument
@@ -243,6 +260,30 @@ def riemann_roe(idir, ng,
 
     F = np.zeros((qx, qy, nvar))
 
+    nx = qx - 2 * ng
+    ny = qy - 2 * ng
+    ilo = ng
+    ihi = ng + nx
+    jlo = ng
+    jhi = ng + ny
+
+    # each row only writes to its own fluxes, so the rows are done in parallel
+    for i in prange(ilo - 1, ihi + 1):  # pylint: disable=not-an-iterable
+        _riemann_roe_row(i, idir, jlo, jhi,
+                         ih, ixmom, iymom, ihX, nspec,
+                         g, U_l, U_r, F)
+
+    return F
+
+
+@njit(cache=True)
+def _riemann_roe_row(i, idir, jlo, jhi,
+                     ih, ixmom, iymom, ihX, nspec,
+                     g, U_l, U_r, F):
+    """compute the Roe fluxes for the interfaces in row i, as described in riemann_roe"""
+
+    nvar = U_l.shape[-1]
+
     smallc = 1.e-10
     tol = 0.1e-1  # entropy fix parameter
     # Note that I've basically assumed that cfl = 0.1 here to get away with
@@ -253,109 +294,100 @@ def riemann_roe(idir, ng,
     K_roe = np.zeros((nvar, nvar))
     alpha_roe = np.zeros(nvar)
 
-    nx = qx - 2 * ng
-    ny = qy - 2 * ng
-    ilo = ng
-    ihi = ng + nx
-    jlo = ng
-    jhi = ng + ny
     ns = nvar - nspec
 
-    for i in range(ilo - 1, ihi + 1):
-        for j in range(jlo - 1, jhi + 1):
+    for j in range(jlo - 1, jhi + 1):
 
-            # primitive variable states
-            h_l = U_l[i, j, ih]
+        # primitive variable states
+        h_l = U_l[i, j, ih]
 
-            # un = normal velocity; ut = transverse velocity
-            if idir == 1:
-                un_l = U_l[i, j, ixmom] / h_l
-            else:
-                un_l = U_l[i, j, iymom] / h_l
+        # un = normal velocity; ut = transverse velocity
+        if idir == 1:
+            un_l = U_l[i, j, ixmom] / h_l
+        else:
+            un_l = U_l[i, j, iymom] / h_l
 
-            h_r = U_r[i, j, ih]
+        h_r = U_r[i, j, ih]
 
-            if idir == 1:
-                un_r = U_r[i, j, ixmom] / h_r
-            else:
-                un_r = U_r[i, j, iymom] / h_r
+        if idir == 1:
+            un_r = U_r[i, j, ixmom] / h_r
+        else:
+            un_r = U_r[i, j, iymom] / h_r
 
-            # compute the sound speeds
-            c_l = max(smallc, np.sqrt(g * h_l))
-            c_r = max(smallc, np.sqrt(g * h_r))
+        # compute the sound speeds
+        c_l = max(smallc, np.sqrt(g * h_l))
+        c_r = max(smallc, np.sqrt(g * h_r))
 
-            # Calculate the Roe averages
-            U_roe = (U_l[i, j, :] / np.sqrt(h_l) + U_r[i, j, :] / np.sqrt(h_r)) / \
-                (np.sqrt(h_l) + np.sqrt(h_r))
+        # Calculate the Roe averages
+        U_roe = (U_l[i, j, :] / np.sqrt(h_l) + U_r[i, j, :] / np.sqrt(h_r)) / \
+            (np.sqrt(h_l) + np.sqrt(h_r))
 
-            U_roe[ih] = np.sqrt(h_l * h_r)
-            c_roe = np.sqrt(0.5 * (c_l**2 + c_r**2))
+        U_roe[ih] = np.sqrt(h_l * h_r)
+        c_roe = np.sqrt(0.5 * (c_l**2 + c_r**2))
 
-            delta = U_r[i, j, :] / h_r - U_l[i, j, :] / h_l
-            delta[ih] = h_r - h_l
+        delta = U_r[i, j, :] / h_r - U_l[i, j, :] / h_l
+        delta[ih] = h_r - h_l
 
-            # e_values and right evectors
-            if idir == 1:
-                un_roe = U_roe[ixmom]
-            else:
-                un_roe = U_roe[iymom]
+        # e_values and right evectors
+        if idir == 1:
+            un_roe = U_roe[ixmom]
+        else:
+            un_roe = U_roe[iymom]
 
-            K_roe[:, :] = 0.0
+        K_roe[:, :] = 0.0
 
-            lambda_roe[:3] = np.array([un_roe - c_roe, un_roe, un_roe + c_roe])
-            if idir == 1:
-                alpha_roe[:3] = [0.5 * (delta[ih] - U_roe[ih] / c_roe * delta[ixmom]),
-                                 U_roe[ih] * delta[iymom],
-                                 0.5 * (delta[ih] + U_roe[ih] / c_roe * delta[ixmom])]
+        lambda_roe[:3] = np.array([un_roe - c_roe, un_roe, un_roe + c_roe])
+        if idir == 1:
+            alpha_roe[:3] = [0.5 * (delta[ih] - U_roe[ih] / c_roe * delta[ixmom]),
+                             U_roe[ih] * delta[iymom],
+                             0.5 * (delta[ih] + U_roe[ih] / c_roe * delta[ixmom])]
 
-                K_roe[0, :3] = [1.0, un_roe - c_roe, U_roe[iymom]]
-                K_roe[1, :3] = [0.0, 0.0, 1.0]
-                K_roe[2, :3] = [1.0, un_roe + c_roe, U_roe[iymom]]
-            else:
-                alpha_roe[:3] = [0.5 * (delta[ih] - U_roe[ih] / c_roe * delta[iymom]),
-                                 U_roe[ih] * delta[ixmom],
-                                 0.5 * (delta[ih] + U_roe[ih] / c_roe * delta[iymom])]
-
-                K_roe[0, :3] = [1.0, U_roe[ixmom], un_roe - c_roe]
-                K_roe[1, :3] = [0.0, 1.0, 0.0]
-                K_roe[2, :3] = [1.0, U_roe[ixmom], un_roe + c_roe]
+            K_roe[0, :3] = [1.0, un_roe - c_roe, U_roe[iymom]]
+            K_roe[1, :3] = [0.0, 0.0, 1.0]
+            K_roe[2, :3] = [1.0, un_roe + c_roe, U_roe[iymom]]
+        else:
+            alpha_roe[:3] = [0.5 * (delta[ih] - U_roe[ih] / c_roe * delta[iymom]),
+                             U_roe[ih] * delta[ixmom],
+                             0.5 * (delta[ih] + U_roe[ih] / c_roe * delta[iymom])]
 
-            lambda_roe[ns:] = un_roe
-            alpha_roe[ns:] = U_roe[ih] * delta[ns:]
-            for n in range(ns, nvar):
-                K_roe[n, :] = 0.0
-                K_roe[n, n] = 1.0
+            K_roe[0, :3] = [1.0, U_roe[ixmom], un_roe - c_roe]
+            K_roe[1, :3] = [0.0, 1.0, 0.0]
+            K_roe[2, :3] = [1.0, U_roe[ixmom], un_roe + c_roe]
 
-            F[i, j, :] = consFlux(idir, g, ih, ixmom, iymom, ihX, nspec,
-                                  U_l[i, j, :])
-            F_r = consFlux(idir, g, ih, ixmom, iymom, ihX, nspec,
-                           U_r[i, j, :])
+        lambda_roe[ns:] = un_roe
+        alpha_roe[ns:] = U_roe[ih] * delta[ns:]
+        for n in range(ns, nvar):
+            K_roe[n, :] = 0.0
+            K_roe[n, n] = 1.0
 
-            F[i, j, :] = 0.5 * (F[i, j, :] + F_r)
+        F[i, j, :] = consFlux(idir, g, ih, ixmom, iymom, ihX, nspec,
+                              U_l[i, j, :])
+        F_r = consFlux(idir, g, ih, ixmom, iymom, ihX, nspec,
+                       U_r[i, j, :])
 
-            h_star = 1.0 / g * (0.5 * (c_l + c_r) + 0.25 * (un_l - un_r))**2
-            u_star = 0.5 * (un_l + un_r) + c_l - c_r
+        F[i, j, :] = 0.5 * (F[i, j, :] + F_r)
 
-            c_star = np.sqrt(g * h_star)
+        h_star = 1.0 / g * (0.5 * (c_l + c_r) + 0.25 * (un_l - un_r))**2
+        u_star = 0.5 * (un_l + un_r) + c_l - c_r
 
-            # modified e_values for entropy fix
-            if abs(lambda_roe[0]) < tol:
-                lambda_roe[0] = lambda_roe[0] * (u_star - c_star - lambda_roe[0]) / \
-                    (u_star - c_star - (un_l - c_l))
+        c_star = np.sqrt(g * h_star)
 
-            if abs(lambda_roe[2]) < tol:
-                lambda_roe[2] = lambda_roe[2] * (u_star + c_star - lambda_roe[2]) / \
-                    (u_star + c_star - (un_r + c_r))
+        # modified e_values for entropy fix
+        if abs(lambda_roe[0]) < tol:
+            lambda_roe[0] = lambda_roe[0] * (u_star - c_star - lambda_roe[0]) / \
+                (u_star - c_star - (un_l - c_l))
 
-            for n in range(nvar):
-                for m in range(nvar):
-                    F[i, j, n] -= 0.5 * alpha_roe[m] * \
-                        abs(lambda_roe[m]) * K_roe[m, n]
+        if abs(lambda_roe[2]) < tol:
+            lambda_roe[2] = lambda_roe[2] * (u_star + c_star - lambda_roe[2]) / \
+                (u_star + c_star - (un_r + c_r))
 
-    return F
+        for n in range(nvar):
+            for m in range(nvar):
+                F[i, j, n] -= 0.5 * alpha_roe[m] * \
+                    abs(lambda_roe[m]) * K_roe[m, n]
 
 
-@njit(cache=True)
+@njit(cache=True, parallel=True)
 def riemann_hllc(idir, ng,
                  ih, ixmom, iymom, ihX, nspec,
                  lower_solid, upper_solid,  # pylint: disable=unused-argument
@@ -393,7 +425,6 @@ def riemann_hllc(idir, ng,
     F = np.zeros((qx, qy, nvar))
 
     smallc = 1.e-10
-    U_state = np.zeros(nvar)
 
     nx = qx - 2 * ng
     ny = qy - 2 * ng
@@ -402,7 +433,10 @@ def riemann_hllc(idir, ng,
     jlo = ng
     jhi = ng + ny
 
-    for i in range(ilo - 1, ihi + 1):
+    for i in prange(ilo - 1, ihi + 1):  # pylint: disable=not-an-iterable
+        # the rows are done in parallel, so each gets its own scratch space
+        U_state = np.zeros(nvar)
+
         for j in range(jlo - 1, jhi + 1):
 
             # primitive variable states
@@ -527,6 +561,51 @@ def riemann_hllc(idir, ng,
     return F
 
 
+@njit(cache=True, parallel=True)
+def timestep(ih, ixmom, iymom, g, dx, dy, U):
+    r"""
+    Find the advective timestep constraint,
+    :math:`\min(\Delta x/(|u| + c_s), \Delta y/(|v| + c_s))`, over
+    all of the zones (including ghost cells).  The wave speed is found
+    zone-by-zone, so this is a single pass over the conserved state
+    without any temporary arrays.
+
+    Parameters
+    ----------
+    ih, ixmom, iymom : int
+        The indices of the height, x-momentum and y-momentum in the
+        conserved state vector.
+    g : float
+        Gravitational acceleration
+    dx, dy : float
+        Cell spacings
+    U : ndarray
+        Conserved state
+
+    Returns
+    -------
+    out : float
+        The timestep, before the CFL number is applied
+    """
+
+    qx, qy, _ = U.shape
+
+    dt = np.inf
+
+    for i in prange(qx):  # pylint: disable=not-an-iterable
+        for j in range(qy):
+            h = U[i, j, ih]
+            u = U[i, j, ixmom] / h
+            v = U[i, j, iymom] / h
+
+            cs = np.sqrt(g * h)
+
+            dt_zone = min(dx / (abs(u) + cs), dy / (abs(v) + cs))
+            dt = min(dt, dt_zone)
+
+    return dt
+
+
 @njit(cache=True)
 def consFlux(idir, g, ih, ixmom, iymom, ihX, nspec, U_state):
     r"""
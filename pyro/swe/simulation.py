@@ -6,6 +6,7 @@ import pyro.swe.unsplit_fluxes as flx
 from pyro.particles import particles
 from pyro.simulation_null import NullSimulation, bc_setup, grid_setup
 from pyro.swe import derives
+from pyro.swe import interface as ifc
 from pyro.util import plot_tools
 
 
@@ -161,14 +162,14 @@ class Simulation(NullSimulation):
 
         cfl = self.rp.get_param("driver.cfl")
 
-        # get the variables we need
-        u, v, cs = self.cc_data.get_var(["velocity", "soundspeed"])
+        # the timestep is min(dx/(|u| + cs), dy/(|v| + cs)) -- this is
+        # found in one pass over the conserved state
+        dt = ifc.timestep(self.ivars.ih, self.ivars.ixmom, self.ivars.iymom,
+                          self.cc_data.get_aux("g"),
+                          self.cc_data.grid.dx, self.cc_data.grid.dy,
+                          self.cc_data.data)
 
-        # the timestep is min(dx/(|u| + cs), dy/(|v| + cs))
-        xtmp = self.cc_data.grid.dx/(abs(u) + cs)
-        ytmp = self.cc_data.grid.dy/(abs(v) + cs)
-
-        self.dt = cfl*float(min(xtmp.min(), ytmp.min()))
+        self.dt = cfl*float(dt)
 
     def evolve(self):
         """
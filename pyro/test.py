@@ -17,11 +17,14 @@ from pyro.multigrid.examples import (mg_test_general_inhomogeneous,
 
 
 class PyroTest:
-    def __init__(self, solver, problem, inputs, options):
+    def __init__(self, solver, problem, inputs, options, single_precision=True):
         self.solver = solver
         self.problem = problem
         self.inputs = inputs
         self.options = options
+        # can this test be compared to the double precision benchmark
+        # when it is run in single precision?
+        self.single_precision = single_precision
 
     def __str__(self):
         return f"{self.solver}-{self.problem}"
@@ -44,7 +47,7 @@ def avoid_interleaved_output(nproc):
             print(output_buffer.getvalue(), end="", flush=True)
 
 
-def run_test(t, reset_fails, store_all_benchmarks, rtol, nproc):
+def run_test(t, reset_fails, store_all_benchmarks, rtol, atol, nproc):
     orig_cwd = Path.cwd()
     # run each test in its own directory, since some of the output file names
     # overlap between tests, and h5py needs exclusive access when writing
@@ -57,7 +60,7 @@ def run_test(t, reset_fails, store_all_benchmarks, rtol, nproc):
                                    reset_bench_on_fail=reset_fails,
                                    make_bench=store_all_benchmarks)
             p.initialize_problem(t.problem, inputs_file=t.inputs, inputs_dict=t.options)
-            err = p.run_sim(rtol)
+            err = p.run_sim(rtol, atol)
     finally:
         os.chdir(orig_cwd)
     if err == 0:
@@ -82,9 +85,11 @@ def run_test_star(args):
 
 def do_tests(out_file,
              reset_fails=False, store_all_benchmarks=False,
-             single=None, solver=None, rtol=1e-12, nproc=1):
+             single=None, solver=None, rtol=1e-12, atol=None, nproc=1,
+             precision="double"):
 
-    opts = {"driver.verbose": 0, "vis.dovis": 0, "io.do_io": 0, "io.force_final_output": 1}
+    opts = {"driver.verbose": 0, "vis.dovis": 0, "io.do_io": 0, "io.force_final_output": 1,
+            "driver.precision": precision}
 
     results = {}
 
@@ -95,6 +100,7 @@ def do_tests(out_file,
     tests.append(PyroTest("advection_rk", "smooth", "inputs.smooth", opts))
     tests.append(PyroTest("advection_fv4",
                           "smooth", "inputs.smooth", opts))
+    tests.append(PyroTest("advection_weno", "smooth", "inputs.smooth", opts))
     tests.append(PyroTest("burgers", "test", "inputs.test", opts))
     tests.append(PyroTest("compressible", "quad", "inputs.quad", opts))
     tests.append(PyroTest("compressible", "sod", "inputs.sod.x", opts))
@@ -106,11 +112,20 @@ def do_tests(out_file,
                           "inputs.acoustic_pulse", opts))
     tests.append(PyroTest("diffusion", "gaussian",
                           "inputs.gaussian", opts))
-    tests.append(PyroTest("incompressible", "shear", "inputs.shear", opts))
+    # the MAC projection only sets phi-MAC up to a constant, which drifts
+    # with the roundoff
+    tests.append(PyroTest("incompressible", "shear", "inputs.shear", opts,
+                          single_precision=False))
     tests.append(PyroTest("incompressible_viscous", "cavity", "inputs.cavity", opts))
-    tests.append(PyroTest("lm_atm", "bubble", "inputs.bubble", opts))
+    # the bubble is unstable -- a 1.e-7 perturbation in double precision
+    # already changes the final state by about 1%
+    tests.append(PyroTest("lm_atm", "bubble", "inputs.bubble", opts,
+                          single_precision=False))
     tests.append(PyroTest("swe", "dam", "inputs.dam.x", opts))
 
+    if precision == "single":
+        tests = [q for q in tests if q.single_precision]
+
     if single is not None:
         tests_to_run = [q for q in tests if str(q) == single]
     elif solver is not None:
@@ -123,14 +138,14 @@ def do_tests(out_file,
     # don't create more processes than needed
     nproc = min(nproc, len(tests_to_run))
     with Pool(processes=nproc) as pool:
-        tasks = ((t, reset_fails, store_all_benchmarks, rtol, nproc) for t in tests_to_run)
+        tasks = ((t, reset_fails, store_all_benchmarks, rtol, atol, nproc) for t in tests_to_run)
         imap_it = pool.imap_unordered(run_test_star, tasks)
         # collect run results
         for name, err in imap_it:
             results[name] = err
 
-    # standalone tests
-    if single is None and solver is None:
+    # standalone tests -- multigrid is always double precision
+    if single is None and solver is None and precision == "double":
         bench_dir = os.path.dirname(os.path.realpath(__file__)) + "/multigrid/tests/"
         err = mg_test_simple.test_poisson_dirichlet(256, comp_bench=True, bench_dir=bench_dir,
                                                     store_bench=store_all_benchmarks, verbose=0)
@@ -202,8 +217,19 @@ def main():
                    action="store_true")
 
     p.add_argument("--rtol",
-                   help="relative tolerance to use when comparing data to benchmarks",
-                   type=float, default=1.e-12)
+                   help="relative tolerance to use when comparing data to benchmarks " +
+                   "(default: 1.e-12, or 1.e-3 for single precision)",
+                   type=float, default=None)
+
+    p.add_argument("--atol",
+                   help="absolute tolerance to use when comparing data to benchmarks, " +
+                   "as a fraction of the largest magnitude of each variable " +
+                   "(default: NumPy's, or 1.e-3 for single precision)",
+                   type=float, default=None)
+
+    p.add_argument("--precision",
+                   help="precision to run the tests in -- the benchmarks are double precision",
+                   choices=["double", "single"], default="double")
 
     p.add_argument("--nproc", "-n",
                    help="maximum number of parallel processes to run, or 0 to use all cores",
@@ -211,11 +237,26 @@ def main():
 
     args = p.parse_args()
 
+    rtol = args.rtol
+    atol = args.atol
+    if args.precision == "single":
+        if args.reset_failures or args.store_all_benchmarks:
+            p.error("the benchmarks can only be stored in double precision")
+
+        # the single precision runs only agree with the double
+        # precision benchmarks to roundoff in float32
+        if rtol is None:
+            rtol = 1.e-3
+        if atol is None:
+            atol = 1.e-3
+    elif rtol is None:
+        rtol = 1.e-12
+
     failed = do_tests(args.outfile,
                       reset_fails=args.reset_failures,
                       store_all_benchmarks=args.store_all_benchmarks,
-                      single=args.single, solver=args.solver, rtol=args.rtol,
-                      nproc=args.nproc)
+                      single=args.single, solver=args.solver, rtol=rtol, atol=atol,
+                      nproc=args.nproc, precision=args.precision)
 
     sys.exit(failed)
 
@@ -1,4 +1,6 @@
+import numba
 import numpy as np
+import pytest
 from numpy.testing import assert_array_equal
 
 from pyro import Pyro
@@ -59,3 +61,105 @@ class TestSimulation:
         assert_array_equal(dens, np.ones_like(dens))
 
         assert pyro_sim.sim.cc_data.t == 1
+
+    def test_weno_order(self):
+        """
+        Check that a WENO order without coefficients is rejected
+        before the run starts.
+        """
+
+        pyro_sim = Pyro("advection_weno")
+        with pytest.raises(ValueError, match="weno_order"):
+            pyro_sim.initialize_problem("smooth", inputs_dict={"advection.weno_order": 4})
+
+    def test_restart(self, tmp_path, monkeypatch):
+        """
+        Check that restarting from a checkpoint gives the same result
+        as an uninterrupted run.
+        """
+
+        monkeypatch.chdir(tmp_path)
+
+        inputs_dict = {"driver.max_steps": 10,
+                       "mesh.nx": 16,
+                       "mesh.ny": 16,
+                       "particles.do_particles": 1,
+                       "particles.n_particles": 16,
+                       "advection.u": -1.0,
+                       "mesh.xlboundary": "outflow",
+                       "mesh.xrboundary": "outflow",
+                       "io.basename": "smooth_",
+                       "io.n_checkpoint": 4}
+
+        pyro_sim = Pyro("advection")
+        pyro_sim.initialize_problem("smooth", inputs_dict=inputs_dict)
+        pyro_sim.run_sim()
+
+        assert sorted(p.name for p in tmp_path.glob("smooth_chk*.h5")) == \
+            ["smooth_chk0004.h5", "smooth_chk0008.h5", "smooth_chk0010.h5"]
+
+        restart_sim = Pyro("advection")
+        restart_sim.restart("smooth_chk0004.h5", inputs_dict={"io.n_checkpoint": 0})
+
+        assert restart_sim.sim.n == 4
+        assert restart_sim.rp.get_param("mesh.nx") == 16
+
+        restart_sim.run_sim()
+
+        assert restart_sim.sim.n == pyro_sim.sim.n
+        assert restart_sim.sim.cc_data.t == pyro_sim.sim.cc_data.t
+        assert_array_equal(restart_sim.sim.cc_data.data, pyro_sim.sim.cc_data.data)
+        assert_array_equal(restart_sim.sim.particles.get_positions(),
+                           pyro_sim.sim.particles.get_positions())
+
+        # the first particles left through the outflow boundary before
+        # the checkpoint, so the ids that are left don't start at 0
+        assert pyro_sim.sim.particles.id[0] > 0
+        assert_array_equal(restart_sim.sim.particles.id,
+                           pyro_sim.sim.particles.id)
+
+    def test_async_output_finalize(self, tmp_path, monkeypatch):
+        """
+        Check that the plotfiles are all on disk and the writer thread
+        is shut down once the run is finalized.
+        """
+
+        monkeypatch.chdir(tmp_path)
+
+        inputs_dict = {"driver.max_steps": 4,
+                       "io.basename": "smooth_",
+                       "io.do_io": 1,
+                       "io.n_out": 2,
+                       "io.async_output": 1}
+
+        pyro_sim = Pyro("advection")
+        pyro_sim.initialize_problem("smooth", inputs_dict=inputs_dict)
+        writer = pyro_sim.sim.writer
+        pyro_sim.run_sim()
+
+        assert pyro_sim.sim.writer is None
+        assert writer.executor._shutdown  # pylint: disable=protected-access
+        assert sorted(p.name for p in tmp_path.glob("smooth_*.h5")) == \
+            ["smooth_0000.h5", "smooth_0002.h5", "smooth_0004.h5"]
+
+    def test_nthreads(self, monkeypatch):
+        """
+        Check that driver.nthreads sets the number of threads the
+        compiled kernels use, and only changes numba's (global)
+        setting when it needs to.
+        """
+
+        pyro_sim = Pyro("advection")
+        pyro_sim.initialize_problem("test", inputs_dict={"driver.nthreads": 1})
+        assert numba.get_num_threads() == 1
+
+        calls = []
+        monkeypatch.setattr(numba, "set_num_threads", calls.append)
+
+        pyro_sim.initialize_problem("test", inputs_dict={"driver.nthreads": 0})
+        pyro_sim.initialize_problem("test", inputs_dict={"driver.nthreads": 1})
+        assert not calls
+
+        monkeypatch.setattr(numba, "get_num_threads", lambda: 2)
+        pyro_sim.initialize_problem("test", inputs_dict={"driver.nthreads": 1})
+        assert calls == [1]
@@ -1,6 +1,8 @@
+import numpy as np
+
 import pyro.mesh.boundary as bnd
 import pyro.simulation_null as sim
-from pyro.mesh import patch
+from pyro.mesh import integration, patch
 from pyro.util import runparams
 
 
@@ -67,6 +69,55 @@ class TestSimulation:
         self.sim.compute_timestep()
         assert self.sim.dt == 0.25
 
+    def test_accept_timestep(self):
+
+        self.rp.params["driver.adaptive_dt"] = 1
+        self.rp.params["driver.adaptive_atol"] = 1.e-6
+        self.rp.params["driver.adaptive_rtol"] = 0.0
+
+        myd = self.sim.cc_data
+        myd.get_var("a")[:, :] = 1.0
+        myd.t = 0.0
+
+        def step():
+            rk = integration.RKIntegrator(myd.t, self.sim.dt, method="BS32")
+            rk.set_start(myd)
+            for s in range(rk.nstages()):
+                ytmp = rk.get_stage_start(s)
+                k = myd.grid.scratch_array(nvar=1)
+                k.v(n=0)[:, :] = np.cos(10.0*ytmp.t)
+                rk.store_increment(s, k)
+            return self.sim.accept_timestep(rk)
+
+        # a step that is too inaccurate is rejected, and the
+        # timestep is reduced until it is accurate enough
+        self.sim.dt = 0.5
+        assert not step()
+        assert self.sim.dt < 0.5
+        while not step():
+            pass
+        assert self.sim.n_rejected > 0
+
+        # the next timestep can only grow from the accepted one, and
+        # is limited by both the error estimate and the CFL timestep
+        dt_accepted = self.sim.dt
+        assert self.sim.dt_old == dt_accepted
+        self.sim.n = 1
+        self.sim.dt = 0.5
+        self.sim.compute_timestep()
+        assert self.sim.dt == min(0.5, 1.2*dt_accepted, self.sim.dt_adaptive)
+        assert self.sim.dt < 0.5
+
+        self.sim.dt = 0.1*dt_accepted
+        self.sim.dt_old = dt_accepted
+        self.sim.compute_timestep()
+        assert self.sim.dt == 0.1*dt_accepted
+
+        # without adaptive timestepping, every step is accepted
+        self.rp.params["driver.adaptive_dt"] = 0
+        self.sim.dt = 0.5
+        assert step()
+
 
 def test_grid_setup():
 
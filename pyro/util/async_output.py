@@ -0,0 +1,85 @@
+"""
+Write plotfiles to disk in the background.
+
+The simulation writes a plotfile into an in-memory HDF5 file (using
+h5py's "core" driver without a backing store).  This is a snapshot
+of the state, so the simulation is free to keep evolving, and the
+resulting file image is handed to an AsyncWriter, which flushes it to
+disk on a separate thread.
+
+At most max_pending files are held in memory at once -- if the disk
+can't keep up, submit() waits for the oldest write to finish.
+
+"""
+
+import collections
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import h5py
+
+
+def _write_file(filename, image):
+    # write to a temporary file and rename it, so we never leave
+    # behind a partial plotfile under the real name
+    tmp_file = filename + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(image)
+    os.replace(tmp_file, filename)
+
+
+def memory_file(filename):
+    """
+    Return an h5py File that lives only in memory.  Once it is
+    written, its contents can be retrieved with
+    ``f.id.get_file_image()``.
+    """
+    # grow the in-memory file in 1 MB increments -- the default
+    # of 64 kB means a lot of reallocations for a large plotfile
+    return h5py.File(filename, "w", driver="core", backing_store=False,
+                     block_size=1024**2)
+
+
+class AsyncWriter:
+    """
+    Write HDF5 file images to disk on a background thread.
+    """
+
+    def __init__(self, max_pending=2):
+        """
+        Parameters
+        ----------
+        max_pending : int, optional
+            The maximum number of files that can be queued or in
+            the process of being written.
+        """
+
+        self.max_pending = max(1, max_pending)
+        self.pending = collections.deque()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def submit(self, filename, image):
+        """
+        Queue up the file image to be written to filename, waiting
+        for earlier writes to finish if we already have max_pending
+        of them.
+        """
+
+        while len(self.pending) >= self.max_pending:
+            self.pending.popleft().result()
+
+        self.pending.append(self.executor.submit(_write_file, filename, image))
+
+    def flush(self):
+        """
+        Wait for all of the queued files to be written.  Any error
+        that occurred while writing is raised here.
+        """
+
+        while self.pending:
+            self.pending.popleft().result()
+
+    def close(self):
+        """ flush and shut down the writer thread """
+        self.flush()
+        self.executor.shutdown()
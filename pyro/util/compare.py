@@ -19,7 +19,7 @@ errors = {"gridbad": "grids don't agree",
           "varerr": "one or more variables don't agree"}
 
 
-def compare(data1, data2, rtol=1.e-12):
+def compare(data1, data2, rtol=1.e-12, atol=None):
     """
     given two CellCenterData2d objects, compare the data, zone-by-zone
     and output any errors
@@ -30,6 +30,10 @@ def compare(data1, data2, rtol=1.e-12):
         Two data grids to compare
     rtol : float
         relative tolerance to use to compare grids
+    atol : float, optional
+        absolute tolerance to use to compare grids, as a fraction of
+        the largest magnitude of each variable in data2.  If not
+        given, NumPy's default absolute tolerance is used.
 
     """
 
@@ -59,7 +63,12 @@ def compare(data1, data2, rtol=1.e-12):
         else:
             print(f"{name:20s} absolute error = {abs_err:10.10g}")
 
-        if not np.allclose(d1.v(), d2.v(), rtol=rtol):
+        if atol is None:
+            var_atol = 1.e-8
+        else:
+            var_atol = atol * np.max(np.abs(d2.v()))
+
+        if not np.allclose(d1.v(), d2.v(), rtol=rtol, atol=var_atol):
             result = "varerr"
 
     return result
@@ -4,11 +4,19 @@
 import importlib
 
 import h5py
+import numpy as np
 
 import pyro.mesh.boundary as bnd
 from pyro.mesh.patch import Cartesian2d, CellCenterData2d, SphericalPolar
 from pyro.particles import particles
 
+BC_EDGES = ["xlb", "xrb", "ylb", "yrb"]
+
+
+def is_packed(gs):
+    """is the state group gs stored in the packed layout?"""
+    return gs.attrs.get("layout") == "packed"
+
 
 def read_bcs(f):
     """read in the boundary condition record from the HDF5 file"""
@@ -76,20 +84,30 @@ def read(filename):
             for name, is_solid in custom_bcs.items():
                 bnd.define_bc(name, bcmod.user, is_solid=is_solid)
 
-        # read in the variable info -- start by getting the names
+        # read in the variable info -- start by getting the names.
+        # The state is either a group per variable or, for the
+        # packed layout, a single dataset with the names and BCs
+        # stored as attributes
         gs = f["state"]
-        names = []
-        for n in gs:
-            names.append(n)
+        packed = is_packed(gs)
+
+        if packed:
+            names = [str(n) for n in np.asarray(gs.attrs["names"])]
+            edge_bcs = {edge: np.asarray(gs.attrs[edge]) for edge in BC_EDGES}
+            bc_types = [{edge: str(edge_bcs[edge][i]) for edge in BC_EDGES}
+                        for i in range(len(names))]
+        else:
+            names = []
+            for n in gs:
+                names.append(n)
+            bc_types = [{edge: gs[n].attrs[edge] for edge in BC_EDGES}
+                        for n in names]
 
         # create the CellCenterData2d object
         myd = CellCenterData2d(myg)
 
-        for n in names:
-            grp = gs[n]
-            bc = bnd.BC(xlb=grp.attrs["xlb"], xrb=grp.attrs["xrb"],
-                        ylb=grp.attrs["ylb"], yrb=grp.attrs["yrb"])
-            myd.register_var(n, bc)
+        for n, bc_type in zip(names, bc_types):
+            myd.register_var(n, bnd.BC(**bc_type))
 
         myd.create()
 
@@ -98,12 +116,14 @@ def read(filename):
             myd.set_aux(k, f["aux"].attrs[k])
 
         # restore the variable data
-        for n in names:
-            grp = gs[n]
-            data = grp["data"]
+        for i, n in enumerate(names):
+            if packed:
+                data = gs["data"][i, :, :]
+            else:
+                data = gs[n]["data"][:, :]
 
             v = myd.get_var(n)
-            v.v()[:, :] = data[:, :]
+            v.v()[:, :] = data
 
         # restore the particle data
         try:
@@ -131,3 +151,28 @@ def read(filename):
         return sim
 
     return myd
+
+
+def read_var(filename, name):
+    """read in just the valid data for a single variable from an HDF5
+    file, without creating the grid and simulation objects.  For the
+    packed layout, this only reads (and decompresses) that variable's
+    chunk.
+
+    """
+    if not filename.endswith(".h5"):
+        filename += ".h5"
+
+    with h5py.File(filename, "r") as f:
+        gs = f["state"]
+        if is_packed(gs):
+            names = [str(n) for n in gs.attrs["names"]]
+            try:
+                i = names.index(name)
+            except ValueError:
+                raise KeyError(f"variable {name} not in {filename}") from None
+            data = gs["data"][i, :, :]
+        else:
+            data = gs[name]["data"][:, :]
+
+    return data.astype(np.float64, copy=False)
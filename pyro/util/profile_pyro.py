@@ -37,6 +37,10 @@ class TimerCollection:
     For best results, the block of code timed should be large enough
     to offset the overhead of the timer class method calls.
 
+    A timer can also count the arrays allocated in its region, by
+    adding to its n_allocs attribute -- these are shown alongside the
+    time.
+
     tc.report() prints out a summary of the timing.
     """
 
@@ -91,7 +95,11 @@ class TimerCollection:
 
         spacing = '   '
         for t in self.timers:
-            print(t.stack_count*spacing + t.name + ': ', t.elapsed_time)
+            if t.n_allocs > 0:
+                print(t.stack_count*spacing + t.name + ': ', t.elapsed_time,
+                      f'({t.n_allocs} allocations)')
+            else:
+                print(t.stack_count*spacing + t.name + ': ', t.elapsed_time)
 
 
 class Timer:
@@ -118,6 +126,9 @@ class Timer:
         self.start_time = 0
         self.elapsed_time = 0
 
+        # the number of arrays allocated in the timed region
+        self.n_allocs = 0
+
     def begin(self):
         """
         Start timing
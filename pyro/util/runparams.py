@@ -231,6 +231,24 @@ class RuntimeParameters:
         for key in sorted(keys):
             grp.attrs[key] = self.params[key]
 
+    def read_params(self, f):
+        """
+        Read the runtime parameters from an HDF5 file written by
+        write_params.  These replace the current values (and add any
+        parameters that are not yet defined).  Here, f is the h5py
+        file object
+        """
+
+        grp = f["runtime parameters"]
+
+        for key, value in grp.attrs.items():
+            # h5py gives us NumPy scalars -- store the python types,
+            # like load_params does
+            if hasattr(value, "item"):
+                value = value.item()
+            self.params[key] = value
+            self.param_comments.setdefault(key, "")
+
     def __str__(self):
         ostr = ""
         for key in sorted(self.params.keys()):
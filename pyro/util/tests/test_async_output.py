@@ -0,0 +1,45 @@
+import numpy as np
+from numpy.testing import assert_array_equal
+
+import pyro.mesh.boundary as bnd
+from pyro.mesh import patch
+from pyro.util import io_pyro
+from pyro.util.async_output import AsyncWriter, memory_file
+
+
+# a file written in memory and flushed in the background should read
+# back the same as the data at the time we wrote it, even if the data
+# changes while it is being written
+def test_async_writer(tmp_path):
+
+    myg = patch.Grid2d(16, 8, ng=2)
+    myd = patch.CellCenterData2d(myg)
+    myd.register_var("a", bnd.BC())
+    myd.create()
+
+    a = myd.get_var("a")
+
+    writer = AsyncWriter(max_pending=2)
+
+    for n in range(4):
+        a[:, :] = n + myg.x2d
+
+        filename = str(tmp_path / f"out_{n:04d}.h5")
+        with memory_file(filename) as f:
+            myd.write_data(f)
+            f.flush()
+            image = f.id.get_file_image()
+        writer.submit(filename, image)
+
+        assert len(writer.pending) <= 2
+
+    a[:, :] = -1.0
+    writer.close()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == \
+        [f"out_{n:04d}.h5" for n in range(4)]
+
+    for n in range(4):
+        d = io_pyro.read(str(tmp_path / f"out_{n:04d}.h5"))
+        assert_array_equal(d.get_var("a").v(), n + myg.x2d[myg.ilo:myg.ihi+1, myg.jlo:myg.jhi+1])
+        assert np.all(d.get_var("a").v() >= 0.0)
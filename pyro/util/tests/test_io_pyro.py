@@ -0,0 +1,68 @@
+import h5py
+import numpy as np
+from numpy.testing import assert_array_equal
+
+import pyro.mesh.boundary as bnd
+from pyro.mesh import patch
+from pyro.util import io_pyro
+
+
+def make_data():
+    myg = patch.Grid2d(16, 8, ng=2)
+    myd = patch.CellCenterData2d(myg)
+    myd.register_var("b", bnd.BC(xlb="periodic", xrb="periodic"))
+    myd.register_var("a", bnd.BC(ylb="reflect-odd", yrb="outflow"))
+    myd.create()
+    myd.set_aux("gamma", 1.4)
+
+    rng = np.random.default_rng(4)
+    myd.data[:, :, :] = rng.random(myd.data.shape)
+    return myd
+
+
+# the packed layout should read back the same as the per-variable
+# layout, and read_var should give the same data as read
+def test_packed_layout(tmp_path):
+
+    myd = make_data()
+    myg = myd.grid
+
+    for options in [{},
+                    {"packed": True},
+                    {"packed": True, "compression": "gzip", "shuffle": True},
+                    {"packed": True, "compression": "lzf"}]:
+
+        filename = str(tmp_path / "out.h5")
+        with h5py.File(filename, "w") as f:
+            myd.write_data(f, **options)
+
+        d = io_pyro.read(filename)
+
+        # the packed layout keeps the variable order
+        if options:
+            assert d.names == myd.names
+        else:
+            assert sorted(d.names) == sorted(myd.names)
+
+        assert d.get_aux("gamma") == 1.4
+
+        for name in myd.names:
+            assert_array_equal(d.get_var(name).v(), myd.get_var(name).v())
+            assert_array_equal(io_pyro.read_var(filename, name),
+                               myd.get_var(name).v())
+            for edge in io_pyro.BC_EDGES:
+                assert getattr(d.BCs[name], edge) == getattr(myd.BCs[name], edge)
+
+    # single precision
+    filename = str(tmp_path / "out32.h5")
+    with h5py.File(filename, "w") as f:
+        myd.write_data(f, packed=True, single_precision=True)
+        dset = f["state/data"]
+        assert isinstance(dset, h5py.Dataset)
+        # pylint thinks indexing an h5py File always gives a Group
+        assert dset.dtype == np.float32  # pylint: disable=no-member
+        assert dset.chunks == (1, myg.nx, myg.ny)  # pylint: disable=no-member
+
+    a = io_pyro.read_var(filename, "a")
+    assert a.dtype == np.float64
+    assert_array_equal(a, myd.get_var("a").v().astype(np.float32))